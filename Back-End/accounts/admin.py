@@ -4,6 +4,7 @@ from .models import Profile, Address, Order, OrderItem, Driver, OrderAssignment,
 from .forms import DriverAdminForm
 from .invoice_admin_actions import export_invoices_to_excel, export_invoices_to_pdf
 from .admin_actions import export_to_pdf, export_to_excel
+from .state_machine import InvalidTransition, bulk_transition_orders
 from django.utils.html import format_html
 from django.db.models import Q, Sum
 from django.utils import timezone
@@ -33,6 +34,33 @@ class OrderItemInline(admin.TabularInline):
     extra = 0
     readonly_fields = ('product_name', 'store_name', 'price', 'quantity', 'subtotal')
 
+def bulk_status_action(target, label):
+    """Action admin: transition `target` sur la sélection, en un seul UPDATE (accounts.state_machine)"""
+    def action(modeladmin, request, queryset):
+        try:
+            result = bulk_transition_orders(
+                list(queryset.values_list('id', flat=True)), target, actor=request.user
+            )
+        except InvalidTransition as e:
+            modeladmin.message_user(request, str(e), messages.ERROR)
+            return
+        if result['updated']:
+            modeladmin.message_user(
+                request, f"{len(result['updated'])} commande(s) passée(s) à « {target} »", messages.SUCCESS
+            )
+        if result['failed']:
+            modeladmin.message_user(
+                request,
+                f"{len(result['failed'])} commande(s) ignorée(s): "
+                + ", ".join(f"#{failure['id']} ({failure['error']})" for failure in result['failed'][:10]),
+                messages.WARNING
+            )
+
+    action.__name__ = f'mark_{target}'
+    action.short_description = label
+    return action
+
+
 # Order Admin
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('order_number', 'user', 'status', 'payment_method', 'payment_status', 'total', 'created_at')
@@ -41,7 +69,14 @@ class OrderAdmin(admin.ModelAdmin):
     readonly_fields = ('order_number', 'created_at', 'updated_at')
     inlines = [OrderItemInline]
     ordering = ('-created_at',)
-    actions = [export_to_pdf, export_to_excel]
+    actions = [
+        export_to_pdf, export_to_excel,
+        bulk_status_action('shipped', "Marquer comme expédiées"),
+        bulk_status_action('cancelled', "Annuler les commandes"),
+    ]
+
+    def save_model(self, request, obj, form, change):
+        obj.save(actor=request.user)  # auteur de l'événement dans order_events
 
 admin.site.register(Order, OrderAdmin)
 
@@ -135,6 +170,9 @@ class OrderAssignmentAdmin(admin.ModelAdmin):
         return obj.driver.user.get_full_name() or obj.driver.user.username
     driver_name.short_description = 'Livreur'
 
+    def save_model(self, request, obj, form, change):
+        obj.save(actor=request.user)  # auteur de l'événement dans order_events
+
 
 admin.site.register(OrderAssignment, OrderAssignmentAdmin)
 
@@ -0,0 +1,109 @@
+"""
+Rôle et livreur portés par le JWT
+
+Les tokens émis par le login contiennent deux claims:
+- role: 'driver', 'admin' ou 'customer'
+- driver_id: id du profil Driver (None hors livreurs)
+
+RoleJWTAuthentication pose `request.driver` à partir de ces claims, sans requête:
+les vues livreur filtrent directement sur driver_id. Les claims sont recalculés
+à chaque rafraîchissement (RoleTokenRefreshSerializer): un livreur supprimé ou
+un membre du personnel rétrogradé perd son rôle au plus tard à l'expiration de
+son access token (ACCESS_TOKEN_LIFETIME), pas de son refresh token.
+"""
+
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Driver
+
+ROLE_CLAIM = 'role'
+DRIVER_CLAIM = 'driver_id'
+
+ROLE_DRIVER = 'driver'
+ROLE_ADMIN = 'admin'
+ROLE_CUSTOMER = 'customer'
+
+
+def user_role(user):
+    """(rôle, id du livreur ou None) de l'utilisateur"""
+    driver_id = Driver.objects.filter(user=user).values_list('id', flat=True).first()
+    if driver_id is not None:
+        return ROLE_DRIVER, driver_id
+    if user.is_staff or user.groups.filter(name='Admin').exists():
+        return ROLE_ADMIN, None
+    return ROLE_CUSTOMER, None
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Refresh token avec les claims role et driver_id (recopiés dans l'access token)
+
+    Un refresh token présenté par le client (décodé depuis une chaîne) relit
+    l'utilisateur et recalcule ses claims: l'access token émis porte le rôle
+    courant, pas celui du login.
+    """
+
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify=verify)
+        if token is not None:
+            self.refresh_role()
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM], token[DRIVER_CLAIM] = user_role(user)
+        return token
+
+    def refresh_role(self):
+        """Recalculer role et driver_id; TokenError si l'utilisateur n'existe plus ou est inactif"""
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: self.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not user.is_active:
+            raise TokenError("Utilisateur introuvable ou inactif")
+        self[ROLE_CLAIM], self[DRIVER_CLAIM] = user_role(user)
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """POST /api/auth/token/refresh/: access token émis avec les claims recalculés"""
+    token_class = RoleRefreshToken
+
+
+def _driver_reference(user, driver_id):
+    """Driver dont seuls id et user sont chargés; les autres champs sont lus à la demande"""
+    driver = Driver.from_db(Driver.objects.db, ['id', 'user_id'], [driver_id, user.id])
+    Driver.user.field.set_cached_value(driver, user)
+    return driver
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication qui résout aussi `request.driver` depuis les claims du token"""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            return None
+        user, token = result
+        # Tokens émis avant l'ajout des claims: résolu à la demande par request_driver
+        if ROLE_CLAIM in token:
+            driver_id = token.get(DRIVER_CLAIM)
+            request.driver = _driver_reference(user, driver_id) if driver_id else None
+        return result
+
+
+def request_driver(request):
+    """
+    Livreur de la requête (None si l'utilisateur n'est pas livreur)
+
+    Lu dans les claims du token si possible, sinon une requête dont le résultat
+    est gardé sur la requête
+    """
+    if 'driver' not in request.__dict__:
+        driver_id = Driver.objects.filter(user=request.user).values_list('id', flat=True).first()
+        request.driver = _driver_reference(request.user, driver_id) if driver_id else None
+    return request.driver
@@ -0,0 +1,193 @@
+"""
+Snapshot en mémoire du catalogue (projection "listing" de la table products)
+
+Le snapshot est immuable: il est chargé à la demande puis remplacé d'un bloc
+(copy-on-write) quand la version du catalogue change. Les lecteurs ne prennent
+jamais de verrou; un seul thread recharge pendant que les autres continuent
+de servir l'ancien snapshot.
+"""
+
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+
+from .models import AVAILABILITY_IN_STOCK, CatalogueVersion, Product
+
+LISTING_FIELDS = (
+    'id', 'name', 'category', 'subcategory', 'current_price',
+    'store_name', 'images_links', 'product_link',
+)
+
+_EMPTY_POSITIONS = np.empty(0, dtype=np.int32)
+
+
+def get_catalogue_version():
+    """Version globale du catalogue (somme des versions par magasin)"""
+    return CatalogueVersion.objects.aggregate(total=Sum('version'))['total'] or 0
+
+
+def bump_catalogue_version(store_name):
+    """Incrémenter la version du catalogue d'un magasin"""
+    store_name = (store_name or '').lower()
+    with transaction.atomic():
+        updated = CatalogueVersion.objects.filter(store_name=store_name).update(version=F('version') + 1)
+        if not updated:
+            version, created = CatalogueVersion.objects.get_or_create(
+                store_name=store_name, defaults={'version': 1}
+            )
+            if not created:
+                CatalogueVersion.objects.filter(pk=version.pk).update(version=F('version') + 1)
+
+
+class CatalogueSnapshot:
+    """
+    Projection listing de products, triée par id décroissant, avec des index
+    de positions par magasin, par catégorie et "en stock" (tableaux numpy triés)
+    """
+
+    def __init__(self, version, rows, in_stock_positions=()):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.products = tuple(rows)
+        self.names = tuple((row['name'] or '').lower() for row in self.products)
+        self.in_stock = np.array(in_stock_positions, dtype=np.int32)
+
+        by_store = defaultdict(list)
+        by_category = defaultdict(list)
+        for position, row in enumerate(self.products):
+            by_store[(row['store_name'] or '').lower()].append(position)
+            if row['category']:
+                by_category[row['category'].lower()].append(position)
+
+        self.by_store = {key: np.array(value, dtype=np.int32) for key, value in by_store.items()}
+        self.by_category = {key: np.array(value, dtype=np.int32) for key, value in by_category.items()}
+
+    def __len__(self):
+        return len(self.products)
+
+    def filter(self, store=None, category=None, search=None, in_stock=False, limit=20):
+        """
+        Filtrer le snapshot sans passer par SQL
+
+        Args:
+            store: Nom du magasin (insensible à la casse)
+            category: Catégorie (insensible à la casse)
+            search: Sous-chaîne recherchée dans le nom
+            in_stock: Ne garder que les produits en stock
+            limit: Nombre maximum de résultats
+
+        Returns:
+            Liste des produits (dicts partagés, à ne pas modifier)
+        """
+        positions = None
+        if store:
+            positions = self.by_store.get(store.lower(), _EMPTY_POSITIONS)
+        if category:
+            category_positions = self.by_category.get(category.lower(), _EMPTY_POSITIONS)
+            positions = (
+                category_positions if positions is None
+                else np.intersect1d(positions, category_positions, assume_unique=True)
+            )
+        if in_stock:
+            positions = (
+                self.in_stock if positions is None
+                else np.intersect1d(positions, self.in_stock, assume_unique=True)
+            )
+
+        candidates = range(len(self.products)) if positions is None else positions.tolist()
+        search = search.lower() if search else None
+
+        results = []
+        for position in candidates:
+            if search and search not in self.names[position]:
+                continue
+            results.append(self.products[position])
+            if len(results) >= limit:
+                break
+        return results
+
+
+def load_catalogue_snapshot(version=None):
+    """Charger un nouveau snapshot depuis la base"""
+    if version is None:
+        version = get_catalogue_version()
+    rows = Product.objects.order_by('-id').values(*LISTING_FIELDS, 'availability_status')
+    snapshot_rows = []
+    in_stock_positions = []
+    for position, row in enumerate(rows.iterator(chunk_size=2000)):
+        if row.pop('availability_status') == AVAILABILITY_IN_STOCK:
+            in_stock_positions.append(position)
+        if not isinstance(row['images_links'], list):
+            row['images_links'] = []
+        snapshot_rows.append(row)
+    return CatalogueSnapshot(version, snapshot_rows, in_stock_positions)
+
+
+_snapshot = None
+_last_version_check = 0.0
+_reload_lock = threading.Lock()
+
+
+def get_catalogue_snapshot():
+    """
+    Retourner le snapshot courant, rechargé si la version du catalogue a changé
+
+    La version n'est relue qu'une fois par CATALOGUE_SNAPSHOT_CHECK_INTERVAL
+    secondes; au-delà de CATALOGUE_SNAPSHOT_MAX_AGE le snapshot est rechargé
+    même sans changement de version (écritures directes des scrapers).
+    """
+    global _snapshot, _last_version_check
+
+    snapshot = _snapshot
+    check_interval = getattr(settings, 'CATALOGUE_SNAPSHOT_CHECK_INTERVAL', 5)
+    if snapshot is not None and time.monotonic() - _last_version_check < check_interval:
+        return snapshot
+
+    # Seul le premier chargement bloque; ensuite un seul thread rafraîchit
+    if not _reload_lock.acquire(blocking=snapshot is None):
+        return snapshot
+    try:
+        snapshot = _snapshot
+        if snapshot is not None and time.monotonic() - _last_version_check < check_interval:
+            return snapshot
+
+        version = get_catalogue_version()
+        max_age = getattr(settings, 'CATALOGUE_SNAPSHOT_MAX_AGE', 600)
+        if (
+            snapshot is None
+            or snapshot.version != version
+            or time.monotonic() - snapshot.loaded_at > max_age
+        ):
+            snapshot = load_catalogue_snapshot(version)
+            _snapshot = snapshot
+        _last_version_check = time.monotonic()
+        return snapshot
+    finally:
+        _reload_lock.release()
+
+
+def warm_catalogue_snapshot():
+    """
+    Recharger le snapshot tout de suite si la version a changé (sans attendre
+    la prochaine vérification périodique)
+    """
+    global _snapshot, _last_version_check
+    with _reload_lock:
+        version = get_catalogue_version()
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = load_catalogue_snapshot(version)
+        _last_version_check = time.monotonic()
+        return _snapshot
+
+
+def reset_catalogue_snapshot():
+    """Oublier le snapshot courant (tests, rechargement forcé)"""
+    global _snapshot, _last_version_check
+    with _reload_lock:
+        _snapshot = None
+        _last_version_check = 0.0
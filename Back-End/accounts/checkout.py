@@ -0,0 +1,180 @@
+"""
+Pipeline de checkout: validation du panier et création atomique de la commande
+
+Les prix viennent de la table products (une seule requête pour tout le panier),
+jamais du client; la commande et ses articles sont écrits dans une seule
+transaction (un INSERT pour la commande, un bulk INSERT pour les articles).
+
+Chaque ligne du panier désigne une offre magasin par `product_id` (id dans
+products). L'`id` d'affichage du front peut être celui d'un produit canonique
+(unique_products) ou un identifiant composé: il n'est jamais utilisé pour
+retrouver l'offre.
+"""
+
+import random
+from datetime import datetime
+
+from django.db import transaction
+
+from .models import Order, OrderItem, Product
+
+SHIPPING_COST = 10.0  # Frais de livraison fixes
+MAX_CART_LINES = 200
+MAX_LINE_QUANTITY = 100
+# Écart toléré entre le prix affiché au client et le prix en base
+PRICE_TOLERANCE = 0.01
+
+
+class CheckoutError(Exception):
+    """Panier refusé; `details` est renvoyé tel quel au client"""
+
+    def __init__(self, message, details=None, status_code=400):
+        super().__init__(message)
+        self.details = details
+        self.status_code = status_code
+
+
+def _parse_cart(cart_items):
+    """Panier client -> [(product_id, quantity, client_price, store)], lignes d'une même offre fusionnées"""
+    if not isinstance(cart_items, list) or not cart_items:
+        raise CheckoutError("Panier vide")
+    if len(cart_items) > MAX_CART_LINES:
+        raise CheckoutError(f"Panier limité à {MAX_CART_LINES} articles")
+
+    lines = {}
+    for item in cart_items:
+        if not isinstance(item, dict) or item.get('product_id') is None:
+            raise CheckoutError("Article sans offre magasin (product_id manquant)", details={'item': item})
+        try:
+            product_id = int(item['product_id'])
+            quantity = int(item.get('quantity', 1))
+            client_price = item.get('price')
+            client_price = float(client_price) if client_price is not None else None
+        except (KeyError, TypeError, ValueError, AttributeError):
+            raise CheckoutError("Article de panier invalide", details={'item': item})
+        if quantity < 1 or quantity > MAX_LINE_QUANTITY:
+            raise CheckoutError(
+                f"Quantité invalide pour le produit {product_id} (1 à {MAX_LINE_QUANTITY})"
+            )
+
+        store = item.get('store')
+        if product_id in lines:
+            _, previous_quantity, previous_price, previous_store = lines[product_id]
+            lines[product_id] = (product_id, previous_quantity + quantity, previous_price, previous_store)
+        else:
+            lines[product_id] = (product_id, quantity, client_price, store)
+    return list(lines.values())
+
+
+def price_cart(cart_items):
+    """
+    Valider le panier contre la table products (une requête)
+
+    Returns:
+        Liste de dicts {product, quantity, price, subtotal} aux prix en base
+
+    Raises:
+        CheckoutError: produit inconnu ou sans prix (400), offre d'un autre
+            magasin que celui affiché (400), prix changé (409, avec la liste
+            des nouveaux prix pour que le client rafraîchisse le panier)
+    """
+    lines = _parse_cart(cart_items)
+    products = Product.objects.only('id', 'name', 'store_name', 'current_price').in_bulk(
+        [product_id for product_id, _, _, _ in lines]
+    )
+
+    missing = [product_id for product_id, _, _, _ in lines if product_id not in products]
+    unpriced = [
+        product_id for product_id, _, _, _ in lines
+        if product_id in products and products[product_id].current_price is None
+    ]
+    if missing or unpriced:
+        raise CheckoutError(
+            "Certains produits ne sont plus disponibles",
+            details={'missing_products': missing, 'unpriced_products': unpriced}
+        )
+
+    # Le magasin affiché au client doit être celui de l'offre: sinon l'id ne
+    # désigne pas l'offre vue par le client (id canonique, panier périmé...)
+    store_mismatches = [
+        {'id': product_id, 'store': store, 'offer_store': products[product_id].store_name}
+        for product_id, _, _, store in lines
+        if store and (products[product_id].store_name or '').lower() != store.lower()
+    ]
+    if store_mismatches:
+        raise CheckoutError(
+            "Certains articles ne correspondent pas à une offre magasin",
+            details={'store_mismatches': store_mismatches}
+        )
+
+    priced = []
+    price_changes = []
+    for product_id, quantity, client_price, _ in lines:
+        product = products[product_id]
+        price = product.current_price
+        if client_price is not None and abs(client_price - price) > PRICE_TOLERANCE:
+            price_changes.append({'id': product_id, 'price': client_price, 'current_price': price})
+        priced.append({
+            'product': product,
+            'quantity': quantity,
+            'price': price,
+            'subtotal': round(price * quantity, 2),
+        })
+
+    if price_changes:
+        raise CheckoutError(
+            "Le prix de certains produits a changé",
+            details={'price_changes': price_changes},
+            status_code=409
+        )
+    return priced
+
+
+def _order_number():
+    return f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000, 9999)}"
+
+
+def create_order(user, cart_items, shipping_address, shipping_city, shipping_postal_code,
+                 payment_method='online'):
+    """
+    Créer une commande et ses articles dans une seule transaction
+
+    Les totaux sont calculés ici, à partir des prix en base.
+
+    Returns:
+        Order, avec ses articles déjà chargés (pas de requête pour les sérialiser)
+    """
+    if payment_method not in dict(Order.PAYMENT_METHOD_CHOICES):
+        raise CheckoutError("Mode de paiement invalide")
+
+    lines = price_cart(cart_items)
+    subtotal = round(sum(line['subtotal'] for line in lines), 2)
+
+    with transaction.atomic():
+        order = Order(
+            user=user,
+            order_number=_order_number(),
+            payment_method=payment_method,
+            shipping_address=shipping_address,
+            shipping_city=shipping_city,
+            shipping_postal_code=shipping_postal_code,
+            subtotal=subtotal,
+            shipping_cost=SHIPPING_COST,
+            total=round(subtotal + SHIPPING_COST, 2)
+        )
+        order.save(actor=user)
+        items = OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product_id=line['product'].id,
+                product_name=line['product'].name,
+                store_name=line['product'].store_name,
+                price=line['price'],
+                quantity=line['quantity'],
+                subtotal=line['subtotal']
+            )
+            for line in lines
+        ])
+
+    order._prefetched_objects_cache = {'items': items}
+    return order
@@ -0,0 +1,207 @@
+"""
+Middleware Idempotency-Key pour les requêtes mutantes (POST, PUT, PATCH, DELETE)
+
+Un client qui renvoie une requête avec le même en-tête `Idempotency-Key`
+reçoit la réponse de la première exécution au lieu de relancer ses effets de
+bord (commande en double, PDF régénéré, notifications...). Les clés sont
+propres à chaque utilisateur authentifié (session ou JWT) et expirent après
+IDEMPOTENCY_TTL secondes.
+
+- première requête: enregistrement "in_progress" (contrainte unique), exécution,
+  puis stockage du statut et du corps de la réponse
+- doublon terminé: réponse rejouée, avec l'en-tête `Idempotent-Replayed: true`
+- doublon concurrent: attend la fin de la requête en cours (au plus
+  IDEMPOTENCY_WAIT_TIMEOUT secondes, sinon 409 + Retry-After)
+- même clé, requête différente: 422
+
+L'empreinte d'une requête couvre méthode, chemin et corps, fichiers envoyés en
+multipart compris. Le corps est donc lu en mémoire: une requête portant une clé
+et plus lourde que DATA_UPLOAD_MAX_MEMORY_SIZE est refusée (413) plutôt que
+comparée sur sa seule taille.
+
+Les erreurs 5xx, les exceptions et les réponses streamées ne sont pas
+conservées: le client peut réessayer avec la même clé.
+"""
+
+import hashlib
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .models import IdempotencyRecord
+
+MUTATING_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 1024 * 1024
+POLL_INTERVAL = 0.1
+# Probabilité de purger les enregistrements expirés à chaque nouvelle clé
+PURGE_PROBABILITY = 0.01
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _authenticated_user(request):
+    """Utilisateur de la session, sinon du JWT (l'authentification DRF n'a pas encore eu lieu)"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return result[0] if result else None
+
+
+def _too_large_to_hash(request):
+    """Corps au-delà de DATA_UPLOAD_MAX_MEMORY_SIZE (None: pas de limite)"""
+    limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+    try:
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    return limit is not None and length > limit
+
+
+def _request_hash(request):
+    """Empreinte méthode + chemin + corps; request.body reste disponible pour la vue
+    (le multipart est ensuite analysé depuis le corps déjà lu)"""
+    digest = hashlib.sha256(f"{request.method} {request.get_full_path()}".encode())
+    digest.update(request.body)
+    return digest.hexdigest()
+
+
+def _claim(user, key, request_hash):
+    """(record, owner): owner=True si cette requête doit s'exécuter"""
+    now = timezone.now()
+    ttl = timedelta(seconds=_setting('IDEMPOTENCY_TTL', 24 * 3600))
+    try:
+        with transaction.atomic():
+            record = IdempotencyRecord.objects.create(
+                user=user, key=key, request_hash=request_hash, locked_at=now, expires_at=now + ttl
+            )
+        if random.random() < PURGE_PROBABILITY:
+            IdempotencyRecord.objects.filter(expires_at__lte=now).delete()
+        return record, True
+    except IntegrityError:
+        pass
+
+    record = IdempotencyRecord.objects.filter(user=user, key=key).first()
+    if record is None:
+        return None, False
+
+    lock_timeout = timedelta(seconds=_setting('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+    abandoned = record.status == 'in_progress' and record.locked_at <= now - lock_timeout
+    if record.expires_at <= now or abandoned:
+        # Reprise d'une clé expirée ou d'une exécution abandonnée (compare-and-swap sur locked_at)
+        taken = IdempotencyRecord.objects.filter(pk=record.pk, locked_at=record.locked_at).update(
+            status='in_progress', request_hash=request_hash, locked_at=now, expires_at=now + ttl,
+            response_status=None, response_content_type='', response_body=None,
+        )
+        record.refresh_from_db()
+        return record, bool(taken)
+    return record, False
+
+
+def _wait_for(record):
+    """Attendre la fin de la requête en cours; None si elle a disparu ou n'a pas fini à temps"""
+    deadline = time.monotonic() + _setting('IDEMPOTENCY_WAIT_TIMEOUT', 10)
+    while record.status == 'in_progress':
+        if time.monotonic() >= deadline:
+            return record
+        time.sleep(POLL_INTERVAL)
+        record = IdempotencyRecord.objects.filter(pk=record.pk).first()
+        if record is None:
+            return None
+    return record
+
+
+def _replay(record):
+    response = HttpResponse(
+        bytes(record.response_body or b''),
+        status=record.response_status,
+        content_type=record.response_content_type or None,
+    )
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def _store(record, response):
+    content = None if response.streaming else response.content
+    if response.status_code >= 500 or content is None or len(content) > MAX_STORED_BODY:
+        record.delete()
+        return
+    record.status = 'completed'
+    record.response_status = response.status_code
+    record.response_content_type = response.get('Content-Type', '')
+    record.response_body = content
+    record.save(update_fields=['status', 'response_status', 'response_content_type', 'response_body'])
+
+
+class IdempotencyMiddleware:
+    """Rejouer la première réponse des requêtes mutantes portant un Idempotency-Key"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = request.META.get(HEADER)
+        if not key or request.method not in MUTATING_METHODS:
+            return self.get_response(request)
+        if len(key) > MAX_KEY_LENGTH:
+            return JsonResponse(
+                {'error': f"Idempotency-Key trop longue ({MAX_KEY_LENGTH} caractères max)"}, status=400
+            )
+
+        user = _authenticated_user(request)
+        if user is None:
+            # Clés par utilisateur: les requêtes anonymes ne sont pas dédupliquées
+            return self.get_response(request)
+
+        if _too_large_to_hash(request):
+            return JsonResponse(
+                {'error': "Idempotency-Key non prise en charge pour une requête de plus de "
+                          f"{settings.DATA_UPLOAD_MAX_MEMORY_SIZE} octets"},
+                status=413
+            )
+        request_hash = _request_hash(request)
+        # Deux tentatives: si l'exécution attendue échoue, ce doublon prend le relais
+        for _ in range(2):
+            record, owner = _claim(user, key, request_hash)
+            if owner:
+                return self._execute(request, record)
+            if record is None:
+                continue
+            if record.request_hash != request_hash:
+                return JsonResponse(
+                    {'error': "Idempotency-Key déjà utilisée pour une autre requête"}, status=422
+                )
+            record = _wait_for(record)
+            if record is None:
+                continue
+            if record.status == 'completed':
+                return _replay(record)
+            break
+
+        response = JsonResponse({'error': "Requête identique en cours de traitement"}, status=409)
+        response['Retry-After'] = '1'
+        return response
+
+    def _execute(self, request, record):
+        try:
+            response = self.get_response(request)
+        except Exception:
+            record.delete()
+            raise
+        _store(record, response)
+        return response
@@ -0,0 +1,49 @@
+"""
+Commande: python manage.py manage_partitions
+Créer à l'avance les partitions mensuelles des tables d'historique, puis
+archiver (détacher + déplacer dans un schéma d'archive) les plus anciennes
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.partitioning import PARTITIONED_TABLES, archive_partitions, ensure_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Maintient les partitions mensuelles (PostgreSQL) et archive les anciennes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=settings.PARTITION_PREMAKE_MONTHS,
+            help="Nombre de mois futurs à créer à l'avance",
+        )
+        parser.add_argument(
+            '--archive-after',
+            type=int,
+            default=settings.PARTITION_ARCHIVE_AFTER_MONTHS,
+            help="Âge (en mois) au-delà duquel une partition est archivée (0 pour ne rien archiver)",
+        )
+        parser.add_argument('--schema', default=settings.PARTITION_ARCHIVE_SCHEMA, help="Schéma d'archive")
+
+    def handle(self, *args, **options):
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(connection, table):
+                self.stdout.write(f"{table}: table non partitionnée, ignorée")
+                continue
+
+            created, skipped = ensure_partitions(connection, table, options['months_ahead'])
+            for name, error in skipped:
+                self.stderr.write(self.style.WARNING(f"{name}: partition non créée ({error})"))
+
+            archived = []
+            if options['archive_after'] > 0:
+                archived = archive_partitions(connection, table, options['archive_after'], options['schema'])
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: {len(created)} partitions créées, {len(archived)} archivées"
+                + (f" dans {options['schema']}" if archived else "")
+            ))
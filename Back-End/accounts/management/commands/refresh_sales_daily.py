@@ -0,0 +1,27 @@
+"""
+Commande: python manage.py refresh_sales_daily
+Mettre à jour l'agrégat sales_daily avec les commandes créées ou modifiées
+depuis le dernier passage (--full pour tout reconstruire)
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.sales_rollup import refresh_sales_daily
+
+
+class Command(BaseCommand):
+    help = "Rafraîchit la table sales_daily (ventes par jour, magasin et produit)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help="Reconstruire toute la table (nécessaire après suppression de commandes)",
+        )
+
+    def handle(self, *args, **options):
+        result = refresh_sales_daily(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"sales_daily: {result['dates']} jours recalculés, {result['rows']} lignes "
+            f"(watermark {result['watermark']})"
+        ))
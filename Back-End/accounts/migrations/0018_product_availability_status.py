@@ -0,0 +1,82 @@
+from django.db import migrations, models
+
+
+# Normalisation côté base: les scrapers Airflow écrivent directement dans products,
+# le trigger maintient availability_status à chaque INSERT / UPDATE OF availability.
+# Les motifs doivent rester alignés sur accounts.models._AVAILABILITY_PATTERNS.
+CREATE_TRIGGER_SQL = r"""
+CREATE OR REPLACE FUNCTION products_normalize_availability() RETURNS trigger AS $$
+DECLARE
+    raw text;
+BEGIN
+    raw := translate(lower(coalesce(NEW.availability, '')), 'éèêëàâäîïôöûüùç', 'eeeeaaaiioouuuc');
+    NEW.availability_status := CASE
+        WHEN raw ~ '(hors stock|rupture|epuise|out of stock|indisponible|non disponible|not available|sold out)' THEN 2
+        WHEN raw ~ '(sur commande|arrivage|pre-?commande|backorder|on order)' THEN 3
+        WHEN raw ~ '(en stock|in stock|disponible|available)' THEN 1
+        ELSE 0
+    END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS products_normalize_availability ON products;
+CREATE TRIGGER products_normalize_availability
+    BEFORE INSERT OR UPDATE OF availability ON products
+    FOR EACH ROW EXECUTE FUNCTION products_normalize_availability();
+
+-- Backfill: réécrire availability déclenche le trigger sur chaque ligne
+UPDATE products SET availability = availability;
+"""
+
+DROP_TRIGGER_SQL = """
+DROP TRIGGER IF EXISTS products_normalize_availability ON products;
+DROP FUNCTION IF EXISTS products_normalize_availability();
+"""
+
+
+def install_normalization(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGGER_SQL)
+        return
+
+    from accounts.models import normalize_availability
+
+    Product = apps.get_model('accounts', 'Product')
+    for product in Product.objects.exclude(availability__isnull=True).only('id', 'availability').iterator():
+        Product.objects.filter(pk=product.pk).update(
+            availability_status=normalize_availability(product.availability)
+        )
+
+
+def remove_normalization(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGGER_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_catalogueversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='availability_status',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Inconnue'), (1, 'En stock'), (2, 'Hors stock'), (3, 'Sur commande')], db_default=0, default=0),
+        ),
+        migrations.RunPython(install_normalization, remove_normalization),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('availability_status', 1)), fields=['-id'], name='products_instock_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('availability_status', 1)), fields=['store_name', '-id'], name='products_instock_store_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('availability_status', 1)), fields=['category', '-id'], name='products_instock_cat_idx'),
+        ),
+    ]
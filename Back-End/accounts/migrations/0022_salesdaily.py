@@ -0,0 +1,45 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0021_orderevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('store_name', models.CharField(max_length=50)),
+                ('product_id', models.IntegerField()),
+                ('product_name', models.CharField(max_length=255)),
+                ('quantity', models.IntegerField(default=0)),
+                ('revenue', models.FloatField(default=0)),
+                ('orders_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'sales_daily',
+                'indexes': [models.Index(fields=['store_name', 'date'], name='sales_daily_store_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'store_name', 'product_id'), name='sales_daily_key_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('position', models.DateTimeField(blank=True, null=True)),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'rollup_watermarks',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['updated_at'], name='orders_updated_idx'),
+        ),
+    ]
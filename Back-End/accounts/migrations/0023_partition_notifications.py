@@ -0,0 +1,135 @@
+from datetime import date
+
+from django.db import migrations
+
+
+# Partitionnement mensuel de accounts_notification sur created_at (PostgreSQL
+# uniquement, voir accounts.partitioning). La table est reconstruite: nouvelle
+# table partitionnée, copie des lignes, puis recréation des index et clés
+# étrangères d'origine (mêmes noms) pour que l'état des migrations reste valable.
+TABLE = 'accounts_notification'
+LEGACY = 'accounts_notification_legacy'
+SEQUENCE = 'accounts_notification_id_seq'
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _relkind(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _detach_definitions(cursor, table, new_name):
+    """
+    Renommer `table` en `new_name` et lui retirer index, clés étrangères,
+    clé primaire et séquence d'id
+
+    Returns:
+        (définitions d'index, (nom, définition) des clés étrangères) à rejouer sur la nouvelle table
+    """
+    cursor.execute(
+        "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+        [table]
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s",
+        [table]
+    )
+    constraint_names = {name for name, _, _ in constraints}
+    indexes = [(name, sql) for name, sql in cursor.fetchall() if name not in constraint_names]
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+    sequence = cursor.fetchone()[0]
+
+    cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{new_name}"')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX "{name}"')
+    for name, _, _ in constraints:
+        cursor.execute(f'ALTER TABLE "{new_name}" DROP CONSTRAINT "{name}"')
+    # Les colonnes identity ne sont pas supportées sur une table partitionnée
+    # avant PostgreSQL 17: l'id passe par une séquence classique
+    cursor.execute(f'ALTER TABLE "{new_name}" ALTER COLUMN id DROP IDENTITY IF EXISTS')
+    cursor.execute(f'ALTER TABLE "{new_name}" ALTER COLUMN id DROP DEFAULT')
+    if sequence:
+        cursor.execute(f'DROP SEQUENCE IF EXISTS {sequence}')
+
+    foreign_keys = [(name, sql) for name, kind, sql in constraints if kind == 'f']
+    return [sql.replace(' ON ONLY ', ' ON ') for _, sql in indexes], foreign_keys
+
+
+def _attach_definitions(cursor, source, indexes, foreign_keys):
+    """Copier les lignes de `source`, rejouer index et clés étrangères, recaler la séquence"""
+    cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{source}"')
+    for sql in indexes:
+        cursor.execute(sql)
+    for name, sql in foreign_keys:
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {sql}')
+    cursor.execute(
+        f"SELECT setval('{SEQUENCE}', COALESCE((SELECT MAX(id) FROM \"{TABLE}\"), 0) + 1, false)"
+    )
+    cursor.execute(f'DROP TABLE "{source}" CASCADE')
+
+
+def partition_notifications(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if _relkind(cursor, TABLE) != 'r':
+            return
+        indexes, foreign_keys = _detach_definitions(cursor, TABLE, LEGACY)
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f"ALTER TABLE \"{TABLE}\" ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id, created_at)')
+
+        # Une partition par mois depuis la plus ancienne notification, plus une
+        # partition par défaut pour les lignes hors plage
+        cursor.execute(f'SELECT MIN(created_at) FROM "{LEGACY}"')
+        oldest = cursor.fetchone()[0]
+        today = date.today()
+        month = date((oldest or today).year, (oldest or today).month, 1)
+        last = _add_months(date(today.year, today.month, 1), MONTHS_AHEAD)
+        while month <= last:
+            cursor.execute(
+                f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                [f"{month.isoformat()} 00:00:00+00", f"{_add_months(month, 1).isoformat()} 00:00:00+00"]
+            )
+            month = _add_months(month, 1)
+        cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        _attach_definitions(cursor, LEGACY, indexes, foreign_keys)
+
+
+def unpartition_notifications(apps, schema_editor):
+    """Revenir à une table simple (les partitions déjà archivées ne sont pas rapatriées)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        if _relkind(cursor, TABLE) != 'p':
+            return
+        indexes, foreign_keys = _detach_definitions(cursor, TABLE, LEGACY)
+
+        cursor.execute(f'CREATE TABLE "{TABLE}" (LIKE "{LEGACY}" INCLUDING DEFAULTS)')
+        cursor.execute(f'CREATE SEQUENCE "{SEQUENCE}" OWNED BY "{TABLE}".id')
+        cursor.execute(f"ALTER TABLE \"{TABLE}\" ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}')")
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY (id)')
+
+        _attach_definitions(cursor, LEGACY, indexes, foreign_keys)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0022_salesdaily'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_notifications, unpartition_notifications),
+    ]
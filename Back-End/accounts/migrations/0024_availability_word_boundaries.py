@@ -0,0 +1,73 @@
+from django.db import migrations
+
+
+# Mêmes motifs que accounts.models._AVAILABILITY_PATTERNS: mots entiers (\y) et
+# négations reconnues avant les formes positives ("unavailable" contient
+# "available", "not in stock" contient "in stock")
+CREATE_FUNCTION_SQL = r"""
+CREATE OR REPLACE FUNCTION products_normalize_availability() RETURNS trigger AS $$
+DECLARE
+    raw text;
+BEGIN
+    raw := translate(lower(coalesce(NEW.availability, '')), 'éèêëàâäîïôöûüùç', 'eeeeaaaiioouuuc');
+    NEW.availability_status := CASE
+        WHEN raw ~ '\y(hors[- ]stock|rupture|epuisee?s?|out[- ]of[- ]stock|(not|pas) (in|en) stock|no stock|indisponible|(non|pas|not) (disponible|available)|unavailable|sold[- ]out)\y' THEN 2
+        WHEN raw ~ '\y(sur commande|arrivage|pre-?commande|pre-?order|backorder|on order)\y' THEN 3
+        WHEN raw ~ '\y(en stock|in stock|disponible|available)\y' THEN 1
+        ELSE 0
+    END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recalculer les lignes déjà normalisées avec les anciens motifs
+UPDATE products SET availability = availability WHERE availability IS NOT NULL;
+"""
+
+# Motifs de la migration 0018
+RESTORE_FUNCTION_SQL = r"""
+CREATE OR REPLACE FUNCTION products_normalize_availability() RETURNS trigger AS $$
+DECLARE
+    raw text;
+BEGIN
+    raw := translate(lower(coalesce(NEW.availability, '')), 'éèêëàâäîïôöûüùç', 'eeeeaaaiioouuuc');
+    NEW.availability_status := CASE
+        WHEN raw ~ '(hors stock|rupture|epuise|out of stock|indisponible|non disponible|not available|sold out)' THEN 2
+        WHEN raw ~ '(sur commande|arrivage|pre-?commande|backorder|on order)' THEN 3
+        WHEN raw ~ '(en stock|in stock|disponible|available)' THEN 1
+        ELSE 0
+    END;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+
+def renormalize(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_FUNCTION_SQL)
+        return
+
+    from accounts.models import normalize_availability
+
+    Product = apps.get_model('accounts', 'Product')
+    for product in Product.objects.exclude(availability__isnull=True).only('id', 'availability').iterator():
+        Product.objects.filter(pk=product.pk).update(
+            availability_status=normalize_availability(product.availability)
+        )
+
+
+def restore_patterns(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(RESTORE_FUNCTION_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0023_partition_notifications'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalize, restore_patterns),
+    ]
@@ -1,5 +1,63 @@
-from django.db import models
+import re
+import unicodedata
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.dispatch import Signal
+
+# Envoyé à chaque transition de statut d'une Order ou d'une OrderAssignment, dans la
+# transaction qui l'écrit (save() ou accounts.state_machine): sender=classe du modèle,
+# instance, from_status (None à la création), to_status, actor, event, full_save
+# (True pour un save() sans update_fields)
+status_changed = Signal()
+
+# Disponibilité normalisée (products.availability_status)
+AVAILABILITY_UNKNOWN = 0
+AVAILABILITY_IN_STOCK = 1
+AVAILABILITY_OUT_OF_STOCK = 2
+AVAILABILITY_ON_ORDER = 3
+
+AVAILABILITY_STATUS_CHOICES = [
+    (AVAILABILITY_UNKNOWN, 'Inconnue'),
+    (AVAILABILITY_IN_STOCK, 'En stock'),
+    (AVAILABILITY_OUT_OF_STOCK, 'Hors stock'),
+    (AVAILABILITY_ON_ORDER, 'Sur commande'),
+]
+
+AVAILABILITY_STATUS_KEYS = {
+    AVAILABILITY_UNKNOWN: 'unknown',
+    AVAILABILITY_IN_STOCK: 'in_stock',
+    AVAILABILITY_OUT_OF_STOCK: 'out_of_stock',
+    AVAILABILITY_ON_ORDER: 'on_order',
+}
+
+# Motifs testés dans cet ordre sur le texte brut (minuscules, sans accents), en mots
+# entiers: les négations ("unavailable", "not in stock", "pas disponible") sont
+# reconnues avant les formes positives.
+# Le trigger Postgres products_normalize_availability (migration 0024) applique les mêmes.
+_AVAILABILITY_PATTERNS = [
+    (AVAILABILITY_OUT_OF_STOCK, re.compile(
+        r"\b(hors[- ]stock|rupture|epuisee?s?|out[- ]of[- ]stock|(not|pas) (in|en) stock|no stock"
+        r"|indisponible|(non|pas|not) (disponible|available)|unavailable|sold[- ]out)\b")),
+    (AVAILABILITY_ON_ORDER, re.compile(r"\b(sur commande|arrivage|pre-?commande|pre-?order|backorder|on order)\b")),
+    (AVAILABILITY_IN_STOCK, re.compile(r"\b(en stock|in stock|disponible|available)\b")),
+]
+
+
+def normalize_availability(value):
+    """
+    Convertir la disponibilité brute d'un scraper ("En stock", "Hors stock", ...)
+    en valeur AVAILABILITY_*
+    """
+    if not value:
+        return AVAILABILITY_UNKNOWN
+    text = unicodedata.normalize('NFKD', str(value).lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    for status, pattern in _AVAILABILITY_PATTERNS:
+        if pattern.search(text):
+            return status
+    return AVAILABILITY_UNKNOWN
+
 
 class Product(models.Model):
     """
@@ -13,6 +71,11 @@ class Product(models.Model):
     product_link = models.TextField()
     name = models.CharField(max_length=255)
     availability = models.CharField(max_length=50, blank=True, null=True)
+    availability_status = models.PositiveSmallIntegerField(
+        choices=AVAILABILITY_STATUS_CHOICES,
+        default=AVAILABILITY_UNKNOWN,
+        db_default=AVAILABILITY_UNKNOWN,
+    )
     current_price = models.FloatField(blank=True, null=True)
     prev_price = models.FloatField(blank=True, null=True)
     description = models.TextField(blank=True, null=True)
@@ -25,11 +88,55 @@ class Product(models.Model):
         indexes = [
             models.Index(fields=['store_name']),
             models.Index(fields=['category']),
+            # Index partiels: la plupart des requêtes clients ne veulent que le stock disponible
+            models.Index(
+                fields=['-id'],
+                name='products_instock_id_idx',
+                condition=models.Q(availability_status=AVAILABILITY_IN_STOCK),
+            ),
+            models.Index(
+                fields=['store_name', '-id'],
+                name='products_instock_store_idx',
+                condition=models.Q(availability_status=AVAILABILITY_IN_STOCK),
+            ),
+            models.Index(
+                fields=['category', '-id'],
+                name='products_instock_cat_idx',
+                condition=models.Q(availability_status=AVAILABILITY_IN_STOCK),
+            ),
         ]
 
     def __str__(self):
         return f"{self.name} - {self.store_name}"
 
+    @property
+    def in_stock(self):
+        return self.availability_status == AVAILABILITY_IN_STOCK
+
+    def save(self, *args, **kwargs):
+        self.availability_status = normalize_availability(self.availability)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'availability' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'availability_status'}
+        super().save(*args, **kwargs)
+
+
+class CatalogueVersion(models.Model):
+    """
+    Compteur de version du catalogue par magasin
+    Incrémenté à chaque modification connue de la table products; la somme des
+    versions sert de version globale au snapshot en mémoire (accounts.catalogue)
+    """
+    store_name = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'catalogue_versions'
+
+    def __str__(self):
+        return f"{self.store_name} v{self.version}"
+
 
 class Profile(models.Model):
     GENDER_CHOICES = [
@@ -107,7 +214,37 @@ class FacialPhoto(models.Model):
         return f"Facial Photo - {self.user.username} ({self.position})"
 
 
-class Order(models.Model):
+class StatusEventMixin:
+    """
+    Journalise chaque changement de `status` dans order_events, dans la même
+    transaction que le save() (voir OrderEvent)
+
+    L'auteur du changement se passe à save(): `order.save(actor=request.user)`.
+    Les transitions des vues passent par accounts.state_machine (UPDATE
+    conditionnel, qui appelle OrderEvent.record() lui-même).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = getattr(instance, 'status', None) if 'status' in field_names else None
+        return instance
+
+    def save(self, *args, actor=None, **kwargs):
+        creating = self._state.adding
+        from_status = None if creating else getattr(self, '_saved_status', None)
+        update_fields = kwargs.get('update_fields')
+        status_saved = update_fields is None or 'status' in update_fields
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if status_saved and (creating or from_status != self.status):
+                OrderEvent.record(self, from_status, self.status, actor=actor, full_save=update_fields is None)
+        if status_saved:
+            self._saved_status = self.status
+
+
+class Order(StatusEventMixin, models.Model):
     """
     Modèle Order pour stocker les commandes des utilisateurs
     """
@@ -152,6 +289,14 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Historique paginé par curseur et synchronisation delta (updated_since)
+            models.Index(fields=['user', '-created_at', '-id'], name='orders_user_created_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='orders_user_updated_idx'),
+            # Rafraîchissement incrémental de sales_daily (commandes touchées, puis leurs jours)
+            models.Index(fields=['updated_at'], name='orders_updated_idx'),
+            models.Index(fields=['created_at'], name='orders_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.order_number} - {self.user.username}"
@@ -189,7 +334,7 @@ class Driver(models.Model):
         return f"Driver {self.user.get_full_name() or self.user.username}"
 
 
-class OrderAssignment(models.Model):
+class OrderAssignment(StatusEventMixin, models.Model):
     """
     Modèle pour assigner les commandes aux livreurs
     """
@@ -219,6 +364,55 @@ class OrderAssignment(models.Model):
         return f"Order #{self.order.order_number} -> {self.driver.user.username}"
 
 
+class OrderEvent(models.Model):
+    """
+    Journal append-only des transitions de statut des commandes et de leurs
+    assignations; sert de flux de changements (GET /api/auth/order-events/?since_event_id=)
+    """
+    ENTITY_CHOICES = [
+        ('order', 'Commande'),
+        ('assignment', 'Assignation'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    assignment = models.ForeignKey(
+        OrderAssignment, on_delete=models.SET_NULL, null=True, blank=True, related_name='events'
+    )
+    entity = models.CharField(max_length=20, choices=ENTITY_CHOICES)
+    from_status = models.CharField(max_length=20, null=True, blank=True)  # None à la création
+    to_status = models.CharField(max_length=20)
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'order_events'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['order', 'id'], name='order_events_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.entity} {self.order_id}: {self.from_status} -> {self.to_status}"
+
+    @classmethod
+    def record(cls, instance, from_status, to_status, actor=None, full_save=False):
+        """Ajouter un événement pour une Order ou une OrderAssignment et envoyer status_changed"""
+        if isinstance(instance, OrderAssignment):
+            event = cls.objects.create(
+                order_id=instance.order_id, assignment=instance, entity='assignment',
+                from_status=from_status, to_status=to_status, actor=actor,
+            )
+        else:
+            event = cls.objects.create(
+                order=instance, entity='order', from_status=from_status, to_status=to_status, actor=actor,
+            )
+        status_changed.send(
+            sender=type(instance), instance=instance, from_status=from_status, to_status=to_status,
+            actor=actor, event=event, full_save=full_save,
+        )
+        return event
+
+
 class DriverAvailability(models.Model):
     """
     Modèle pour gérer la disponibilité des livreurs
@@ -402,4 +596,81 @@ class Invoice(models.Model):
         ]
 
     def __str__(self):
-        return f"Invoice #{self.invoice_number} - Order #{self.order.order_number}"
\ No newline at end of file
+        return f"Invoice #{self.invoice_number} - Order #{self.order.order_number}"
+
+
+class IdempotencyRecord(models.Model):
+    """
+    Première réponse d'une requête POST/PUT/PATCH/DELETE envoyée avec un
+    en-tête Idempotency-Key (par utilisateur), rejouée pour les doublons
+    (voir accounts.idempotency)
+    """
+    STATUS_CHOICES = [
+        ('in_progress', 'En cours'),
+        ('completed', 'Terminée'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='idempotency_records')
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)  # sha256 méthode + chemin + corps
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_content_type = models.CharField(max_length=100, blank=True, default='')
+    response_body = models.BinaryField(null=True, blank=True)
+
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'idempotency_records'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} / {self.key} ({self.status})"
+
+
+class SalesDaily(models.Model):
+    """
+    Agrégat matérialisé des ventes par jour, magasin et produit (date de la
+    commande, commandes annulées exclues); rafraîchi de façon incrémentale par
+    accounts.sales_rollup.refresh_sales_daily
+    """
+    date = models.DateField()
+    store_name = models.CharField(max_length=50)
+    product_id = models.IntegerField()
+    product_name = models.CharField(max_length=255)
+    quantity = models.IntegerField(default=0)
+    revenue = models.FloatField(default=0)
+    orders_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'sales_daily'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'store_name', 'product_id'], name='sales_daily_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['store_name', 'date'], name='sales_daily_store_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.store_name} #{self.product_id}: {self.revenue}"
+
+
+class RollupWatermark(models.Model):
+    """
+    Position de reprise d'un agrégat incrémental (updated_at de la dernière
+    commande prise en compte)
+    """
+    name = models.CharField(max_length=50, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rollup_watermarks'
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
@@ -0,0 +1,117 @@
+"""
+Pagination par curseur (keyset) de l'historique des commandes
+
+- historique: tri (created_at, id) décroissant; le curseur encode la dernière
+  commande renvoyée, la page suivante reprend strictement après elle
+- synchronisation delta: tri (updated_at, id) croissant; le jeton de
+  synchronisation encode la dernière modification vue par le client, sans
+  dépasser maintenant - SYNC_OVERLAP: updated_at (auto_now) est posé avant le
+  commit, une transaction lente peut donc devenir visible avec une date déjà
+  dépassée par le jeton. Les modifications de cette fenêtre sont relues à
+  chaque synchronisation; le client dédoublonne sur (id, updated_at).
+
+Curseurs et jetons sont opaques pour le client (base64 de "<date ISO>|<id>").
+"""
+
+import base64
+import binascii
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Durée max entre updated_at et le commit d'une modification
+SYNC_OVERLAP = timedelta(minutes=2)
+
+
+class InvalidCursor(ValueError):
+    """Curseur ou jeton de synchronisation illisible"""
+
+
+def encode_cursor(timestamp, pk):
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(value):
+    """Curseur -> (datetime, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(value.encode()).decode()
+        timestamp, pk = raw.rsplit('|', 1)
+        parsed = parse_datetime(timestamp)
+        pk = int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise InvalidCursor("Curseur invalide")
+    if parsed is None:
+        raise InvalidCursor("Curseur invalide")
+    return parsed, pk
+
+
+def page_size_from(params):
+    try:
+        size = int(params.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return min(max(size, 1), MAX_PAGE_SIZE)
+
+
+def _sync_token(updated_at, pk):
+    """Jeton de (updated_at, id), ramené à la limite de la fenêtre de recouvrement"""
+    horizon = timezone.now() - SYNC_OVERLAP
+    if updated_at > horizon:
+        updated_at, pk = horizon, 0
+    return encode_cursor(updated_at, pk)
+
+
+def sync_token_for(queryset):
+    """Jeton de la dernière modification de `queryset` (None si vide); utilise l'index (user, updated_at)"""
+    latest = queryset.order_by('-updated_at', '-id').values_list('updated_at', 'id').first()
+    return _sync_token(*latest) if latest else None
+
+
+def paginate_history(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Une page d'historique, de la plus récente à la plus ancienne
+
+    Returns:
+        (objets, curseur suivant ou None)
+    """
+    queryset = queryset.order_by('-created_at', '-id')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+
+    objects = list(queryset[:page_size + 1])
+    if len(objects) <= page_size:
+        return objects, None
+    objects = objects[:page_size]
+    return objects, encode_cursor(objects[-1].created_at, objects[-1].id)
+
+
+def changed_since(queryset, sync_token, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Objets modifiés après `sync_token`, du plus ancien au plus récent
+
+    Returns:
+        (objets, nouveau jeton, has_more); le client rappelle avec le nouveau
+        jeton tant que has_more est vrai. Les objets de la fenêtre de
+        recouvrement reviennent à la synchronisation suivante.
+    """
+    updated_at, pk = decode_cursor(sync_token)
+    queryset = queryset.filter(
+        Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk)
+    ).order_by('updated_at', 'id')
+
+    objects = list(queryset[:page_size + 1])
+    has_more = len(objects) > page_size
+    objects = objects[:page_size]
+    if has_more:
+        # Pages suivantes de la même synchronisation: reprise stricte après la dernière
+        token = encode_cursor(objects[-1].updated_at, objects[-1].id)
+    elif objects:
+        token = _sync_token(objects[-1].updated_at, objects[-1].id)
+    else:
+        token = _sync_token(updated_at, pk)
+    return objects, token, has_more
@@ -0,0 +1,151 @@
+"""
+Partitionnement mensuel (PostgreSQL) des tables d'historique et archivage
+
+accounts_notification est partitionnée par mois sur created_at (migration
+0023). La clé primaire devient (id, created_at): l'id reste unique grâce à la
+séquence et Django continue de l'utiliser comme pk. Les requêtes
+"notifications récentes d'un utilisateur" (user_id, created_at DESC) passent
+par l'index partitionné: élagage des partitions sur created_at, sinon Merge
+Append + LIMIT qui s'arrête dans les partitions les plus récentes.
+
+Les partitions plus anciennes que PARTITION_ARCHIVE_AFTER_MONTHS sont détachées
+et déplacées dans le schéma PARTITION_ARCHIVE_SCHEMA: toujours interrogeables en
+SQL, hors du chemin des requêtes Django et du vacuum de la table active.
+
+orders et accounts_orderitem ne sont pas partitionnées: orders est référencée par
+clé étrangère (id) depuis six tables, et PostgreSQL exige que la clé de partition
+fasse partie de toute contrainte unique référencée; accounts_orderitem n'a pas de
+colonne de date. Leur historique par utilisateur est servi par les index
+(user, created_at, id) et (user, updated_at, id).
+"""
+
+import re
+from datetime import date
+
+from django.db import transaction
+
+# Table partitionnée -> colonne de partitionnement
+PARTITIONED_TABLES = {
+    'accounts_notification': 'created_at',
+}
+DEFAULT_PARTITION_SUFFIX = '_default'
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def partition_month(table, name):
+    """Mois d'une partition `<table>_pYYYYMM`, None pour les autres (dont la partition par défaut)"""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(connection, table):
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def list_partitions(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY child.relname
+            """,
+            [table]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def ensure_partitions(connection, table, months_ahead=3, today=None):
+    """
+    Créer les partitions du mois courant et des `months_ahead` mois suivants
+
+    Returns:
+        (créées, ignorées): une partition est ignorée si la partition par défaut
+        contient déjà des lignes de ce mois (à déplacer à la main)
+    """
+    quote = connection.ops.quote_name
+    existing = set(list_partitions(connection, table))
+    current = month_start(today or date.today())
+    created, skipped = [], []
+
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        try:
+            with transaction.atomic(using=connection.alias):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TABLE {quote(name)} PARTITION OF {quote(table)} "
+                        f"FOR VALUES FROM (%s) TO (%s)",
+                        [f"{month.isoformat()} 00:00:00+00", f"{add_months(month, 1).isoformat()} 00:00:00+00"]
+                    )
+            created.append(name)
+        except Exception as e:
+            skipped.append((name, str(e)))
+    return created, skipped
+
+
+def archive_partitions(connection, table, older_than_months, schema='archive', today=None):
+    """
+    Détacher les partitions entièrement antérieures à `older_than_months` mois
+    et les déplacer dans `schema`
+
+    Les clés étrangères héritées de la table sont supprimées de la partition
+    détachée: sinon un utilisateur, une commande ou un livreur ayant des
+    notifications archivées ne pourrait plus être supprimé. Les lignes archivées
+    gardent leurs ids, sans garantie qu'ils existent encore.
+
+    Les contraintes différées sont vérifiées (SET CONSTRAINTS ALL IMMEDIATE)
+    avant de modifier la partition: PostgreSQL refuse un ALTER TABLE sur une
+    table ayant des déclencheurs de clé étrangère en attente, ce qui arrive dès
+    que l'appelant a déjà écrit dans la même transaction.
+
+    Returns:
+        Liste des partitions archivées
+    """
+    quote = connection.ops.quote_name
+    cutoff = add_months(month_start(today or date.today()), -older_than_months)
+    archived = []
+
+    for name in list_partitions(connection, table):
+        month = partition_month(table, name)
+        if month is None or add_months(month, 1) > cutoff:
+            continue
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+                try:
+                    cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {quote(schema)}")
+                    cursor.execute(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+                    cursor.execute(
+                        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+                        [name]
+                    )
+                    for (constraint,) in cursor.fetchall():
+                        cursor.execute(f"ALTER TABLE {quote(name)} DROP CONSTRAINT {quote(constraint)}")
+                    cursor.execute(f"ALTER TABLE {quote(name)} SET SCHEMA {quote(schema)}")
+                finally:
+                    cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        archived.append(name)
+    return archived
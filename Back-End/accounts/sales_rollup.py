@@ -0,0 +1,162 @@
+"""
+Agrégat sales_daily: ventes par (jour, magasin, produit)
+
+Les tableaux de bord lisent sales_daily au lieu de parcourir orders x order_items.
+Le rafraîchissement est incrémental: les commandes créées ou modifiées depuis le
+watermark désignent les jours à recalculer, et ces jours sont reconstruits
+entièrement (idempotent: relancer ne fausse rien).
+
+Les commandes supprimées ne sont vues que par une reconstruction complète
+(`refresh_sales_daily(full=True)`, option --full de la commande).
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Order, OrderItem, RollupWatermark, SalesDaily
+
+ROLLUP_NAME = 'sales_daily'
+# Statuts qui ne comptent pas comme des ventes
+EXCLUDED_STATUSES = ('cancelled',)
+# Relecture avant le watermark: une transaction validée après le rafraîchissement
+# précédent peut porter un updated_at légèrement antérieur
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def _day_ranges(dates):
+    """
+    Intervalles [début, fin[ de created_at couvrant `dates` (jours consécutifs
+    fusionnés), bornés dans le fuseau courant comme TruncDate
+    """
+    ranges = []
+    for day in sorted(set(dates)):
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def _daily_rows(dates=None):
+    """Lignes SalesDaily calculées depuis order_items (tous les jours si dates=None)"""
+    items = OrderItem.objects.exclude(order__status__in=EXCLUDED_STATUSES)
+    if dates is not None:
+        # Plages sur created_at (indexable) plutôt que created_at::date IN (...)
+        days = Q(pk__in=[])
+        for start, end in _day_ranges(dates):
+            days |= Q(order__created_at__gte=start, order__created_at__lt=end)
+        items = items.filter(days)
+    rows = (
+        items.annotate(day=TruncDate('order__created_at'))
+        .values('day', 'store_name', 'product_id')
+        .annotate(
+            name=Max('product_name'),
+            units=Sum('quantity'),
+            total=Sum('subtotal'),
+            orders=Count('order', distinct=True),
+        )
+    )
+    return [
+        SalesDaily(
+            date=row['day'],
+            store_name=row['store_name'],
+            product_id=row['product_id'],
+            product_name=row['name'],
+            quantity=row['units'],
+            revenue=round(row['total'], 2),
+            orders_count=row['orders'],
+        )
+        for row in rows
+    ]
+
+
+def refresh_sales_daily(full=False):
+    """
+    Recalculer les jours touchés depuis le dernier rafraîchissement
+
+    Returns:
+        dict {'dates': jours recalculés, 'rows': lignes écrites, 'watermark': position}
+    """
+    with transaction.atomic():
+        watermark, _ = RollupWatermark.objects.select_for_update().get_or_create(name=ROLLUP_NAME)
+
+        orders = Order.objects.all()
+        if not full and watermark.position is not None:
+            orders = orders.filter(updated_at__gt=watermark.position - REFRESH_OVERLAP)
+        latest = orders.aggregate(latest=Max('updated_at'))['latest']
+
+        if full:
+            dates = None
+            SalesDaily.objects.all().delete()
+        else:
+            dates = sorted(set(
+                orders.annotate(day=TruncDate('created_at')).values_list('day', flat=True).distinct()
+            ))
+            if not dates:
+                return {'dates': 0, 'rows': 0, 'watermark': watermark.position}
+            SalesDaily.objects.filter(date__in=dates).delete()
+
+        rows = SalesDaily.objects.bulk_create(_daily_rows(dates), batch_size=1000)
+
+        if latest is not None and (watermark.position is None or latest > watermark.position):
+            watermark.position = latest
+        watermark.save()
+
+    return {
+        'dates': len(dates) if dates is not None else len({row.date for row in rows}),
+        'rows': len(rows),
+        'watermark': watermark.position,
+    }
+
+
+def _sales_range(start, end, store_name=None):
+    rows = SalesDaily.objects.filter(date__gte=start, date__lte=end)
+    if store_name:
+        rows = rows.filter(store_name=store_name)
+    return rows
+
+
+def sales_by_day(start, end, store_name=None):
+    """Chiffre d'affaires et quantités par jour et par magasin sur [start, end]"""
+    rows = (
+        _sales_range(start, end, store_name)
+        .values('date', 'store_name')
+        .annotate(total=Sum('revenue'), units=Sum('quantity'))
+        .order_by('date', 'store_name')
+    )
+    return [
+        {
+            'date': row['date'].isoformat(),
+            'store_name': row['store_name'],
+            'revenue': round(row['total'], 2),
+            'quantity': row['units'],
+        }
+        for row in rows
+    ]
+
+
+def top_products(start, end, store_name=None, limit=10):
+    """Produits au plus fort chiffre d'affaires sur [start, end]"""
+    rows = (
+        _sales_range(start, end, store_name)
+        .values('store_name', 'product_id')
+        .annotate(name=Max('product_name'), total=Sum('revenue'), units=Sum('quantity'), orders=Sum('orders_count'))
+        .order_by('-total', 'product_id')[:limit]
+    )
+    return [
+        {
+            'product_id': row['product_id'],
+            'product_name': row['name'],
+            'store_name': row['store_name'],
+            'revenue': round(row['total'], 2),
+            'quantity': row['units'],
+            'orders_count': row['orders'],
+        }
+        for row in rows
+    ]
@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from rest_framework import serializers
-from .models import Profile, FacialPhoto, Address, Order, OrderItem, Driver, OrderAssignment, DeliveryDay, DriverAvailability, DeliveryRoute, Invoice, Notification
+from .models import Profile, FacialPhoto, Address, Order, OrderItem, Driver, OrderAssignment, DeliveryDay, DriverAvailability, DeliveryRoute, Invoice, Notification, OrderEvent
 from django.contrib.auth.password_validation import validate_password
 from rest_framework.validators import UniqueValidator
 import base64
@@ -155,6 +155,44 @@ class OrderAssignmentSerializer(serializers.ModelSerializer):
         return obj.driver.user.get_full_name() or obj.driver.user.username
 
 
+class DriverOrderItemSerializer(serializers.ModelSerializer):
+    """Article tel qu'affiché au livreur (sans prix unitaire ni magasin)"""
+    class Meta:
+        model = OrderItem
+        fields = ['id', 'product_name', 'quantity']
+        read_only_fields = fields
+
+
+class DriverOrderSerializer(serializers.ModelSerializer):
+    """Commande vue par le livreur: livraison et paiement uniquement"""
+    items = DriverOrderItemSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Order
+        fields = [
+            'id', 'order_number', 'status', 'payment_method',
+            'shipping_address', 'shipping_city', 'shipping_postal_code', 'total', 'items'
+        ]
+        read_only_fields = fields
+
+
+class DriverAssignmentSerializer(serializers.ModelSerializer):
+    """
+    Assignation pour le dashboard livreur: pas de driver_name (le livreur est
+    renvoyé une fois à part), commande allégée
+    """
+    order_number = serializers.CharField(source='order.order_number', read_only=True)
+    order_details = DriverOrderSerializer(source='order', read_only=True)
+
+    class Meta:
+        model = OrderAssignment
+        fields = [
+            'id', 'order_number', 'order_details', 'status',
+            'assigned_at', 'accepted_at', 'completed_at', 'scheduled_delivery_date'
+        ]
+        read_only_fields = fields
+
+
 class DriverAvailabilitySerializer(serializers.ModelSerializer):
     class Meta:
         model = DriverAvailability
@@ -228,3 +266,18 @@ class NotificationSerializer(serializers.ModelSerializer):
             'is_read', 'action_taken', 'created_at', 'read_at'
         ]
         read_only_fields = ['id', 'created_at', 'notification_type_display']
+
+
+class OrderEventSerializer(serializers.ModelSerializer):
+    """
+    Serializer for OrderEvent (flux de changements des commandes)
+    """
+    order_number = serializers.CharField(source='order.order_number', read_only=True)
+
+    class Meta:
+        model = OrderEvent
+        fields = [
+            'id', 'order_id', 'order_number', 'assignment_id', 'entity',
+            'from_status', 'to_status', 'actor_id', 'created_at'
+        ]
+        read_only_fields = fields
@@ -2,153 +2,125 @@
 Django signals for account-related events
 """
 
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import OrderAssignment, Notification, Order
+from .models import Invoice, OrderAssignment, Notification, Order, Product, status_changed
 from .invoice_utils import create_invoice_for_assignment, save_invoice_pdf
-from django.utils import timezone
+from .catalogue import bump_catalogue_version
 
 
-@receiver(post_save, sender=OrderAssignment)
-def generate_invoice_on_acceptance(sender, instance, created, update_fields, **kwargs):
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_catalogue_on_product_change(sender, instance, **kwargs):
     """
-    Signal handler to create an invoice when an OrderAssignment is accepted by a driver
+    Invalidate in-memory catalogue snapshots when a product is changed through the ORM
     """
-    # Check if the status was changed to 'accepted'
-    if instance.status == 'accepted' and instance.accepted_at:
-        # Check if invoice doesn't already exist
-        if not hasattr(instance, 'invoice'):
-            # Create invoice
-            invoice = create_invoice_for_assignment(instance)
-
-            # Generate PDF
-            try:
-                save_invoice_pdf(invoice)
-            except Exception as e:
-                print(f"Error generating PDF for invoice {invoice.invoice_number}: {str(e)}")
+    bump_catalogue_version(instance.store_name)
 
 
-# ============ NOTIFICATION SIGNAL HANDLERS ============
+# Les handlers status_changed tournent dans la transaction de la transition:
+# leurs écritures passent par un savepoint (atomic imbriqué) pour qu'une erreur
+# interceptée n'annule pas la transition elle-même.
 
-@receiver(post_save, sender=OrderAssignment)
-def notify_on_order_assignment(sender, instance, created, **kwargs):
+@receiver(status_changed, sender=OrderAssignment)
+def generate_invoice_on_acceptance(sender, instance, to_status, **kwargs):
     """
-    Create notification when admin assigns an order to a driver
+    Signal handler to create an invoice when an OrderAssignment is accepted by a driver
     """
-    if created:  # Only on creation (assignment)
+    if to_status == 'accepted' and instance.accepted_at:
         try:
-            Notification.objects.create(
-                user=instance.driver.user,
-                notification_type='order_assigned',
-                message=f"Une commande (#{instance.order.order_number}) vous a été assignée",
-                order=instance.order,
-                driver=instance.driver,
-                order_assignment=instance
-            )
+            with transaction.atomic():
+                # Check if invoice doesn't already exist
+                if Invoice.objects.filter(order_assignment=instance).exists():
+                    return
+                invoice = create_invoice_for_assignment(instance)
         except Exception as e:
-            print(f"Error creating assignment notification: {str(e)}")
+            print(f"Error creating invoice for assignment {instance.id}: {str(e)}")
+            return
 
-
-@receiver(post_save, sender=OrderAssignment)
-def notify_on_order_accepted(sender, instance, created, **kwargs):
-    """
-    Create notification for customer when driver accepts order
-    """
-    if instance.status == 'accepted' and instance.accepted_at:
-        try:
-            Notification.objects.create(
-                user=instance.order.user,
-                notification_type='order_accepted',
-                message=f"Votre commande (#{instance.order.order_number}) a été acceptée par le livreur",
-                order=instance.order,
-                driver=instance.driver,
-                order_assignment=instance
-            )
-        except Exception as e:
-            print(f"Error creating acceptance notification: {str(e)}")
+        # PDF généré après le commit, hors de la transaction (et des verrous) de la transition
+        transaction.on_commit(lambda: _generate_invoice_pdf(invoice))
 
 
-@receiver(post_save, sender=OrderAssignment)
-def notify_on_order_rejected(sender, instance, created, **kwargs):
-    """
-    Create notification for customer when driver rejects order
-    """
-    if instance.status == 'rejected' and instance.rejected_at:
-        try:
-            Notification.objects.create(
-                user=instance.order.user,
-                notification_type='order_rejected',
-                message=f"Votre commande (#{instance.order.order_number}) a été refusée par le livreur",
-                order=instance.order,
-                driver=instance.driver,
-                order_assignment=instance
-            )
-        except Exception as e:
-            print(f"Error creating rejection notification: {str(e)}")
+def _generate_invoice_pdf(invoice):
+    try:
+        save_invoice_pdf(invoice)
+    except Exception as e:
+        print(f"Error generating PDF for invoice {invoice.invoice_number}: {str(e)}")
 
 
-@receiver(post_save, sender=OrderAssignment)
-def notify_on_order_completed(sender, instance, created, **kwargs):
-    """
-    Create notification for customer when driver marks order as delivered
-    """
-    if instance.status == 'completed' and instance.completed_at:
-        try:
-            Notification.objects.create(
-                user=instance.order.user,
-                notification_type='order_delivered',
-                message=f"Votre commande (#{instance.order.order_number}) a été livrée. Veuillez confirmer la réception.",
-                order=instance.order,
-                driver=instance.driver,
-                order_assignment=instance
-            )
-        except Exception as e:
-            print(f"Error creating delivery notification: {str(e)}")
-
-
-@receiver(post_save, sender=Order)
-def notify_on_order_status_change(sender, instance, created, update_fields, **kwargs):
+# ============ NOTIFICATION SIGNAL HANDLERS ============
+# Déclenchés par status_changed: une seule fois par transition, que le changement
+# passe par save() ou par accounts.state_machine
+
+ASSIGNMENT_NOTIFICATIONS = {
+    'accepted': ('order_accepted', "Votre commande (#{number}) a été acceptée par le livreur"),
+    'rejected': ('order_rejected', "Votre commande (#{number}) a été refusée par le livreur"),
+    'completed': (
+        'order_delivered',
+        "Votre commande (#{number}) a été livrée. Veuillez confirmer la réception."
+    ),
+}
+
+ORDER_NOTIFICATIONS = {
+    'confirmed': ('order_confirmed', "Votre commande (#{number}) a été confirmée"),
+    'cancelled': ('order_cancelled', "Votre commande (#{number}) a été annulée"),
+    'received': ('delivery_confirmed', "Votre commande (#{number}) a été confirmée comme reçue"),
+    'disputed': ('delivery_rejected', "Un problème a été signalé avec votre commande (#{number})"),
+}
+
+
+@receiver(status_changed, sender=OrderAssignment)
+def notify_on_assignment_status_change(sender, instance, from_status, to_status, **kwargs):
     """
-    Create notifications based on order status changes
+    Notify the driver when an order is assigned, and the customer when the driver
+    accepts, rejects or delivers it
     """
-    if not created and update_fields and 'status' in update_fields:
-        old_status = Order.objects.filter(pk=instance.pk).values('status').first()
-
-        try:
-            # Notify on order confirmation
-            if instance.status == 'confirmed':
+    try:
+        with transaction.atomic():
+            if from_status is None:
                 Notification.objects.create(
-                    user=instance.user,
-                    notification_type='order_confirmed',
-                    message=f"Votre commande (#{instance.order_number}) a été confirmée",
-                    order=instance
+                    user=instance.driver.user,
+                    notification_type='order_assigned',
+                    message=f"Une commande (#{instance.order.order_number}) vous a été assignée",
+                    order=instance.order,
+                    driver=instance.driver,
+                    order_assignment=instance
                 )
-
-            # Notify on order cancellation
-            elif instance.status == 'cancelled':
+            elif to_status in ASSIGNMENT_NOTIFICATIONS:
+                notification_type, message = ASSIGNMENT_NOTIFICATIONS[to_status]
                 Notification.objects.create(
-                    user=instance.user,
-                    notification_type='order_cancelled',
-                    message=f"Votre commande (#{instance.order_number}) a été annulée",
-                    order=instance
+                    user=instance.order.user,
+                    notification_type=notification_type,
+                    message=message.format(number=instance.order.order_number),
+                    order=instance.order,
+                    driver=instance.driver,
+                    order_assignment=instance
                 )
+    except Exception as e:
+        print(f"Error creating assignment notification: {str(e)}")
 
-            # Notify on order received
-            elif instance.status == 'received':
-                Notification.objects.create(
-                    user=instance.user,
-                    notification_type='delivery_confirmed',
-                    message=f"Votre commande (#{instance.order_number}) a été confirmée comme reçue",
-                    order=instance
-                )
 
-            # Notify on disputed status
-            elif instance.status == 'disputed':
-                Notification.objects.create(
-                    user=instance.user,
-                    notification_type='delivery_rejected',
-                    message=f"Un problème a été signalé avec votre commande (#{instance.order_number})",
-                    order=instance
-                )
-        except Exception as e:
-            print(f"Error creating order status notification: {str(e)}")
+@receiver(status_changed, sender=Order)
+def notify_on_order_status_change(sender, instance, from_status, to_status, full_save=False, **kwargs):
+    """
+    Create notifications based on order status changes
+
+    Comme avant le journal d'événements: pas de notification à la création ni
+    pour un save() complet (admin), seulement pour les transitions et les
+    save(update_fields=[..., 'status'])
+    """
+    if from_status is None or full_save or to_status not in ORDER_NOTIFICATIONS:
+        return
+    try:
+        notification_type, message = ORDER_NOTIFICATIONS[to_status]
+        with transaction.atomic():
+            Notification.objects.create(
+                user=instance.user,
+                notification_type=notification_type,
+                message=message.format(number=instance.order_number),
+                order=instance
+            )
+    except Exception as e:
+        print(f"Error creating order status notification: {str(e)}")
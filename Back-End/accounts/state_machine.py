@@ -0,0 +1,301 @@
+"""
+Machine à états des commandes et des assignations livreur
+
+Chaque transition est un UPDATE conditionnel unique (compare-and-swap):
+
+    UPDATE ... SET status = <cible>, <colonnes modifiées> WHERE id = %s AND status = <attendu> RETURNING ...
+
+- pas de SELECT préalable ni de save() de la ligne complète: seules les
+  colonnes de la transition sont écrites
+- deux requêtes concurrentes sur la même ligne: une seule gagne, l'autre
+  reçoit None (pas de mise à jour perdue)
+- plusieurs états de départ possibles: un seul UPDATE ... WHERE status IN (...)
+  qui renvoie l'ancien statut, lu par un sous-SELECT ... FOR UPDATE (CTE)
+- la transition est journalisée dans order_events dans la même transaction,
+  ce qui envoie le signal `status_changed` (notifications, factures); les
+  handlers écrivent dans un savepoint et le PDF de facture est généré après
+  le commit (accounts.signals)
+"""
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification, Order, OrderAssignment, OrderEvent
+
+ORDER_TRANSITIONS = {
+    'pending': {'confirmed', 'processing', 'delivered', 'cancelled'},
+    'confirmed': {'processing', 'shipped', 'accepted', 'in_transit', 'delivered', 'cancelled'},
+    'processing': {'shipped', 'in_transit', 'delivered', 'cancelled'},
+    'shipped': {'in_transit', 'delivered'},
+    'accepted': {'in_transit', 'delivered'},
+    'in_transit': {'delivered'},
+    'delivered': {'received', 'disputed'},
+    'disputed': {'received'},
+    'received': set(),
+    'cancelled': set(),
+}
+
+ASSIGNMENT_TRANSITIONS = {
+    'assigned': {'accepted', 'rejected'},
+    'accepted': {'completed'},
+    'completed': {'confirmed'},  # confirmée par le livreur à la fin de sa tournée
+    'rejected': set(),
+    'confirmed': set(),
+}
+
+TRANSITIONS = {
+    Order: ORDER_TRANSITIONS,
+    OrderAssignment: ASSIGNMENT_TRANSITIONS,
+}
+
+# Taille maximale d'un lot de bulk_transition_orders
+BULK_TRANSITION_LIMIT = 1000
+
+# États depuis lesquels une commande peut être marquée livrée
+DELIVERABLE_ORDER_STATUSES = ('confirmed', 'pending', 'accepted', 'in_transit', 'shipped', 'processing')
+
+
+class InvalidTransition(ValueError):
+    """Transition absente de la machine à états"""
+
+
+def can_transition(model, from_status, to_status):
+    return to_status in TRANSITIONS[model].get(from_status, ())
+
+
+def transition(model, pk, expected, to_status, actor=None, filters=None, **fields):
+    """
+    Passer l'objet `pk` de `expected` à `to_status` si (et seulement si) il est
+    encore dans l'état `expected`
+
+    Args:
+        model: Order ou OrderAssignment
+        expected: état attendu, ou tuple d'états acceptés
+        filters: conditions supplémentaires {colonne: valeur} (ex: {'driver_id': 3})
+        fields: autres colonnes à écrire avec la transition (ex: accepted_at=...)
+
+    Returns:
+        L'objet à jour (lu par RETURNING), ou None si l'objet n'existe pas, ne
+        correspond pas aux filtres ou n'est plus dans l'état attendu
+
+    Raises:
+        InvalidTransition: `expected` -> `to_status` n'est pas autorisée
+    """
+    candidates = (expected,) if isinstance(expected, str) else tuple(expected)
+    for from_status in candidates:
+        if not can_transition(model, from_status, to_status):
+            raise InvalidTransition(f"{model.__name__}: {from_status} -> {to_status} non autorisée")
+
+    with transaction.atomic():
+        if len(candidates) == 1:
+            from_status = candidates[0]
+            instance = _compare_and_swap(model, pk, from_status, to_status, filters or {}, fields)
+        else:
+            instance, from_status = _compare_and_swap_any(model, pk, candidates, to_status, filters or {}, fields)
+        if instance is not None:
+            OrderEvent.record(instance, from_status, to_status, actor=actor)
+    return instance
+
+
+def _compare_and_swap(model, pk, from_status, to_status, filters, fields):
+    meta = model._meta
+    conditions = {meta.pk.attname: pk, 'status': from_status, **filters}
+    rows = _update_returning(model, {'status': to_status, **fields}, conditions)
+    return rows[0] if rows else None
+
+
+def _compare_and_swap_any(model, pk, candidates, to_status, filters, fields):
+    """
+    Transition depuis l'un des états `candidates`; renvoie (objet, ancien statut)
+    ou (None, None)
+
+    PostgreSQL: une seule requête
+
+        WITH previous AS (SELECT id, status ... WHERE id = %s AND status IN (...) FOR UPDATE)
+        UPDATE ... FROM previous WHERE id = previous.id RETURNING previous.status, ...
+
+    Le verrou garantit que l'ancien statut renvoyé est bien celui que l'UPDATE
+    remplace. Ailleurs (sqlite: RETURNING ne voit pas les tables du FROM), le
+    statut est lu puis l'UPDATE conditionnel porte sur ce statut.
+    """
+    meta = model._meta
+    conditions = {meta.pk.attname: pk, **filters}
+    if connection.vendor != 'postgresql':
+        from_status = (
+            model.objects.select_for_update().filter(status__in=candidates, **conditions)
+            .values_list('status', flat=True).first()
+        )
+        if from_status is None:
+            return None, None
+        return _compare_and_swap(model, pk, from_status, to_status, filters, fields), from_status
+
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    pk_column = quote(meta.pk.column)
+    status_column = quote(meta.get_field('status').column)
+    assignments, params = _set_clause(model, {'status': to_status, **fields})
+    where, where_params = _where_clause(model, conditions, {'status': candidates})
+    fields_returned = list(meta.concrete_fields)
+    sql = (
+        f"WITH previous AS ("
+        f"SELECT {pk_column}, {status_column} FROM {table} WHERE {where} FOR UPDATE) "
+        f"UPDATE {table} SET {assignments} FROM previous "
+        f"WHERE {table}.{pk_column} = previous.{pk_column} "
+        f"RETURNING previous.{status_column}, "
+        f"{', '.join(f'{table}.{quote(field.column)}' for field in fields_returned)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, where_params + params)
+        rows = cursor.fetchall()
+    if not rows:
+        return None, None
+    return _from_rows(model, fields_returned, [rows[0][1:]])[0], rows[0][0]
+
+
+def _set_clause(model, values):
+    """`col = %s, ...` des colonnes de `values` (plus les champs auto_now) et ses paramètres"""
+    meta = model._meta
+    quote = connection.ops.quote_name
+    values = dict(values)
+    for field in meta.concrete_fields:
+        if getattr(field, 'auto_now', False):
+            values.setdefault(field.attname, timezone.now())
+
+    assignments = []
+    params = []
+    for name, value in values.items():
+        field = meta.get_field(name)
+        assignments.append(f"{quote(field.column)} = %s")
+        params.append(field.get_db_prep_save(value, connection))
+    return ', '.join(assignments), params
+
+
+def _where_clause(model, conditions, in_conditions=None):
+    """Conditions `conditions` ({champ: valeur}) et `in_conditions` ({champ: [valeurs]}) et leurs paramètres"""
+    meta = model._meta
+    quote = connection.ops.quote_name
+    where = []
+    params = []
+    for name, value in conditions.items():
+        where.append(f"{quote(meta.get_field(name).column)} = %s")
+        params.append(value)
+    for name, choices in (in_conditions or {}).items():
+        where.append(f"{quote(meta.get_field(name).column)} IN ({', '.join(['%s'] * len(choices))})")
+        params.extend(choices)
+    return ' AND '.join(where), params
+
+
+def _from_rows(model, fields, rows):
+    """Objets `model` construits à partir de lignes brutes (colonnes de `fields`)"""
+    meta = model._meta
+    columns = [field.get_col(meta.db_table) for field in fields]
+    attnames = [field.attname for field in fields]
+    instances = []
+    for row in rows:
+        converted = []
+        for column, value in zip(columns, row):
+            # Convertisseurs du backend et du champ (dates sqlite, etc.), comme pour un SELECT
+            for converter in column.get_db_converters(connection):
+                value = converter(value, column, connection)
+            converted.append(value)
+        instances.append(model.from_db(connection.alias, attnames, converted))
+    return instances
+
+
+def _update_returning(model, values, conditions, in_conditions=None):
+    """
+    UPDATE de `values` sur les lignes qui vérifient `conditions` ({champ: valeur})
+    et `in_conditions` ({champ: [valeurs]}); renvoie les objets mis à jour (RETURNING)
+    """
+    meta = model._meta
+    quote = connection.ops.quote_name
+    assignments, params = _set_clause(model, values)
+    where, where_params = _where_clause(model, conditions, in_conditions)
+
+    fields_returned = list(meta.concrete_fields)
+    sql = (
+        f"UPDATE {quote(meta.db_table)} SET {assignments} "
+        f"WHERE {where} "
+        f"RETURNING {', '.join(quote(field.column) for field in fields_returned)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + where_params)
+        rows = cursor.fetchall()
+    return _from_rows(model, fields_returned, rows)
+
+
+def bulk_transition_orders(order_ids, to_status, actor=None):
+    """
+    Appliquer une même transition à un lot de commandes
+
+    Dans une même transaction: lecture des statuts courants avec verrouillage
+    des lignes (SELECT ... FOR UPDATE, par id croissant), un UPDATE pour tout le
+    lot, puis un bulk INSERT des événements et un des notifications client. Le
+    verrou garantit que le from_status journalisé est bien celui que l'UPDATE a
+    remplacé. Les signaux status_changed ne sont pas envoyés (notifications
+    écrites ici).
+
+    Returns:
+        {'updated': [ids], 'failed': [{'id', 'status', 'error'}]}
+
+    Raises:
+        InvalidTransition: `to_status` n'est atteignable depuis aucun état
+    """
+    # Import local: les handlers de accounts.signals définissent les messages
+    from .signals import ORDER_NOTIFICATIONS
+
+    sources = [status for status, targets in ORDER_TRANSITIONS.items() if to_status in targets]
+    if not sources:
+        raise InvalidTransition(f"Order: aucune transition vers {to_status}")
+    if len(order_ids) > BULK_TRANSITION_LIMIT:
+        raise InvalidTransition(f"{BULK_TRANSITION_LIMIT} commandes maximum par lot")
+
+    order_ids = list(dict.fromkeys(order_ids))
+    with transaction.atomic():
+        current = dict(
+            Order.objects.select_for_update().filter(id__in=order_ids).order_by('id').values_list('id', 'status')
+        )
+        failed = []
+        eligible = []
+        for order_id in order_ids:
+            if order_id not in current:
+                failed.append({'id': order_id, 'status': None, 'error': "Commande non trouvée"})
+            elif current[order_id] not in sources:
+                failed.append({
+                    'id': order_id,
+                    'status': current[order_id],
+                    'error': f"Transition {current[order_id]} -> {to_status} non autorisée",
+                })
+            else:
+                eligible.append(order_id)
+
+        if not eligible:
+            return {'updated': [], 'failed': failed}
+
+        orders = _update_returning(Order, {'status': to_status}, {}, {'id': eligible, 'status': sources})
+        position = {order_id: index for index, order_id in enumerate(eligible)}
+        orders.sort(key=lambda order: position[order.id])
+
+        OrderEvent.objects.bulk_create([
+            OrderEvent(order=order, entity='order', from_status=current[order.id], to_status=to_status, actor=actor)
+            for order in orders
+        ])
+        if to_status in ORDER_NOTIFICATIONS:
+            notification_type, message = ORDER_NOTIFICATIONS[to_status]
+            Notification.objects.bulk_create([
+                Notification(
+                    user_id=order.user_id,
+                    notification_type=notification_type,
+                    message=message.format(number=order.order_number),
+                    order=order,
+                )
+                for order in orders
+            ])
+
+    updated = {order.id for order in orders}
+    # Lignes verrouillées: ne devrait pas arriver, gardé par prudence
+    failed += [
+        {'id': order_id, 'status': None, 'error': "Statut modifié entre-temps, réessayer"}
+        for order_id in eligible if order_id not in updated
+    ]
+    return {'updated': [order.id for order in orders], 'failed': failed}
@@ -1,3 +1,1058 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.http import JsonResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from . import partitioning
+from .idempotency import IdempotencyMiddleware
+from .catalogue import get_catalogue_snapshot, reset_catalogue_snapshot
+from .sales_rollup import refresh_sales_daily
+from .state_machine import DELIVERABLE_ORDER_STATUSES, InvalidTransition, bulk_transition_orders, transition
+from .models import (
+    AVAILABILITY_IN_STOCK, AVAILABILITY_ON_ORDER, AVAILABILITY_OUT_OF_STOCK, AVAILABILITY_UNKNOWN,
+    CatalogueVersion, Driver, IdempotencyRecord, Invoice, Notification, Order, OrderAssignment, OrderEvent, OrderItem,
+    Product, SalesDaily, normalize_availability,
+)
+
+
+def make_product(**kwargs):
+    defaults = {
+        'name': 'Produit',
+        'store_name': 'mytek',
+        'category': 'Informatique',
+        'product_link': 'https://example.com/p',
+        'current_price': 10.0,
+    }
+    defaults.update(kwargs)
+    return Product.objects.create(**defaults)
+
+
+@override_settings(CATALOGUE_SNAPSHOT_CHECK_INTERVAL=0)
+class CatalogueSnapshotTests(TestCase):
+    """Tests du snapshot en mémoire servi par /api/products/"""
+
+    def setUp(self):
+        reset_catalogue_snapshot()
+        self.addCleanup(reset_catalogue_snapshot)
+        self.client = APIClient()
+        self.laptop = make_product(name='Laptop Lenovo IdeaPad', store_name='mytek', category='Informatique')
+        self.phone = make_product(name='Samsung Galaxy A15', store_name='mytek', category='Téléphonie')
+        self.cream = make_product(name='Crème Solaire SPF 50', store_name='parashop', category='Solaire')
+
+    def test_filters_use_store_and_category_indexes(self):
+        snapshot = get_catalogue_snapshot()
+
+        self.assertEqual([p['id'] for p in snapshot.filter(store='MYTEK')], [self.phone.id, self.laptop.id])
+        self.assertEqual([p['id'] for p in snapshot.filter(store='mytek', category='informatique')], [self.laptop.id])
+        self.assertEqual(snapshot.filter(store='unknown'), [])
+        self.assertEqual([p['id'] for p in snapshot.filter(search='galaxy')], [self.phone.id])
+
+    def test_snapshot_swapped_when_version_changes(self):
+        first = get_catalogue_snapshot()
+        self.assertIs(get_catalogue_snapshot(), first)
+
+        make_product(name='Shampooing Bio', store_name='parashop', category='Capillaire')
+        second = get_catalogue_snapshot()
+
+        self.assertIsNot(second, first)
+        self.assertEqual(len(second), 4)
+        self.assertEqual(CatalogueVersion.objects.get(store_name='parashop').version, 2)
+
+    def test_products_api_response(self):
+        response = self.client.get('/api/products/', {'store': 'parashop', 'limit': 5})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['name'], 'Crème Solaire SPF 50')
+        self.assertEqual(response.data['results'][0]['images_links'], [])
+
+
+class AvailabilityNormalizationTests(TestCase):
+    """Tests de la disponibilité normalisée"""
+
+    def test_normalize_availability(self):
+        self.assertEqual(normalize_availability('En stock'), AVAILABILITY_IN_STOCK)
+        self.assertEqual(normalize_availability('In Stock'), AVAILABILITY_IN_STOCK)
+        self.assertEqual(normalize_availability('Épuisé'), AVAILABILITY_OUT_OF_STOCK)
+        self.assertEqual(normalize_availability('Non disponible'), AVAILABILITY_OUT_OF_STOCK)
+        self.assertEqual(normalize_availability('Sur commande'), AVAILABILITY_ON_ORDER)
+        self.assertEqual(normalize_availability(None), AVAILABILITY_UNKNOWN)
+
+    def test_negations_are_not_in_stock(self):
+        """Test que les formes négatives ne sont pas prises pour "available" / "in stock" """
+        for value in ['Unavailable', 'Temporarily unavailable', 'Not in stock', 'Out-of-stock',
+                      'Out of Stock', 'Hors-stock', 'Indisponible', 'Pas disponible', 'Sold-out']:
+            with self.subTest(value=value):
+                self.assertEqual(normalize_availability(value), AVAILABILITY_OUT_OF_STOCK)
+        self.assertEqual(normalize_availability('Disponible'), AVAILABILITY_IN_STOCK)
+        self.assertEqual(normalize_availability('Available now'), AVAILABILITY_IN_STOCK)
+        self.assertEqual(normalize_availability('Pre-order'), AVAILABILITY_ON_ORDER)
+
+    @override_settings(CATALOGUE_SNAPSHOT_CHECK_INTERVAL=0)
+    def test_in_stock_filter(self):
+        reset_catalogue_snapshot()
+        self.addCleanup(reset_catalogue_snapshot)
+        available = make_product(name='Clavier', availability='En stock')
+        make_product(name='Souris', availability='Hors stock')
+
+        self.assertEqual(available.availability_status, AVAILABILITY_IN_STOCK)
+        response = APIClient().get('/api/products/', {'in_stock': 'true'})
+
+        self.assertEqual([p['id'] for p in response.data['results']], [available.id])
+
+
+class CheckoutPipelineTests(TestCase):
+    """Tests du checkout atomique (POST /api/auth/orders/)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.products = Product.objects.bulk_create([
+            Product(name=f'Produit {i}', store_name='mytek', product_link=f'https://example.com/{i}',
+                    current_price=10.0 + i)
+            for i in range(100)
+        ])
+
+    def checkout(self, cart):
+        return self.client.post('/api/auth/orders/', {
+            'cart_items': cart,
+            'shipping_address': '1 rue de Tunis',
+            'shipping_city': 'Tunis',
+            'shipping_postal_code': '1000',
+        }, format='json')
+
+    def cart(self, size, **overrides):
+        return [
+            {'id': p.id, 'product_id': p.id, 'name': p.name, 'store': p.store_name, 'price': p.current_price,
+             'quantity': 2, **overrides}
+            for p in self.products[:size]
+        ]
+
+    def test_query_count_does_not_grow_with_cart_size(self):
+        """Test un nombre de requêtes constant pour 1, 10 et 100 articles"""
+        counts = []
+        for size in (1, 10, 100):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.checkout(self.cart(size))
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(len(response.data['items']), size)
+            counts.append(len(queries))
+
+        self.assertEqual(len(set(counts)), 1, counts)
+
+    def test_totals_are_computed_server_side(self):
+        """Test les totaux calculés depuis les prix en base (prix client ignoré si absent)"""
+        cart = self.cart(2)
+        for item in cart:
+            del item['price']
+        cart.append(dict(cart[0], quantity=1))
+
+        response = self.checkout(cart)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['quantity'] for item in response.data['items']], [3, 2])
+        self.assertEqual(response.data['subtotal'], 10.0 * 3 + 11.0 * 2)
+        self.assertEqual(response.data['total'], 52.0 + 10.0)
+
+    def test_changed_price_or_unknown_product_creates_nothing(self):
+        """Test le refus du panier sans commande partielle"""
+        cart = self.cart(3)
+        cart[2]['price'] = 1.0
+        response = self.checkout(cart)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['price_changes'][0]['current_price'], 12.0)
+
+        response = self.checkout(self.cart(3) + [{'product_id': 999999, 'quantity': 1}])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing_products'], [999999])
+
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_lines_must_name_a_store_offer(self):
+        """Test le refus des ids qui ne désignent pas une offre (id canonique, id composé, autre magasin)"""
+        canonical = self.cart(1)
+        del canonical[0]['product_id']
+        response = self.checkout(canonical)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('product_id', response.data['error'])
+
+        response = self.checkout(self.cart(1, product_id=f'{self.products[0].id}-0'))
+        self.assertEqual(response.status_code, 400)
+
+        response = self.checkout(self.cart(1, store='Tunisianet'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['store_mismatches'][0]['offer_store'], 'mytek')
+        self.assertFalse(Order.objects.exists())
+
+
+class IdempotencyKeyTests(TestCase):
+    """Tests du middleware Idempotency-Key"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('mobile', 'mobile@example.com', 'secret123')
+        self.product = make_product(current_price=25.0)
+        self.client = APIClient()
+        # Authentification JWT réelle: le middleware passe avant l'authentification DRF
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def checkout(self, key, quantity=1):
+        return self.client.post('/api/auth/orders/', {
+            'cart_items': [{'product_id': self.product.id, 'quantity': quantity}],
+            'shipping_address': '1 rue de Sfax',
+            'shipping_city': 'Sfax',
+            'shipping_postal_code': '3000',
+        }, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response(self):
+        """Test qu'un POST rejoué ne crée pas une deuxième commande"""
+        first = self.checkout('retry-1')
+        second = self.checkout('retry-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(second.json()['order_number'], first.data['order_number'])
+        self.assertEqual(Order.objects.count(), 1)
+
+        self.assertEqual(self.checkout('retry-2').status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_key_reused_for_other_request(self):
+        """Test le refus d'une même clé avec un corps différent"""
+        self.checkout('reused')
+
+        self.assertEqual(self.checkout('reused', quantity=3).status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_concurrent_duplicate_waits_for_inflight_request(self):
+        """Test qu'un doublon concurrent attend la première exécution au lieu de relancer"""
+        response = self.checkout('inflight')
+        record = IdempotencyRecord.objects.get(key='inflight')
+        record.status = 'in_progress'
+        record.save()
+
+        def first_request_finishes(seconds):
+            IdempotencyRecord.objects.filter(pk=record.pk).update(status='completed')
+
+        with patch('accounts.idempotency.time.sleep', side_effect=first_request_finishes) as sleep:
+            duplicate = self.checkout('inflight')
+
+        sleep.assert_called_once()
+        self.assertEqual(duplicate['Idempotent-Replayed'], 'true')
+        self.assertEqual(duplicate.json()['id'], response.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def upload(self, key, content):
+        request = RequestFactory().post(
+            '/upload/', {'photo': SimpleUploadedFile('face.jpg', content)},
+            HTTP_IDEMPOTENCY_KEY=key
+        )
+        request.user = self.user
+        # La vue lit toujours le fichier après le calcul de l'empreinte
+        middleware = IdempotencyMiddleware(
+            lambda request: JsonResponse({'photo': request.FILES['photo'].read().decode()}, status=201)
+        )
+        return middleware(request)
+
+    def test_multipart_upload_hashed_on_its_content(self):
+        """Test qu'un autre fichier de même taille sous la même clé est refusé au lieu d'être rejoué"""
+        first = self.upload('upload', b'AAAA')
+        replayed = self.upload('upload', b'AAAA')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(json.loads(first.content), {'photo': 'AAAA'})
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.upload('upload', b'BBBB').status_code, 422)
+
+    @override_settings(DATA_UPLOAD_MAX_MEMORY_SIZE=100)
+    def test_key_refused_on_oversized_body(self):
+        """Test le 413 quand le corps dépasse DATA_UPLOAD_MAX_MEMORY_SIZE"""
+        self.assertEqual(self.upload('big', b'A' * 200).status_code, 413)
+        self.assertFalse(IdempotencyRecord.objects.filter(key='big').exists())
+
+
+class OrderHistoryTests(TestCase):
+    """Tests de l'historique paginé et de la synchronisation delta (GET /api/auth/orders/)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        other = User.objects.create_user('autre', 'autre@example.com', 'secret123')
+        Order.objects.create(user=other, order_number='ORD-OTHER', shipping_address='x',
+                             shipping_city='Tunis', shipping_postal_code='1000')
+        self.orders = [
+            Order.objects.create(user=self.user, order_number=f'ORD-{i}', shipping_address='x',
+                                 shipping_city='Tunis', shipping_postal_code='1000')
+            for i in range(25)
+        ]
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=1, product_name='Produit', store_name='mytek', price=10, quantity=1, subtotal=10)
+            for order in self.orders for _ in range(3)
+        ])
+
+    def test_cursor_walks_whole_history_without_duplicates(self):
+        """Test le parcours complet par curseur, du plus récent au plus ancien"""
+        seen = []
+        cursor = None
+        while True:
+            params = {'page_size': 10, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get('/api/auth/orders/', params)
+            self.assertEqual(response.status_code, 200)
+            seen += [order['id'] for order in response.data['results']]
+            cursor = response.data['next_cursor']
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [order.id for order in reversed(self.orders)])
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        """Test les articles préchargés: même nombre de requêtes pour 5 ou 25 commandes"""
+        counts = []
+        for size in (5, 25):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get('/api/auth/orders/', {'page_size': size})
+            self.assertEqual(len(response.data['results']), size)
+            self.assertEqual(len(response.data['results'][0]['items']), 3)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_updated_since_returns_only_changed_orders(self):
+        """Test le mode delta: seules les commandes modifiées après le jeton sont renvoyées"""
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        token = self.client.get('/api/auth/orders/').data['sync_token']
+
+        empty = self.client.get('/api/auth/orders/', {'updated_since': token})
+        self.assertEqual(empty.data['results'], [])
+        self.assertEqual(empty.data['sync_token'], token)
+
+        changed = self.orders[3]
+        changed.status = 'shipped'
+        changed.save()
+
+        response = self.client.get('/api/auth/orders/', {'updated_since': token})
+        self.assertEqual([order['id'] for order in response.data['results']], [changed.id])
+        self.assertFalse(response.data['has_more'])
+
+        # Modification récente: relue tant qu'elle est dans la fenêtre de recouvrement
+        again = self.client.get('/api/auth/orders/', {'updated_since': response.data['sync_token']})
+        self.assertEqual([order['id'] for order in again.data['results']], [changed.id])
+        with patch('accounts.pagination.timezone.now', return_value=timezone.now() + timedelta(hours=1)):
+            last = self.client.get('/api/auth/orders/', {'updated_since': again.data['sync_token']})
+            later = self.client.get('/api/auth/orders/', {'updated_since': last.data['sync_token']})
+        self.assertEqual([order['id'] for order in last.data['results']], [changed.id])
+        self.assertEqual(later.data['results'], [])
+
+    def test_updated_since_sees_late_commits(self):
+        """Test qu'une modification commitée après coup, datée avant le jeton, est renvoyée"""
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        self.orders[0].save()
+        token = self.client.get('/api/auth/orders/').data['sync_token']
+
+        # Transaction lente: updated_at posé 30 s plus tôt, visible seulement maintenant
+        late = self.orders[5]
+        Order.objects.filter(pk=late.pk).update(status='shipped', updated_at=timezone.now() - timedelta(seconds=30))
+
+        response = self.client.get('/api/auth/orders/', {'updated_since': token})
+        self.assertIn(late.id, [order['id'] for order in response.data['results']])
+
+    def test_updated_since_pages_through_overlap_window(self):
+        """Test que la fenêtre de recouvrement se parcourt en pages sans boucler"""
+        Order.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        token = self.client.get('/api/auth/orders/').data['sync_token']
+        Order.objects.filter(user=self.user).update(updated_at=timezone.now())
+
+        seen = []
+        while True:
+            response = self.client.get('/api/auth/orders/', {'updated_since': token, 'page_size': 10})
+            seen += [order['id'] for order in response.data['results']]
+            token = response.data['sync_token']
+            if not response.data['has_more']:
+                break
+
+        self.assertEqual(sorted(seen), sorted(order.id for order in self.orders))
+
+    def test_invalid_cursor_is_rejected(self):
+        """Test le 400 sur un curseur illisible"""
+        response = self.client.get('/api/auth/orders/', {'cursor': 'pas-un-curseur'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+
+class OrderEventFeedTests(TestCase):
+    """Tests du journal order_events et du flux since_event_id"""
+
+    def setUp(self):
+        # Le PDF de facture généré à l'acceptation ne doit pas finir dans media/
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.driver_user = User.objects.create_user('livreur', 'livreur@example.com', 'secret123')
+        self.driver = Driver.objects.create(user=self.driver_user, phone='20000000')
+        self.order = Order.objects.create(user=self.customer, order_number='ORD-1', shipping_address='x',
+                                          shipping_city='Tunis', shipping_postal_code='1000')
+        self.client = APIClient()
+
+    def test_transitions_are_appended_with_actor(self):
+        """Test un événement par transition, avec statut précédent et auteur"""
+        assignment = OrderAssignment.objects.create(order=self.order, driver=self.driver)
+        self.client.force_authenticate(self.driver_user)
+        response = self.client.put(f'/api/auth/driver/orders/{assignment.id}/accept/')
+        self.assertEqual(response.status_code, 200)
+
+        events = list(OrderEvent.objects.values_list('entity', 'from_status', 'to_status', 'actor_id'))
+        self.assertEqual(events, [
+            ('order', None, 'pending', None),
+            ('assignment', None, 'assigned', None),
+            ('assignment', 'assigned', 'accepted', self.driver_user.id),
+            ('order', 'pending', 'confirmed', self.driver_user.id),
+        ])
+
+    def test_save_without_status_change_records_nothing(self):
+        """Test qu'un save() sans changement de statut n'ajoute pas d'événement"""
+        order = Order.objects.get(pk=self.order.pk)
+        order.payment_status = 'paid'
+        order.save()
+        order.status = 'shipped'
+        order.save(update_fields=['payment_status'])
+        self.assertEqual(OrderEvent.objects.count(), 1)
+
+    @override_settings(ORDER_EVENTS_COMMIT_LAG=0)
+    def test_feed_is_incremental_and_scoped_to_customer(self):
+        """Test la lecture incrémentale depuis since_event_id, limitée aux commandes du client"""
+        other = User.objects.create_user('autre', 'autre@example.com', 'secret123')
+        Order.objects.create(user=other, order_number='ORD-2', shipping_address='x',
+                             shipping_city='Tunis', shipping_postal_code='1000')
+        self.client.force_authenticate(self.customer)
+
+        first = self.client.get('/api/auth/order-events/', {'limit': 1}).data
+        self.assertEqual([e['order_number'] for e in first['results']], ['ORD-1'])
+        self.assertFalse(first['has_more'])
+
+        self.order.status = 'cancelled'
+        self.order.save()
+        feed = self.client.get('/api/auth/order-events/', {'since_event_id': first['last_event_id']}).data
+        self.assertEqual([(e['from_status'], e['to_status']) for e in feed['results']], [('pending', 'cancelled')])
+        self.assertEqual(self.client.get('/api/auth/order-events/', {'since_event_id': 'x'}).status_code, 400)
+
+    @override_settings(ORDER_EVENTS_COMMIT_LAG=5)
+    def test_feed_waits_for_late_commits(self):
+        """Test qu'un id plus petit commité après un id plus grand n'est pas sauté par le lecteur"""
+        OrderEvent.objects.update(created_at=timezone.now() - timedelta(minutes=1))
+        self.client.force_authenticate(self.customer)
+        cursor = self.client.get('/api/auth/order-events/').data['last_event_id']
+
+        # Deux transitions: la première (id plus petit) n'a pas encore commité
+        # quand le lecteur passe, la seconde si
+        late = OrderEvent.objects.create(order=self.order, entity='order', from_status='pending', to_status='confirmed')
+        OrderEvent.objects.create(order=self.order, entity='order', from_status='confirmed', to_status='shipped')
+        late_fields = {'id': late.id, 'order': self.order, 'entity': 'order',
+                       'from_status': 'pending', 'to_status': 'confirmed'}
+        late.delete()
+
+        feed = self.client.get('/api/auth/order-events/', {'since_event_id': cursor}).data
+        self.assertEqual(feed['results'], [])
+        self.assertEqual(feed['last_event_id'], cursor)
+
+        # Commit de la transaction lente, puis délai écoulé
+        OrderEvent.objects.create(**late_fields)
+        OrderEvent.objects.filter(id__gt=cursor).update(created_at=timezone.now() - timedelta(seconds=10))
+        feed = self.client.get('/api/auth/order-events/', {'since_event_id': cursor}).data
+        self.assertEqual([e['to_status'] for e in feed['results']], ['confirmed', 'shipped'])
+
+
+class SalesDailyRollupTests(TestCase):
+    """Tests de l'agrégat sales_daily et des endpoints de ventes"""
+
+    def setUp(self):
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.staff = User.objects.create_user('admin', 'admin@example.com', 'secret123', is_staff=True)
+        self.client = APIClient()
+
+    def order(self, day, lines, status='pending'):
+        order = Order.objects.create(user=self.customer, order_number=f'ORD-{Order.objects.count()}',
+                                     shipping_address='x', shipping_city='Tunis', shipping_postal_code='1000',
+                                     status=status)
+        Order.objects.filter(pk=order.pk).update(created_at=timezone.make_aware(timezone.datetime(2026, 5, day, 12)))
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=product_id, product_name=f'Produit {product_id}', store_name=store,
+                      price=price, quantity=quantity, subtotal=price * quantity)
+            for product_id, store, price, quantity in lines
+        ])
+        order.refresh_from_db()
+        return order
+
+    @patch('accounts.sales_rollup.REFRESH_OVERLAP', timedelta(0))
+    def test_incremental_refresh_recomputes_only_touched_days(self):
+        """Test le rafraîchissement incrémental: nouvelles commandes et annulations"""
+        self.order(1, [(1, 'mytek', 10.0, 2), (2, 'tunisianet', 5.0, 1)])
+        first = self.order(2, [(1, 'mytek', 10.0, 1)])
+        self.assertEqual(refresh_sales_daily()['rows'], 3)
+        self.assertEqual(refresh_sales_daily()['dates'], 0)
+
+        self.order(2, [(1, 'mytek', 10.0, 3)])
+        first.status = 'cancelled'
+        first.save()
+        result = refresh_sales_daily()
+
+        self.assertEqual(result['dates'], 1)
+        row = SalesDaily.objects.get(date='2026-05-02', product_id=1)
+        self.assertEqual((row.quantity, row.revenue, row.orders_count), (3, 30.0, 1))
+        self.assertEqual(SalesDaily.objects.get(date='2026-05-01', product_id=1).quantity, 2)
+
+    @patch('accounts.sales_rollup.REFRESH_OVERLAP', timedelta(0))
+    def test_touched_days_filtered_by_created_at_range(self):
+        """Test les jours touchés relus par plage de created_at, bornes comprises au bon jour"""
+        self.order(1, [(1, 'mytek', 10.0, 1)])
+        self.order(3, [(1, 'mytek', 10.0, 1)])
+        refresh_sales_daily()
+
+        midnight = self.order(2, [(1, 'mytek', 10.0, 4)])
+        Order.objects.filter(pk=midnight.pk).update(created_at=timezone.make_aware(timezone.datetime(2026, 5, 2)))
+        with CaptureQueriesContext(connection) as queries:
+            result = refresh_sales_daily()
+
+        self.assertEqual(result['dates'], 1)
+        self.assertEqual(
+            list(SalesDaily.objects.order_by('date').values_list('date', 'quantity')),
+            [(date(2026, 5, 1), 1), (date(2026, 5, 2), 4), (date(2026, 5, 3), 1)]
+        )
+        items_query = next(q['sql'] for q in queries if 'FROM "accounts_orderitem"' in q['sql'])
+        self.assertIn('"accounts_order"."created_at" >=', items_query)
+        self.assertIn('"accounts_order"."created_at" <', items_query)
+
+    def test_endpoints_read_rollup_for_staff_only(self):
+        """Test les ventes par jour et le top produits, réservés au personnel"""
+        self.order(1, [(1, 'mytek', 10.0, 2), (2, 'tunisianet', 50.0, 1)])
+        self.order(3, [(1, 'mytek', 10.0, 1)])
+        refresh_sales_daily()
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get('/api/auth/admin/sales/daily/').status_code, 403)
+
+        self.client.force_authenticate(self.staff)
+        period = {'start': '2026-05-01', 'end': '2026-05-31'}
+        daily = self.client.get('/api/auth/admin/sales/daily/', {**period, 'store': 'mytek'}).data
+        self.assertEqual([(d['date'], d['revenue']) for d in daily['results']],
+                         [('2026-05-01', 20.0), ('2026-05-03', 10.0)])
+        self.assertEqual(daily['total_revenue'], 30.0)
+
+        top = self.client.get('/api/auth/admin/sales/top-products/', {**period, 'limit': 1}).data['results']
+        self.assertEqual([(p['product_id'], p['revenue']) for p in top], [(2, 50.0)])
+        self.assertEqual(
+            self.client.get('/api/auth/admin/sales/daily/', {'start': '2026-06-01', 'end': '2026-05-01'}).status_code,
+            400
+        )
+
+
+class PartitioningTests(TestCase):
+    """Tests du calendrier des partitions mensuelles"""
+
+    def test_month_arithmetic_and_names(self):
+        """Test le passage d'année et le nommage des partitions"""
+        self.assertEqual(partitioning.add_months(date(2026, 11, 1), 3), date(2027, 2, 1))
+        self.assertEqual(partitioning.add_months(date(2026, 1, 1), -13), date(2024, 12, 1))
+        name = partitioning.partition_name('accounts_notification', date(2026, 5, 1))
+        self.assertEqual(name, 'accounts_notification_p202605')
+        self.assertEqual(partitioning.partition_month('accounts_notification', name), date(2026, 5, 1))
+        self.assertIsNone(partitioning.partition_month('accounts_notification', 'accounts_notification_default'))
+
+    def test_archive_selects_only_partitions_past_cutoff(self):
+        """Test que seules les partitions entièrement antérieures à la limite sont archivées"""
+        names = ['accounts_notification_default'] + [
+            partitioning.partition_name('accounts_notification', date(2025, month, 1)) for month in range(9, 13)
+        ]
+        connection = MagicMock(alias='default')
+        connection.ops.quote_name.side_effect = lambda name: f'"{name}"'
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [('accounts_notification_user_id_fk',)]
+        with patch.object(partitioning, 'list_partitions', return_value=names):
+            archived = partitioning.archive_partitions(
+                connection, 'accounts_notification', 12, today=date(2026, 11, 19)
+            )
+
+        self.assertEqual(archived, ['accounts_notification_p202509', 'accounts_notification_p202510'])
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        self.assertIn('ALTER TABLE "accounts_notification_p202510" SET SCHEMA "archive"', statements)
+        # Déclencheurs de clé étrangère en attente exécutés avant tout ALTER TABLE
+        self.assertEqual(statements[0], 'SET CONSTRAINTS ALL IMMEDIATE')
+        self.assertEqual(statements[-1], 'SET CONSTRAINTS ALL DEFERRED')
+        # Clés étrangères retirées avant le déplacement dans le schéma d'archive
+        drop = 'ALTER TABLE "accounts_notification_p202510" DROP CONSTRAINT "accounts_notification_user_id_fk"'
+        self.assertLess(
+            statements.index(drop),
+            statements.index('ALTER TABLE "accounts_notification_p202510" SET SCHEMA "archive"')
+        )
+
+
+def _foreign_keys(table):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'", [table]
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitionnement: PostgreSQL uniquement")
+class PartitionArchivePostgresTests(TestCase):
+    """Tests de l'archivage des partitions sur une vraie base PostgreSQL"""
+
+    TABLE = 'accounts_notification'
+    SCHEMA = 'archive_test'
+
+    def setUp(self):
+        self.user = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.order = Order.objects.create(user=self.user, order_number='ORD-OLD', shipping_address='x',
+                                          shipping_city='Tunis', shipping_postal_code='1000')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE "{self.TABLE}_p202001" PARTITION OF "{self.TABLE}" '
+                f"FOR VALUES FROM ('2020-01-01 00:00:00+00') TO ('2020-02-01 00:00:00+00')"
+            )
+        notification = Notification.objects.create(
+            user=self.user, order=self.order, notification_type='order_confirmed', message='Ancienne'
+        )
+        Notification.objects.filter(pk=notification.pk).update(created_at=datetime(2020, 1, 15, tzinfo=dt_timezone.utc))
+
+    def test_table_is_partitioned_with_foreign_keys(self):
+        """Test l'état laissé par la migration 0023 (table partitionnée, clés étrangères recréées)"""
+        self.assertTrue(partitioning.is_partitioned(connection, self.TABLE))
+        self.assertEqual(len(_foreign_keys(self.TABLE)), len(_foreign_keys(f'{self.TABLE}_p202001')))
+        self.assertTrue(_foreign_keys(self.TABLE))
+
+    def test_archived_rows_do_not_block_deletes(self):
+        """Test qu'un utilisateur et sa commande restent supprimables après archivage de leurs notifications"""
+        # Lignes insérées dans la transaction du test: leurs contrôles de clé étrangère sont encore en attente
+        archived = partitioning.archive_partitions(connection, self.TABLE, 12, schema=self.SCHEMA)
+
+        self.assertIn(f'{self.TABLE}_p202001', archived)
+        self.assertEqual(_foreign_keys(f'"{self.SCHEMA}"."{self.TABLE}_p202001"'), set())
+        self.assertEqual(Notification.objects.count(), 0)
+
+        self.order.delete()
+        self.user.delete()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT message FROM "{self.SCHEMA}"."{self.TABLE}_p202001"')
+            self.assertEqual(cursor.fetchall(), [('Ancienne',)])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Partitionnement: PostgreSQL uniquement")
+class PartitionMigrationPostgresTests(TransactionTestCase):
+    """Tests aller-retour de la migration 0023 sur PostgreSQL"""
+
+    TABLE = 'accounts_notification'
+
+    def test_migration_round_trip(self):
+        """Test le retour à une table simple puis le repartitionnement, lignes et clés étrangères conservées"""
+        user = User.objects.create_user('client', 'client@example.com', 'secret123')
+        Notification.objects.create(user=user, notification_type='order_confirmed', message='Conservée')
+        foreign_keys = _foreign_keys(self.TABLE)
+
+        executor = MigrationExecutor(connection)
+        leaves = executor.loader.graph.leaf_nodes()
+        executor.migrate([('accounts', '0022_salesdaily')])
+        self.assertFalse(partitioning.is_partitioned(connection, self.TABLE))
+        self.assertEqual(_foreign_keys(self.TABLE), foreign_keys)
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(leaves)
+        self.assertTrue(partitioning.is_partitioned(connection, self.TABLE))
+        self.assertEqual(_foreign_keys(self.TABLE), foreign_keys)
+        self.assertEqual(list(Notification.objects.values_list('message', flat=True)), ['Conservée'])
+
+
+class OrderStateMachineTests(TestCase):
+    """Tests des transitions compare-and-swap (accounts.state_machine)"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.driver_user = User.objects.create_user('livreur', 'livreur@example.com', 'secret123')
+        self.driver = Driver.objects.create(user=self.driver_user, phone='20000000')
+        self.order = Order.objects.create(user=self.customer, order_number='ORD-1', shipping_address='x',
+                                          shipping_city='Tunis', shipping_postal_code='1000')
+        self.assignment = OrderAssignment.objects.create(order=self.order, driver=self.driver)
+        self.client = APIClient()
+
+    def test_transition_is_a_single_conditional_update(self):
+        """Test une seule requête sur orders (UPDATE ... RETURNING), sans SELECT préalable"""
+        with CaptureQueriesContext(connection) as queries:
+            order = transition(Order, self.order.id, 'pending', 'processing', actor=self.customer)
+
+        order_queries = [q['sql'] for q in queries if '"accounts_order"' in q['sql']]
+        self.assertEqual(len(order_queries), 1)
+        self.assertTrue(order_queries[0].startswith('UPDATE'))
+        self.assertEqual(order.status, 'processing')
+        self.assertEqual(order.order_number, 'ORD-1')
+        self.assertEqual(OrderEvent.objects.last().from_status, 'pending')
+
+    def test_transition_from_any_of_several_states(self):
+        """Test une transition multi-états: un seul UPDATE et l'ancien statut journalisé"""
+        Order.objects.filter(pk=self.order.pk).update(status='processing')
+        with CaptureQueriesContext(connection) as queries:
+            order = transition(Order, self.order.id, DELIVERABLE_ORDER_STATUSES, 'delivered', actor=self.customer)
+
+        updates = [q['sql'] for q in queries if 'UPDATE "accounts_order"' in q['sql']]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(order.status, 'delivered')
+        self.assertEqual(OrderEvent.objects.last().from_status, 'processing')
+        events = OrderEvent.objects.count()
+        self.assertIsNone(transition(Order, self.order.id, DELIVERABLE_ORDER_STATUSES, 'delivered'))
+        self.assertEqual(OrderEvent.objects.count(), events)
+
+    @skipUnless(connection.vendor == 'postgresql', "CTE FOR UPDATE: PostgreSQL uniquement")
+    def test_transition_from_several_states_is_a_single_statement(self):
+        """Test PostgreSQL: ancien statut lu et ligne mise à jour par la même requête"""
+        Order.objects.filter(pk=self.order.pk).update(status='in_transit')
+        with CaptureQueriesContext(connection) as queries:
+            transition(Order, self.order.id, DELIVERABLE_ORDER_STATUSES, 'delivered')
+
+        order_queries = [q['sql'] for q in queries if '"accounts_order"' in q['sql']]
+        self.assertEqual(len(order_queries), 1)
+        self.assertTrue(order_queries[0].startswith('WITH previous AS'))
+        self.assertEqual(OrderEvent.objects.last().from_status, 'in_transit')
+
+    def test_lost_race_and_invalid_transition(self):
+        """Test qu'une transition concurrente perdue renvoie None et qu'une transition interdite lève"""
+        self.assertIsNotNone(transition(Order, self.order.id, 'pending', 'cancelled'))
+        self.assertIsNone(transition(Order, self.order.id, 'pending', 'confirmed'))
+        with self.assertRaises(InvalidTransition):
+            transition(Order, self.order.id, 'cancelled', 'delivered')
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'cancelled')
+
+    def test_driver_flow_notifies_once_per_transition(self):
+        """Test accepter puis livrer: statuts, facture et une notification par transition"""
+        self.client.force_authenticate(self.driver_user)
+        base = f'/api/auth/driver/orders/{self.assignment.id}'
+        self.assertEqual(self.client.put(f'{base}/accept/').status_code, 200)
+        self.assertEqual(self.client.put(f'{base}/accept/').status_code, 404)
+        self.assertEqual(self.client.put(f'{base}/complete/').status_code, 200)
+
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'delivered')
+        self.assertTrue(hasattr(OrderAssignment.objects.get(pk=self.assignment.pk), 'invoice'))
+        self.assertEqual(
+            sorted(Notification.objects.filter(user=self.customer).values_list('notification_type', flat=True)),
+            ['order_accepted', 'order_confirmed', 'order_delivered']
+        )
+
+    def test_order_notifications_keep_save_triggers(self):
+        """Test les notifications commande: pas pour un save() complet ni pour une expédition"""
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'confirmed'
+        order.save()
+        self.assertFalse(Notification.objects.filter(user=self.customer).exists())
+
+        transition(Order, self.order.id, 'confirmed', 'shipped')
+        self.assertFalse(Notification.objects.filter(user=self.customer).exists())
+
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = 'delivered'
+        order.save(update_fields=['status'])
+        order.status = 'disputed'
+        order.save(update_fields=['status'])
+        self.assertEqual(
+            list(Notification.objects.filter(user=self.customer).values_list('notification_type', flat=True)),
+            ['delivery_rejected']
+        )
+        self.assertEqual(OrderEvent.objects.filter(order=self.order, entity='order').count(), 5)
+
+    def test_failing_handler_does_not_roll_back_transition(self):
+        """Test qu'une erreur de base interceptée dans un handler status_changed n'annule pas la transition"""
+        def failing_create(**kwargs):
+            with transaction.mark_for_rollback_on_error():
+                raise IntegrityError("notification refusée")
+
+        with patch('accounts.signals.Notification.objects.create', side_effect=failing_create):
+            order = transition(Order, self.order.id, 'pending', 'confirmed')
+
+        self.assertIsNotNone(order)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'confirmed')
+        self.assertTrue(OrderEvent.objects.filter(order=self.order, to_status='confirmed').exists())
+
+    def test_invoice_pdf_generated_after_commit(self):
+        """Test que la facture est créée avec l'acceptation et son PDF seulement après le commit"""
+        with patch('accounts.signals.save_invoice_pdf') as save_pdf:
+            with self.captureOnCommitCallbacks() as callbacks:
+                transition(OrderAssignment, self.assignment.id, 'assigned', 'accepted', accepted_at=timezone.now())
+                self.assertTrue(Invoice.objects.filter(order_assignment=self.assignment).exists())
+                save_pdf.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        save_pdf.assert_called_once()
+
+    def test_order_detail_put_follows_state_machine(self):
+        """Test PUT /orders/<id>/: réservé au personnel, transitions validées, 409 sinon"""
+        url = f'/api/auth/orders/{self.order.id}/'
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.put(url, {'status': 'received'}, format='json').status_code, 403)
+        self.assertEqual(self.client.put(url, {'payment_status': 'paid'}, format='json').status_code, 403)
+
+        staff = User.objects.create_user('admin', 'admin@example.com', 'secret123', is_staff=True)
+        self.client.force_authenticate(staff)
+        self.assertEqual(self.client.put(url, {'status': 'received'}, format='json').status_code, 409)
+        self.assertEqual(self.client.put(url, {'status': 'teleported'}, format='json').status_code, 409)
+        self.assertEqual(self.client.put(url, {'payment_status': 'free'}, format='json').status_code, 400)
+        self.assertEqual(Order.objects.get(pk=self.order.pk).status, 'pending')
+
+        response = self.client.put(url, {'status': 'confirmed', 'payment_status': 'paid'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['status'], response.data['payment_status']), ('confirmed', 'paid'))
+        event = OrderEvent.objects.filter(entity='order').last()
+        self.assertEqual((event.from_status, event.to_status, event.actor), ('pending', 'confirmed', staff))
+
+    def test_confirm_delivery_requires_delivered_order(self):
+        """Test le 409 tant que la commande n'est pas livrée, puis la confirmation"""
+        self.client.force_authenticate(self.customer)
+        url = f'/api/auth/orders/{self.order.id}/confirm-delivery/'
+        payload = {'confirmed': True, 'status': 'received'}
+        self.assertEqual(self.client.post(url, payload, format='json').status_code, 409)
+
+        Order.objects.filter(pk=self.order.pk).update(status='delivered')
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['order']['status'], 'received')
+        self.assertEqual(self.client.post('/api/auth/orders/999/confirm-delivery/', payload,
+                                          format='json').status_code, 404)
+
+    def test_disputed_delivery_can_be_confirmed_later(self):
+        """Test qu'une commande en litige peut ensuite être confirmée reçue, mais pas re-signalée"""
+        self.client.force_authenticate(self.customer)
+        url = f'/api/auth/orders/{self.order.id}/confirm-delivery/'
+        Order.objects.filter(pk=self.order.pk).update(status='delivered')
+
+        disputed = self.client.post(url, {'confirmed': False, 'status': 'disputed'}, format='json')
+        self.assertEqual(disputed.data['order']['status'], 'disputed')
+        self.assertEqual(
+            self.client.post(url, {'confirmed': False, 'status': 'disputed'}, format='json').status_code, 409
+        )
+
+        response = self.client.post(url, {'confirmed': True, 'status': 'received'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['order']['status'], 'received')
+        self.assertEqual(OrderEvent.objects.filter(entity='order').last().from_status, 'disputed')
+
+
+class BulkOrderStatusTests(TestCase):
+    """Tests de la transition en lot (POST /api/auth/admin/orders/bulk-status/)"""
+
+    def setUp(self):
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.staff = User.objects.create_user('admin', 'admin@example.com', 'secret123', is_staff=True)
+        self.orders = [
+            Order.objects.create(user=self.customer, order_number=f'ORD-{i}', shipping_address='x',
+                                 shipping_city='Tunis', shipping_postal_code='1000', status='confirmed')
+            for i in range(30)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def bulk(self, payload):
+        return self.client.post('/api/auth/admin/orders/bulk-status/', payload, format='json')
+
+    def test_single_update_and_bulk_notifications(self):
+        """Test un UPDATE et des INSERT en lot, quel que soit le nombre de commandes"""
+        ids = [order.id for order in self.orders]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk({'status': 'cancelled', 'order_ids': ids})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['updated_count'], 30)
+        tables = ('"accounts_order"', '"order_events"', '"accounts_notification"')
+        statements = [q['sql'].split()[0] for q in queries if any(table in q['sql'] for table in tables)]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertEqual(statements.count('INSERT'), 2)
+        self.assertEqual(Order.objects.filter(status='cancelled').count(), 30)
+        self.assertEqual(Notification.objects.filter(notification_type='order_cancelled').count(), 30)
+        self.assertEqual(OrderEvent.objects.filter(from_status='confirmed', to_status='cancelled').count(), 30)
+
+    def test_shipping_does_not_notify(self):
+        """Test qu'une expédition en lot est journalisée sans notifier les clients"""
+        response = self.bulk({'status': 'shipped', 'order_ids': [order.id for order in self.orders]})
+
+        self.assertEqual(response.data['updated_count'], 30)
+        self.assertEqual(OrderEvent.objects.filter(to_status='shipped').count(), 30)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_reports_per_order_failures(self):
+        """Test les commandes introuvables ou dans un état incompatible"""
+        Order.objects.filter(pk=self.orders[0].pk).update(status='delivered')
+        response = self.bulk({'status': 'cancelled', 'order_ids': [self.orders[0].id, self.orders[1].id, 999999]})
+
+        self.assertEqual(response.data['updated'], [self.orders[1].id])
+        self.assertEqual(
+            [(failure['id'], failure['status']) for failure in response.data['failed']],
+            [(self.orders[0].id, 'delivered'), (999999, None)]
+        )
+
+    def test_statuses_read_under_lock_in_update_transaction(self):
+        """Test que les statuts journalisés sont lus verrouillés, dans la transaction de l'UPDATE"""
+        depths = []
+        select_for_update = QuerySet.select_for_update
+
+        def locked(queryset, *args, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return select_for_update(queryset, *args, **kwargs)
+
+        baseline = len(connection.atomic_blocks)
+        with patch.object(QuerySet, 'select_for_update', locked):
+            result = bulk_transition_orders([order.id for order in self.orders[:3]], 'shipped', actor=self.staff)
+
+        self.assertEqual(depths, [baseline + 1])
+        self.assertEqual(len(result['updated']), 3)
+        self.assertEqual(OrderEvent.objects.filter(from_status='confirmed', to_status='shipped').count(), 3)
+
+    def test_filters_and_permissions(self):
+        """Test la sélection par filtres, et le refus hors personnel ou pour un statut inconnu"""
+        Order.objects.filter(pk__in=[order.pk for order in self.orders[:5]]).update(status='pending')
+        response = self.bulk({'status': 'cancelled', 'filters': {'status': 'pending'}})
+        self.assertEqual(response.data['updated_count'], 5)
+        self.assertEqual(self.bulk({'status': 'teleported', 'order_ids': [self.orders[0].id]}).status_code, 400)
+
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.bulk({'status': 'shipped', 'order_ids': [self.orders[0].id]}).status_code, 403)
+
+
+class DriverDashboardTests(TestCase):
+    """Tests du dashboard livreur paginé (assignations actives par défaut)"""
+
+    def setUp(self):
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.driver_user = User.objects.create_user('livreur', 'livreur@example.com', 'secret123')
+        self.driver = Driver.objects.create(user=self.driver_user, phone='20000000')
+        self.client = APIClient()
+        self.client.force_authenticate(self.driver_user)
+
+    def make_assignments(self, count, assignment_status='assigned'):
+        start = OrderAssignment.objects.count()
+        for index in range(start, start + count):
+            order = Order.objects.create(user=self.customer, order_number=f'ORD-{index}', shipping_address='x',
+                                         shipping_city='Tunis', shipping_postal_code='1000', total=20)
+            for position in range(2):
+                OrderItem.objects.create(order=order, product_id=position, product_name=f'Produit {position}',
+                                         store_name='mytek', price=10, quantity=1, subtotal=10)
+            OrderAssignment.objects.create(order=order, driver=self.driver, status=assignment_status)
+
+    def test_query_count_does_not_depend_on_history(self):
+        """Test un nombre de requêtes fixe: livreur, count, assignations + commandes, articles"""
+        self.make_assignments(2)
+        with self.assertNumQueries(4):
+            self.client.get('/api/auth/driver/dashboard/')
+
+        self.make_assignments(40, 'confirmed')
+        self.make_assignments(30)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/auth/driver/dashboard/?scope=all')
+        self.assertEqual(response.data['count'], 72)
+        self.assertEqual(len(response.data['assignments']), 20)
+
+    def test_defaults_to_active_assignments(self):
+        """Test le filtre par défaut, le paramètre status et la forme allégée des assignations"""
+        self.make_assignments(3)
+        self.make_assignments(2, 'confirmed')
+        response = self.client.get('/api/auth/driver/dashboard/')
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['driver']['username'], 'livreur')
+
+        assignment = response.data['assignments'][0]
+        self.assertNotIn('driver_name', assignment)
+        self.assertEqual([item['product_name'] for item in assignment['order_details']['items']],
+                         ['Produit 0', 'Produit 1'])
+        self.assertNotIn('price', assignment['order_details']['items'][0])
+
+        response = self.client.get('/api/auth/driver/dashboard/?status=confirmed&page_size=1&page=2')
+        self.assertEqual((response.data['count'], response.data['current_page']), (2, 2))
+
+
+class RoleClaimsTests(TestCase):
+    """Tests des claims role/driver_id et de request.driver"""
+
+    def setUp(self):
+        self.customer = User.objects.create_user('client', 'client@example.com', 'secret123')
+        self.driver_user = User.objects.create_user('livreur', 'livreur@example.com', 'secret123')
+        self.driver = Driver.objects.create(user=self.driver_user, phone='20000000')
+        self.client = APIClient()
+
+    def login(self, email):
+        response = self.client.post('/api/auth/login/', {'email': email, 'password': 'secret123'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_login_returns_role_and_claims(self):
+        """Test le rôle dans la réponse du login et les claims de l'access token"""
+        data = self.login('livreur@example.com')
+        self.assertEqual(data['user']['role'], 'driver')
+        access = AccessToken(data['tokens']['access'])
+        self.assertEqual((access['role'], access['driver_id']), ('driver', self.driver.id))
+
+        data = self.login('client@example.com')
+        self.assertEqual(data['user']['role'], 'customer')
+        self.assertIsNone(AccessToken(data['tokens']['access'])['driver_id'])
+
+    def test_driver_resolved_without_query(self):
+        """Test qu'aucune requête ne lit accounts_driver pour identifier le livreur"""
+        access = self.login('livreur@example.com')['tokens']['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/auth/driver/orders/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([q['sql'] for q in queries if 'FROM "accounts_driver"' in q['sql']])
+
+        access = self.login('client@example.com')['tokens']['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get('/api/auth/driver/orders/').status_code, 403)
+
+    def test_refresh_recomputes_role_claims(self):
+        """Test qu'un livreur supprimé ou un admin rétrogradé perd son rôle au rafraîchissement"""
+        refresh = self.login('livreur@example.com')['tokens']['refresh']
+        self.driver.delete()
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        access = AccessToken(response.data['access'])
+        self.assertEqual((access['role'], access['driver_id']), ('customer', None))
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get('/api/auth/driver/orders/').status_code, 403)
+
+        self.client.credentials()
+        User.objects.filter(pk=self.customer.pk).update(is_staff=True)
+        refresh = self.login('client@example.com')['tokens']['refresh']
+        self.assertEqual(AccessToken(self.client.post('/api/auth/token/refresh/', {'refresh': refresh},
+                                                      format='json').data['access'])['role'], 'admin')
+        User.objects.filter(pk=self.customer.pk).update(is_staff=False)
+        response = self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(AccessToken(response.data['access'])['role'], 'customer')
+
+        User.objects.filter(pk=self.customer.pk).update(is_active=False)
+        self.assertEqual(
+            self.client.post('/api/auth/token/refresh/', {'refresh': refresh}, format='json').status_code, 401
+        )
+
+    def test_tokens_without_claims_fall_back_to_lookup(self):
+        """Test qu'un token sans claims (émis avant) résout toujours le livreur"""
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.driver_user).access_token}")
+        self.assertEqual(self.client.get('/api/auth/driver/orders/').status_code, 200)
@@ -4,7 +4,8 @@ from .views import (
     ChangePasswordView, OrderListCreateView, OrderDetailView,
     DriverDashboardView, DriverAssignedOrdersView, DriverAcceptOrderView,
     DriverRejectOrderView, AdminAssignOrderToDriverView, AdminGetDriversView,
-    DriverCompleteOrderView, ConfirmDeliveryView,
+    DriverCompleteOrderView, ConfirmDeliveryView, OrderEventFeedView,
+    AdminSalesDailyView, AdminTopProductsView, AdminBulkOrderStatusView,
     driver_delivery_calendar, manage_driver_availability, delivery_day_details,
     update_delivery_day, delivery_routes, update_delivery_route,
     driver_delivery_history, transfer_undelivered_orders, confirm_order_delivery,
@@ -12,12 +13,13 @@ from .views import (
     NotificationListView, NotificationMarkAsReadView, NotificationMarkAllAsReadView,
     NotificationDeleteView, NotificationActionView
 )
+from .authentication import RoleTokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 urlpatterns = [
     path('register/', RegisterView, name='register'),
     path('login/', LoginView, name='login'),  # Login personnalisé avec email/password
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', TokenRefreshView.as_view(serializer_class=RoleTokenRefreshSerializer), name='token_refresh'),
     path('user/', UserView, name='user'),
     path('addresses/', AddressListCreateView, name='addresses_list_create'),
     path('addresses/<int:address_id>/', AddressDetailView, name='address_detail'),
@@ -25,6 +27,7 @@ urlpatterns = [
     path('orders/', OrderListCreateView, name='orders_list_create'),
     path('orders/<int:order_id>/', OrderDetailView, name='order_detail'),
     path('orders/<int:order_id>/confirm-delivery/', ConfirmDeliveryView, name='confirm_delivery'),
+    path('order-events/', OrderEventFeedView, name='order_events_feed'),
 
     # Driver routes
     path('driver/dashboard/', DriverDashboardView, name='driver_dashboard'),
@@ -47,6 +50,9 @@ urlpatterns = [
     # Admin routes (order assignment)
     path('admin/assign-order/', AdminAssignOrderToDriverView, name='admin_assign_order'),
     path('admin/drivers/', AdminGetDriversView, name='admin_get_drivers'),
+    path('admin/orders/bulk-status/', AdminBulkOrderStatusView, name='admin_bulk_order_status'),
+    path('admin/sales/daily/', AdminSalesDailyView, name='admin_sales_daily'),
+    path('admin/sales/top-products/', AdminTopProductsView, name='admin_top_products'),
 
     # Invoice management routes
     path('invoices/', list_invoices, name='list_invoices'),
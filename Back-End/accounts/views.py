@@ -3,20 +3,31 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from .serializers import RegisterSerializer, ProfileSerializer, AddressSerializer, OrderSerializer, OrderItemSerializer, DriverSerializer, OrderAssignmentSerializer, DriverAvailabilitySerializer, InvoiceSerializer, NotificationSerializer
-from .models import FacialPhoto, Address, Order, OrderItem, Driver, OrderAssignment, DeliveryDay, DriverAvailability, DeliveryRoute, Invoice, Notification
-from rest_framework_simplejwt.tokens import RefreshToken
+from .serializers import RegisterSerializer, ProfileSerializer, AddressSerializer, OrderSerializer, OrderItemSerializer, DriverSerializer, OrderAssignmentSerializer, DriverAvailabilitySerializer, InvoiceSerializer, NotificationSerializer, OrderEventSerializer, DriverAssignmentSerializer
+from .models import FacialPhoto, Address, Order, OrderItem, Driver, OrderAssignment, DeliveryDay, DriverAvailability, DeliveryRoute, Invoice, Notification, OrderEvent
+from .authentication import ROLE_CLAIM, RoleRefreshToken, request_driver
+from .catalogue import get_catalogue_snapshot
+from .checkout import CheckoutError, create_order
+from .pagination import InvalidCursor, changed_since, page_size_from, paginate_history, sync_token_for
+from .sales_rollup import sales_by_day, top_products
+from .state_machine import (
+    BULK_TRANSITION_LIMIT, DELIVERABLE_ORDER_STATUSES, InvalidTransition, bulk_transition_orders, transition
+)
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.core.mail import send_mail
 from django.conf import settings
 from django.http import FileResponse
 from django.core.paginator import Paginator
+from django.db.models import Prefetch
+from django.utils import timezone
 import json
-from datetime import datetime, timedelta
-import random
+import logging
+from datetime import date, datetime, timedelta
 import string
 
+logger = logging.getLogger(__name__)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def LoginView(request):
@@ -48,7 +59,7 @@ def LoginView(request):
             )
 
         # Générer les tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
 
         return Response({
             "user": {
@@ -57,6 +68,7 @@ def LoginView(request):
                 "email": user.email,
                 "first_name": user.first_name,
                 "last_name": user.last_name,
+                "role": refresh[ROLE_CLAIM],
             },
             "tokens": {
                 "refresh": str(refresh),
@@ -83,14 +95,15 @@ def RegisterView(request):
     serializer = RegisterSerializer(data=request.data)
     if serializer.is_valid():
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             "user": {
                 "id": user.id,
                 "username": user.username,
                 "email": user.email,
                 "first_name": user.first_name,
-                "last_name": user.last_name
+                "last_name": user.last_name,
+                "role": refresh[ROLE_CLAIM]
             },
             "tokens": {
                 "refresh": str(refresh),
@@ -256,92 +269,29 @@ MESSAGE:
 def products_api(request):
     """
     API endpoint to fetch products
-    Returns sample products for demonstration
+    Served from the in-memory catalogue snapshot (accounts.catalogue), not from SQL
     Supports optional query parameters:
     - limit: number of products to return (default: 20)
     - store: filter by store name (parashop, mytek, tunisianet, spacenet)
     - category: filter by category
     - search: search in product name
+    - in_stock: 'true' to keep only in-stock products
     """
     try:
-        # Sample products from scrapers
-        all_products = [
-            {
-                "id": 1,
-                "name": "SVR Set Ampoule Intensive Lifting",
-                "category": "Beauté",
-                "subcategory": "Beauté",
-                "current_price": 89.99,
-                "store_name": "parashop",
-                "images_links": ["https://via.placeholder.com/300?text=SVR+Ampoule"],
-                "product_link": "https://www.parashop.tn"
-            },
-            {
-                "id": 2,
-                "name": "Crème Hydratante Premium",
-                "category": "Soin",
-                "subcategory": "Soin",
-                "current_price": 45.50,
-                "store_name": "parashop",
-                "images_links": ["https://via.placeholder.com/300?text=Creme+Hydratante"],
-                "product_link": "https://www.parashop.tn"
-            },
-            {
-                "id": 3,
-                "name": "Samsung Galaxy A15",
-                "category": "Électronique",
-                "subcategory": "Électronique",
-                "current_price": 799.99,
-                "store_name": "mytek",
-                "images_links": ["https://via.placeholder.com/300?text=Samsung+Galaxy"],
-                "product_link": "https://www.mytek.tn"
-            },
-            {
-                "id": 4,
-                "name": "Shampooing Bio Naturel",
-                "category": "Capillaire",
-                "subcategory": "Capillaire",
-                "current_price": 28.00,
-                "store_name": "tunisianet",
-                "images_links": ["https://via.placeholder.com/300?text=Shampooing+Bio"],
-                "product_link": "https://www.tunisianet.tn"
-            },
-            {
-                "id": 5,
-                "name": "Crème Solaire SPF 50",
-                "category": "Solaire",
-                "subcategory": "Solaire",
-                "current_price": 32.99,
-                "store_name": "spacenet",
-                "images_links": ["https://via.placeholder.com/300?text=Solaire+SPF50"],
-                "product_link": "https://www.spacenet.tn"
-            },
-        ]
-
         # Get query parameters
         limit = int(request.GET.get('limit', 20))
         store = request.GET.get('store', None)
         category = request.GET.get('category', None)
         search = request.GET.get('search', None)
+        in_stock = request.GET.get('in_stock', '').lower() in ('1', 'true', 'yes')
 
         # Ensure limit is reasonable
         limit = min(max(limit, 1), 500)
 
-        # Filter products
-        filtered = all_products
-
-        if store:
-            filtered = [p for p in filtered if p['store_name'].lower() == store.lower()]
-
-        if category:
-            filtered = [p for p in filtered if p['category'].lower() == category.lower()]
-
-        if search:
-            search_lower = search.lower()
-            filtered = [p for p in filtered if search_lower in p['name'].lower()]
-
-        # Apply limit
-        filtered = filtered[:limit]
+        snapshot = get_catalogue_snapshot()
+        filtered = snapshot.filter(
+            store=store, category=category, search=search, in_stock=in_stock, limit=limit
+        )
 
         return Response({
             'count': len(filtered),
@@ -484,73 +434,73 @@ def ChangePasswordView(request):
 @permission_classes([IsAuthenticated])
 def OrderListCreateView(request):
     """
-    GET: Récupère toutes les commandes de l'utilisateur
+    GET: Historique des commandes de l'utilisateur, paginé par curseur
+        ?cursor=<next_cursor>&page_size=20 (100 max)
+        ?updated_since=<sync_token>: uniquement les commandes modifiées depuis le jeton
     POST: Crée une nouvelle commande
     """
     user = request.user
 
     if request.method == 'GET':
-        orders = Order.objects.filter(user=user)
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        orders = Order.objects.filter(user=user).prefetch_related('items')
+        page_size = page_size_from(request.query_params)
+        updated_since = request.query_params.get('updated_since')
 
-    elif request.method == 'POST':
         try:
-            # Récupérer les données
-            cart_items = request.data.get('cart_items', [])
-            shipping_address = request.data.get('shipping_address')
-            shipping_city = request.data.get('shipping_city')
-            shipping_postal_code = request.data.get('shipping_postal_code')
-            payment_method = request.data.get('payment_method', 'online')
-
-            if not cart_items or not shipping_address or not shipping_city or not shipping_postal_code:
-                return Response(
-                    {"error": "Données de commande incomplètes"},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            if updated_since:
+                changed, sync_token, has_more = changed_since(orders, updated_since, page_size)
+                return Response({
+                    'results': OrderSerializer(changed, many=True).data,
+                    'sync_token': sync_token,
+                    'has_more': has_more,
+                }, status=status.HTTP_200_OK)
+
+            page, next_cursor = paginate_history(orders, request.query_params.get('cursor'), page_size)
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            # Calculer le total
-            subtotal = sum(item['price'] * item['quantity'] for item in cart_items)
-            shipping_cost = 10.0  # Frais de livraison fixes
-            total = subtotal + shipping_cost
-
-            # Générer un numéro de commande unique
-            order_number = f"ORD-{datetime.now().strftime('%Y%m%d%H%M%S')}-{random.randint(1000, 9999)}"
-
-            # Créer la commande
-            order = Order.objects.create(
-                user=user,
-                order_number=order_number,
-                payment_method=payment_method,
-                shipping_address=shipping_address,
-                shipping_city=shipping_city,
-                shipping_postal_code=shipping_postal_code,
-                subtotal=subtotal,
-                shipping_cost=shipping_cost,
-                total=total
-            )
+        return Response({
+            'results': OrderSerializer(page, many=True).data,
+            'next_cursor': next_cursor,
+            'sync_token': sync_token_for(Order.objects.filter(user=user)),
+        }, status=status.HTTP_200_OK)
 
-            # Créer les articles de commande
-            for item in cart_items:
-                OrderItem.objects.create(
-                    order=order,
-                    product_id=item['id'],
-                    product_name=item['name'],
-                    store_name=item['store'],
-                    price=item['price'],
-                    quantity=item['quantity'],
-                    subtotal=item['price'] * item['quantity']
-                )
+    elif request.method == 'POST':
+        cart_items = request.data.get('cart_items', [])
+        shipping_address = request.data.get('shipping_address')
+        shipping_city = request.data.get('shipping_city')
+        shipping_postal_code = request.data.get('shipping_postal_code')
+        payment_method = request.data.get('payment_method', 'online')
 
-            serializer = OrderSerializer(order)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        if not cart_items or not shipping_address or not shipping_city or not shipping_postal_code:
+            return Response(
+                {"error": "Données de commande incomplètes"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
+        try:
+            # Prix validés en base, commande + articles en une transaction
+            order = create_order(
+                user, cart_items, shipping_address, shipping_city, shipping_postal_code, payment_method
+            )
+        except CheckoutError as e:
+            body = {"error": str(e)}
+            if e.details:
+                body.update(e.details)
+            return Response(body, status=e.status_code)
         except Exception as e:
+            logger.exception(f"Erreur lors de la création de la commande: {str(e)}")
             return Response(
                 {"error": f"Erreur lors de la création de la commande: {str(e)}"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+        serializer = OrderSerializer(order)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+PAYMENT_STATUSES = ('pending', 'paid', 'failed')
+
 
 @api_view(['GET', 'PUT'])
 @permission_classes([IsAuthenticated])
@@ -558,11 +508,21 @@ def OrderDetailView(request, order_id):
     """
     GET: Récupère une commande spécifique
     PUT: Met à jour le statut d'une commande (admin/backend only)
+    Le statut suit la machine à états (409 si la transition est interdite ou si
+    la commande a changé entre-temps); payment_status: pending, paid ou failed.
     """
     user = request.user
 
+    if request.method == 'PUT' and not user.is_staff:
+        return Response(
+            {"error": "Vous n'avez pas les permissions pour modifier une commande"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
     try:
-        order = Order.objects.get(id=order_id, user=user)
+        # Le personnel accède à toutes les commandes, les clients aux leurs
+        orders = Order.objects.all() if user.is_staff else Order.objects.filter(user=user)
+        order = orders.get(id=order_id)
     except Order.DoesNotExist:
         return Response(
             {"error": "Commande non trouvée"},
@@ -574,40 +534,145 @@ def OrderDetailView(request, order_id):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     elif request.method == 'PUT':
-        # Update order status/payment status
-        if 'status' in request.data:
-            order.status = request.data['status']
-        if 'payment_status' in request.data:
-            order.payment_status = request.data['payment_status']
+        payment_status = request.data.get('payment_status')
+        if payment_status is not None and payment_status not in PAYMENT_STATUSES:
+            return Response(
+                {"error": f"payment_status invalide (valeurs possibles: {', '.join(PAYMENT_STATUSES)})"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        target = request.data.get('status')
+        if target is not None and target != order.status:
+            try:
+                updated = transition(Order, order.id, order.status, target, actor=user)
+            except InvalidTransition:
+                return Response(
+                    {"error": f"Transition {order.status} -> {target} non autorisée"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if updated is None:
+                return Response(
+                    {"error": "Le statut de la commande a changé entre-temps, réessayer"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            order = updated
+
+        if payment_status is not None:
+            # Colonne seule: pas de save() complet de la commande
+            Order.objects.filter(pk=order.pk).update(payment_status=payment_status, updated_at=timezone.now())
+            order.payment_status = payment_status
 
-        order.save()
         serializer = OrderSerializer(order)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+ORDER_EVENTS_DEFAULT_LIMIT = 100
+ORDER_EVENTS_MAX_LIMIT = 500
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def OrderEventFeedView(request):
+    """
+    Flux append-only des changements de statut (commandes et assignations)
+    Query params:
+    - since_event_id: événements d'id strictement supérieur (défaut 0)
+    - limit: nombre max d'événements (défaut 100, max 500)
+    Le personnel voit tous les événements, les clients ceux de leurs commandes;
+    le lecteur rappelle avec last_event_id tant que has_more est vrai.
+    Les ids sont attribués à l'INSERT: une transaction encore ouverte peut
+    commiter un id plus petit qu'un événement déjà visible. Le flux s'arrête
+    donc au premier événement de moins de ORDER_EVENTS_COMMIT_LAG secondes,
+    sans le dépasser: il sera servi au prochain appel.
+    """
+    try:
+        since_event_id = int(request.query_params.get('since_event_id', 0))
+        limit = int(request.query_params.get('limit', ORDER_EVENTS_DEFAULT_LIMIT))
+    except ValueError:
+        return Response(
+            {"error": "since_event_id et limit doivent être des entiers"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    limit = min(max(limit, 1), ORDER_EVENTS_MAX_LIMIT)
+
+    events = OrderEvent.objects.filter(id__gt=since_event_id).select_related('order').order_by('id')
+    if not request.user.is_staff:
+        events = events.filter(order__user=request.user)
+
+    events = list(events[:limit + 1])
+    has_more = len(events) > limit
+    events = events[:limit]
+
+    horizon = timezone.now() - timedelta(seconds=settings.ORDER_EVENTS_COMMIT_LAG)
+    for index, event in enumerate(events):
+        if event.created_at > horizon:
+            events, has_more = events[:index], False
+            break
+
+    return Response({
+        'results': OrderEventSerializer(events, many=True).data,
+        'last_event_id': events[-1].id if events else since_event_id,
+        'has_more': has_more,
+    }, status=status.HTTP_200_OK)
+
+
 # ==================== DRIVER VIEWS ====================
 
+# Assignations affichées par défaut sur le dashboard livreur
+DRIVER_ACTIVE_STATUSES = ('assigned', 'accepted')
+
+def _driver_id(request):
+    """Id du livreur de la requête (claim driver_id du token), None s'il n'est pas livreur"""
+    driver = request_driver(request)
+    return driver.pk if driver is not None else None
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def DriverDashboardView(request):
     """
     Dashboard pour les livreurs
-    Affiche le profil du livreur et ses commandes assignées
+    Affiche le profil du livreur et ses commandes assignées, paginées
+    Query params:
+    - scope: 'active' (défaut: assignées ou acceptées) ou 'all' (tout l'historique)
+    - status: un statut d'assignation précis (prioritaire sur scope)
+    - page, page_size (défaut 20, max 100)
+    Nombre de requêtes constant quel que soit l'historique du livreur.
     """
     try:
-        driver = Driver.objects.get(user=request.user)
+        driver = Driver.objects.select_related('user').get(user=request.user)
     except Driver.DoesNotExist:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
         )
 
-    # Get assigned orders
-    assignments = OrderAssignment.objects.filter(driver=driver).select_related('order')
+    scope = request.query_params.get('scope', 'active')
+    assignment_status = request.query_params.get('status')
+    assignments = OrderAssignment.objects.filter(driver=driver)
+    if assignment_status:
+        assignments = assignments.filter(status=assignment_status)
+    elif scope != 'all':
+        assignments = assignments.filter(status__in=DRIVER_ACTIVE_STATUSES)
+    assignments = (
+        assignments.select_related('order')
+        .prefetch_related(Prefetch(
+            'order__items',
+            queryset=OrderItem.objects.only('id', 'order_id', 'product_name', 'quantity').order_by('id')
+        ))
+        .order_by('-assigned_at', '-id')
+    )
+
+    paginator = Paginator(assignments, page_size_from(request.query_params))
+    page_obj = paginator.get_page(request.query_params.get('page', 1))
 
     return Response({
         'driver': DriverSerializer(driver).data,
-        'assignments': OrderAssignmentSerializer(assignments, many=True).data
+        'assignments': DriverAssignmentSerializer(page_obj, many=True).data,
+        'scope': assignment_status or ('all' if scope == 'all' else 'active'),
+        'count': paginator.count,
+        'total_pages': paginator.num_pages,
+        'current_page': page_obj.number,
     }, status=status.HTTP_200_OK)
 
 
@@ -617,9 +682,8 @@ def DriverAssignedOrdersView(request):
     """
     Récupère les commandes assignées au livreur avec filtrage par statut
     """
-    try:
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -644,31 +708,26 @@ def DriverAcceptOrderView(request, assignment_id):
     """
     from django.utils import timezone
 
-    try:
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    driver_id = _driver_id(request)
+    if driver_id is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
         )
 
-    try:
-        assignment = OrderAssignment.objects.get(id=assignment_id, driver=driver, status='assigned')
-    except OrderAssignment.DoesNotExist:
+    # assigned -> accepted, en un UPDATE conditionnel
+    assignment = transition(
+        OrderAssignment, assignment_id, 'assigned', 'accepted', actor=request.user,
+        filters={'driver_id': driver_id}, accepted_at=timezone.now()
+    )
+    if assignment is None:
         return Response(
             {"error": "Commande non trouvée ou déjà traitée"},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Update assignment status
-    assignment.status = 'accepted'
-    assignment.accepted_at = timezone.now()
-    assignment.save()
-
     # Update order status if needed
-    if assignment.order.status == 'pending':
-        assignment.order.status = 'confirmed'
-        assignment.order.save()
+    transition(Order, assignment.order_id, 'pending', 'confirmed', actor=request.user)
 
     serializer = OrderAssignmentSerializer(assignment)
     return Response({
@@ -685,31 +744,26 @@ def DriverRejectOrderView(request, assignment_id):
     """
     from django.utils import timezone
 
-    try:
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    driver_id = _driver_id(request)
+    if driver_id is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
         )
 
-    try:
-        assignment = OrderAssignment.objects.get(id=assignment_id, driver=driver, status='assigned')
-    except OrderAssignment.DoesNotExist:
+    # Get rejection reason from request
+    rejection_reason = request.data.get('reason', 'Non spécifiée')
+
+    assignment = transition(
+        OrderAssignment, assignment_id, 'assigned', 'rejected', actor=request.user,
+        filters={'driver_id': driver_id}, rejected_at=timezone.now(), rejection_reason=rejection_reason
+    )
+    if assignment is None:
         return Response(
             {"error": "Commande non trouvée ou déjà traitée"},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Get rejection reason from request
-    rejection_reason = request.data.get('reason', 'Non spécifiée')
-
-    # Update assignment status
-    assignment.status = 'rejected'
-    assignment.rejected_at = timezone.now()
-    assignment.rejection_reason = rejection_reason
-    assignment.save()
-
     serializer = OrderAssignmentSerializer(assignment)
     return Response({
         'message': 'Commande refusée',
@@ -766,11 +820,12 @@ def AdminAssignOrderToDriverView(request):
         )
 
     # Create assignment
-    assignment = OrderAssignment.objects.create(
+    assignment = OrderAssignment(
         order=order,
         driver=driver,
         status='assigned'
     )
+    assignment.save(actor=request.user)
 
     serializer = OrderAssignmentSerializer(assignment)
     return Response({
@@ -779,6 +834,58 @@ def AdminAssignOrderToDriverView(request):
     }, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def AdminBulkOrderStatusView(request):
+    """
+    Le personnel applique une même transition de statut à un lot de commandes
+    Requiert: status, et order_ids (liste) ou filters {status, created_from,
+    created_to (YYYY-MM-DD), shipping_city}
+    Un seul UPDATE pour le lot; les commandes refusées sont listées dans failed
+    """
+    if not request.user.is_staff:
+        return Response(
+            {"error": "Vous n'avez pas les permissions pour modifier des commandes"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    target = request.data.get('status')
+    order_ids = request.data.get('order_ids')
+    filters = request.data.get('filters')
+    if not target or (order_ids is None and not filters):
+        return Response(
+            {"error": "status et order_ids (ou filters) sont requis"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        if order_ids is not None:
+            order_ids = [int(order_id) for order_id in order_ids]
+        else:
+            orders = Order.objects.all()
+            if filters.get('status'):
+                orders = orders.filter(status=filters['status'])
+            if filters.get('created_from'):
+                orders = orders.filter(created_at__date__gte=date.fromisoformat(filters['created_from']))
+            if filters.get('created_to'):
+                orders = orders.filter(created_at__date__lte=date.fromisoformat(filters['created_to']))
+            if filters.get('shipping_city'):
+                orders = orders.filter(shipping_city__iexact=filters['shipping_city'])
+            order_ids = list(orders.order_by('id').values_list('id', flat=True)[:BULK_TRANSITION_LIMIT + 1])
+
+        result = bulk_transition_orders(order_ids, target, actor=request.user)
+    except (TypeError, ValueError, AttributeError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'status': target,
+        'updated_count': len(result['updated']),
+        'failed_count': len(result['failed']),
+        'updated': result['updated'],
+        'failed': result['failed'],
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def AdminGetDriversView(request):
@@ -796,6 +903,74 @@ def AdminGetDriversView(request):
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
+SALES_DEFAULT_DAYS = 30
+SALES_MAX_DAYS = 366
+
+
+def _sales_period(request):
+    """(start, end) depuis ?start=&end= (YYYY-MM-DD, défaut: 30 derniers jours)"""
+    end = request.query_params.get('end')
+    start = request.query_params.get('start')
+    end = date.fromisoformat(end) if end else date.today()
+    start = date.fromisoformat(start) if start else end - timedelta(days=SALES_DEFAULT_DAYS - 1)
+    if start > end or (end - start).days >= SALES_MAX_DAYS:
+        raise ValueError(f"Période invalide (start <= end, {SALES_MAX_DAYS} jours max)")
+    return start, end
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def AdminSalesDailyView(request):
+    """
+    Ventes par jour et par magasin, lues dans l'agrégat sales_daily
+    Query params: start, end (YYYY-MM-DD), store
+    """
+    if not request.user.is_staff:
+        return Response(
+            {"error": "Vous n'avez pas les permissions"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        start, end = _sales_period(request)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    days = sales_by_day(start, end, request.query_params.get('store'))
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'total_revenue': round(sum(day['revenue'] for day in days), 2),
+        'results': days,
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def AdminTopProductsView(request):
+    """
+    Produits les plus vendus (chiffre d'affaires) sur la période, depuis sales_daily
+    Query params: start, end (YYYY-MM-DD), store, limit (défaut 10, max 100)
+    """
+    if not request.user.is_staff:
+        return Response(
+            {"error": "Vous n'avez pas les permissions"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    try:
+        start, end = _sales_period(request)
+        limit = min(max(int(request.query_params.get('limit', 10)), 1), 100)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'results': top_products(start, end, request.query_params.get('store'), limit),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['PUT'])
 @permission_classes([IsAuthenticated])
 def DriverCompleteOrderView(request, assignment_id):
@@ -804,31 +979,25 @@ def DriverCompleteOrderView(request, assignment_id):
     """
     from django.utils import timezone
 
-    try:
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    driver_id = _driver_id(request)
+    if driver_id is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
         )
 
-    try:
-        assignment = OrderAssignment.objects.get(id=assignment_id, driver=driver, status='accepted')
-    except OrderAssignment.DoesNotExist:
+    assignment = transition(
+        OrderAssignment, assignment_id, 'accepted', 'completed', actor=request.user,
+        filters={'driver_id': driver_id}, completed_at=timezone.now()
+    )
+    if assignment is None:
         return Response(
             {"error": "Commande non trouvée ou non acceptée"},
             status=status.HTTP_404_NOT_FOUND
         )
 
-    # Update assignment status
-    assignment.status = 'completed'
-    assignment.completed_at = timezone.now()
-    assignment.save()
-
-    # Update order status
-    if assignment.order.status != 'delivered':
-        assignment.order.status = 'delivered'
-        assignment.order.save()
+    # Update order status (aucun effet si elle est déjà livrée)
+    transition(Order, assignment.order_id, DELIVERABLE_ORDER_STATUSES, 'delivered', actor=request.user)
 
     serializer = OrderAssignmentSerializer(assignment)
     return Response({
@@ -846,31 +1015,35 @@ def ConfirmDeliveryView(request, order_id):
     """
     user = request.user
 
-    try:
-        order = Order.objects.get(id=order_id, user=user)
-    except Order.DoesNotExist:
-        return Response(
-            {"error": "Commande non trouvée"},
-            status=status.HTTP_404_NOT_FOUND
-        )
-
     try:
         confirmed = request.data.get('confirmed', False)
         new_status = request.data.get('status', 'received')
 
         if not confirmed and new_status == 'disputed':
             # L'utilisateur a signalé un problème
-            order.status = 'disputed'
+            target = 'disputed'
         elif confirmed and new_status == 'received':
             # L'utilisateur a confirmé la réception
-            order.status = 'received'
+            target = 'received'
         else:
             return Response(
                 {"error": "Statut invalide"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        order.save()
+        # Une commande signalée en litige peut encore être confirmée reçue (ORDER_TRANSITIONS)
+        expected = ('delivered', 'disputed') if target == 'received' else 'delivered'
+        order = transition(Order, order_id, expected, target, actor=user, filters={'user_id': user.id})
+        if order is None:
+            if not Order.objects.filter(id=order_id, user=user).exists():
+                return Response(
+                    {"error": "Commande non trouvée"},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(
+                {"error": "La commande n'est pas en attente de confirmation de livraison"},
+                status=status.HTTP_409_CONFLICT
+            )
 
         serializer = OrderSerializer(order)
         return Response({
@@ -894,10 +1067,9 @@ def driver_delivery_calendar(request):
     Paramètres: year, month (optionnels pour filtrer)
     Inclut les assignements avec leurs statuts pour la coloration du calendrier
     """
-    try:
-        # Vérifier que l'utilisateur est un livreur
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    # Vérifier que l'utilisateur est un livreur
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Utilisateur n'est pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -1018,9 +1190,8 @@ def manage_driver_availability(request):
     GET: Récupère la disponibilité actuelle (crée une nouvelle si n'existe pas)
     POST/PUT: Crée ou met à jour la disponibilité
     """
-    try:
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Utilisateur n'est pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -1166,10 +1337,9 @@ def driver_delivery_history(request, day_id):
     Récupère l'historique réel des livraisons pour un jour spécifique
     Retourne les commandes réellement acceptées/complétées par le livreur ce jour-là
     """
-    try:
-        # Vérifier que l'utilisateur est un livreur
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    # Vérifier que l'utilisateur est un livreur
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -1241,10 +1411,9 @@ def transfer_undelivered_orders(request, day_id):
     Transfère automatiquement les commandes non livrées au jour suivant
     POST: Transfère les commandes avec status 'assigned' ou 'accepted' au jour suivant
     """
-    try:
-        # Vérifier que l'utilisateur est un livreur
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    # Vérifier que l'utilisateur est un livreur
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -1307,10 +1476,9 @@ def confirm_order_delivery(request, assignment_id):
     Confirme la livraison d'une commande (passe le statut à 'confirmed')
     POST: Marque la commande comme confirmée par le client
     """
-    try:
-        # Vérifier que l'utilisateur est un livreur
-        driver = Driver.objects.get(user=request.user)
-    except Driver.DoesNotExist:
+    # Vérifier que l'utilisateur est un livreur
+    driver = request_driver(request)
+    if driver is None:
         return Response(
             {"error": "Vous n'êtes pas un livreur"},
             status=status.HTTP_403_FORBIDDEN
@@ -1328,7 +1496,7 @@ def confirm_order_delivery(request, assignment_id):
     # Mettre à jour le statut à 'confirmed'
     assignment.status = 'confirmed'
     assignment.confirmed_at = datetime.now()
-    assignment.save()
+    assignment.save(actor=request.user)
 
     return Response({
         'success': True,
@@ -1350,14 +1518,13 @@ def list_invoices(request):
         invoices = Invoice.objects.all().order_by('-issued_at')
     else:
         # Driver sees invoices from their own orders
-        try:
-            driver = Driver.objects.get(user=request.user)
-            invoices = Invoice.objects.filter(driver=driver).order_by('-issued_at')
-        except Driver.DoesNotExist:
+        driver = request_driver(request)
+        if driver is None:
             return Response(
                 {"error": "Utilisateur n'est pas un livreur"},
                 status=status.HTTP_403_FORBIDDEN
             )
+        invoices = Invoice.objects.filter(driver=driver).order_by('-issued_at')
 
     # Pagination
     paginator = Paginator(invoices, 10)
@@ -1635,16 +1802,14 @@ class NotificationActionView(APIView):
         notification.is_read = True
         from django.utils import timezone
         notification.read_at = timezone.now()
-        notification.save()
+        notification.save(update_fields=['action_taken', 'is_read', 'read_at'])
 
         # If this is a delivery confirmation/rejection notification, update order status
-        if notification.notification_type == 'order_delivered' and notification.order:
-            order = notification.order
-            if action == 'confirmed':
-                order.status = 'received'
-            elif action == 'rejected':
-                order.status = 'disputed'
-            order.save()
+        if notification.notification_type == 'order_delivered' and notification.order_id:
+            transition(
+                Order, notification.order_id, 'delivered',
+                'received' if action == 'confirmed' else 'disputed', actor=request.user
+            )
 
         return Response({
             'success': True,
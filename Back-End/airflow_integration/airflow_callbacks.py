@@ -0,0 +1,130 @@
+"""
+Callbacks à copier dans le dossier dags/ d'Airflow (aucune dépendance Django)
+
+    from backend_callbacks import notify_backend
+
+    DAG(..., on_success_callback=notify_backend, on_failure_callback=notify_backend)
+
+Métriques d'ingestion (optionnel), dans les tâches qui écrivent en base:
+
+    from backend_callbacks import IngestionMetrics
+
+    metrics = IngestionMetrics()
+    with metrics.db_write():
+        inserted, updated = upsert_products(rows)
+    metrics.add(rows_inserted=inserted, rows_updated=updated,
+                rows_unchanged=len(rows) - inserted - updated, bytes_fetched=size)
+    metrics.push(context)
+
+Elles sont additionnées sur toutes les tâches du run et envoyées avec le webhook.
+
+Variables d'environnement côté Airflow:
+    BACKEND_WEBHOOK_URL      ex: http://backend:8000/api/airflow/webhooks/dag-run/
+    AIRFLOW_WEBHOOK_SECRET   même secret que le backend Django
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import time
+import urllib.request
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+METRICS_XCOM_KEY = 'ingestion_metrics'
+METRIC_KEYS = ('rows_inserted', 'rows_updated', 'rows_unchanged', 'bytes_fetched', 'db_write_seconds')
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+class IngestionMetrics:
+    """Compteurs d'ingestion d'une tâche, poussés en XCom pour le webhook de fin de run"""
+
+    def __init__(self):
+        self.values = dict.fromkeys(METRIC_KEYS, 0)
+
+    def add(self, **counts):
+        for key, value in counts.items():
+            if key not in self.values:
+                raise KeyError(f"Métrique inconnue: {key}")
+            self.values[key] += value
+
+    @contextmanager
+    def db_write(self):
+        """Chronométrer une écriture en base (cumulé dans db_write_seconds)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.values['db_write_seconds'] += time.perf_counter() - start
+
+    def push(self, context):
+        context['ti'].xcom_push(key=METRICS_XCOM_KEY, value=self.values)
+
+
+def collect_metrics(dag_run):
+    """Additionner les métriques poussées par les tâches du run (None si aucune)"""
+    totals = None
+    for ti in dag_run.get_task_instances():
+        pushed = ti.xcom_pull(task_ids=ti.task_id, key=METRICS_XCOM_KEY)
+        for values in (pushed if isinstance(pushed, list) else [pushed]):
+            if not values:
+                continue
+            totals = totals or dict.fromkeys(METRIC_KEYS, 0)
+            for key in METRIC_KEYS:
+                totals[key] += values.get(key) or 0
+    return totals
+
+
+def build_payload(context):
+    """Corps JSON du webhook depuis le contexte du callback"""
+    dag_run = context['dag_run']
+    try:
+        metrics = collect_metrics(dag_run)
+    except Exception as e:
+        logger.warning(f"Métriques d'ingestion indisponibles: {str(e)}")
+        metrics = None
+    return {
+        'dag_id': dag_run.dag_id,
+        'dag_run_id': dag_run.run_id,
+        'state': str(dag_run.state),
+        'run_type': str(dag_run.run_type),
+        'execution_date': _iso(getattr(dag_run, 'logical_date', None) or dag_run.execution_date),
+        'start_date': _iso(dag_run.start_date),
+        'end_date': _iso(dag_run.end_date),
+        'conf': dag_run.conf or None,
+        'metrics': metrics,
+    }
+
+
+def sign(secret, timestamp, body):
+    """Signature `sha256=<hex>` de `<timestamp>.<body>` (identique au backend)"""
+    message = timestamp.encode('utf-8') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def notify_backend(context, url=None, secret=None, timeout=5):
+    """Envoyer la fin du DAG run au backend (les erreurs sont journalisées, jamais levées)"""
+    url = url or os.environ.get('BACKEND_WEBHOOK_URL')
+    secret = secret or os.environ.get('AIRFLOW_WEBHOOK_SECRET')
+    if not url or not secret:
+        logger.warning("BACKEND_WEBHOOK_URL / AIRFLOW_WEBHOOK_SECRET non configurés, webhook ignoré")
+        return
+
+    body = json.dumps(build_payload(context)).encode('utf-8')
+    timestamp = str(int(time.time()))
+    request = urllib.request.Request(url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-Airflow-Timestamp': timestamp,
+        'X-Airflow-Signature': sign(secret, timestamp, body),
+    })
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            logger.info(f"Webhook backend: HTTP {response.status}")
+    except Exception as e:
+        logger.error(f"Webhook backend échoué: {str(e)}")
@@ -5,12 +5,42 @@ Intégration avec l'API REST d'Airflow pour Django Backend
 
 import requests
 import logging
-from typing import Dict, List, Optional, Any
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Any
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
 
+from .cache import SWRCache
+from .circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
 logger = logging.getLogger(__name__)
 
+# Durée de fraîcheur (secondes) par type de ressource; une valeur périmée reste
+# servie pendant CACHE_STALE_FACTOR * ttl le temps d'être rafraîchie en tâche de fond
+DEFAULT_CACHE_TTLS = {
+    'health': 5,
+    'dags': 30,
+    'dag': 30,
+    'dag_runs': 5,
+}
+CACHE_STALE_FACTOR = 3
+
+# Taille de page par défaut des itérateurs (limite maximale par défaut de l'API Airflow)
+DEFAULT_PAGE_SIZE = 100
+
+# Tout 5xx est compté comme une panne d'Airflow (les 4xx sont des erreurs d'appel);
+# seuls les 5xx de passerelle, transitoires, justifient un nouvel essai des GET
+RETRYABLE_STATUS_CODES = (502, 503, 504)
+
+
+def is_server_error(status_code: int) -> bool:
+    """Réponse 5xx: panne d'Airflow pour le circuit breaker"""
+    return 500 <= status_code < 600
+
 
 class AirflowClient:
     """Client pour interagir avec l'API REST d'Airflow"""
@@ -20,7 +50,14 @@ class AirflowClient:
         base_url: str = "http://localhost:8080",
         username: str = "airflow",
         password: str = "airflow",
-        timeout: int = 30
+        timeout: float = 10,
+        connect_timeout: float = 3,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        pool_maxsize: int = 10,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30
     ):
         """
         Initialiser le client Airflow
@@ -29,13 +66,50 @@ class AirflowClient:
             base_url: URL de base d'Airflow (ex: http://localhost:8080)
             username: Nom d'utilisateur Airflow
             password: Mot de passe Airflow
-            timeout: Timeout des requêtes en secondes
+            timeout: Timeout de lecture en secondes
+            connect_timeout: Timeout de connexion en secondes
+            cache_ttls: TTL par type de ressource (health, dags, dag, dag_runs);
+                0 désactive le cache pour ce type
+            max_retries: Nouvelles tentatives pour les GET (idempotents)
+            backoff_base: Base du backoff exponentiel avec jitter (secondes)
+            pool_maxsize: Connexions simultanées maximum vers Airflow (par process)
+            failure_threshold: Échecs consécutifs avant ouverture du circuit
+            recovery_timeout: Durée d'ouverture du circuit avant un appel d'essai
         """
         self.base_url = base_url.rstrip('/')
         self.auth = HTTPBasicAuth(username, password)
-        self.timeout = timeout
+        self.timeout = (connect_timeout, timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
         self.session = requests.Session()
         self.session.auth = self.auth
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # Borne les appels simultanés: au-delà, on échoue vite plutôt que d'attendre
+        self.slots = threading.BoundedSemaphore(pool_maxsize)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, recovery_timeout=recovery_timeout)
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **(cache_ttls or {})}
+        self.cache = SWRCache()
+
+    def _cached(self, resource: str, key: tuple, fetch):
+        """Lire une ressource via le cache stale-while-revalidate"""
+        ttl = self.cache_ttls.get(resource, 0)
+        if not ttl:
+            return fetch()
+        return self.cache.get((resource,) + key, fetch, ttl=ttl, stale_ttl=ttl * CACHE_STALE_FACTOR)
+
+    def invalidate_cache(self, dag_id: Optional[str] = None):
+        """
+        Invalider le cache (tout, ou seulement ce qui concerne un DAG)
+
+        Args:
+            dag_id: ID du DAG (None pour tout invalider)
+        """
+        if dag_id is None:
+            self.cache.invalidate()
+        else:
+            self.cache.invalidate(lambda key: key[0] == 'dags' or (len(key) > 1 and key[1] == dag_id))
 
     def _request(
         self,
@@ -44,7 +118,7 @@ class AirflowClient:
         **kwargs
     ) -> requests.Response:
         """
-        Effectuer une requête HTTP
+        Effectuer une requête HTTP (circuit breaker + retries des GET)
 
         Args:
             method: Méthode HTTP (GET, POST, etc.)
@@ -53,17 +127,125 @@ class AirflowClient:
 
         Returns:
             Response object
+
+        Raises:
+            CircuitBreakerOpen: si le circuit est ouvert ou le pool saturé
+            requests.exceptions.RequestException: en cas d'échec de la requête
         """
         url = f"{self.base_url}{endpoint}"
         kwargs.setdefault('timeout', self.timeout)
-
+        attempts = 1 + (self.max_retries if method.upper() == 'GET' else 0)
+
+        for attempt in range(attempts):
+            if not self.breaker.allow():
+                logger.warning(f"Circuit Airflow ouvert, requête {method} {url} refusée")
+                raise CircuitBreakerOpen(f"Airflow circuit open (retry in {self.breaker.retry_after():.0f}s)")
+            try:
+                response = self._send(method, url, **kwargs)
+            except CircuitBreakerOpen:
+                # Pool saturé: l'appel n'est pas parti, rendre l'essai réservé
+                self.breaker.release()
+                raise
+            except requests.exceptions.RequestException as e:
+                if not self._is_airflow_failure(e):
+                    # Erreur côté appelant (4xx): Airflow répond, le circuit reste fermé
+                    self.breaker.record_success()
+                    logger.error(f"Erreur lors de la requête {method} {url}: {str(e)}")
+                    raise
+                self.breaker.record_failure(e)
+                if attempt + 1 >= attempts or not self._is_retryable(e):
+                    logger.error(f"Erreur lors de la requête {method} {url}: {str(e)}")
+                    raise
+                delay = random.uniform(0, self.backoff_base * (2 ** attempt))
+                logger.warning(f"Requête {method} {url} échouée ({str(e)}), nouvel essai dans {delay:.2f}s")
+                time.sleep(delay)
+            except BaseException:
+                # Exception inattendue: aucun résultat à enregistrer, rendre l'essai réservé
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return response
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Envoyer une requête en occupant un slot du pool borné"""
+        if not self.slots.acquire(timeout=self.timeout[0]):
+            raise CircuitBreakerOpen("Airflow connection pool exhausted")
         try:
             response = self.session.request(method, url, **kwargs)
             response.raise_for_status()
             return response
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erreur lors de la requête {method} {url}: {str(e)}")
-            raise
+        finally:
+            self.slots.release()
+
+    @staticmethod
+    def _is_airflow_failure(error: requests.exceptions.RequestException) -> bool:
+        """Panne d'Airflow (connexion, timeout, 5xx) vs erreur d'appel"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            response = error.response
+            return response is not None and is_server_error(response.status_code)
+        return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    @staticmethod
+    def _is_retryable(error: requests.exceptions.RequestException) -> bool:
+        """Panne transitoire (connexion, timeout, 5xx de passerelle) qu'un nouvel essai peut résoudre"""
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response.status_code in RETRYABLE_STATUS_CODES
+        return True
+
+    def _iter_pages(
+        self,
+        endpoint: str,
+        items_key: str,
+        params: Optional[Dict[str, Any]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourir toutes les pages d'une collection Airflow (sans cache)
+
+        Args:
+            endpoint: Endpoint de la collection
+            items_key: Clé de la liste dans la réponse (dags, dag_runs, ...)
+            params: Filtres supplémentaires
+            page_size: Nombre d'éléments par page
+            prefetch: Demander la page suivante pendant que la page courante est consommée
+
+        Yields:
+            Les éléments un par un
+        """
+        params = dict(params or {})
+
+        def fetch(offset):
+            return self._request('GET', endpoint, params={**params, 'limit': page_size, 'offset': offset}).json()
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        pending = None
+        try:
+            offset = 0
+            page = fetch(offset)
+            while True:
+                items = page.get(items_key, [])
+                total = page.get('total_entries')
+                # Airflow plafonne `limit` (maximum_page_limit): une page plus courte
+                # que page_size n'est pas forcément la dernière
+                offset += len(items)
+                has_more = bool(items) and (total is None or offset < total)
+                if has_more and executor:
+                    pending = executor.submit(fetch, offset)
+
+                yield from items
+
+                if not has_more:
+                    return
+                page = pending.result() if pending else fetch(offset)
+                pending = None
+        finally:
+            # Générateur abandonné en cours de route: ne pas attendre la page préchargée
+            if pending is not None:
+                pending.cancel()
+            if executor:
+                executor.shutdown(wait=False)
 
     # ==================== DAG Endpoints ====================
 
@@ -79,8 +261,20 @@ class AirflowClient:
             Dict contenant la liste des DAGs
         """
         params = {'limit': limit, 'offset': offset}
-        response = self._request('GET', '/api/v1/dags', params=params)
-        return response.json()
+        return self._cached(
+            'dags', (limit, offset),
+            lambda: self._request('GET', '/api/v1/dags', params=params).json()
+        )
+
+    def iter_dags(self, page_size: int = DEFAULT_PAGE_SIZE, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Itérer sur tous les DAGs, page par page
+
+        Args:
+            page_size: Nombre de DAGs par requête
+            prefetch: Précharger la page suivante en parallèle
+        """
+        return self._iter_pages('/api/v1/dags', 'dags', page_size=page_size, prefetch=prefetch)
 
     def get_dag(self, dag_id: str) -> Dict[str, Any]:
         """
@@ -92,8 +286,10 @@ class AirflowClient:
         Returns:
             Dict contenant les infos du DAG
         """
-        response = self._request('GET', f'/api/v1/dags/{dag_id}')
-        return response.json()
+        return self._cached(
+            'dag', (dag_id,),
+            lambda: self._request('GET', f'/api/v1/dags/{dag_id}').json()
+        )
 
     def get_dag_tasks(self, dag_id: str) -> List[Dict[str, Any]]:
         """
@@ -114,7 +310,8 @@ class AirflowClient:
         self,
         dag_id: str,
         conf: Optional[Dict[str, Any]] = None,
-        note: Optional[str] = None
+        note: Optional[str] = None,
+        dag_run_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Déclencher l'exécution d'un DAG
@@ -123,6 +320,7 @@ class AirflowClient:
             dag_id: ID du DAG à déclencher
             conf: Configuration du DAG (optionnel)
             note: Note pour l'exécution (optionnel)
+            dag_run_id: ID du run à créer (optionnel; Airflow répond 409 s'il existe déjà)
 
         Returns:
             Dict contenant l'info de la nouvelle exécution
@@ -132,12 +330,16 @@ class AirflowClient:
             payload['conf'] = conf
         if note:
             payload['note'] = note
+        if dag_run_id:
+            payload['dag_run_id'] = dag_run_id
 
         response = self._request(
             'POST',
             f'/api/v1/dags/{dag_id}/dagRuns',
             json=payload
         )
+        # Le nouveau run doit apparaître immédiatement dans l'historique
+        self.invalidate_cache(dag_id)
         return response.json()
 
     def get_dag_runs(
@@ -145,7 +347,9 @@ class AirflowClient:
         dag_id: str,
         limit: int = 10,
         offset: int = 0,
-        state: Optional[str] = None
+        state: Optional[str] = None,
+        execution_date_gte: Optional[str] = None,
+        order_by: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Récupérer l'historique d'exécution d'un DAG
@@ -155,6 +359,8 @@ class AirflowClient:
             limit: Nombre maximum de runs
             offset: Offset pour la pagination
             state: Filtrer par état (success, failed, running, etc.)
+            execution_date_gte: Ne garder que les runs à partir de cette date (ISO 8601)
+            order_by: Tri Airflow (ex: execution_date, -execution_date)
 
         Returns:
             Dict contenant la liste des DAG runs
@@ -165,13 +371,47 @@ class AirflowClient:
         }
         if state:
             params['state'] = state
+        if execution_date_gte:
+            params['execution_date_gte'] = execution_date_gte
+        if order_by:
+            params['order_by'] = order_by
+
+        return self._cached(
+            'dag_runs', (dag_id, limit, offset, state, execution_date_gte, order_by),
+            lambda: self._request('GET', f'/api/v1/dags/{dag_id}/dagRuns', params=params).json()
+        )
 
-        response = self._request(
-            'GET',
-            f'/api/v1/dags/{dag_id}/dagRuns',
-            params=params
+    def iter_dag_runs(
+        self,
+        dag_id: str,
+        state: Optional[str] = None,
+        execution_date_gte: Optional[str] = None,
+        order_by: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itérer sur tout l'historique d'exécution d'un DAG, page par page
+
+        Args:
+            dag_id: ID du DAG
+            state: Filtrer par état
+            execution_date_gte: Ne garder que les runs à partir de cette date (ISO 8601)
+            order_by: Tri Airflow (ex: execution_date, -execution_date)
+            page_size: Nombre de runs par requête
+            prefetch: Précharger la page suivante en parallèle
+        """
+        params = {}
+        if state:
+            params['state'] = state
+        if execution_date_gte:
+            params['execution_date_gte'] = execution_date_gte
+        if order_by:
+            params['order_by'] = order_by
+        return self._iter_pages(
+            f'/api/v1/dags/{dag_id}/dagRuns', 'dag_runs',
+            params=params, page_size=page_size, prefetch=prefetch
         )
-        return response.json()
 
     def get_dag_run(self, dag_id: str, run_id: str) -> Dict[str, Any]:
         """
@@ -200,7 +440,8 @@ class AirflowClient:
         Returns:
             Dict contenant l'info de la dernière exécution, ou None si aucune
         """
-        runs = self.get_dag_runs(dag_id, limit=1)
+        # Airflow trie par date d'exécution croissante par défaut
+        runs = self.get_dag_runs(dag_id, limit=1, order_by='-execution_date')
         if runs.get('dag_runs'):
             return runs['dag_runs'][0]
         return None
@@ -211,7 +452,8 @@ class AirflowClient:
         self,
         dag_id: str,
         limit: int = 10,
-        offset: int = 0
+        offset: int = 0,
+        dag_run_id: str = '~'
     ) -> Dict[str, Any]:
         """
         Récupérer les instances de tâches d'un DAG
@@ -220,6 +462,7 @@ class AirflowClient:
             dag_id: ID du DAG
             limit: Nombre maximum
             offset: Offset pour la pagination
+            dag_run_id: ID du run ('~' pour tous les runs)
 
         Returns:
             Dict contenant la liste des instances de tâches
@@ -230,44 +473,94 @@ class AirflowClient:
         }
         response = self._request(
             'GET',
-            f'/api/v1/dags/{dag_id}/dagRuns',
+            f'/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances',
             params=params
         )
         return response.json()
 
+    def list_task_instances(
+        self,
+        dag_ids: Optional[List[str]] = None,
+        dag_run_ids: Optional[List[str]] = None,
+        page_size: int = DEFAULT_PAGE_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itérer sur les task instances de plusieurs DAGs/runs via l'endpoint batch
+        (POST /api/v1/dags/~/dagRuns/~/taskInstances/list)
+
+        Args:
+            dag_ids: DAGs à inclure (tous si None)
+            dag_run_ids: Runs à inclure (tous si None)
+            page_size: Nombre d'instances par requête
+        """
+        payload = {}
+        if dag_ids:
+            payload['dag_ids'] = list(dag_ids)
+        if dag_run_ids:
+            payload['dag_run_ids'] = list(dag_run_ids)
+
+        offset = 0
+        while True:
+            page = self._request(
+                'POST',
+                '/api/v1/dags/~/dagRuns/~/taskInstances/list',
+                json={**payload, 'page_offset': offset, 'page_limit': page_size}
+            ).json()
+            items = page.get('task_instances', [])
+            yield from items
+
+            total = page.get('total_entries')
+            offset += len(items)
+            # Page plus courte que page_size: plafond maximum_page_limit d'Airflow, pas la fin
+            if not items or (total is not None and offset >= total):
+                return
+
+    def iter_task_instances(
+        self,
+        dag_id: str,
+        dag_run_id: str = '~',
+        page_size: int = DEFAULT_PAGE_SIZE,
+        prefetch: bool = False
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Itérer sur les instances de tâches d'un DAG run, page par page
+
+        Args:
+            dag_id: ID du DAG
+            dag_run_id: ID du run ('~' pour tous les runs)
+            page_size: Nombre d'instances par requête
+            prefetch: Précharger la page suivante en parallèle
+        """
+        return self._iter_pages(
+            f'/api/v1/dags/{dag_id}/dagRuns/{dag_run_id}/taskInstances', 'task_instances',
+            page_size=page_size, prefetch=prefetch
+        )
+
     # ==================== Statistics ====================
 
-    def get_dag_stats(self, dag_id: str) -> Dict[str, Any]:
+    def get_dag_stats(
+        self,
+        dag_id: str,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Récupérer les statistiques d'un DAG
 
+        Calculées sur le miroir local scraper_runs (sans appel à Airflow), voir
+        scraper_runs.scraper_run_stats
+
         Args:
             dag_id: ID du DAG
+            since / until: Fenêtre de dates d'exécution (défaut: tout l'historique)
 
         Returns:
             Dict contenant les statistiques (runs réussis, échoués, etc.)
         """
-        runs = self.get_dag_runs(dag_id, limit=100)
-        stats = {
-            'total_runs': len(runs.get('dag_runs', [])),
-            'success': 0,
-            'failed': 0,
-            'running': 0,
-            'skipped': 0
-        }
-
-        for run in runs.get('dag_runs', []):
-            state = run.get('state', '').lower()
-            if state == 'success':
-                stats['success'] += 1
-            elif state == 'failed':
-                stats['failed'] += 1
-            elif state == 'running':
-                stats['running'] += 1
-            elif state == 'skipped':
-                stats['skipped'] += 1
+        # Import local: le client reste importable sans les modèles Django chargés
+        from .scraper_runs import scraper_run_stats
 
-        return stats
+        return scraper_run_stats(dag_id, since=since, until=until)
 
     def get_health(self) -> Dict[str, Any]:
         """
@@ -276,13 +569,11 @@ class AirflowClient:
         Returns:
             Dict contenant le statut de santé
         """
+        def fetch():
+            return self._request('GET', '/api/v2/monitor/health').json()
+
         try:
-            response = self.session.get(
-                f"{self.base_url}/api/v2/monitor/health",
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            data = response.json()
+            data = self._cached('health', (), fetch)
 
             component_statuses = []
             for value in data.values():
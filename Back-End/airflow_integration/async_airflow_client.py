@@ -0,0 +1,211 @@
+"""
+Client async de l'API REST d'Airflow
+Un client httpx par process (keep-alive HTTP/1.1), ouvert et fermé par le
+lifespan ASGI; même circuit breaker et même pool borné que le client sync
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Iterable, Optional
+
+import httpx
+
+from .airflow_client import AirflowClient, is_server_error
+from .circuit_breaker import CircuitBreaker, CircuitBreakerOpen
+
+logger = logging.getLogger(__name__)
+
+# Attente entre deux tentatives de prise d'un slot du pool borné (secondes)
+SLOT_POLL_INTERVAL = 0.01
+
+
+class AsyncAirflowClient:
+    """Variante async d'AirflowClient pour les fan-out concurrents"""
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8080",
+        username: str = "airflow",
+        password: str = "airflow",
+        timeout: float = 30,
+        connect_timeout: float = 3,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        slots: Optional[threading.BoundedSemaphore] = None
+    ):
+        """
+        Initialiser le client Airflow async
+
+        Args:
+            base_url: URL de base d'Airflow (ex: http://localhost:8080)
+            username: Nom d'utilisateur Airflow
+            password: Mot de passe Airflow
+            timeout: Timeout de lecture en secondes
+            connect_timeout: Timeout de connexion (et d'attente d'un slot) en secondes
+            max_connections: Taille maximale du pool de connexions httpx
+            max_keepalive_connections: Connexions gardées ouvertes entre deux requêtes
+            transport: Transport httpx (tests)
+            breaker: Circuit breaker partagé (celui du client sync)
+            slots: Slots d'appels simultanés partagés (ceux du client sync)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.auth = httpx.BasicAuth(username, password)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.connect_timeout = connect_timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.transport = transport
+        self.breaker = breaker or CircuitBreaker()
+        self.slots = slots or threading.BoundedSemaphore(max_connections)
+        # Client du process, lié à la boucle du worker ASGI (un AsyncClient ne
+        # peut pas changer de boucle)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            auth=self.auth,
+            timeout=self.timeout,
+            limits=self.limits,
+            transport=self.transport
+        )
+
+    async def open(self):
+        """Ouvrir le client du process sur la boucle courante (démarrage du worker ASGI)"""
+        if self._client is None:
+            self._client = self._new_client()
+            self._loop = asyncio.get_running_loop()
+
+    async def aclose(self):
+        """Fermer le client du process (arrêt du worker ASGI)"""
+        client, self._client, self._loop = self._client, None, None
+        if client is not None:
+            await client.aclose()
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Client du process s'il est ouvert sur la boucle courante, sinon un client
+        fermé en sortie (WSGI: async_to_sync crée une boucle par appel)
+        """
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            yield self._client
+            return
+        async with self._new_client() as client:
+            yield client
+
+    async def _acquire_slot(self):
+        """Prendre un slot du pool borné sans bloquer la boucle; échouer vite s'il reste saturé"""
+        deadline = time.monotonic() + self.connect_timeout
+        while not self.slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                raise CircuitBreakerOpen("Airflow connection pool exhausted")
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    async def _request(self, client: httpx.AsyncClient, method: str, endpoint: str, **kwargs) -> httpx.Response:
+        """
+        Effectuer une requête HTTP async (circuit breaker + pool borné)
+
+        Args:
+            client: Client httpx (voir session())
+            method: Méthode HTTP (GET, POST, etc.)
+            endpoint: Endpoint de l'API (ex: /api/v1/dags)
+            **kwargs: Arguments supplémentaires pour httpx
+
+        Returns:
+            Response object
+
+        Raises:
+            CircuitBreakerOpen: si le circuit est ouvert ou le pool saturé
+            httpx.HTTPError: en cas d'échec de la requête
+        """
+        await self._acquire_slot()
+        try:
+            if not self.breaker.allow():
+                logger.warning(f"Circuit Airflow ouvert, requête {method} {self.base_url}{endpoint} refusée")
+                raise CircuitBreakerOpen(f"Airflow circuit open (retry in {self.breaker.retry_after():.0f}s)")
+            try:
+                response = await client.request(method, endpoint, **kwargs)
+                response.raise_for_status()
+            except httpx.HTTPStatusError as e:
+                if is_server_error(e.response.status_code):
+                    self.breaker.record_failure(e)
+                else:
+                    # Erreur côté appelant (4xx): Airflow répond, le circuit reste fermé
+                    self.breaker.record_success()
+                logger.error(f"Erreur lors de la requête {method} {self.base_url}{endpoint}: {str(e)}")
+                raise
+            except httpx.TransportError as e:
+                self.breaker.record_failure(e)
+                logger.error(f"Erreur lors de la requête {method} {self.base_url}{endpoint}: {str(e)}")
+                raise
+            except BaseException:
+                # Appel annulé ou exception inattendue: rendre l'essai réservé
+                self.breaker.release()
+                raise
+            self.breaker.record_success()
+            return response
+        finally:
+            self.slots.release()
+
+    # ==================== DAG Run Endpoints ====================
+
+    async def get_dag_runs(
+        self,
+        dag_id: str,
+        limit: int = 10,
+        offset: int = 0,
+        state: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Récupérer l'historique d'exécution d'un DAG"""
+        params = {'limit': limit, 'offset': offset}
+        if state:
+            params['state'] = state
+        async with self.session() as client:
+            response = await self._request(client, 'GET', f'/api/v1/dags/{dag_id}/dagRuns', params=params)
+        return response.json()
+
+    async def _latest_dag_run(self, client: httpx.AsyncClient, dag_id: str) -> Optional[Dict[str, Any]]:
+        # Airflow trie par date d'exécution croissante par défaut
+        response = await self._request(
+            client, 'GET', f'/api/v1/dags/{dag_id}/dagRuns',
+            params={'limit': 1, 'offset': 0, 'order_by': '-execution_date'}
+        )
+        runs = response.json()
+        if runs.get('dag_runs'):
+            return runs['dag_runs'][0]
+        return None
+
+    async def get_latest_dag_run(self, dag_id: str) -> Optional[Dict[str, Any]]:
+        """Récupérer la dernière exécution d'un DAG (ou None)"""
+        async with self.session() as client:
+            return await self._latest_dag_run(client, dag_id)
+
+    async def get_latest_dag_runs(self, dag_ids: Iterable[str]) -> Dict[str, Any]:
+        """
+        Récupérer en parallèle la dernière exécution de plusieurs DAGs
+
+        Returns:
+            Dict {dag_id: run | None | Exception}; une erreur sur un DAG
+            n'interrompt pas les autres
+        """
+        dag_ids = list(dag_ids)
+        async with self.session() as client:
+            results = await asyncio.gather(
+                *(self._latest_dag_run(client, dag_id) for dag_id in dag_ids),
+                return_exceptions=True
+            )
+        return dict(zip(dag_ids, results))
+
+    # ==================== Utility Methods ====================
+
+    format_dag_run = AirflowClient.format_dag_run
+    _calculate_duration = staticmethod(AirflowClient._calculate_duration)
@@ -0,0 +1,98 @@
+"""
+Accès asynchrone à la base catalogue (psycopg3 + pool de connexions async)
+Utilisé par les vues async servies sous ASGI (uvicorn)
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Sequence
+
+from django.conf import settings
+from psycopg import AsyncConnection
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from .products_views import (
+    SCRAPER_DB_HOST, SCRAPER_DB_NAME, SCRAPER_DB_PASSWORD, SCRAPER_DB_PORT, SCRAPER_DB_USER,
+)
+
+logger = logging.getLogger(__name__)
+
+# Un pool par process, ouvert et fermé par le lifespan ASGI (backend.asgi) sur la
+# boucle du worker uvicorn. Sans lifespan (WSGI: async_to_sync crée une boucle par
+# appel; tests), chaque requête ouvre sa propre connexion et la ferme aussitôt:
+# rien ne reste attaché à une boucle terminée.
+_pool: Optional[AsyncConnectionPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _conninfo() -> str:
+    return (
+        f"host={SCRAPER_DB_HOST} port={SCRAPER_DB_PORT} dbname={SCRAPER_DB_NAME} "
+        f"user={SCRAPER_DB_USER} password={SCRAPER_DB_PASSWORD} client_encoding=UTF8"
+    )
+
+
+async def open_pool() -> AsyncConnectionPool:
+    """Ouvrir le pool du process sur la boucle courante (démarrage du worker ASGI)"""
+    global _pool, _pool_loop
+    if _pool is None:
+        _pool = AsyncConnectionPool(
+            _conninfo(),
+            min_size=getattr(settings, 'ASYNC_DB_POOL_MIN_SIZE', 2),
+            max_size=getattr(settings, 'ASYNC_DB_POOL_MAX_SIZE', 10),
+            timeout=getattr(settings, 'ASYNC_DB_POOL_TIMEOUT', 10),
+            kwargs={'row_factory': dict_row, 'autocommit': True},
+            open=False,
+        )
+        _pool_loop = asyncio.get_running_loop()
+        await _pool.open()
+        logger.info(f"Pool async catalogue ouvert ({_pool.min_size}-{_pool.max_size} connexions)")
+    return _pool
+
+
+async def close_pool():
+    """Fermer le pool du process (arrêt du worker ASGI)"""
+    global _pool, _pool_loop
+    pool, _pool, _pool_loop = _pool, None, None
+    if pool is not None:
+        await pool.close()
+
+
+def has_pool() -> bool:
+    """Vrai si le pool du process est ouvert sur la boucle courante (worker ASGI avec lifespan)"""
+    return _pool is not None and _pool_loop is asyncio.get_running_loop()
+
+
+@asynccontextmanager
+async def connection():
+    """Connexion du pool si elle appartient à la boucle courante, sinon connexion dédiée"""
+    if has_pool():
+        async with _pool.connection() as conn:
+            yield conn
+        return
+    conn = await AsyncConnection.connect(
+        _conninfo(),
+        row_factory=dict_row,
+        autocommit=True,
+        connect_timeout=int(getattr(settings, 'ASYNC_DB_POOL_TIMEOUT', 10)),
+    )
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+async def fetch_all(query: str, params: Optional[Sequence[Any]] = None) -> List[Dict]:
+    """Exécuter une requête et retourner toutes les lignes (dicts)"""
+    async with connection() as conn:
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchall()
+
+
+async def fetch_one(query: str, params: Optional[Sequence[Any]] = None) -> Optional[Dict]:
+    """Exécuter une requête et retourner la première ligne"""
+    async with connection() as conn:
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchone()
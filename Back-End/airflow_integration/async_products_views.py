@@ -0,0 +1,210 @@
+"""
+Vues async des endpoints agrégés du catalogue (servies sous ASGI)
+Les requêtes indépendantes d'un endpoint sont exécutées en parallèle sur le
+pool psycopg3 async au lieu d'être enchaînées sur une session SQLAlchemy.
+
+Sans pool (WSGI, où le lifespan n'existe pas), chaque requête du gather
+ouvrirait sa propre connexion PostgreSQL: la version sync de l'endpoint est
+servie à la place. L'en-tête X-Catalogue-Backend indique le chemin utilisé.
+"""
+
+import asyncio
+import logging
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from accounts.models import AVAILABILITY_STATUS_KEYS
+from . import products_views
+from .async_db import fetch_all, fetch_one, has_pool
+from .products_views import IN_STOCK_SQL, _parse_bool
+
+logger = logging.getLogger(__name__)
+BACKEND_HEADER = 'X-Catalogue-Backend'
+
+
+def _sync_without_pool(sync_view_name):
+    """Servir la vue sync `products_views.<sync_view_name>` quand le pool async n'est pas ouvert"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if has_pool():
+                response = await view(request, *args, **kwargs)
+                response[BACKEND_HEADER] = 'async-pool'
+            else:
+                sync_view = getattr(products_views, sync_view_name)
+                response = await sync_to_async(sync_view)(request, *args, **kwargs)
+                response[BACKEND_HEADER] = 'sync'
+            return response
+        return wrapper
+    return decorator
+
+
+def _json(data, status=200):
+    # Même encodeur que les Response DRF (Decimal -> float, dates ISO)
+    return JsonResponse(data, status=status, encoder=JSONEncoder)
+
+
+def _price(value):
+    return float(value) if value else None
+
+
+def _availability_status(rows):
+    return {AVAILABILITY_STATUS_KEYS.get(row['availability_status'], 'unknown'): row['count'] for row in rows}
+
+
+@require_GET
+@_sync_without_pool('get_products')
+async def get_products(request):
+    """
+    Endpoint: GET /api/airflow/async/products/
+    Version async de /api/airflow/products/ (page + total en parallèle)
+
+    Query parameters:
+        - store, category, in_stock, limit (max 100), offset
+    """
+    try:
+        store = request.GET.get('store')
+        category = request.GET.get('category')
+        limit = min(int(request.GET.get('limit', 10)), 100)
+        offset = int(request.GET.get('offset', 0))
+
+        where = " WHERE 1=1"
+        params = []
+        if store:
+            where += " AND store_name = %s"
+            params.append(store)
+        if category:
+            where += " AND category = %s"
+            params.append(category)
+        if _parse_bool(request.GET.get('in_stock')):
+            where += IN_STOCK_SQL
+
+        products, total = await asyncio.gather(
+            fetch_all(f"SELECT * FROM products{where} ORDER BY id DESC LIMIT {limit} OFFSET {offset}", params),
+            fetch_one(f"SELECT COUNT(*) AS count FROM products{where}", params),
+        )
+
+        for product in products:
+            if isinstance(product.get('images_links'), str):
+                product['images_links'] = product['images_links'].split(',')
+
+        return _json({
+            'status': 'success',
+            'count': len(products),
+            'total': total['count'],
+            'limit': limit,
+            'offset': offset,
+            'products': products
+        })
+    except Exception as e:
+        logger.error(f"Error getting products (async): {str(e)}")
+        return _json({'status': 'error', 'message': str(e)}, status=400)
+
+
+@require_GET
+@_sync_without_pool('get_products_stats')
+async def get_products_stats(request):
+    """
+    Endpoint: GET /api/airflow/async/products/stats/
+    Version async de /api/airflow/products/stats/ (même réponse)
+    """
+    try:
+        total, by_store, by_category, prices, availability, availability_status = await asyncio.gather(
+            fetch_one("SELECT COUNT(*) AS count FROM products"),
+            fetch_all(
+                "SELECT store_name, COUNT(*) AS count FROM products "
+                "GROUP BY store_name ORDER BY count DESC"
+            ),
+            fetch_all(
+                "SELECT category, COUNT(*) AS count FROM products WHERE category IS NOT NULL "
+                "GROUP BY category ORDER BY count DESC LIMIT 10"
+            ),
+            fetch_all(
+                "SELECT store_name, AVG(current_price) AS avg, MIN(current_price) AS min, "
+                "MAX(current_price) AS max FROM products WHERE current_price IS NOT NULL "
+                "GROUP BY store_name"
+            ),
+            fetch_all(
+                "SELECT availability, COUNT(*) AS count FROM products "
+                "WHERE availability IS NOT NULL GROUP BY availability"
+            ),
+            fetch_all("SELECT availability_status, COUNT(*) AS count FROM products GROUP BY availability_status"),
+        )
+
+        return _json({
+            'status': 'success',
+            'stats': {
+                'total_products': total['count'],
+                'by_store': {row['store_name']: row['count'] for row in by_store},
+                'by_category': {row['category']: row['count'] for row in by_category},
+                'price_by_store': {
+                    row['store_name']: {'avg': _price(row['avg']), 'min': _price(row['min']), 'max': _price(row['max'])}
+                    for row in prices
+                },
+                'availability': {row['availability']: row['count'] for row in availability},
+                'availability_status': _availability_status(availability_status)
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error getting products stats (async): {str(e)}")
+        return _json({'status': 'error', 'message': str(e)}, status=400)
+
+
+@require_GET
+@_sync_without_pool('get_store_stats')
+async def get_store_stats(request, store_name):
+    """
+    Endpoint: GET /api/airflow/async/products/store/<store_name>/stats/
+    Version async de /api/airflow/products/store/<store_name>/stats/ (même réponse)
+    """
+    try:
+        params = [store_name]
+        total, by_category, price, availability, availability_status = await asyncio.gather(
+            fetch_one("SELECT COUNT(*) AS count FROM products WHERE store_name = %s", params),
+            fetch_all(
+                "SELECT category, COUNT(*) AS count FROM products "
+                "WHERE store_name = %s AND category IS NOT NULL "
+                "GROUP BY category ORDER BY count DESC",
+                params
+            ),
+            fetch_one(
+                "SELECT AVG(current_price) AS avg, MIN(current_price) AS min, MAX(current_price) AS max, "
+                "COUNT(*) AS with_price FROM products "
+                "WHERE store_name = %s AND current_price IS NOT NULL",
+                params
+            ),
+            fetch_all(
+                "SELECT availability, COUNT(*) AS count FROM products "
+                "WHERE store_name = %s AND availability IS NOT NULL GROUP BY availability",
+                params
+            ),
+            fetch_all(
+                "SELECT availability_status, COUNT(*) AS count FROM products "
+                "WHERE store_name = %s GROUP BY availability_status",
+                params
+            ),
+        )
+
+        return _json({
+            'status': 'success',
+            'store': store_name,
+            'stats': {
+                'total_products': total['count'],
+                'by_category': {row['category']: row['count'] for row in by_category},
+                'price_info': {
+                    'avg': _price(price['avg']),
+                    'min': _price(price['min']),
+                    'max': _price(price['max']),
+                    'products_with_price': price['with_price'] or 0
+                },
+                'availability': {row['availability']: row['count'] for row in availability},
+                'availability_status': _availability_status(availability_status)
+            }
+        })
+    except Exception as e:
+        logger.error(f"Error getting store stats for {store_name} (async): {str(e)}")
+        return _json({'status': 'error', 'message': str(e)}, status=400)
@@ -0,0 +1,60 @@
+"""
+Vues async de l'intégration Airflow (servies sous ASGI)
+"""
+
+import logging
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .async_airflow_client import AsyncAirflowClient
+from .views import AIRFLOW_API_PASSWORD, AIRFLOW_API_USER, AIRFLOW_BASE_URL, SCRAPER_DAGS, airflow_client
+
+logger = logging.getLogger(__name__)
+
+# Même circuit breaker et mêmes slots que le client sync: une panne d'Airflow vue
+# par l'un coupe aussi l'autre, et le plafond d'appels simultanés vaut pour les deux
+async_airflow_client = AsyncAirflowClient(
+    base_url=AIRFLOW_BASE_URL,
+    username=AIRFLOW_API_USER,
+    password=AIRFLOW_API_PASSWORD,
+    timeout=airflow_client.timeout[1],
+    connect_timeout=airflow_client.timeout[0],
+    breaker=airflow_client.breaker,
+    slots=airflow_client.slots
+)
+
+
+# ==================== Scrapers Shortcuts ====================
+
+@require_GET
+async def get_all_scrapers_status(request):
+    """
+    Endpoint: GET /api/airflow/scrapers/status/
+    Récupérer le statut de tous les scrapers en une requête
+
+    Les dernières exécutions sont demandées en parallèle à Airflow: le temps
+    de réponse est celui de l'appel le plus lent. Un scraper en erreur
+    n'empêche pas de renvoyer le statut des autres.
+    """
+    latest_runs = await async_airflow_client.get_latest_dag_runs(SCRAPER_DAGS.values())
+
+    scrapers = {}
+    for scraper_name, dag_id in SCRAPER_DAGS.items():
+        run = latest_runs[dag_id]
+        if isinstance(run, Exception):
+            logger.error(f"Error getting status for scraper {scraper_name}: {str(run)}")
+            scrapers[scraper_name] = {'status': 'error', 'message': str(run)}
+        elif not run:
+            scrapers[scraper_name] = {'status': 'info', 'message': 'No runs found'}
+        else:
+            scrapers[scraper_name] = {
+                'status': 'success',
+                'last_run': async_airflow_client.format_dag_run(run)
+            }
+
+    errors = sum(1 for scraper in scrapers.values() if scraper['status'] == 'error')
+    return JsonResponse({
+        'status': 'success' if not errors else ('error' if errors == len(scrapers) else 'partial'),
+        'scrapers': scrapers
+    }, status=503 if errors == len(scrapers) else 200)
@@ -0,0 +1,254 @@
+"""
+Scheduler des déclenchements groupés de scrapers (ScraperBatch)
+
+L'état vit en base. Chaque appel à `advance_batch` procède en étapes courtes,
+sans jamais garder de verrou pendant un appel HTTP à Airflow:
+
+1. met à jour les scrapers en cours (miroir scraper_runs alimenté par le
+   webhook, ou interrogation d'Airflow hors transaction)
+2. réserve les scrapers à démarrer (état `triggering`) dans une transaction
+   courte qui verrouille le batch: slots libres et intervalle de décalage
+3. déclenche les DAGs hors transaction, avec un dag_run_id déterministe: une
+   réservation reprise après un arrêt du process reçoit un 409 au lieu de
+   lancer le DAG une seconde fois
+4. enregistre le run_id dans une seconde transaction, puis clôt le batch
+   s'il est terminé ou si son échéance (`deadline_at`) est passée
+
+Il est appelé par le webhook de fin de run, par l'endpoint POST
+`scrapers/batches/<id>/advance/` et par la commande `advance_scraper_batches`
+(CronJob); l'endpoint de statut (GET) ne fait que lire.
+"""
+
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ScraperBatch, ScraperBatchItem, ScraperRun
+from .scraper_runs import upsert_runs
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ('triggering', 'running')
+FINISHED_STATES = ('success', 'failed')
+# Réservation sans run_id au-delà de ce délai: le process qui déclenchait s'est
+# arrêté, le déclenchement est repris (même dag_run_id)
+TRIGGER_CLAIM_TIMEOUT = timedelta(minutes=2)
+
+
+def create_batch(
+    scraper_dags: Dict[str, str],
+    max_concurrency: int,
+    stagger_seconds: int,
+    timeout_seconds: Optional[int] = None
+) -> ScraperBatch:
+    """
+    Créer un batch (tous les scrapers en attente)
+
+    Args:
+        scraper_dags: {scraper_name: dag_id} dans l'ordre de démarrage
+        max_concurrency: Nombre maximum de scrapers simultanés
+        stagger_seconds: Délai minimum entre deux démarrages
+        timeout_seconds: Durée maximale du batch (défaut SCRAPER_BATCH_TIMEOUT_SECONDS);
+            les scrapers non terminés à l'échéance sont marqués en échec
+    """
+    if timeout_seconds is None:
+        timeout_seconds = settings.SCRAPER_BATCH_TIMEOUT_SECONDS
+    with transaction.atomic():
+        batch = ScraperBatch.objects.create(
+            max_concurrency=max_concurrency,
+            stagger_seconds=stagger_seconds,
+            deadline_at=timezone.now() + timedelta(seconds=timeout_seconds),
+        )
+        ScraperBatchItem.objects.bulk_create([
+            ScraperBatchItem(batch=batch, position=position, scraper_name=scraper_name, dag_id=dag_id)
+            for position, (scraper_name, dag_id) in enumerate(scraper_dags.items())
+        ])
+    return batch
+
+
+def batch_run_id(item: ScraperBatchItem) -> str:
+    """dag_run_id demandé à Airflow pour un scraper du batch (unique, rejouable)"""
+    return f"batch__{item.batch_id}__{item.pk}"
+
+
+def _refresh_running(batch_id: int, client, poll: bool):
+    """Mettre à jour les scrapers en cours depuis le miroir (et Airflow si poll)"""
+    running = list(ScraperBatchItem.objects.filter(batch_id=batch_id, state='running', run_id__isnull=False))
+    if not running:
+        return
+
+    mirrored = {
+        (run.dag_id, run.run_id): run
+        for run in ScraperRun.objects.filter(
+            dag_id__in={item.dag_id for item in running},
+            run_id__in={item.run_id for item in running},
+        )
+    }
+    for item in running:
+        run = mirrored.get((item.dag_id, item.run_id))
+        if (run is None or run.state not in FINISHED_STATES) and poll:
+            try:
+                upsert_runs([client.get_dag_run(item.dag_id, item.run_id)])
+                run = ScraperRun.objects.get(dag_id=item.dag_id, run_id=item.run_id)
+            except Exception as e:
+                logger.warning(f"Statut du run {item.dag_id}/{item.run_id} indisponible: {str(e)}")
+                continue
+        if run is not None and run.state in FINISHED_STATES:
+            ScraperBatchItem.objects.filter(pk=item.pk, state='running').update(
+                state=run.state, finished_at=run.end_date or timezone.now()
+            )
+
+
+def _claim_next(batch_id: int) -> List[ScraperBatchItem]:
+    """Réserver les scrapers à démarrer selon les slots libres et le décalage (batch verrouillé)"""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = ScraperBatch.objects.select_for_update().filter(pk=batch_id, status='running').first()
+        if batch is None:
+            return []
+        items = list(batch.items.order_by('position'))
+
+        claimed = []
+        for item in items:
+            if item.state == 'triggering' and item.triggered_at and now - item.triggered_at >= TRIGGER_CLAIM_TIMEOUT:
+                claimed.append(item)
+
+        active = sum(1 for item in items if item.state in ACTIVE_STATES)
+        for item in items:
+            if item.state != 'pending':
+                continue
+            if active >= batch.max_concurrency:
+                break
+            if batch.last_triggered_at and now - batch.last_triggered_at < timedelta(seconds=batch.stagger_seconds):
+                break
+            item.state = 'triggering'
+            batch.last_triggered_at = now
+            claimed.append(item)
+            active += 1
+
+        for item in claimed:
+            item.triggered_at = now
+            item.save(update_fields=['state', 'triggered_at'])
+        if claimed:
+            batch.save(update_fields=['last_triggered_at'])
+    return claimed
+
+
+def _trigger(item: ScraperBatchItem, client):
+    """Déclencher le DAG d'un scraper réservé (hors transaction) puis enregistrer le run"""
+    run_id = batch_run_id(item)
+    try:
+        result = client.trigger_dag(item.dag_id, note=f"Batch #{item.batch_id}", dag_run_id=run_id)
+        run_id = result.get('dag_run_id') or run_id
+    except requests.exceptions.HTTPError as e:
+        if e.response is None or e.response.status_code != 409:
+            _fail(item, e)
+            return
+        # Run déjà créé par une réservation précédente
+        logger.info(f"Batch #{item.batch_id}: {run_id} déjà déclenché")
+    except Exception as e:
+        _fail(item, e)
+        return
+
+    ScraperBatchItem.objects.filter(pk=item.pk, state='triggering').update(state='running', run_id=run_id)
+
+
+def _fail(item: ScraperBatchItem, error: Exception):
+    logger.error(f"Batch #{item.batch_id}: échec du déclenchement de {item.scraper_name}: {str(error)}")
+    ScraperBatchItem.objects.filter(pk=item.pk, state='triggering').update(
+        state='failed', error=str(error), finished_at=timezone.now()
+    )
+
+
+def _finish_if_done(batch_id: int) -> Optional[ScraperBatch]:
+    """Clore le batch si tous ses scrapers sont terminés ou si son échéance est passée"""
+    now = timezone.now()
+    with transaction.atomic():
+        batch = ScraperBatch.objects.select_for_update().filter(pk=batch_id).first()
+        if batch is None or batch.status != 'running':
+            return batch
+
+        if batch.deadline_at and now >= batch.deadline_at:
+            expired = batch.items.exclude(state__in=FINISHED_STATES).update(
+                state='failed', error="Échéance du batch dépassée", finished_at=now
+            )
+            if expired:
+                logger.warning(f"Batch #{batch.id}: {expired} scraper(s) non terminés à l'échéance")
+
+        states = list(batch.items.values_list('state', flat=True))
+        if any(state not in FINISHED_STATES for state in states):
+            return batch
+        failed = states.count('failed')
+        batch.status = 'success' if not failed else ('failed' if failed == len(states) else 'partial')
+        batch.finished_at = now
+        batch.save(update_fields=['status', 'finished_at'])
+    return batch
+
+
+def advance_batch(batch_id: int, client, poll: bool = False) -> Optional[ScraperBatch]:
+    """
+    Faire avancer un batch (idempotent, sûr en concurrence)
+
+    Args:
+        batch_id: ID du batch
+        client: AirflowClient
+        poll: Interroger Airflow pour les runs dont la fin n'a pas été notifiée
+    """
+    if not ScraperBatch.objects.filter(pk=batch_id, status='running').exists():
+        return ScraperBatch.objects.filter(pk=batch_id).first()
+
+    _refresh_running(batch_id, client, poll)
+    for item in _claim_next(batch_id):
+        _trigger(item, client)
+    return _finish_if_done(batch_id)
+
+
+def advance_batches_for_run(client, dag_id: str, run_id: str):
+    """Faire avancer les batches qui attendaient ce run (webhook)"""
+    batch_ids = ScraperBatchItem.objects.filter(
+        dag_id=dag_id, run_id=run_id, batch__status='running'
+    ).values_list('batch_id', flat=True).distinct()
+    for batch_id in batch_ids:
+        advance_batch(batch_id, client)
+
+
+def advance_running_batches(client, poll: bool = True) -> Iterable[ScraperBatch]:
+    """Faire avancer tous les batches en cours (commande / CronJob)"""
+    batch_ids = list(ScraperBatch.objects.filter(status='running').values_list('id', flat=True))
+    return [advance_batch(batch_id, client, poll=poll) for batch_id in batch_ids]
+
+
+def batch_status(batch: ScraperBatch) -> Dict:
+    """Statut consolidé d'un batch"""
+    items = list(batch.items.order_by('position'))
+    counts = {state: 0 for state, _ in ScraperBatchItem.STATE_CHOICES}
+    for item in items:
+        counts[item.state] += 1
+
+    return {
+        'batch_id': batch.id,
+        'status': batch.status,
+        'max_concurrency': batch.max_concurrency,
+        'stagger_seconds': batch.stagger_seconds,
+        'created_at': batch.created_at,
+        'deadline_at': batch.deadline_at,
+        'finished_at': batch.finished_at,
+        'counts': counts,
+        'scrapers': [
+            {
+                'scraper': item.scraper_name,
+                'dag_id': item.dag_id,
+                'state': item.state,
+                'run_id': item.run_id,
+                'triggered_at': item.triggered_at,
+                'finished_at': item.finished_at,
+                'error': item.error,
+            }
+            for item in items
+        ],
+    }
@@ -0,0 +1,152 @@
+"""
+Cache stale-while-revalidate en mémoire pour les réponses Airflow
+"""
+
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SWRCache:
+    """
+    Cache clé -> valeur avec TTL et fenêtre stale-while-revalidate
+
+    - entrée fraîche (âge < ttl): servie telle quelle
+    - entrée périmée (âge < ttl + stale_ttl): servie immédiatement, rafraîchie en tâche de fond
+    - entrée absente ou expirée: chargée de façon synchrone
+
+    Les chargements concurrents d'une même clé sont regroupés: un seul appel
+    part vers Airflow, les autres threads attendent son résultat.
+
+    Chaque appelant reçoit sa propre copie: modifier une réponse ne touche ni le
+    cache ni les autres appelants.
+
+    Le cache est borné: les clés incluent des paramètres fournis par le client
+    (limit, offset). Chaque écriture purge les entrées expirées, puis les moins
+    récemment lues au-delà de `max_entries`.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 512):
+        # Clé -> (valeur, chargée à, expire à), de la moins à la plus récemment utilisée
+        self._entries: OrderedDict[Hashable, Tuple[Any, float, float]] = OrderedDict()
+        self._max_entries = max_entries
+        self._inflight: Dict[Hashable, Future] = {}
+        # Génération d'une clé: (époque globale, compteur de la clé), incrémentée à
+        # chaque invalidation qui la touche. Un chargement commencé avant
+        # l'invalidation ne réécrit pas de valeur obsolète, sans que l'invalidation
+        # d'une clé n'écarte les rafraîchissements des autres.
+        self._epoch = 0
+        self._generations: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='airflow-swr')
+
+    def get(self, key: Hashable, fetch: Callable[[], Any], ttl: float, stale_ttl: float = 0) -> Any:
+        """
+        Retourner la valeur de `key`, en appelant `fetch()` si nécessaire
+
+        Args:
+            key: Clé du cache (hashable)
+            fetch: Fonction de chargement (exceptions propagées, jamais mises en cache)
+            ttl: Durée de fraîcheur en secondes
+            stale_ttl: Durée supplémentaire pendant laquelle la valeur périmée est servie
+        """
+        now = time.monotonic()
+        cached = None
+        with self._lock:
+            generation = self._generation(key)
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at, _ = entry
+                age = now - fetched_at
+                if age < ttl:
+                    cached = entry
+                elif age < ttl + stale_ttl:
+                    if key not in self._inflight:
+                        refresh = Future()
+                        self._inflight[key] = refresh
+                        self._executor.submit(self._refresh, key, fetch, generation, ttl + stale_ttl, refresh)
+                    cached = entry
+                if cached is not None:
+                    self._entries.move_to_end(key)
+
+            if cached is None:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[key] = future
+
+        if cached is not None:
+            return copy.deepcopy(cached[0])
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._finish(key, future, generation, ttl + stale_ttl, exception=e)
+            raise
+        self._finish(key, future, generation, ttl + stale_ttl, value=value)
+        return value
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], Any], generation: int, lifetime: float, future: Future):
+        """Rafraîchissement en tâche de fond (l'ancienne valeur reste servie en cas d'erreur)"""
+        try:
+            value = fetch()
+        except Exception as e:
+            logger.warning(f"Rafraîchissement du cache Airflow échoué pour {key}: {str(e)}")
+            self._finish(key, future, generation, lifetime, exception=e)
+            return
+        self._finish(key, future, generation, lifetime, value=value)
+
+    def _generation(self, key: Hashable) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def _finish(self, key, future, generation, lifetime, value=None, exception=None):
+        stored = copy.deepcopy(value) if exception is None else None
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if exception is None and generation == self._generation(key):
+                now = time.monotonic()
+                self._entries[key] = (stored, now, now + lifetime)
+                self._entries.move_to_end(key)
+                self._evict(now)
+        if exception is None:
+            future.set_result(value)
+        else:
+            future.set_exception(exception)
+
+    def _evict(self, now: float):
+        """Purger les entrées expirées puis les moins récemment utilisées au-delà de max_entries"""
+        for key in [key for key, (_, _, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        # Les compteurs d'invalidation par clé sont bornés de la même façon: au-delà,
+        # une nouvelle époque les remplace (les chargements en cours ne seront pas
+        # mis en cache, leurs appelants reçoivent quand même la valeur)
+        if len(self._generations) > self._max_entries:
+            self._epoch += 1
+            self._generations.clear()
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] = None):
+        """Supprimer les entrées dont la clé vérifie `predicate` (toutes si None)"""
+        with self._lock:
+            if predicate is None:
+                self._epoch += 1
+                self._generations.clear()
+                self._entries.clear()
+                self._inflight.clear()
+                return
+            keys = {key for store in (self._entries, self._inflight) for key in store if predicate(key)}
+            for key in keys:
+                self._generations[key] = self._generations.get(key, 0) + 1
+                self._entries.pop(key, None)
+                self._inflight.pop(key, None)
@@ -0,0 +1,104 @@
+"""
+Circuit breaker pour les appels à Airflow
+Évite de bloquer les workers Django quand Airflow ne répond plus
+"""
+
+import threading
+import time
+from typing import Any, Dict
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreakerOpen(requests.exceptions.RequestException):
+    """Appel refusé sans contacter Airflow (circuit ouvert)"""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker à trois états
+
+    - closed: les appels passent; après `failure_threshold` échecs consécutifs le circuit s'ouvre
+    - open: les appels échouent immédiatement pendant `recovery_timeout` secondes
+    - half_open: `half_open_max_calls` appels d'essai passent; un succès referme
+      le circuit, un échec le rouvre
+    """
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._last_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Réserver un appel; False si le circuit refuse les appels"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return True
+            return False
+
+    def release(self):
+        """
+        Rendre un appel réservé par allow() qui n'a donné aucun résultat (pool
+        saturé, erreur locale): sinon l'essai du half_open resterait occupé
+        """
+        with self._lock:
+            if self._state == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._half_open_calls = 0
+
+    def record_failure(self, error: Exception = None):
+        with self._lock:
+            self._failures += 1
+            self._last_error = str(error) if error else None
+            if self._current_state() == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+
+    def retry_after(self) -> float:
+        """Secondes avant le prochain appel d'essai (0 si le circuit n'est pas ouvert)"""
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """État du circuit pour l'endpoint de santé"""
+        retry_after = self.retry_after()
+        with self._lock:
+            return {
+                'state': self._current_state(),
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'retry_after': round(retry_after, 1),
+                'last_error': self._last_error,
+            }
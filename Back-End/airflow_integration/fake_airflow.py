@@ -0,0 +1,421 @@
+"""
+Faux serveur Airflow (API REST v1) pour les tests et les benchmarks
+
+Sert, depuis des données en mémoire, les endpoints utilisés par AirflowClient:
+santé, DAGs, tâches, DAG runs (liste, détail, déclenchement) et task instances
+(par run et batch). La latence et les erreurs sont injectables pour vérifier
+les timeouts, les retries et le circuit breaker.
+
+Dans les tests:
+    with FakeAirflow(latency=0.05) as airflow:
+        client = AirflowClient(base_url=airflow.url)
+
+En ligne de commande (pour pointer un backend via AIRFLOW_API_URL):
+    python -m airflow_integration.fake_airflow --port 8080 --latency 0.1 --error-rate 0.05
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_DAG_IDS = (
+    'chillandlit_scraper_dag',
+    'mytek_scraper_dag',
+    'spacenet_scraper_dag',
+    'tunisianet_scraper_dag',
+    'parashop_scraper_dag',
+)
+DEFAULT_TASKS = ('scrape_products', 'clean_products', 'load_products')
+FIRST_RUN_DATE = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+class FakeAirflow:
+    """
+    Faux Airflow dans un thread (ThreadingHTTPServer sur 127.0.0.1)
+
+    Args:
+        dag_ids: DAGs exposés (défaut: les DAGs des scrapers)
+        runs_per_dag: Nombre de runs terminés générés par DAG
+        tasks: Tâches (chaîne linéaire) de chaque DAG
+        latency: Délai ajouté à chaque réponse (secondes)
+        jitter: Délai aléatoire supplémentaire, entre 0 et `jitter` secondes
+        error_rate: Probabilité de répondre `error_status` (0 à 1)
+        error_status: Code HTTP des erreurs injectées
+        port: Port d'écoute (0 = port libre choisi par le système)
+        seed: Graine du générateur aléatoire (reproductibilité)
+        maximum_page_limit: Plafond de `limit` par page, comme `[api] maximum_page_limit`
+    """
+
+    def __init__(
+        self,
+        dag_ids: Iterable[str] = DEFAULT_DAG_IDS,
+        runs_per_dag: int = 3,
+        tasks: Iterable[str] = DEFAULT_TASKS,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        seed: Optional[int] = None,
+        maximum_page_limit: int = 100
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.host = host
+        self.port = port
+        self.healthy = True
+        self.requests: List[tuple] = []
+        self.tasks = list(tasks)
+        self.maximum_page_limit = maximum_page_limit
+        self.dags: Dict[str, Dict[str, Any]] = {}
+        self.dag_runs: Dict[str, List[Dict[str, Any]]] = {}
+        self._forced_errors: List[int] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+        for dag_id in dag_ids:
+            self.add_dag(dag_id, runs=runs_per_dag)
+
+    # ==================== Données ====================
+
+    def add_dag(self, dag_id: str, runs: int = 0, is_paused: bool = False):
+        """Ajouter un DAG et `runs` runs réussis (un par jour)"""
+        with self._lock:
+            self.dags[dag_id] = {
+                'dag_id': dag_id,
+                'description': f"Fake {dag_id}",
+                'is_paused': is_paused,
+                'is_active': True,
+                'tags': [{'name': 'scraper'}],
+                'schedule_interval': {'__type': 'CronExpression', 'value': '0 2 * * *'},
+            }
+            self.dag_runs.setdefault(dag_id, [])
+        for day in range(runs):
+            execution_date = FIRST_RUN_DATE + timedelta(days=day)
+            self.add_dag_run(
+                dag_id,
+                run_id=f"scheduled__{execution_date.isoformat()}",
+                state='success',
+                execution_date=execution_date,
+                minutes=10 + day % 5,
+            )
+
+    def add_dag_run(
+        self,
+        dag_id: str,
+        run_id: str,
+        state: str = 'success',
+        execution_date: Optional[datetime] = None,
+        minutes: int = 10,
+        conf: Optional[Dict[str, Any]] = None,
+        note: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Ajouter un run; les runs terminés ont des task instances en chaîne"""
+        execution_date = execution_date or datetime.now(timezone.utc)
+        finished = state in ('success', 'failed')
+        run = {
+            'dag_id': dag_id,
+            'dag_run_id': run_id,
+            'state': state,
+            'run_type': 'manual' if run_id.startswith('manual__') else 'scheduled',
+            'execution_date': _iso(execution_date),
+            'logical_date': _iso(execution_date),
+            'start_date': _iso(execution_date) if state != 'queued' else None,
+            'end_date': _iso(execution_date + timedelta(minutes=minutes)) if finished else None,
+            'conf': conf or {},
+            'note': note,
+            'task_instances': [],
+        }
+        if state != 'queued':
+            step = timedelta(minutes=minutes) / max(len(self.tasks), 1)
+            for position, task_id in enumerate(self.tasks):
+                start = execution_date + step * position
+                done = finished or position < len(self.tasks) - 1
+                run['task_instances'].append({
+                    'dag_id': dag_id,
+                    'dag_run_id': run_id,
+                    'task_id': task_id,
+                    'map_index': -1,
+                    'state': (state if position == len(self.tasks) - 1 else 'success') if done else 'running',
+                    'try_number': 1,
+                    'operator': 'PythonOperator',
+                    'queued_when': _iso(start),
+                    'start_date': _iso(start),
+                    'end_date': _iso(start + step) if done else None,
+                    'duration': step.total_seconds() if done else None,
+                })
+        with self._lock:
+            self.dag_runs.setdefault(dag_id, []).append(run)
+        return run
+
+    def set_run_state(self, dag_id: str, run_id: str, state: str):
+        """Changer l'état d'un run (fin de run simulée)"""
+        with self._lock:
+            for run in self.dag_runs.get(dag_id, []):
+                if run['dag_run_id'] == run_id:
+                    run['state'] = state
+                    if state in ('success', 'failed') and not run['end_date']:
+                        run['end_date'] = _iso(datetime.now(timezone.utc))
+
+    # ==================== Injection de pannes ====================
+
+    def fail_next(self, count: int = 1, status: int = 503):
+        """Faire échouer les `count` prochaines requêtes avec `status`"""
+        with self._lock:
+            self._forced_errors.extend([status] * count)
+
+    def request_count(self, path_prefix: str = '') -> int:
+        """Nombre de requêtes reçues (filtrées par préfixe de chemin)"""
+        with self._lock:
+            return sum(1 for _, path in self.requests if path.startswith(path_prefix))
+
+    def _injected_error(self) -> Optional[int]:
+        with self._lock:
+            if self._forced_errors:
+                return self._forced_errors.pop(0)
+            if self.error_rate and self._random.random() < self.error_rate:
+                return self.error_status
+            return None
+
+    def _delay(self) -> float:
+        with self._lock:
+            return self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    # ==================== Serveur ====================
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> 'FakeAirflow':
+        self._server = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, name='fake-airflow', daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self) -> 'FakeAirflow':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    # ==================== Routes ====================
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Dict[str, Any]):
+        """Retourner (status, payload) pour une requête"""
+        if path == '/api/v2/monitor/health':
+            status = 'healthy' if self.healthy else 'unhealthy'
+            return 200, {
+                'metadatabase': {'status': status},
+                'scheduler': {'status': status, 'latest_scheduler_heartbeat': _iso(datetime.now(timezone.utc))},
+            }
+
+        if method == 'POST' and path == '/api/v1/dags/~/dagRuns/~/taskInstances/list':
+            return 200, self._list_task_instances(body)
+
+        if path == '/api/v1/dags':
+            return 200, self._page('dags', list(self.dags.values()), query)
+
+        match = re.fullmatch(r'/api/v1/dags/([^/]+)(/.*)?', path)
+        if not match:
+            return 404, self._not_found(f"Unknown endpoint {path}")
+        dag_id, rest = match.group(1), match.group(2) or ''
+        if dag_id not in self.dags:
+            return 404, self._not_found(f"DAG with dag_id: '{dag_id}' not found")
+
+        if rest == '':
+            return 200, self.dags[dag_id]
+        if rest == '/tasks':
+            return 200, {
+                'tasks': [
+                    {'task_id': task_id, 'downstream_task_ids': self.tasks[position + 1:position + 2]}
+                    for position, task_id in enumerate(self.tasks)
+                ],
+                'total_entries': len(self.tasks),
+            }
+        if rest == '/dagRuns':
+            if method == 'POST':
+                return self._trigger(dag_id, body)
+            return 200, self._page('dag_runs', self._filter_runs(dag_id, query), query)
+
+        match = re.fullmatch(r'/dagRuns/([^/]+)(/taskInstances)?', rest)
+        if not match:
+            return 404, self._not_found(f"Unknown endpoint {path}")
+        run_id, task_instances = match.groups()
+        runs = self.dag_runs[dag_id] if run_id == '~' else [
+            run for run in self.dag_runs[dag_id] if run['dag_run_id'] == run_id
+        ]
+        if task_instances:
+            items = [ti for run in runs for ti in run['task_instances']]
+            return 200, self._page('task_instances', items, query)
+        if not runs:
+            return 404, self._not_found(f"DAGRun with DAG ID: '{dag_id}' and DagRun ID: '{run_id}' not found")
+        return 200, self._public_run(runs[0])
+
+    @staticmethod
+    def _not_found(detail: str) -> Dict[str, Any]:
+        return {'detail': detail, 'status': 404, 'title': 'Not Found', 'type': 'about:blank'}
+
+    @staticmethod
+    def _public_run(run: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in run.items() if key != 'task_instances'}
+
+    def _page(self, key: str, items: List[Dict[str, Any]], query: Dict[str, str]) -> Dict[str, Any]:
+        limit = min(int(query.get('limit', 100)), self.maximum_page_limit)
+        offset = int(query.get('offset', 0))
+        return {key: items[offset:offset + limit], 'total_entries': len(items)}
+
+    def _filter_runs(self, dag_id: str, query: Dict[str, str]) -> List[Dict[str, Any]]:
+        with self._lock:
+            runs = [self._public_run(run) for run in self.dag_runs[dag_id]]
+        if query.get('state'):
+            runs = [run for run in runs if run['state'] == query['state']]
+        if query.get('execution_date_gte'):
+            runs = [run for run in runs if run['execution_date'] >= query['execution_date_gte']]
+        order_by = query.get('order_by')
+        if order_by:
+            field = order_by.lstrip('-')
+            runs.sort(key=lambda run: run.get(field) or '', reverse=order_by.startswith('-'))
+        return runs
+
+    def _trigger(self, dag_id: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        now = datetime.now(timezone.utc)
+        run_id = body.get('dag_run_id') or f"manual__{now.isoformat()}"
+        with self._lock:
+            exists = any(run['dag_run_id'] == run_id for run in self.dag_runs[dag_id])
+        if exists:
+            return 409, {
+                'detail': f"DAGRun with DAG ID: '{dag_id}' and DAGRun ID: '{run_id}' already exists",
+                'status': 409, 'title': 'Conflict', 'type': 'about:blank',
+            }
+        run = self.add_dag_run(
+            dag_id,
+            run_id=run_id,
+            state='queued',
+            execution_date=now,
+            conf=body.get('conf'),
+            note=body.get('note'),
+        )
+        return 200, self._public_run(run)
+
+    def _list_task_instances(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        dag_ids = body.get('dag_ids')
+        run_ids = body.get('dag_run_ids')
+        with self._lock:
+            items = [
+                ti
+                for dag_id, runs in self.dag_runs.items() if not dag_ids or dag_id in dag_ids
+                for run in runs if not run_ids or run['dag_run_id'] in run_ids
+                for ti in run['task_instances']
+            ]
+        offset = body.get('page_offset', 0)
+        limit = min(body.get('page_limit', 100), self.maximum_page_limit)
+        return {'task_instances': items[offset:offset + limit], 'total_entries': len(items)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _dispatch(self, method: str):
+        fake = self.server.fake
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        with fake._lock:
+            fake.requests.append((method, parsed.path))
+
+        delay = fake._delay()
+        if delay:
+            time.sleep(delay)
+
+        error = fake._injected_error()
+        if error:
+            status, payload = error, {'detail': 'Injected error', 'status': error, 'title': 'Fake error'}
+        else:
+            try:
+                body = json.loads(raw) if raw else {}
+                status, payload = fake.handle(method, parsed.path, query, body)
+            except (ValueError, TypeError) as e:
+                status, payload = 400, {'detail': str(e), 'status': 400, 'title': 'Bad Request'}
+
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # Client parti entre-temps (timeout de lecture côté client)
+            self.close_connection = True
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faux serveur Airflow (API REST v1)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--runs-per-dag', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.0, help="Délai par réponse (secondes)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Délai aléatoire supplémentaire (secondes)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Probabilité d'erreur injectée (0 à 1)")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--maximum-page-limit', type=int, default=100)
+    args = parser.parse_args()
+
+    airflow = FakeAirflow(
+        runs_per_dag=args.runs_per_dag,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        host=args.host,
+        port=args.port,
+        maximum_page_limit=args.maximum_page_limit,
+    ).start()
+    print(f"Faux Airflow sur {airflow.url} (Ctrl+C pour arrêter)")
+    try:
+        airflow._thread.join()
+    except KeyboardInterrupt:
+        airflow.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Métriques d'ingestion des scrapers
+Enregistrement par run (webhook de fin de run) et agrégats par période
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from django.db.models import Avg, Count, F, Max, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+
+from .models import ScraperRun, ScraperRunMetrics
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = ('rows_inserted', 'rows_updated', 'rows_unchanged', 'bytes_fetched')
+ROLLUP_INTERVALS = {
+    'hour': TruncHour,
+    'day': TruncDay,
+    'week': TruncWeek,
+}
+RECENT_RUNS = 20
+
+
+def _ratio(numerator, denominator) -> Optional[float]:
+    return round(numerator / denominator, 4) if numerator is not None and denominator else None
+
+
+def record_run_metrics(run: ScraperRun, store: str, metrics: Dict[str, Any]) -> ScraperRunMetrics:
+    """
+    Enregistrer (ou remplacer) les métriques d'ingestion d'un run
+
+    Args:
+        run: ScraperRun concerné (durée connue si le run est terminé)
+        store: Nom du magasin / scraper
+        metrics: Dict envoyé par le DAG (rows_inserted, rows_updated,
+            rows_unchanged, bytes_fetched, db_write_seconds)
+
+    Raises:
+        ValueError: si une valeur n'est pas un nombre positif
+    """
+    values = {}
+    for field in COUNTER_FIELDS:
+        value = int(metrics.get(field) or 0)
+        if value < 0:
+            raise ValueError(f"metrics.{field} must be >= 0")
+        values[field] = value
+
+    db_write_seconds = metrics.get('db_write_seconds')
+    if db_write_seconds is not None:
+        db_write_seconds = float(db_write_seconds)
+        if db_write_seconds < 0:
+            raise ValueError("metrics.db_write_seconds must be >= 0")
+
+    rows_total = values['rows_inserted'] + values['rows_updated'] + values['rows_unchanged']
+    values.update(
+        store=store,
+        db_write_seconds=db_write_seconds,
+        rows_per_second=_ratio(rows_total, run.duration),
+        changed_ratio=_ratio(values['rows_inserted'] + values['rows_updated'], rows_total),
+        db_write_share=_ratio(db_write_seconds, run.duration),
+    )
+    run_metrics, _ = ScraperRunMetrics.objects.update_or_create(run=run, defaults=values)
+    return run_metrics
+
+
+def ingestion_metrics(
+    dag_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    interval: str = 'day'
+) -> Dict[str, Any]:
+    """
+    Métriques d'ingestion d'un DAG sur une fenêtre de dates d'exécution
+
+    Returns:
+        Dict avec les totaux de la fenêtre, une série temporelle agrégée par
+        `interval` (hour, day, week) et les derniers runs
+    """
+    if interval not in ROLLUP_INTERVALS:
+        raise ValueError(f"interval must be one of: {', '.join(ROLLUP_INTERVALS)}")
+
+    queryset = ScraperRunMetrics.objects.filter(run__dag_id=dag_id)
+    if since:
+        queryset = queryset.filter(run__execution_date__gte=since)
+    if until:
+        queryset = queryset.filter(run__execution_date__lt=until)
+
+    # Alias distincts des champs du modèle (interdit dans annotate())
+    aggregates = {
+        'runs': Count('id'),
+        'inserted': Sum('rows_inserted'),
+        'updated': Sum('rows_updated'),
+        'unchanged': Sum('rows_unchanged'),
+        'bytes': Sum('bytes_fetched'),
+        'db_seconds': Sum('db_write_seconds'),
+        'run_seconds': Sum('run__duration'),
+        'avg_rows_per_second': Avg('rows_per_second'),
+        'avg_changed_ratio': Avg('changed_ratio'),
+        'avg_db_write_share': Avg('db_write_share'),
+    }
+    totals = queryset.aggregate(**aggregates, last_reported_at=Max('reported_at'))
+
+    series = (
+        queryset
+        .filter(run__execution_date__isnull=False)
+        .annotate(period=ROLLUP_INTERVALS[interval]('run__execution_date'))
+        .values('period')
+        .annotate(**aggregates)
+        .order_by('period')
+    )
+
+    recent = (
+        queryset
+        .annotate(
+            dag_run_id=F('run__run_id'),
+            state=F('run__state'),
+            execution_date=F('run__execution_date'),
+            duration=F('run__duration'),
+        )
+        .order_by('-run__execution_date')
+        .values('dag_run_id', 'state', 'execution_date', 'duration', 'rows_inserted', 'rows_updated',
+                'rows_unchanged', 'bytes_fetched', 'db_write_seconds', 'rows_per_second',
+                'changed_ratio', 'db_write_share')[:RECENT_RUNS]
+    )
+
+    return {
+        'totals': _summary(totals),
+        'last_reported_at': totals['last_reported_at'],
+        'interval': interval,
+        'series': [{'period': row['period'], **_summary(row)} for row in series],
+        'recent_runs': list(recent),
+    }
+
+
+def _summary(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Ligne agrégée -> compteurs + débit global (sommes) et moyennes par run"""
+    inserted, updated, unchanged = row['inserted'] or 0, row['updated'] or 0, row['unchanged'] or 0
+    rows_total = inserted + updated + unchanged
+    return {
+        'runs': row['runs'],
+        'rows_total': rows_total,
+        'rows_inserted': inserted,
+        'rows_updated': updated,
+        'rows_unchanged': unchanged,
+        'bytes_fetched': row['bytes'] or 0,
+        'db_write_seconds': row['db_seconds'],
+        'rows_per_second': _ratio(rows_total, row['run_seconds']),
+        'changed_ratio': _ratio(inserted + updated, rows_total),
+        'db_write_share': _ratio(row['db_seconds'], row['run_seconds']),
+        'avg_rows_per_second': row['avg_rows_per_second'],
+        'avg_changed_ratio': row['avg_changed_ratio'],
+        'avg_db_write_share': row['avg_db_write_share'],
+    }
@@ -0,0 +1,35 @@
+"""
+Commande: python manage.py advance_scraper_batches
+Faire avancer les déclenchements groupés de scrapers (filet de sécurité du webhook)
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from airflow_integration.batches import advance_running_batches
+from airflow_integration.views import airflow_client
+
+
+class Command(BaseCommand):
+    help = "Met à jour les batches de scrapers en cours et démarre les scrapers suivants"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=0,
+            help="Continuer pendant N secondes (0: un seul passage)",
+        )
+        parser.add_argument('--interval', type=float, default=10, help="Secondes entre deux passages")
+
+    def handle(self, *args, **options):
+        deadline = time.monotonic() + options['duration']
+        while True:
+            batches = advance_running_batches(airflow_client, poll=True)
+            for batch in batches:
+                if batch is not None:
+                    self.stdout.write(f"Batch #{batch.id}: {batch.status}")
+            if not batches or time.monotonic() + options['interval'] > deadline:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,32 @@
+"""
+Commande: python manage.py build_product_vectors
+Reconstruire les index vectoriels "produits similaires" (job nocturne)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airflow_integration.similarity import DEFAULT_DIM, INDEX_QUERIES, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Construit les vecteurs TF-IDF (n-grammes hachés) de products et unique_products"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=sorted(INDEX_QUERIES),
+            help="Table à indexer (répétable, défaut: toutes)",
+        )
+        parser.add_argument('--dim', type=int, default=DEFAULT_DIM, help="Dimension des vecteurs")
+
+    def handle(self, *args, **options):
+        tables = options['table'] or sorted(INDEX_QUERIES)
+        for table in tables:
+            try:
+                manifest = rebuild_index(table, dim=options['dim'])
+            except Exception as e:
+                raise CommandError(f"Échec de l'indexation de {table}: {str(e)}")
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: {manifest['count']} produits indexés (version {manifest['version']})"
+            ))
@@ -0,0 +1,50 @@
+"""
+Commande: python manage.py sync_scraper_runs
+Synchroniser la table scraper_runs avec les DAG runs Airflow (incrémental),
+puis les task instances des runs terminés (table scraper_task_runs)
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from airflow_integration.scraper_runs import SYNC_PAGE_SIZE, sync_dag_runs
+from airflow_integration.task_runs import sync_task_runs
+from airflow_integration.views import SCRAPER_DAGS, airflow_client
+
+
+class Command(BaseCommand):
+    help = "Récupère les nouveaux DAG runs des scrapers depuis Airflow"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dag',
+            action='append',
+            help="DAG à synchroniser (répétable, défaut: tous les scrapers)",
+        )
+        parser.add_argument('--page-size', type=int, default=SYNC_PAGE_SIZE, help="Taille des pages Airflow")
+        parser.add_argument(
+            '--task-runs',
+            type=int,
+            default=50,
+            help="Nombre maximum de runs dont les task instances sont récupérées (0 pour désactiver)",
+        )
+
+    def handle(self, *args, **options):
+        dag_ids = options['dag'] or list(SCRAPER_DAGS.values())
+        failures = []
+        for dag_id in dag_ids:
+            try:
+                result = sync_dag_runs(airflow_client, dag_id, page_size=options['page_size'])
+                if options['task_runs']:
+                    tasks = sync_task_runs(
+                        airflow_client, dag_id, limit=options['task_runs'], page_size=options['page_size']
+                    )
+            except Exception as e:
+                failures.append(dag_id)
+                self.stderr.write(self.style.ERROR(f"{dag_id}: échec de la synchronisation ({str(e)})"))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{dag_id}: {result['fetched']} runs récupérés, {result['refreshed']} rafraîchis"
+                + (f", {tasks['task_instances']} task instances" if options['task_runs'] else "")
+            ))
+        if failures:
+            raise CommandError(f"Synchronisation incomplète: {', '.join(failures)}")
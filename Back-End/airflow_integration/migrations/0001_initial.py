@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dag_id', models.CharField(max_length=250)),
+                ('run_id', models.CharField(max_length=250)),
+                ('state', models.CharField(blank=True, default='', max_length=20)),
+                ('run_type', models.CharField(blank=True, default='', max_length=50)),
+                ('execution_date', models.DateTimeField(blank=True, null=True)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('conf', models.JSONField(blank=True, null=True)),
+                ('note', models.TextField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'scraper_runs',
+                'ordering': ['-execution_date'],
+                'indexes': [models.Index(fields=['dag_id', '-execution_date'], name='scraper_runs_dag_exec_idx'), models.Index(fields=['dag_id', 'state'], name='scraper_runs_dag_state_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dag_id', 'run_id'), name='scraper_runs_dag_run_uniq')],
+            },
+        ),
+    ]
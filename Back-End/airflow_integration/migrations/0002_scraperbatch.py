@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airflow_integration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'En cours'), ('success', 'Terminé'), ('partial', 'Terminé avec erreurs'), ('failed', 'Échoué')], default='running', max_length=20)),
+                ('max_concurrency', models.PositiveSmallIntegerField(default=2)),
+                ('stagger_seconds', models.PositiveIntegerField(default=60)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_triggered_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'scraper_batches',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status'], name='scraper_batches_status_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScraperBatchItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.PositiveSmallIntegerField()),
+                ('scraper_name', models.CharField(max_length=50)),
+                ('dag_id', models.CharField(max_length=250)),
+                ('state', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('success', 'Réussi'), ('failed', 'Échoué')], default='pending', max_length=20)),
+                ('run_id', models.CharField(blank=True, max_length=250, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('triggered_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('batch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='airflow_integration.scraperbatch')),
+            ],
+            options={
+                'db_table': 'scraper_batch_items',
+                'ordering': ['batch', 'position'],
+                'indexes': [models.Index(fields=['dag_id', 'run_id'], name='scraper_batch_items_run_idx')],
+            },
+        ),
+    ]
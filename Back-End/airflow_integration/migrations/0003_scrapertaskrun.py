@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airflow_integration', '0002_scraperbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperTaskRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dag_id', models.CharField(max_length=250)),
+                ('run_id', models.CharField(max_length=250)),
+                ('task_id', models.CharField(max_length=250)),
+                ('map_index', models.IntegerField(default=-1)),
+                ('state', models.CharField(blank=True, default='', max_length=20)),
+                ('try_number', models.PositiveSmallIntegerField(default=0)),
+                ('operator', models.CharField(blank=True, default='', max_length=100)),
+                ('upstream_task_ids', models.JSONField(blank=True, default=list)),
+                ('queued_at', models.DateTimeField(blank=True, null=True)),
+                ('start_date', models.DateTimeField(blank=True, null=True)),
+                ('end_date', models.DateTimeField(blank=True, null=True)),
+                ('duration', models.FloatField(blank=True, null=True)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'scraper_task_runs',
+                'ordering': ['dag_id', 'run_id', 'start_date'],
+                'indexes': [models.Index(fields=['dag_id', 'task_id', 'start_date'], name='scraper_task_runs_task_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dag_id', 'run_id', 'task_id', 'map_index'), name='scraper_task_runs_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airflow_integration', '0003_scrapertaskrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScraperRunMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('store', models.CharField(db_index=True, max_length=50)),
+                ('rows_inserted', models.PositiveIntegerField(default=0)),
+                ('rows_updated', models.PositiveIntegerField(default=0)),
+                ('rows_unchanged', models.PositiveIntegerField(default=0)),
+                ('bytes_fetched', models.BigIntegerField(default=0)),
+                ('db_write_seconds', models.FloatField(blank=True, null=True)),
+                ('rows_per_second', models.FloatField(blank=True, null=True)),
+                ('changed_ratio', models.FloatField(blank=True, null=True)),
+                ('db_write_share', models.FloatField(blank=True, null=True)),
+                ('reported_at', models.DateTimeField(auto_now=True)),
+                ('run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='metrics', to='airflow_integration.scraperrun')),
+            ],
+            options={
+                'db_table': 'scraper_run_metrics',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 08:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airflow_integration', '0004_scraperrunmetrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperbatch',
+            name='deadline_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scraperbatchitem',
+            name='state',
+            field=models.CharField(choices=[('pending', 'En attente'), ('triggering', 'Déclenchement'), ('running', 'En cours'), ('success', 'Réussi'), ('failed', 'Échoué')], default='pending', max_length=20),
+        ),
+    ]
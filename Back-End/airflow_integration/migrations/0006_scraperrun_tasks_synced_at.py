@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-19 11:20
+
+from django.db import migrations, models
+
+
+def mark_synced_runs(apps, schema_editor):
+    """Les runs qui ont déjà des task instances sont considérés synchronisés"""
+    ScraperRun = apps.get_model('airflow_integration', 'ScraperRun')
+    ScraperTaskRun = apps.get_model('airflow_integration', 'ScraperTaskRun')
+    ScraperRun.objects.filter(
+        models.Exists(ScraperTaskRun.objects.filter(
+            dag_id=models.OuterRef('dag_id'), run_id=models.OuterRef('run_id')
+        ))
+    ).update(tasks_synced_at=models.F('synced_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('airflow_integration', '0005_scraperbatch_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scraperrun',
+            name='tasks_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_synced_runs, migrations.RunPython.noop),
+    ]
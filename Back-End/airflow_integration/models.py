@@ -0,0 +1,188 @@
+"""
+Modèles de l'intégration Airflow
+"""
+
+from django.db import models
+
+
+class ScraperRun(models.Model):
+    """
+    Copie locale des DAG runs Airflow des scrapers
+
+    Synchronisée de façon incrémentale (`manage.py sync_scraper_runs`) pour
+    calculer les statistiques en SQL sans appeler Airflow.
+    """
+    FINISHED_STATES = ('success', 'failed')
+
+    dag_id = models.CharField(max_length=250)
+    run_id = models.CharField(max_length=250)
+    state = models.CharField(max_length=20, blank=True, default='')
+    run_type = models.CharField(max_length=50, blank=True, default='')
+
+    execution_date = models.DateTimeField(null=True, blank=True)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)  # secondes, calculée à la synchronisation
+
+    conf = models.JSONField(null=True, blank=True)
+    note = models.TextField(null=True, blank=True)
+
+    synced_at = models.DateTimeField(auto_now=True)
+    # Task instances récupérées (même si Airflow n'en a renvoyé aucune)
+    tasks_synced_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'scraper_runs'
+        ordering = ['-execution_date']
+        constraints = [
+            models.UniqueConstraint(fields=['dag_id', 'run_id'], name='scraper_runs_dag_run_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['dag_id', '-execution_date'], name='scraper_runs_dag_exec_idx'),
+            models.Index(fields=['dag_id', 'state'], name='scraper_runs_dag_state_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dag_id} / {self.run_id} ({self.state})"
+
+
+class ScraperTaskRun(models.Model):
+    """
+    Copie locale des task instances d'un DAG run de scraper
+
+    Alimentée par `sync_scraper_runs` (endpoint batch taskInstances/list
+    d'Airflow) pour profiler la durée de chaque étape (fetch, parse, write).
+    """
+    dag_id = models.CharField(max_length=250)
+    run_id = models.CharField(max_length=250)
+    task_id = models.CharField(max_length=250)
+    map_index = models.IntegerField(default=-1)
+
+    state = models.CharField(max_length=20, blank=True, default='')
+    try_number = models.PositiveSmallIntegerField(default=0)
+    operator = models.CharField(max_length=100, blank=True, default='')
+    upstream_task_ids = models.JSONField(default=list, blank=True)
+
+    queued_at = models.DateTimeField(null=True, blank=True)
+    start_date = models.DateTimeField(null=True, blank=True)
+    end_date = models.DateTimeField(null=True, blank=True)
+    duration = models.FloatField(null=True, blank=True)  # secondes
+
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'scraper_task_runs'
+        ordering = ['dag_id', 'run_id', 'start_date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dag_id', 'run_id', 'task_id', 'map_index'], name='scraper_task_runs_uniq'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dag_id', 'task_id', 'start_date'], name='scraper_task_runs_task_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dag_id} / {self.run_id} / {self.task_id} ({self.state})"
+
+
+class ScraperRunMetrics(models.Model):
+    """
+    Métriques d'ingestion d'un run de scraper
+
+    Envoyées par le DAG avec le webhook de fin de run (clé `metrics`):
+    lignes insérées / mises à jour / inchangées, octets récupérés et temps
+    passé à écrire en base. Les ratios sont calculés à l'enregistrement.
+    """
+    run = models.OneToOneField(ScraperRun, on_delete=models.CASCADE, related_name='metrics')
+    store = models.CharField(max_length=50, db_index=True)
+
+    rows_inserted = models.PositiveIntegerField(default=0)
+    rows_updated = models.PositiveIntegerField(default=0)
+    rows_unchanged = models.PositiveIntegerField(default=0)
+    bytes_fetched = models.BigIntegerField(default=0)
+    db_write_seconds = models.FloatField(null=True, blank=True)
+
+    rows_per_second = models.FloatField(null=True, blank=True)  # lignes traitées / durée du run
+    changed_ratio = models.FloatField(null=True, blank=True)  # (insérées + mises à jour) / traitées
+    db_write_share = models.FloatField(null=True, blank=True)  # temps d'écriture / durée du run
+
+    reported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'scraper_run_metrics'
+
+    @property
+    def rows_total(self):
+        return self.rows_inserted + self.rows_updated + self.rows_unchanged
+
+    def __str__(self):
+        return f"{self.store} / {self.run.run_id}: {self.rows_total} lignes"
+
+
+class ScraperBatch(models.Model):
+    """
+    Déclenchement groupé de scrapers avec limite de concurrence
+
+    Le scheduler (airflow_integration.batches) démarre le scraper suivant dès
+    qu'un slot se libère, au plus un toutes les `stagger_seconds` secondes.
+    """
+    STATUS_CHOICES = [
+        ('running', 'En cours'),
+        ('success', 'Terminé'),
+        ('partial', 'Terminé avec erreurs'),
+        ('failed', 'Échoué'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    max_concurrency = models.PositiveSmallIntegerField(default=2)
+    stagger_seconds = models.PositiveIntegerField(default=60)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_triggered_at = models.DateTimeField(null=True, blank=True)
+    # Au-delà, les scrapers non terminés sont marqués en échec et le batch est clos
+    deadline_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'scraper_batches'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status'], name='scraper_batches_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"Batch #{self.id} ({self.status})"
+
+
+class ScraperBatchItem(models.Model):
+    """Un scraper d'un batch"""
+    STATE_CHOICES = [
+        ('pending', 'En attente'),
+        ('triggering', 'Déclenchement'),
+        ('running', 'En cours'),
+        ('success', 'Réussi'),
+        ('failed', 'Échoué'),
+    ]
+
+    batch = models.ForeignKey(ScraperBatch, on_delete=models.CASCADE, related_name='items')
+    position = models.PositiveSmallIntegerField()
+    scraper_name = models.CharField(max_length=50)
+    dag_id = models.CharField(max_length=250)
+
+    state = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending')
+    run_id = models.CharField(max_length=250, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    triggered_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'scraper_batch_items'
+        ordering = ['batch', 'position']
+        indexes = [
+            models.Index(fields=['dag_id', 'run_id'], name='scraper_batch_items_run_idx'),
+        ]
+
+    def __str__(self):
+        return f"Batch #{self.batch_id} - {self.scraper_name} ({self.state})"
@@ -15,6 +15,8 @@ from psycopg2.extras import RealDictCursor
 from django.http import JsonResponse
 import os
 from decouple import config
+from .similarity import load_index
+from accounts.models import AVAILABILITY_IN_STOCK, AVAILABILITY_STATUS_KEYS
 
 logger = logging.getLogger(__name__)
 
@@ -48,6 +50,15 @@ def _parse_json_field(value):
     except Exception:
         return value
 
+def _parse_bool(value):
+    """Interpréter un query param booléen (true/1/yes)"""
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# Filtre "en stock" écrit en littéral pour que le planner Postgres retienne les
+# index partiels products_instock_* (WHERE availability_status = 1)
+IN_STOCK_SQL = f" AND availability_status = {AVAILABILITY_IN_STOCK}"
+
 # Configuration de la base de données scraper / catalogue
 # Désormais les tables products et unique_products résident dans tuni_db (même DB que Django)
 SCRAPER_DB_HOST = os.getenv("SCRAPER_DB_HOST", os.getenv("DB_HOST", "db"))
@@ -81,6 +92,7 @@ def get_products(request):
     Query parameters:
         - store: Filtrer par magasin (chillandlit, mytek, spacenet, tunisianet, parashop)
         - category: Filtrer par catégorie
+        - in_stock: true pour ne garder que les produits en stock
         - limit: Nombre de résultats (défaut: 10, max: 100)
         - offset: Offset pour la pagination (défaut: 0)
 
@@ -91,6 +103,7 @@ def get_products(request):
     try:
         store = request.query_params.get('store')
         category = request.query_params.get('category')
+        in_stock = _parse_bool(request.query_params.get('in_stock'))
         limit = min(int(request.query_params.get('limit', 10)), 100)
         offset = int(request.query_params.get('offset', 0))
 
@@ -105,6 +118,9 @@ def get_products(request):
             query += " AND category = :category"
             params['category'] = category
 
+        if in_stock:
+            query += IN_STOCK_SQL
+
         query += " ORDER BY id DESC"
         query += f" LIMIT {limit} OFFSET {offset}"
 
@@ -195,6 +211,7 @@ def get_products_by_store(request, store_name):
         - offset: Offset pour la pagination
         - category: Filtrer par catégorie
         - subcategory: Filtrer par subcatégorie
+        - in_stock: true pour ne garder que les produits en stock
 
     Example:
         GET /api/airflow/products/store/chillandlit/?limit=50
@@ -217,6 +234,9 @@ def get_products_by_store(request, store_name):
         if subcategory:
             query = query.filter(subcategory=subcategory)
 
+        if _parse_bool(request.query_params.get('in_stock')):
+            query = query.filter(availability_status=AVAILABILITY_IN_STOCK)
+
         # Order and paginate
         query = query.order_by('-id')[offset:offset + limit]
 
@@ -232,6 +252,7 @@ def get_products_by_store(request, store_name):
                 'store_name': product.store_name,
                 'product_link': product.product_link,
                 'availability': product.availability,
+                'availability_status': AVAILABILITY_STATUS_KEYS.get(product.availability_status),
                 'current_price': product.current_price,
                 'prev_price': product.prev_price,
                 'description': product.description,
@@ -273,6 +294,7 @@ def search_products(request):
         - max_price: Prix maximum
         - category: Filtrer par catégorie
         - availability: Filtrer par disponibilité (In Stock, Out of Stock)
+        - in_stock: true pour ne garder que les produits en stock (disponibilité normalisée)
         - limit: Nombre de résultats (défaut: 20, max: 100)
 
     Example:
@@ -321,6 +343,9 @@ def search_products(request):
             query += " AND availability = :availability"
             params['availability'] = availability
 
+        if _parse_bool(request.query_params.get('in_stock')):
+            query += IN_STOCK_SQL
+
         query += " ORDER BY current_price DESC"
         query += f" LIMIT {limit}"
 
@@ -365,6 +390,7 @@ def get_products_stats(request):
         - by_category: Top 10 catégories avec nombre de produits
         - avg_price_by_store: Prix moyen par magasin
         - availability_summary: Résumé disponibilité
+        - availability_status: Résumé disponibilité normalisée (in_stock, out_of_stock, ...)
     """
     session = SessionLocal()
     try:
@@ -420,6 +446,17 @@ def get_products_stats(request):
         availability_result = session.execute(text(availability_query))
         availability_summary = {row[0]: row[1] for row in availability_result}
 
+        # Disponibilité normalisée
+        availability_status_query = """
+        SELECT availability_status, COUNT(*) as count
+        FROM products
+        GROUP BY availability_status
+        """
+        availability_status_result = session.execute(text(availability_status_query))
+        availability_status_summary = {
+            AVAILABILITY_STATUS_KEYS.get(row[0], 'unknown'): row[1] for row in availability_status_result
+        }
+
         return Response({
             'status': 'success',
             'stats': {
@@ -427,7 +464,8 @@ def get_products_stats(request):
                 'by_store': by_store,
                 'by_category': by_category,
                 'price_by_store': avg_price,
-                'availability': availability_summary
+                'availability': availability_summary,
+                'availability_status': availability_status_summary
             }
         })
     except Exception as e:
@@ -485,6 +523,7 @@ def get_store_stats(request, store_name):
         - by_category: Produits par catégorie
         - price_info: Infos sur les prix
         - availability: Disponibilité
+        - availability_status: Disponibilité normalisée
     """
     session = SessionLocal()
     try:
@@ -531,6 +570,18 @@ def get_store_stats(request, store_name):
         availability_result = session.execute(text(availability_query), {'store': store_name})
         availability = {row[0]: row[1] for row in availability_result}
 
+        # Disponibilité normalisée
+        availability_status_query = """
+        SELECT availability_status, COUNT(*) as count
+        FROM products
+        WHERE store_name = :store
+        GROUP BY availability_status
+        """
+        availability_status_result = session.execute(text(availability_status_query), {'store': store_name})
+        availability_status = {
+            AVAILABILITY_STATUS_KEYS.get(row[0], 'unknown'): row[1] for row in availability_status_result
+        }
+
         return Response({
             'status': 'success',
             'store': store_name,
@@ -538,7 +589,8 @@ def get_store_stats(request, store_name):
                 'total_products': total,
                 'by_category': by_category,
                 'price_info': price_info,
-                'availability': availability
+                'availability': availability,
+                'availability_status': availability_status
             }
         })
     except Exception as e:
@@ -561,6 +613,7 @@ def get_products_by_category(request, category):
 
     Query parameters:
         - store: Filtrer par magasin (optionnel)
+        - in_stock: true pour ne garder que les produits en stock
         - limit: Nombre de résultats (défaut: 20, max: 100)
         - offset: Offset pour la pagination
 
@@ -580,6 +633,9 @@ def get_products_by_category(request, category):
             query += " AND store_name = :store"
             params['store'] = store
 
+        if _parse_bool(request.query_params.get('in_stock')):
+            query += IN_STOCK_SQL
+
         query += " ORDER BY name ASC"
         query += f" LIMIT {limit} OFFSET {offset}"
 
@@ -723,3 +779,96 @@ def get_unique_product(request, product_id):
         }, status=status.HTTP_400_BAD_REQUEST)
     finally:
         session.close()
+
+
+# ==================== Similar Products (vector index) ====================
+
+def _similar_products_response(request, table, product_id, json_fields):
+    """
+    Top-k cosinus dans l'index vectoriel de `table`, puis chargement des lignes en une requête
+    """
+    index = load_index(table)
+    if index is None:
+        return Response({
+            'status': 'error',
+            'message': f'Similarity index for {table} has not been built yet'
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    limit = max(1, min(int(request.query_params.get('limit', 10)), 50))
+    matches = index.similar(product_id, k=limit)
+    if matches is None:
+        return Response({
+            'status': 'error',
+            'message': f'Product with ID {product_id} is not indexed'
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    scores = dict(matches)
+    products = []
+    if matches:
+        session = SessionLocal()
+        try:
+            result = session.execute(
+                text(f"SELECT * FROM {table} WHERE id = ANY(:ids)"),
+                {'ids': list(scores)}
+            )
+            rows = {row._mapping['id']: dict(row._mapping) for row in result}
+        finally:
+            session.close()
+
+        for similar_id, score in matches:
+            record = rows.get(similar_id)
+            if record is None:
+                continue
+            for field in json_fields:
+                record[field] = _parse_json_field(record.get(field))
+            record['similarity'] = round(score, 4)
+            products.append(record)
+
+    return Response({
+        'status': 'success',
+        'product_id': product_id,
+        'index_version': index.version,
+        'count': len(products),
+        'products': products
+    })
+
+
+@api_view(['GET'])
+def get_similar_unique_products(request, product_id):
+    """
+    Endpoint: GET /api/airflow/unique-products/<id>/similar/
+    Produits canoniques similaires (nom + catégories), via l'index vectoriel précalculé
+
+    Query parameters:
+        - limit: Nombre de résultats (défaut: 10, max: 50)
+    """
+    try:
+        return _similar_products_response(
+            request, 'unique_products', product_id,
+            ['canonical_images_links', 'product_ids', 'product_names', 'store_names', 'metadata_snapshot']
+        )
+    except Exception as e:
+        logger.error(f"Error getting similar unique products for {product_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def get_similar_products(request, product_id):
+    """
+    Endpoint: GET /api/airflow/products/<id>/similar/
+    Produits scrappés similaires, via l'index vectoriel précalculé
+
+    Query parameters:
+        - limit: Nombre de résultats (défaut: 10, max: 50)
+    """
+    try:
+        return _similar_products_response(request, 'products', product_id, ['images_links'])
+    except Exception as e:
+        logger.error(f"Error getting similar products for {product_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
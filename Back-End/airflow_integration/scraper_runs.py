@@ -0,0 +1,208 @@
+"""
+Miroir local des DAG runs des scrapers
+Synchronisation incrémentale depuis Airflow et statistiques calculées en SQL
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from django.db import connection
+from django.db.models import Aggregate, Avg, Count, FloatField, Max, Q
+from django.db.models.functions import TruncDate
+from django.utils.dateparse import parse_datetime
+
+from .models import ScraperRun
+
+logger = logging.getLogger(__name__)
+
+SYNC_PAGE_SIZE = 100
+UNFINISHED_STATES = ('queued', 'running')
+RUN_UPDATE_FIELDS = [
+    'state', 'run_type', 'execution_date', 'start_date', 'end_date',
+    'duration', 'conf', 'note', 'synced_at',
+]
+
+
+class PercentileCont(Aggregate):
+    """percentile_cont(p) WITHIN GROUP (ORDER BY expr) — PostgreSQL uniquement"""
+    function = 'PERCENTILE_CONT'
+    template = '%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+# ==================== Synchronisation ====================
+
+def _parse_date(value: Optional[str]) -> Optional[datetime]:
+    return parse_datetime(value) if value else None
+
+
+def build_scraper_run(run: Dict[str, Any]) -> ScraperRun:
+    """Construire un ScraperRun (non sauvegardé) depuis la réponse Airflow"""
+    start_date = _parse_date(run.get('start_date'))
+    end_date = _parse_date(run.get('end_date'))
+    return ScraperRun(
+        dag_id=run.get('dag_id'),
+        run_id=run.get('dag_run_id'),
+        state=run.get('state') or '',
+        run_type=run.get('run_type') or '',
+        execution_date=_parse_date(run.get('logical_date') or run.get('execution_date')),
+        start_date=start_date,
+        end_date=end_date,
+        duration=(end_date - start_date).total_seconds() if start_date and end_date else None,
+        conf=run.get('conf'),
+        note=run.get('note'),
+    )
+
+
+def upsert_runs(runs: Iterable[Dict[str, Any]]) -> int:
+    """Insérer ou mettre à jour des runs Airflow (une requête)"""
+    objects = [build_scraper_run(run) for run in runs if run.get('dag_id') and run.get('dag_run_id')]
+    if objects:
+        ScraperRun.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['dag_id', 'run_id'],
+            update_fields=RUN_UPDATE_FIELDS,
+        )
+    return len(objects)
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def sync_dag_runs(client, dag_id: str, page_size: int = SYNC_PAGE_SIZE) -> Dict[str, Any]:
+    """
+    Synchroniser les runs d'un DAG
+
+    Seuls les runs dont la date d'exécution est postérieure ou égale au dernier
+    run connu sont demandés à Airflow; les runs locaux encore en cours plus
+    anciens sont rafraîchis un par un.
+
+    Returns:
+        Dict {dag_id, fetched, refreshed}
+    """
+    last_seen = ScraperRun.objects.filter(dag_id=dag_id).aggregate(last=Max('execution_date'))['last']
+
+    runs = client.iter_dag_runs(
+        dag_id,
+        execution_date_gte=last_seen.isoformat() if last_seen else None,
+        order_by='execution_date',
+        page_size=page_size,
+        prefetch=True
+    )
+    fetched = 0
+    for chunk in _chunks(runs, page_size):
+        fetched += upsert_runs(chunk)
+
+    refreshed = 0
+    if last_seen:
+        stale = ScraperRun.objects.filter(
+            dag_id=dag_id, state__in=UNFINISHED_STATES, execution_date__lt=last_seen
+        ).values_list('run_id', flat=True)
+        for run_id in stale:
+            refreshed += upsert_runs([client.get_dag_run(dag_id, run_id)])
+
+    logger.info(f"Runs {dag_id} synchronisés: {fetched} récupérés, {refreshed} rafraîchis")
+    return {'dag_id': dag_id, 'fetched': fetched, 'refreshed': refreshed}
+
+
+# ==================== Statistiques ====================
+
+def percentile(values, p: float) -> Optional[float]:
+    """Percentile continu d'une liste triée (même interpolation que percentile_cont)"""
+    if not values:
+        return None
+    position = (len(values) - 1) * p
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _duration_percentiles(queryset) -> Dict[str, Optional[float]]:
+    """p50/p95 des durées (en SQL sur PostgreSQL, en Python sinon)"""
+    queryset = queryset.filter(duration__isnull=False)
+    if connection.vendor == 'postgresql':
+        return queryset.aggregate(
+            p50=PercentileCont('duration', 0.5),
+            p95=PercentileCont('duration', 0.95),
+        )
+
+    durations = sorted(queryset.values_list('duration', flat=True))
+    return {'p50': percentile(durations, 0.5), 'p95': percentile(durations, 0.95)}
+
+
+def scraper_run_stats(
+    dag_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Statistiques d'un DAG sur une fenêtre de dates d'exécution
+
+    Returns:
+        Dict avec les compteurs par état, le taux de succès, les percentiles
+        de durée (runs réussis, secondes) et le nombre de runs par jour
+    """
+    queryset = ScraperRun.objects.filter(dag_id=dag_id)
+    if since:
+        queryset = queryset.filter(execution_date__gte=since)
+    if until:
+        queryset = queryset.filter(execution_date__lt=until)
+
+    counts = queryset.aggregate(
+        total_runs=Count('id'),
+        success=Count('id', filter=Q(state='success')),
+        failed=Count('id', filter=Q(state='failed')),
+        running=Count('id', filter=Q(state='running')),
+        queued=Count('id', filter=Q(state='queued')),
+        skipped=Count('id', filter=Q(state='skipped')),
+        avg_duration=Avg('duration', filter=Q(state='success')),
+        last_synced_at=Max('synced_at'),
+    )
+    finished = counts['success'] + counts['failed']
+    percentiles = _duration_percentiles(queryset.filter(state='success'))
+
+    per_day = (
+        queryset
+        .filter(execution_date__isnull=False)
+        .annotate(day=TruncDate('execution_date'))
+        .values('day')
+        .annotate(
+            total=Count('id'),
+            success=Count('id', filter=Q(state='success')),
+            failed=Count('id', filter=Q(state='failed')),
+        )
+        .order_by('day')
+    )
+
+    return {
+        'total_runs': counts['total_runs'],
+        'success': counts['success'],
+        'failed': counts['failed'],
+        'running': counts['running'],
+        'queued': counts['queued'],
+        'skipped': counts['skipped'],
+        'success_rate': round(counts['success'] / finished, 4) if finished else None,
+        'duration': {
+            'avg': counts['avg_duration'],
+            'p50': percentiles['p50'],
+            'p95': percentiles['p95'],
+        },
+        'runs_per_day': [
+            {'date': row['day'].isoformat(), 'total': row['total'], 'success': row['success'], 'failed': row['failed']}
+            for row in per_day
+        ],
+        'last_synced_at': counts['last_synced_at'],
+    }
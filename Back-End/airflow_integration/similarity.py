@@ -0,0 +1,317 @@
+"""
+Index vectoriel des produits ("Produits similaires")
+Vecteurs TF-IDF de n-grammes hachés, stockés en matrice float32 (.npy memory-mappé)
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Tables indexables: requête de projection (id + texte) triée par id.
+# Le tri par id permet de retrouver la ligne d'un produit par np.searchsorted.
+INDEX_QUERIES = {
+    'unique_products': (
+        "SELECT id, canonical_name, canonical_category, canonical_subcategory, canonical_sub_subcategory "
+        "FROM unique_products ORDER BY id"
+    ),
+    'products': (
+        "SELECT id, name, category, subcategory, sub_subcategory "
+        "FROM products ORDER BY id"
+    ),
+}
+
+DEFAULT_DIM = 512
+DEFAULT_BATCH_SIZE = 8192
+
+# Poids relatifs des familles de features
+NAME_WORD_WEIGHT = 1.0
+NAME_TRIGRAM_WEIGHT = 0.5
+CATEGORY_WEIGHT = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(value: Optional[str]) -> str:
+    """Minuscules sans accents"""
+    if not value:
+        return ''
+    value = unicodedata.normalize('NFKD', str(value).lower())
+    return ''.join(ch for ch in value if not unicodedata.combining(ch))
+
+
+def extract_features(name: Optional[str], categories: Iterable[Optional[str]]) -> Counter:
+    """
+    Extraire les features pondérées d'un produit
+
+    Args:
+        name: Nom du produit
+        categories: Catégorie, sous-catégorie, sous-sous-catégorie
+
+    Returns:
+        Counter {feature: poids}
+    """
+    features = Counter()
+    words = _TOKEN_RE.findall(_normalize(name))
+    for word in words:
+        features[f"w:{word}"] += NAME_WORD_WEIGHT
+        padded = f"#{word}#"
+        for i in range(len(padded) - 2):
+            features[f"t:{padded[i:i + 3]}"] += NAME_TRIGRAM_WEIGHT
+    for category in categories:
+        for word in _TOKEN_RE.findall(_normalize(category)):
+            features[f"c:{word}"] += CATEGORY_WEIGHT
+    return features
+
+
+def _bucket(feature: str, dim: int) -> Tuple[int, float]:
+    """Hacher une feature vers (colonne, signe)"""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+def build_vectors(rows: List[Tuple], dim: int = DEFAULT_DIM) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Construire la matrice TF-IDF hachée et normalisée L2
+
+    Args:
+        rows: Tuples (id, name, category, subcategory, sub_subcategory) triés par id
+        dim: Nombre de colonnes de la matrice
+
+    Returns:
+        (ids int64, vectors float32 de forme (n, dim))
+    """
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    docs = [extract_features(row[1], row[2:]) for row in rows]
+
+    doc_freq = Counter()
+    for doc in docs:
+        doc_freq.update(doc.keys())
+    n_docs = len(docs)
+
+    vectors = np.zeros((n_docs, dim), dtype=np.float32)
+    for i, doc in enumerate(docs):
+        for feature, tf in doc.items():
+            idf = math.log((1 + n_docs) / (1 + doc_freq[feature])) + 1.0
+            column, sign = _bucket(feature, dim)
+            vectors[i, column] += sign * tf * idf
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return ids, vectors
+
+
+# ==================== Stockage ====================
+
+def get_index_dir() -> str:
+    return str(getattr(settings, 'PRODUCT_VECTORS_DIR', os.path.join(settings.BASE_DIR, 'vector_index')))
+
+
+def _manifest_path(index_dir: str, table: str) -> str:
+    return os.path.join(index_dir, f"{table}.json")
+
+
+def _generation_files(index_dir: str, table: str) -> List[str]:
+    pattern = re.compile(rf"{re.escape(table)}-\d{{14}}-\d{{9}}\.(vectors|ids)\.npy")
+    return [name for name in os.listdir(index_dir) if pattern.fullmatch(name)]
+
+
+def _prune_generations(index_dir: str, table: str, keep: Iterable[str], retention: float):
+    """
+    Supprimer les générations hors de `keep` écrites il y a plus de `retention` secondes
+
+    Sur un volume réseau (NFS/EFS) un fichier supprimé n'est pas garanti pour les
+    pods qui l'ont memory-mappé (ESTALE, SIGBUS): la génération précédente est
+    toujours gardée et les plus anciennes le temps que les pods aient rechargé.
+    """
+    keep = set(keep)
+    cutoff = time.time() - retention
+    for name in _generation_files(index_dir, table):
+        if name in keep:
+            continue
+        path = os.path.join(index_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except OSError:
+            pass
+
+
+def save_index(table: str, ids: np.ndarray, vectors: np.ndarray, index_dir: Optional[str] = None) -> Dict:
+    """
+    Écrire un nouvel index puis basculer le manifeste de façon atomique
+
+    La génération précédente reste sur disque pour les processus qui l'ont encore
+    memory-mappée; les plus anciennes sont supprimées après
+    PRODUCT_VECTORS_RETENTION_SECONDS.
+    """
+    index_dir = index_dir or get_index_dir()
+    os.makedirs(index_dir, exist_ok=True)
+
+    stamp = time.strftime('%Y%m%d%H%M%S') + f"-{time.time_ns() % 1_000_000_000:09d}"
+    vectors_file = f"{table}-{stamp}.vectors.npy"
+    ids_file = f"{table}-{stamp}.ids.npy"
+    np.save(os.path.join(index_dir, vectors_file), vectors.astype(np.float32, copy=False))
+    np.save(os.path.join(index_dir, ids_file), ids.astype(np.int64, copy=False))
+
+    manifest_path = _manifest_path(index_dir, table)
+    previous = _read_manifest(manifest_path)
+    manifest = {
+        'table': table,
+        'version': stamp,
+        'vectors': vectors_file,
+        'ids': ids_file,
+        'count': int(ids.shape[0]),
+        'dim': int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+    }
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w') as fh:
+        json.dump(manifest, fh)
+    os.replace(tmp_path, manifest_path)
+
+    keep = [manifest['vectors'], manifest['ids']]
+    if previous:
+        keep += [previous['vectors'], previous['ids']]
+    _prune_generations(
+        index_dir, table, keep, getattr(settings, 'PRODUCT_VECTORS_RETENTION_SECONDS', 24 * 3600)
+    )
+
+    return manifest
+
+
+def _read_manifest(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+class ProductVectorIndex:
+    """Index chargé en lecture seule (vecteurs memory-mappés)"""
+
+    def __init__(self, table: str, version: str, ids: np.ndarray, vectors: np.ndarray):
+        self.table = table
+        self.version = version
+        self.ids = ids
+        self.vectors = vectors
+
+    def row_of(self, product_id: int) -> Optional[int]:
+        row = int(np.searchsorted(self.ids, product_id))
+        if row < len(self.ids) and self.ids[row] == product_id:
+            return row
+        return None
+
+    def similar(
+        self,
+        product_id: int,
+        k: int = 10,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Optional[List[Tuple[int, float]]]:
+        """
+        Top-k cosinus par lots (les vecteurs sont déjà normalisés)
+
+        Returns:
+            Liste [(id, score)] triée par score décroissant, ou None si le produit n'est pas indexé
+        """
+        row = self.row_of(product_id)
+        if row is None:
+            return None
+
+        query = np.asarray(self.vectors[row], dtype=np.float32)
+        if not query.any():
+            return []
+
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        n_rows = self.vectors.shape[0]
+
+        for start in range(0, n_rows, batch_size):
+            scores = self.vectors[start:start + batch_size] @ query
+            if start <= row < start + batch_size:
+                scores[row - start] = -np.inf
+            take = min(k, scores.shape[0])
+            top = np.argpartition(scores, -take)[-take:]
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if best_rows.shape[0] > k:
+                keep = np.argpartition(best_scores, -k)[-k:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        order = np.argsort(-best_scores)
+        return [
+            (int(self.ids[best_rows[i]]), float(best_scores[i]))
+            for i in order
+            if best_scores[i] > 0
+        ]
+
+
+_loaded_indexes: Dict[str, ProductVectorIndex] = {}
+_load_lock = threading.Lock()
+
+
+def load_index(table: str, index_dir: Optional[str] = None) -> Optional[ProductVectorIndex]:
+    """
+    Retourner l'index courant d'une table, rechargé si le manifeste a changé
+
+    Returns:
+        ProductVectorIndex, ou None si l'index n'a pas encore été construit
+    """
+    index_dir = index_dir or get_index_dir()
+    manifest = _read_manifest(_manifest_path(index_dir, table))
+    if not manifest:
+        return None
+
+    current = _loaded_indexes.get(table)
+    if current and current.version == manifest['version']:
+        return current
+
+    with _load_lock:
+        current = _loaded_indexes.get(table)
+        if current and current.version == manifest['version']:
+            return current
+        try:
+            ids = np.load(os.path.join(index_dir, manifest['ids']))
+            vectors = np.load(os.path.join(index_dir, manifest['vectors']), mmap_mode='r')
+        except OSError as e:
+            logger.error(f"Impossible de charger l'index vectoriel {table}: {str(e)}")
+            return current
+        index = ProductVectorIndex(table, manifest['version'], ids, vectors)
+        _loaded_indexes[table] = index
+        logger.info(f"Index vectoriel {table} chargé (version {index.version}, {len(ids)} produits)")
+        return index
+
+
+def rebuild_index(table: str, dim: int = DEFAULT_DIM, index_dir: Optional[str] = None) -> Dict:
+    """
+    Reconstruire l'index d'une table depuis la base catalogue
+
+    Returns:
+        Manifeste du nouvel index
+    """
+    from sqlalchemy import text
+    from .products_views import SessionLocal
+
+    if table not in INDEX_QUERIES:
+        raise ValueError(f"Unknown table: {table}")
+
+    session = SessionLocal()
+    try:
+        rows = [tuple(row) for row in session.execute(text(INDEX_QUERIES[table]))]
+    finally:
+        session.close()
+
+    ids, vectors = build_vectors(rows, dim=dim)
+    return save_index(table, ids, vectors, index_dir=index_dir)
@@ -0,0 +1,265 @@
+"""
+Profil des tâches des DAGs de scrapers
+Synchronisation des task instances (endpoint batch d'Airflow), tendances de
+durée par tâche et chemin critique des runs
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.db import connection
+from django.db.models import Avg, Count, Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ScraperRun, ScraperTaskRun
+from .scraper_runs import PercentileCont, _chunks, _parse_date, percentile
+
+logger = logging.getLogger(__name__)
+
+TASK_UPDATE_FIELDS = [
+    'state', 'try_number', 'operator', 'upstream_task_ids',
+    'queued_at', 'start_date', 'end_date', 'duration', 'synced_at',
+]
+# Nombre de runs analysés pour la part de chaque tâche dans le chemin critique
+CRITICAL_PATH_RUNS = 50
+
+
+# ==================== Synchronisation ====================
+
+def _upstream_map(client, dag_id: str) -> Dict[str, List[str]]:
+    """Tâches amont de chaque tâche, depuis la définition du DAG"""
+    upstream = defaultdict(list)
+    try:
+        for task in client.get_dag_tasks(dag_id):
+            upstream.setdefault(task['task_id'], [])
+            for downstream_id in task.get('downstream_task_ids', []):
+                upstream[downstream_id].append(task['task_id'])
+    except Exception as e:
+        logger.warning(f"Graphe des tâches de {dag_id} indisponible: {str(e)}")
+    return upstream
+
+
+def upsert_task_instances(task_instances: Iterable[Dict[str, Any]], upstream: Dict[str, List[str]]) -> int:
+    """Insérer ou mettre à jour des task instances Airflow (une requête)"""
+    objects = []
+    for ti in task_instances:
+        start_date = _parse_date(ti.get('start_date'))
+        end_date = _parse_date(ti.get('end_date'))
+        duration = ti.get('duration')
+        if duration is None and start_date and end_date:
+            duration = (end_date - start_date).total_seconds()
+        objects.append(ScraperTaskRun(
+            dag_id=ti.get('dag_id'),
+            run_id=ti.get('dag_run_id'),
+            task_id=ti.get('task_id'),
+            map_index=ti.get('map_index', -1) if ti.get('map_index') is not None else -1,
+            state=ti.get('state') or '',
+            try_number=ti.get('try_number') or 0,
+            operator=ti.get('operator') or '',
+            upstream_task_ids=upstream.get(ti.get('task_id'), []),
+            queued_at=_parse_date(ti.get('queued_when')),
+            start_date=start_date,
+            end_date=end_date,
+            duration=duration,
+        ))
+    if objects:
+        ScraperTaskRun.objects.bulk_create(
+            objects,
+            update_conflicts=True,
+            unique_fields=['dag_id', 'run_id', 'task_id', 'map_index'],
+            update_fields=TASK_UPDATE_FIELDS,
+        )
+    return len(objects)
+
+
+def sync_task_runs(client, dag_id: str, limit: int = 50, page_size: int = 100) -> Dict[str, Any]:
+    """
+    Récupérer les task instances des runs terminés pas encore synchronisés
+
+    Un seul appel batch (paginé) pour tous les runs concernés. Les runs sont
+    marqués (tasks_synced_at) même sans task instance, pour ne pas être
+    redemandés à chaque synchronisation.
+
+    Returns:
+        Dict {dag_id, runs, task_instances}
+    """
+    run_ids = list(
+        ScraperRun.objects
+        .filter(dag_id=dag_id, state__in=ScraperRun.FINISHED_STATES, tasks_synced_at__isnull=True)
+        .order_by('-execution_date')
+        .values_list('run_id', flat=True)[:limit]
+    )
+    if not run_ids:
+        return {'dag_id': dag_id, 'runs': 0, 'task_instances': 0}
+
+    upstream = _upstream_map(client, dag_id)
+    synced = 0
+    task_instances = client.list_task_instances(dag_ids=[dag_id], dag_run_ids=run_ids, page_size=page_size)
+    for chunk in _chunks(task_instances, page_size):
+        synced += upsert_task_instances(chunk, upstream)
+    ScraperRun.objects.filter(dag_id=dag_id, run_id__in=run_ids).update(tasks_synced_at=timezone.now())
+
+    logger.info(f"Task instances {dag_id}: {synced} pour {len(run_ids)} runs")
+    return {'dag_id': dag_id, 'runs': len(run_ids), 'task_instances': synced}
+
+
+# ==================== Profil ====================
+
+def critical_path(task_runs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Chemin critique d'un run: en partant de la dernière tâche terminée, remonter
+    à chaque fois vers la tâche amont qui a fini le plus tard (celle qui a
+    retardé le démarrage). Sans graphe connu, les tâches terminées avant le
+    démarrage servent d'amont.
+
+    Args:
+        task_runs: Task instances d'un run (les tâches mappées sont regroupées)
+    """
+    tasks = {}
+    for row in task_runs:
+        if not row['start_date'] or not row['end_date']:
+            continue
+        task = tasks.setdefault(row['task_id'], {
+            'task_id': row['task_id'],
+            'upstream_task_ids': row['upstream_task_ids'] or [],
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+        })
+        task['start_date'] = min(task['start_date'], row['start_date'])
+        task['end_date'] = max(task['end_date'], row['end_date'])
+    if not tasks:
+        return []
+
+    current = max(tasks.values(), key=lambda task: task['end_date'])
+    path = [current]
+    seen = {current['task_id']}
+    while True:
+        if current['upstream_task_ids']:
+            candidates = [tasks[task_id] for task_id in current['upstream_task_ids'] if task_id in tasks]
+        else:
+            candidates = [task for task in tasks.values() if task['end_date'] <= current['start_date']]
+        candidates = [task for task in candidates if task['task_id'] not in seen]
+        if not candidates:
+            break
+        current = max(candidates, key=lambda task: task['end_date'])
+        seen.add(current['task_id'])
+        path.append(current)
+    path.reverse()
+
+    steps = []
+    previous_end = None
+    for task in path:
+        steps.append({
+            'task_id': task['task_id'],
+            'start_date': task['start_date'],
+            'end_date': task['end_date'],
+            'duration': (task['end_date'] - task['start_date']).total_seconds(),
+            'wait': (task['start_date'] - previous_end).total_seconds() if previous_end else 0.0,
+        })
+        previous_end = task['end_date']
+    return steps
+
+
+def _task_percentiles(queryset) -> Dict[str, Dict[str, Optional[float]]]:
+    """p50/p95 des durées par tâche (en SQL sur PostgreSQL, en Python sinon)"""
+    if connection.vendor == 'postgresql':
+        rows = queryset.values('task_id').annotate(
+            p50=PercentileCont('duration', 0.5),
+            p95=PercentileCont('duration', 0.95),
+        )
+        return {row['task_id']: {'p50': row['p50'], 'p95': row['p95']} for row in rows}
+
+    durations = defaultdict(list)
+    for task_id, duration in queryset.values_list('task_id', 'duration'):
+        durations[task_id].append(duration)
+    return {
+        task_id: {'p50': percentile(sorted(values), 0.5), 'p95': percentile(sorted(values), 0.95)}
+        for task_id, values in durations.items()
+    }
+
+
+def task_profile(
+    dag_id: str,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Profil des tâches d'un DAG sur une fenêtre de dates de démarrage
+
+    Returns:
+        Dict avec, par tâche, les durées (avg/p50/p95), la tendance journalière
+        et la part des runs où la tâche est sur le chemin critique; plus le
+        chemin critique détaillé du dernier run terminé
+    """
+    queryset = ScraperTaskRun.objects.filter(dag_id=dag_id, duration__isnull=False)
+    if since:
+        queryset = queryset.filter(start_date__gte=since)
+    if until:
+        queryset = queryset.filter(start_date__lt=until)
+
+    summary = {
+        row['task_id']: row
+        for row in queryset.values('task_id').annotate(runs=Count('id'), avg=Avg('duration'))
+    }
+    percentiles = _task_percentiles(queryset)
+
+    trends = defaultdict(list)
+    daily = (
+        queryset
+        .annotate(day=TruncDate('start_date'))
+        .values('task_id', 'day')
+        .annotate(avg=Avg('duration'), runs=Count('id'))
+        .order_by('task_id', 'day')
+    )
+    for row in daily:
+        trends[row['task_id']].append({'date': row['day'].isoformat(), 'avg': row['avg'], 'runs': row['runs']})
+
+    # Chemin critique des derniers runs terminés de la fenêtre
+    run_ids = list(
+        queryset.values('run_id')
+        .annotate(last_start=Max('start_date'))
+        .order_by('-last_start', 'run_id')
+        .values_list('run_id', flat=True)[:CRITICAL_PATH_RUNS]
+    )
+    rows_by_run = defaultdict(list)
+    for row in ScraperTaskRun.objects.filter(dag_id=dag_id, run_id__in=run_ids).values(
+        'run_id', 'task_id', 'upstream_task_ids', 'start_date', 'end_date'
+    ):
+        rows_by_run[row['run_id']].append(row)
+
+    on_critical_path = defaultdict(int)
+    latest = None
+    for run_id in run_ids:
+        path = critical_path(rows_by_run[run_id])
+        for step in path:
+            on_critical_path[step['task_id']] += 1
+        if latest is None and path:
+            latest = {
+                'run_id': run_id,
+                'wall_clock': (path[-1]['end_date'] - path[0]['start_date']).total_seconds(),
+                'path': path,
+            }
+
+    tasks = []
+    for task_id, row in summary.items():
+        tasks.append({
+            'task_id': task_id,
+            'runs': row['runs'],
+            'duration': {
+                'avg': row['avg'],
+                'p50': percentiles.get(task_id, {}).get('p50'),
+                'p95': percentiles.get(task_id, {}).get('p95'),
+            },
+            'critical_path_share': round(on_critical_path[task_id] / len(run_ids), 4) if run_ids else None,
+            'trend': trends[task_id],
+        })
+    tasks.sort(key=lambda task: task['duration']['avg'] or 0, reverse=True)
+
+    return {
+        'tasks': tasks,
+        'critical_path': latest,
+        'runs_analyzed': len(run_ids),
+    }
@@ -2,10 +2,38 @@
 Tests pour l'intégration Airflow - Django
 """
 
-from django.test import TestCase, Client
+import asyncio
+import json
+import os
+import shutil
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
+import tempfile
+import threading
+import time
+
+import httpx
+from asgiref.sync import async_to_sync
+import numpy as np
+import requests
+from django.db import connection
+from django.http import JsonResponse
+from django.test import TestCase, Client, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import AsyncMock, patch, MagicMock
+from . import airflow_callbacks, async_db
 from .airflow_client import AirflowClient
+from .async_airflow_client import AsyncAirflowClient
+from .cache import SWRCache
+from .fake_airflow import FakeAirflow
+from .batches import advance_batch, advance_batches_for_run, create_batch
+from .models import ScraperBatch, ScraperBatchItem, ScraperRun, ScraperRunMetrics, ScraperTaskRun
+from .scraper_runs import scraper_run_stats, sync_dag_runs, upsert_runs
+from .circuit_breaker import CircuitBreakerOpen
+from .task_runs import sync_task_runs, task_profile
+from .similarity import build_vectors, load_index, save_index
 
 
 class AirflowClientTests(TestCase):
@@ -83,6 +111,349 @@ class AirflowClientTests(TestCase):
         self.assertEqual(len(result['dag_runs']), 2)
 
 
+class AirflowClientPaginationTests(TestCase):
+    """Tests pour les itérateurs paginés du client"""
+
+    def setUp(self):
+        self.client = AirflowClient()
+        self.runs = [{'dag_run_id': f'run_{i}', 'state': 'success'} for i in range(25)]
+
+    def fake_page(self, method, url, params=None, **kwargs):
+        response = MagicMock()
+        offset, limit = params['offset'], params['limit']
+        response.json.return_value = {
+            'dag_runs': self.runs[offset:offset + limit],
+            'total_entries': len(self.runs)
+        }
+        return response
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_iter_dag_runs_pages_through_history(self, mock_request):
+        """Test le parcours de toutes les pages (avec préchargement)"""
+        mock_request.side_effect = self.fake_page
+
+        runs = list(self.client.iter_dag_runs('mytek_scraper_dag', page_size=10, prefetch=True))
+
+        self.assertEqual([run['dag_run_id'] for run in runs], [f'run_{i}' for i in range(25)])
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_iter_is_lazy(self, mock_request):
+        """Test qu'aucune page n'est demandée au-delà de ce qui est consommé"""
+        mock_request.side_effect = self.fake_page
+
+        runs = self.client.iter_dag_runs('mytek_scraper_dag', page_size=10)
+        self.assertEqual(mock_request.call_count, 0)
+        self.assertEqual(next(runs)['dag_run_id'], 'run_0')
+        runs.close()
+
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_dag_runs_endpoint_streams_all(self, mock_request):
+        """Test le streaming de tout l'historique par /dags/<dag_id>/runs/?all=true"""
+        mock_request.side_effect = self.fake_page
+
+        with patch('airflow_integration.views.airflow_client', self.client):
+            response = APIClient().get('/api/airflow/dags/mytek_scraper_dag/runs/', {'all': 'true', 'page_size': 10})
+            data = json.loads(b''.join(response.streaming_content))
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(data['runs'][-1]['run_id'], 'run_24')
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    async def test_dag_runs_endpoint_streams_async_under_asgi(self, mock_request):
+        """Test que le streaming reste un itérateur async sous ASGI (pas de buffer complet)"""
+        mock_request.side_effect = self.fake_page
+
+        with patch('airflow_integration.views.airflow_client', self.client):
+            response = await self.async_client.get('/api/airflow/dags/mytek_scraper_dag/runs/', {'all': 'true', 'page_size': 10})
+            self.assertTrue(response.is_async)
+            data = json.loads(b''.join([chunk async for chunk in response.streaming_content]))
+
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(mock_request.call_count, 3)
+
+
+class AirflowClientCacheTests(TestCase):
+    """Tests pour le cache stale-while-revalidate du client"""
+
+    def test_concurrent_requests_are_coalesced(self):
+        """Test un seul appel pour des lectures concurrentes de la même clé"""
+        cache = SWRCache()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'runs'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get('key', fetch, ttl=5)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['runs'] * 5)
+
+    def test_stale_value_served_while_refreshing(self):
+        """Test la valeur périmée servie pendant le rafraîchissement"""
+        cache = SWRCache()
+        cache.get('key', lambda: 'old', ttl=0.01, stale_ttl=5)
+        time.sleep(0.02)
+        refreshed = threading.Event()
+
+        def fetch():
+            refreshed.set()
+            return 'new'
+
+        self.assertEqual(cache.get('key', fetch, ttl=0.01, stale_ttl=5), 'old')
+        self.assertTrue(refreshed.wait(1))
+
+    def test_callers_get_their_own_copy(self):
+        """Test qu'un appelant qui modifie sa réponse ne modifie pas le cache"""
+        cache = SWRCache()
+        first = cache.get('key', lambda: {'dag_runs': [{'state': 'running'}]}, ttl=5)
+        first['dag_runs'][0]['state'] = 'failed'
+        second = cache.get('key', lambda: None, ttl=5)
+        second['dag_runs'].clear()
+
+        self.assertEqual(cache.get('key', lambda: None, ttl=5), {'dag_runs': [{'state': 'running'}]})
+
+    def test_invalidation_is_per_key(self):
+        """Test qu'invalider une clé n'écarte pas le chargement en cours d'une autre"""
+        cache = SWRCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_fetch():
+            started.set()
+            release.wait(1)
+            return 'b'
+
+        loader = threading.Thread(target=lambda: cache.get(('dag_runs', 'b_dag'), slow_fetch, ttl=5))
+        loader.start()
+        self.assertTrue(started.wait(1))
+        cache.invalidate(lambda key: key[1] == 'a_dag')
+        release.set()
+        loader.join()
+
+        self.assertEqual(cache.get(('dag_runs', 'b_dag'), lambda: 'refetched', ttl=5), 'b')
+
+    def test_entries_are_bounded(self):
+        """Test l'éviction LRU au-delà de max_entries et la purge des entrées expirées"""
+        cache = SWRCache(max_entries=2)
+        cache.get(('dags', 100, 0), lambda: 'page 0', ttl=5)
+        cache.get(('dags', 100, 100), lambda: 'page 1', ttl=5)
+        cache.get(('dags', 100, 0), lambda: 'refetched', ttl=5)
+        cache.get(('dags', 100, 200), lambda: 'page 2', ttl=5)
+
+        self.assertEqual(list(cache._entries), [('dags', 100, 0), ('dags', 100, 200)])
+
+        cache.get('short', lambda: 'short', ttl=0.01, stale_ttl=0.01)
+        time.sleep(0.03)
+        cache.get('other', lambda: 'other', ttl=5)
+        self.assertNotIn('short', cache._entries)
+        self.assertEqual(len(cache._entries), 2)
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_trigger_invalidates_dag_runs(self, mock_request):
+        """Test l'invalidation du cache après un déclenchement"""
+        client = AirflowClient()
+        mock_request.return_value.json.return_value = {'dag_runs': [], 'total_entries': 0}
+
+        client.get_dag_runs('mytek_scraper_dag')
+        client.get_dag_runs('mytek_scraper_dag')
+        self.assertEqual(mock_request.call_count, 1)
+
+        client.trigger_dag('mytek_scraper_dag')
+        client.get_dag_runs('mytek_scraper_dag')
+        self.assertEqual(mock_request.call_count, 3)
+
+
+class AirflowClientResilienceTests(TestCase):
+    """Tests pour le circuit breaker et les retries du client"""
+
+    def setUp(self):
+        self.client = AirflowClient(
+            cache_ttls={'dags': 0, 'dag': 0, 'dag_runs': 0, 'health': 0},
+            max_retries=2,
+            backoff_base=0,
+            failure_threshold=3,
+            recovery_timeout=60
+        )
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_get_retried_then_succeeds(self, mock_request):
+        """Test le retry d'un GET après une erreur de connexion"""
+        response = MagicMock()
+        response.json.return_value = {'dag_id': 'mytek_scraper_dag'}
+        mock_request.side_effect = [requests.exceptions.ConnectionError('refused'), response]
+
+        result = self.client.get_dag('mytek_scraper_dag')
+
+        self.assertEqual(result['dag_id'], 'mytek_scraper_dag')
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_post_not_retried(self, mock_request):
+        """Test l'absence de retry pour un POST (non idempotent)"""
+        mock_request.side_effect = requests.exceptions.ReadTimeout('timeout')
+
+        with self.assertRaises(requests.exceptions.ReadTimeout):
+            self.client.trigger_dag('mytek_scraper_dag')
+        self.assertEqual(mock_request.call_count, 1)
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_breaker_opens_and_fails_fast(self, mock_request):
+        """Test l'ouverture du circuit après des échecs consécutifs"""
+        mock_request.side_effect = requests.exceptions.ConnectionError('refused')
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.get_dag('mytek_scraper_dag')
+        self.assertEqual(self.client.breaker.state, 'open')
+
+        with self.assertRaises(CircuitBreakerOpen):
+            self.client.get_dag('mytek_scraper_dag')
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(self.client.get_health()['status'], 'error')
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_client_errors_do_not_open_breaker(self, mock_request):
+        """Test qu'un 404 n'est pas compté comme une panne d'Airflow"""
+        response = MagicMock(status_code=404)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError('404', response=response)
+        mock_request.return_value = response
+
+        for _ in range(4):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.get_dag('unknown_dag')
+
+        self.assertEqual(mock_request.call_count, 4)
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_server_errors_open_breaker_without_retry(self, mock_request):
+        """Test qu'un 500 est compté comme une panne sans être rejoué (seuls les 502/503/504 le sont)"""
+        response = MagicMock(status_code=500)
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError('500', response=response)
+        mock_request.return_value = response
+
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.get_dag('mytek_scraper_dag')
+
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(self.client.breaker.state, 'open')
+
+    def test_half_open_trial_released_without_outcome(self):
+        """Test qu'un essai half_open sans résultat (pool saturé, erreur locale) est rendu"""
+        client = AirflowClient(failure_threshold=1, recovery_timeout=0.01, max_retries=0)
+        client.breaker.record_failure()
+        time.sleep(0.02)
+
+        with patch.object(client, '_send', side_effect=CircuitBreakerOpen("Airflow connection pool exhausted")):
+            with self.assertRaises(CircuitBreakerOpen):
+                client._request('GET', '/api/v1/dags')
+        with patch.object(client, '_send', side_effect=ValueError("bad json")):
+            with self.assertRaises(ValueError):
+                client._request('GET', '/api/v1/dags')
+        self.assertEqual(client.breaker.state, 'half_open')
+
+        with patch.object(client, '_send', return_value=MagicMock()):
+            client._request('GET', '/api/v1/dags')
+        self.assertEqual(client.breaker.state, 'closed')
+
+
+class FakeAirflowServerTests(TestCase):
+    """Tests du client et des vues contre le faux serveur Airflow (vraies requêtes HTTP)"""
+
+    def start_airflow(self, **kwargs):
+        airflow = FakeAirflow(seed=0, **kwargs).start()
+        self.addCleanup(airflow.stop)
+        return airflow
+
+    def test_client_pages_through_real_http(self):
+        """Test la pagination et les filtres contre le faux serveur"""
+        airflow = self.start_airflow(runs_per_dag=25)
+        client = AirflowClient(base_url=airflow.url)
+
+        runs = list(client.iter_dag_runs('mytek_scraper_dag', page_size=10, prefetch=True))
+
+        self.assertEqual(len(runs), 25)
+        self.assertEqual(airflow.request_count('/api/v1/dags/mytek_scraper_dag/dagRuns'), 3)
+        self.assertEqual(client.get_health()['status'], 'healthy')
+
+    def test_read_timeout(self):
+        """Test qu'une latence supérieure au timeout de lecture échoue vite"""
+        airflow = self.start_airflow(latency=0.5)
+        client = AirflowClient(base_url=airflow.url, timeout=0.1, max_retries=0)
+
+        start = time.monotonic()
+        with self.assertRaises(requests.exceptions.Timeout):
+            client.get_dag_runs('mytek_scraper_dag')
+        self.assertLess(time.monotonic() - start, 0.4)
+
+    def test_breaker_opens_on_injected_errors(self):
+        """Test l'ouverture du circuit: les appels suivants ne touchent plus Airflow"""
+        airflow = self.start_airflow()
+        airflow.fail_next(2, status=503)
+        client = AirflowClient(base_url=airflow.url, max_retries=1, backoff_base=0, failure_threshold=2)
+
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.get_dag_runs('mytek_scraper_dag')
+        with self.assertRaises(CircuitBreakerOpen):
+            client.get_dag_runs('mytek_scraper_dag')
+
+        self.assertEqual(client.breaker.state, 'open')
+        self.assertEqual(airflow.request_count(), 2)
+
+    def test_sync_runs_and_task_instances(self):
+        """Test la synchronisation complète (runs puis task instances en batch)"""
+        airflow = self.start_airflow(runs_per_dag=4)
+        client = AirflowClient(base_url=airflow.url)
+
+        sync_dag_runs(client, 'mytek_scraper_dag', page_size=3)
+        result = sync_task_runs(client, 'mytek_scraper_dag', page_size=5)
+
+        self.assertEqual(ScraperRun.objects.filter(dag_id='mytek_scraper_dag').count(), 4)
+        self.assertEqual(result['task_instances'], 12)
+        self.assertEqual(
+            ScraperTaskRun.objects.filter(task_id='load_products').first().upstream_task_ids,
+            ['clean_products']
+        )
+
+    def test_pages_capped_by_maximum_page_limit(self):
+        """Test le parcours complet quand Airflow renvoie moins que page_size (maximum_page_limit)"""
+        airflow = self.start_airflow(runs_per_dag=12, maximum_page_limit=5)
+        client = AirflowClient(base_url=airflow.url)
+
+        runs = list(client.iter_dag_runs('mytek_scraper_dag', page_size=500, prefetch=True))
+        task_instances = list(client.list_task_instances(dag_ids=['mytek_scraper_dag'], page_size=500))
+
+        self.assertEqual(len(runs), 12)
+        self.assertEqual(len({run['dag_run_id'] for run in runs}), 12)
+        self.assertEqual(len(task_instances), 36)
+
+    def test_streamed_runs_view(self):
+        """Test l'endpoint ?all=true de bout en bout"""
+        airflow = self.start_airflow(runs_per_dag=12)
+
+        with patch('airflow_integration.views.airflow_client', AirflowClient(base_url=airflow.url)):
+            response = Client().get('/api/airflow/dags/mytek_scraper_dag/runs/', {'all': 'true', 'page_size': 5})
+            body = json.loads(b''.join(response.streaming_content))
+
+        self.assertEqual(body['status'], 'success')
+        self.assertEqual(len(body['runs']), 12)
+
+
 class AirflowAPIViewsTests(TestCase):
     """Tests pour les vues API"""
 
@@ -146,3 +517,708 @@ class AirflowClientFormattingTests(TestCase):
         duration = AirflowClient._calculate_duration(start, end)
 
         self.assertEqual(duration, 3600)  # 1 heure = 3600 secondes
+
+
+class ProductSimilarityTests(TestCase):
+    """Tests pour l'index vectoriel des produits similaires"""
+
+    def setUp(self):
+        self.index_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.index_dir, ignore_errors=True)
+        self.rows = [
+            (1, 'Samsung Galaxy A15 128Go', 'Téléphonie', 'Smartphones', None),
+            (2, 'Samsung Galaxy A25 256Go', 'Téléphonie', 'Smartphones', None),
+            (3, 'Crème Solaire SPF 50', 'Beauté', 'Solaire', None),
+            (4, 'Crème solaire enfant SPF 50+', 'Beauté', 'Solaire', None),
+            (5, 'Shampooing Bio Naturel', 'Beauté', 'Capillaire', None),
+        ]
+
+    def test_build_vectors_are_normalized(self):
+        """Test la normalisation L2 de la matrice float32"""
+        ids, vectors = build_vectors(self.rows, dim=64)
+
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual(vectors.shape, (5, 64))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        self.assertEqual(ids.tolist(), [1, 2, 3, 4, 5])
+
+    def test_similar_after_save_and_load(self):
+        """Test le top-k cosinus sur l'index memory-mappé"""
+        ids, vectors = build_vectors(self.rows, dim=256)
+        save_index('unique_products', ids, vectors, index_dir=self.index_dir)
+
+        index = load_index('unique_products', index_dir=self.index_dir)
+        matches = index.similar(3, k=2, batch_size=2)
+
+        self.assertIsInstance(index.vectors, np.memmap)
+        self.assertEqual(matches[0][0], 4)
+        self.assertNotIn(3, [product_id for product_id, _ in matches])
+        self.assertIsNone(index.similar(999))
+
+    def test_save_index_swaps_version(self):
+        """Test le rechargement après reconstruction de l'index"""
+        ids, vectors = build_vectors(self.rows, dim=32)
+        first = save_index('products', ids, vectors, index_dir=self.index_dir)
+        loaded = load_index('products', index_dir=self.index_dir)
+
+        second = save_index('products', ids[:2], vectors[:2], index_dir=self.index_dir)
+        reloaded = load_index('products', index_dir=self.index_dir)
+
+        self.assertEqual(loaded.version, first['version'])
+        self.assertEqual(reloaded.version, second['version'])
+        self.assertEqual(len(reloaded.ids), 2)
+
+    def test_previous_generation_kept_until_retention(self):
+        """Test que la génération précédente reste sur disque et que les plus anciennes expirent"""
+        ids, vectors = build_vectors(self.rows, dim=32)
+        first = save_index('products', ids, vectors, index_dir=self.index_dir)
+        loaded = load_index('products', index_dir=self.index_dir)
+        second = save_index('products', ids, vectors, index_dir=self.index_dir)
+        save_index('unique_products', ids, vectors, index_dir=self.index_dir)
+
+        # Deux reconstructions plus tard, la première génération n'est supprimée qu'après la rétention
+        with override_settings(PRODUCT_VECTORS_RETENTION_SECONDS=3600):
+            third = save_index('products', ids, vectors, index_dir=self.index_dir)
+            files = set(os.listdir(self.index_dir))
+            self.assertIn(first['vectors'], files)
+            self.assertEqual(loaded.similar(3, k=1)[0][0], 4)
+
+            expired = time.time() - 7200
+            for name in files:
+                os.utime(os.path.join(self.index_dir, name), (expired, expired))
+            fourth = save_index('products', ids, vectors, index_dir=self.index_dir)
+        files = set(os.listdir(self.index_dir))
+        self.assertNotIn(first['vectors'], files)
+        self.assertNotIn(second['ids'], files)
+        self.assertIn(third['vectors'], files)
+        self.assertIn(fourth['ids'], files)
+        self.assertEqual(sum(name.startswith('unique_products-') for name in files), 2)
+
+    def test_similar_endpoint_unavailable_without_index(self):
+        """Test le 503 quand aucune génération n'existe (volume vide ou absent)"""
+        with override_settings(PRODUCT_VECTORS_DIR=os.path.join(self.index_dir, 'missing')):
+            response = APIClient().get('/api/airflow/products/3/similar/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['status'], 'error')
+
+
+class AsyncProductsViewsTests(TestCase):
+    """Tests pour les vues async du catalogue"""
+
+    @patch('airflow_integration.async_products_views.has_pool', return_value=True)
+    @patch('airflow_integration.async_products_views.fetch_all', new_callable=AsyncMock)
+    @patch('airflow_integration.async_products_views.fetch_one', new_callable=AsyncMock)
+    async def test_store_stats(self, mock_fetch_one, mock_fetch_all, mock_has_pool):
+        """Test la réponse agrégée de /async/products/store/<store>/stats/"""
+        mock_fetch_one.side_effect = [
+            {'count': 3},
+            {'avg': 12.5, 'min': 10, 'max': 15, 'with_price': 2},
+        ]
+        mock_fetch_all.side_effect = [
+            [{'category': 'Informatique', 'count': 3}],
+            [{'availability': 'En stock', 'count': 3}],
+            [{'availability_status': 1, 'count': 3}],
+        ]
+
+        response = await self.async_client.get('/api/airflow/async/products/store/mytek/stats/')
+        stats = response.json()['stats']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(stats['total_products'], 3)
+        self.assertEqual(stats['price_info']['avg'], 12.5)
+        self.assertEqual(stats['availability_status'], {'in_stock': 3})
+        self.assertTrue(all(call.args[1] == ['mytek'] for call in mock_fetch_all.await_args_list))
+        self.assertEqual(response['X-Catalogue-Backend'], 'async-pool')
+
+    @patch('airflow_integration.async_products_views.fetch_all', new_callable=AsyncMock)
+    @patch('airflow_integration.products_views.get_store_stats')
+    def test_sync_view_served_without_pool(self, mock_sync_view, mock_fetch_all):
+        """Test que sans pool (WSGI) la vue sync est servie au lieu d'ouvrir une connexion par requête"""
+        mock_sync_view.return_value = JsonResponse({'status': 'success', 'store': 'mytek'})
+
+        response = self.client.get('/api/airflow/async/products/store/mytek/stats/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Catalogue-Backend'], 'sync')
+        self.assertEqual(mock_sync_view.call_args.kwargs['store_name'], 'mytek')
+        mock_fetch_all.assert_not_awaited()
+
+
+class AsyncDbPoolTests(TestCase):
+    """Tests du pool async: un par process (lifespan ASGI), rien de retenu hors lifespan"""
+
+    def tearDown(self):
+        async_to_sync(async_db.close_pool)()
+
+    def fake_connection(self):
+        conn = MagicMock()
+        cursor = MagicMock()
+        cursor.fetchone = AsyncMock(return_value={'count': 1})
+        conn.execute = AsyncMock(return_value=cursor)
+        conn.close = AsyncMock()
+        return conn
+
+    def test_connections_closed_outside_lifespan(self):
+        """Test sous WSGI (une boucle par appel): une connexion par requête, fermée, aucun pool"""
+        conn = self.fake_connection()
+        with patch('airflow_integration.async_db.AsyncConnection.connect', AsyncMock(return_value=conn)) as connect:
+            for _ in range(5):
+                self.assertEqual(async_to_sync(async_db.fetch_one)("SELECT 1"), {'count': 1})
+
+        self.assertEqual(connect.await_count, 5)
+        self.assertEqual(conn.close.await_count, 5)
+        self.assertIsNone(async_db._pool)
+
+    async def test_lifespan_opens_one_pool(self):
+        """Test le pool ouvert au démarrage ASGI, réutilisé par les requêtes et fermé à l'arrêt"""
+        from backend import asgi
+
+        conn = self.fake_connection()
+
+        @asynccontextmanager
+        async def pool_connection():
+            yield conn
+
+        pool = MagicMock(min_size=2, max_size=10, open=AsyncMock(), close=AsyncMock())
+        pool.connection = pool_connection
+        messages = asyncio.Queue()
+        sent = []
+
+        async def send(message):
+            sent.append(message['type'])
+
+        with patch('airflow_integration.async_db.AsyncConnectionPool', return_value=pool) as pool_class:
+            await messages.put({'type': 'lifespan.startup'})
+            lifespan = asyncio.ensure_future(asgi.application({'type': 'lifespan'}, messages.get, send))
+            while not sent:
+                await asyncio.sleep(0)
+            for _ in range(3):
+                await async_db.fetch_one("SELECT 1")
+            await messages.put({'type': 'lifespan.shutdown'})
+            await lifespan
+
+        self.assertEqual(pool_class.call_count, 1)
+        self.assertEqual(conn.execute.await_count, 3)
+        pool.close.assert_awaited_once()
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.assertIsNone(async_db._pool)
+
+
+class ScrapersStatusTests(TestCase):
+    """Tests pour le statut groupé des scrapers (client async)"""
+
+    async def test_scrapers_status_fan_out(self):
+        """Test les appels concurrents: durée proche de l'appel le plus lent"""
+        async def handler(request):
+            await asyncio.sleep(0.2)
+            if 'parashop' in request.url.path:
+                return httpx.Response(500)
+            return httpx.Response(200, json={'dag_runs': [{
+                'dag_id': request.url.path.split('/')[4],
+                'dag_run_id': 'run_1',
+                'state': 'success',
+                'start_date': '2024-01-01T00:00:00Z',
+                'end_date': '2024-01-01T00:10:00Z'
+            }]})
+
+        client = AsyncAirflowClient(transport=httpx.MockTransport(handler))
+        with patch('airflow_integration.async_views.async_airflow_client', client):
+            start = time.monotonic()
+            response = await self.async_client.get('/api/airflow/scrapers/status/')
+            elapsed = time.monotonic() - start
+        await client.aclose()
+
+        data = response.json()
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(data['status'], 'partial')
+        self.assertEqual(data['scrapers']['mytek']['last_run']['duration'], 600)
+        self.assertEqual(data['scrapers']['parashop']['status'], 'error')
+
+    def test_no_client_outlives_its_loop(self):
+        """Test hors lifespan (une boucle par appel sous WSGI): un client par appel, refermé"""
+        clients = []
+        client = AsyncAirflowClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={'dag_runs': []})))
+        new_client = client._new_client
+
+        def track():
+            clients.append(new_client())
+            return clients[-1]
+
+        with patch.object(client, '_new_client', side_effect=track):
+            for _ in range(5):
+                async_to_sync(client.get_latest_dag_runs)(['a_dag', 'b_dag'])
+
+        self.assertEqual(len(clients), 5)
+        self.assertTrue(all(http_client.is_closed for http_client in clients))
+        self.assertIsNone(client._client)
+
+    def test_latest_run_is_requested_newest_first(self):
+        """Test que la dernière exécution est demandée triée par date décroissante (sync et async)"""
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(dict(request.url.params))
+            return httpx.Response(200, json={'dag_runs': [{'dag_run_id': 'newest'}]})
+
+        client = AsyncAirflowClient(transport=httpx.MockTransport(handler))
+        self.assertEqual(async_to_sync(client.get_latest_dag_run)('a_dag')['dag_run_id'], 'newest')
+        self.assertEqual(requests_seen, [{'limit': '1', 'offset': '0', 'order_by': '-execution_date'}])
+
+        with patch('airflow_integration.airflow_client.requests.Session.request') as mock_request:
+            mock_request.return_value.json.return_value = {'dag_runs': []}
+            self.assertIsNone(AirflowClient().get_latest_dag_run('a_dag'))
+        self.assertEqual(mock_request.call_args.kwargs['params']['order_by'], '-execution_date')
+
+    async def test_process_client_and_shared_breaker(self):
+        """Test le client ouvert au démarrage réutilisé, et le circuit partagé avec le client sync"""
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(500)
+
+        sync_client = AirflowClient(failure_threshold=2)
+        client = AsyncAirflowClient(transport=httpx.MockTransport(handler), breaker=sync_client.breaker,
+                                    slots=sync_client.slots)
+        await client.open()
+        process_client = client._client
+
+        results = await client.get_latest_dag_runs(['a_dag', 'b_dag'])
+        self.assertTrue(all(isinstance(result, httpx.HTTPStatusError) for result in results.values()))
+        self.assertIs(client._client, process_client)
+        self.assertEqual(sync_client.breaker.state, 'open')
+
+        with self.assertRaises(CircuitBreakerOpen):
+            await client.get_latest_dag_run('a_dag')
+        self.assertEqual(len(calls), 2)
+
+        await client.aclose()
+        self.assertTrue(process_client.is_closed)
+
+
+class ScraperRunStatsTests(TestCase):
+    """Tests pour le miroir local des DAG runs et ses statistiques"""
+
+    @staticmethod
+    def airflow_run(run_id, state, day, minutes):
+        return {
+            'dag_id': 'mytek_scraper_dag',
+            'dag_run_id': run_id,
+            'state': state,
+            'execution_date': f'2024-01-0{day}T00:00:00+00:00',
+            'start_date': f'2024-01-0{day}T00:00:00+00:00',
+            'end_date': f'2024-01-0{day}T00:{minutes:02d}:00+00:00' if state != 'running' else None,
+        }
+
+    def test_sync_is_incremental(self):
+        """Test la reprise de la synchronisation à partir du dernier run connu"""
+        client = MagicMock()
+        client.iter_dag_runs.return_value = iter([
+            self.airflow_run('run_1', 'success', 1, 10),
+            self.airflow_run('run_2', 'running', 2, 0),
+        ])
+        sync_dag_runs(client, 'mytek_scraper_dag', page_size=100)
+        self.assertIsNone(client.iter_dag_runs.call_args.kwargs['execution_date_gte'])
+
+        client.iter_dag_runs.return_value = iter([self.airflow_run('run_2', 'success', 2, 20)])
+        result = sync_dag_runs(client, 'mytek_scraper_dag', page_size=100)
+
+        self.assertEqual(client.iter_dag_runs.call_args.kwargs['execution_date_gte'], '2024-01-02T00:00:00+00:00')
+        self.assertEqual(result['fetched'], 1)
+        self.assertEqual(ScraperRun.objects.get(run_id='run_2').duration, 1200)
+
+    def test_stats_aggregates(self):
+        """Test le taux de succès, les percentiles et les runs par jour"""
+        upsert_runs([
+            self.airflow_run('run_1', 'success', 1, 10),
+            self.airflow_run('run_2', 'success', 1, 20),
+            self.airflow_run('run_3', 'success', 2, 30),
+            self.airflow_run('run_4', 'failed', 2, 5),
+        ])
+
+        stats = scraper_run_stats('mytek_scraper_dag')
+
+        self.assertEqual(stats['total_runs'], 4)
+        self.assertEqual(stats['success_rate'], 0.75)
+        self.assertEqual(stats['duration']['p50'], 1200)
+        self.assertEqual([day['total'] for day in stats['runs_per_day']], [2, 2])
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_client_stats_read_the_mirror(self, mock_request):
+        """Test que AirflowClient.get_dag_stats lit scraper_runs sans parcourir l'historique Airflow"""
+        upsert_runs([self.airflow_run('run_1', 'success', 1, 10), self.airflow_run('run_2', 'failed', 2, 5)])
+
+        stats = AirflowClient().get_dag_stats('mytek_scraper_dag')
+
+        mock_request.assert_not_called()
+        self.assertEqual((stats['total_runs'], stats['success'], stats['failed']), (2, 1, 1))
+
+    def test_scraper_stats_endpoint(self):
+        """Test l'endpoint /scrapers/<name>/stats/: miroir synchronisé une seule fois, au premier appel"""
+        def sync_once(client, dag_id):
+            upsert_runs([self.airflow_run('run_1', 'success', 1, 10)])
+
+        with patch('airflow_integration.views.sync_dag_runs', side_effect=sync_once) as sync:
+            response = APIClient().get('/api/airflow/scrapers/mytek/stats/', {'days': 0})
+            again = APIClient().get('/api/airflow/scrapers/mytek/stats/', {'days': 0})
+
+        sync.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['dag_id'], 'mytek_scraper_dag')
+        self.assertEqual(again.data['stats']['total_runs'], 1)
+
+    def test_dag_stats_endpoint_keeps_its_shape(self):
+        """Test /dags/<id>/stats/: tout l'historique par défaut et les clés d'origine"""
+        upsert_runs([self.airflow_run('run_1', 'success', 1, 10), self.airflow_run('run_2', 'failed', 2, 5)])
+
+        response = APIClient().get('/api/airflow/dags/mytek_scraper_dag/stats/')
+
+        self.assertEqual(set(response.data), {'status', 'dag_id', 'stats'})
+        stats = response.data['stats']
+        self.assertEqual(
+            {key: stats[key] for key in ('total_runs', 'success', 'failed', 'running', 'skipped')},
+            {'total_runs': 2, 'success': 1, 'failed': 1, 'running': 0, 'skipped': 0}
+        )
+        windowed = APIClient().get('/api/airflow/dags/mytek_scraper_dag/stats/', {'since': '2024-01-02T00:00:00Z'})
+        self.assertEqual(windowed.data['stats']['total_runs'], 1)
+        self.assertIn('since', windowed.data)
+
+    def test_dag_stats_unavailable_before_first_sync(self):
+        """Test le 503 explicite quand le miroir est vide et qu'Airflow ne répond pas"""
+        with patch('airflow_integration.views.sync_dag_runs', side_effect=requests.ConnectionError('refused')):
+            response = APIClient().get('/api/airflow/dags/mytek_scraper_dag/stats/')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('not been synced', response.data['message'])
+
+
+class ScraperTaskProfileTests(TestCase):
+    """Tests pour le profil des tâches (task instances persistées)"""
+
+    @staticmethod
+    def task_instance(run_id, task_id, start, end):
+        return {
+            'dag_id': 'mytek_scraper_dag',
+            'dag_run_id': run_id,
+            'task_id': task_id,
+            'map_index': -1,
+            'state': 'success',
+            'try_number': 1,
+            'start_date': f'2024-01-01T00:{start:02d}:00+00:00',
+            'end_date': f'2024-01-01T00:{end:02d}:00+00:00',
+            'duration': (end - start) * 60.0,
+        }
+
+    @patch('airflow_integration.airflow_client.requests.Session.request')
+    def test_get_task_instances_endpoint(self, mock_request):
+        """Test que get_task_instances interroge bien les task instances (et non les dagRuns)"""
+        mock_request.return_value.json.return_value = {'task_instances': [], 'total_entries': 0}
+
+        AirflowClient().get_task_instances('mytek_scraper_dag', dag_run_id='run_1')
+
+        self.assertTrue(mock_request.call_args.args[1].endswith(
+            '/api/v1/dags/mytek_scraper_dag/dagRuns/run_1/taskInstances'
+        ))
+
+    def test_sync_fetches_finished_runs_in_one_batch(self):
+        """Test la récupération groupée des task instances des runs terminés"""
+        upsert_runs([
+            ScraperRunStatsTests.airflow_run('run_1', 'success', 1, 10),
+            ScraperRunStatsTests.airflow_run('run_2', 'running', 2, 0),
+        ])
+        client = MagicMock()
+        client.get_dag_tasks.return_value = [
+            {'task_id': 'scrape', 'downstream_task_ids': ['load']},
+            {'task_id': 'load', 'downstream_task_ids': []},
+        ]
+        client.list_task_instances.return_value = iter([
+            self.task_instance('run_1', 'scrape', 0, 8),
+            self.task_instance('run_1', 'load', 8, 10),
+        ])
+
+        result = sync_task_runs(client, 'mytek_scraper_dag')
+
+        self.assertEqual(client.list_task_instances.call_args.kwargs['dag_run_ids'], ['run_1'])
+        self.assertEqual(result['task_instances'], 2)
+        self.assertEqual(ScraperTaskRun.objects.get(task_id='load').upstream_task_ids, ['scrape'])
+
+        # Les runs déjà synchronisés ne sont plus demandés
+        self.assertEqual(sync_task_runs(client, 'mytek_scraper_dag')['runs'], 0)
+
+    def test_sync_marks_runs_without_task_instances(self):
+        """Test qu'un run sans task instance n'est pas redemandé à chaque synchronisation"""
+        upsert_runs([ScraperRunStatsTests.airflow_run('run_1', 'failed', 1, 0)])
+        client = MagicMock()
+        client.get_dag_tasks.return_value = []
+        client.list_task_instances.return_value = iter([])
+
+        self.assertEqual(sync_task_runs(client, 'mytek_scraper_dag')['runs'], 1)
+        self.assertEqual(sync_task_runs(client, 'mytek_scraper_dag')['runs'], 0)
+        self.assertEqual(client.list_task_instances.call_count, 1)
+        self.assertIsNotNone(ScraperRun.objects.get(run_id='run_1').tasks_synced_at)
+
+    def test_profile_critical_path(self):
+        """Test les durées par tâche et le chemin critique (branche la plus lente)"""
+        ScraperTaskRun.objects.bulk_create([
+            ScraperTaskRun(
+                dag_id='mytek_scraper_dag', run_id='run_1', task_id=task_id, state='success',
+                upstream_task_ids=upstream,
+                start_date=datetime(2024, 1, 1, 0, start, tzinfo=dt_timezone.utc),
+                end_date=datetime(2024, 1, 1, 0, end, tzinfo=dt_timezone.utc),
+                duration=(end - start) * 60.0,
+            )
+            for task_id, upstream, start, end in [
+                ('start', [], 0, 1),
+                ('fast_pages', ['start'], 1, 3),
+                ('slow_pages', ['start'], 1, 9),
+                ('load', ['fast_pages', 'slow_pages'], 9, 10),
+            ]
+        ])
+
+        profile = task_profile('mytek_scraper_dag')
+
+        path = profile['critical_path']['path']
+        self.assertEqual([step['task_id'] for step in path], ['start', 'slow_pages', 'load'])
+        self.assertEqual(profile['critical_path']['wall_clock'], 600)
+        tasks = {task['task_id']: task for task in profile['tasks']}
+        self.assertEqual(tasks['slow_pages']['duration']['p50'], 480)
+        self.assertEqual(tasks['fast_pages']['critical_path_share'], 0)
+        self.assertEqual(profile['tasks'][0]['task_id'], 'slow_pages')
+
+    def test_profile_analyzes_latest_runs(self):
+        """Test la sélection des runs analysés (un par run, le plus récent en premier)"""
+        ScraperTaskRun.objects.bulk_create([
+            ScraperTaskRun(
+                dag_id='mytek_scraper_dag', run_id=run_id, task_id=task_id, state='success',
+                start_date=datetime(2024, 1, day, 0, start, tzinfo=dt_timezone.utc),
+                end_date=datetime(2024, 1, day, 0, start + 1, tzinfo=dt_timezone.utc),
+                duration=60.0,
+            )
+            for run_id, day in [('run_1', 1), ('run_2', 2)]
+            for task_id, start in [('scrape', 0), ('load', 1)]
+        ])
+
+        with patch('airflow_integration.task_runs.CRITICAL_PATH_RUNS', 1):
+            profile = task_profile('mytek_scraper_dag')
+
+        self.assertEqual(profile['runs_analyzed'], 1)
+        self.assertEqual(profile['critical_path']['run_id'], 'run_2')
+
+    def test_scraper_profile_endpoint(self):
+        """Test l'endpoint /scrapers/<name>/profile/"""
+        response = APIClient().get('/api/airflow/scrapers/mytek/profile/', {'days': 0})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['profile']['tasks'], [])
+        self.assertIsNone(response.data['profile']['critical_path'])
+
+
+@override_settings(AIRFLOW_WEBHOOK_SECRET='test-secret')
+class DagRunWebhookTests(TestCase):
+    """Tests pour le webhook de fin de DAG run"""
+
+    def setUp(self):
+        # Contexte minimal d'un callback Airflow (fake dag_run)
+        self.context = {'dag_run': SimpleNamespace(
+            dag_id='mytek_scraper_dag',
+            run_id='scheduled__2024-01-01',
+            state='success',
+            run_type='scheduled',
+            logical_date=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+            execution_date=datetime(2024, 1, 1, tzinfo=dt_timezone.utc),
+            start_date=datetime(2024, 1, 1, 0, 0, tzinfo=dt_timezone.utc),
+            end_date=datetime(2024, 1, 1, 0, 15, tzinfo=dt_timezone.utc),
+            conf={},
+        )}
+
+    def post(self, secret='test-secret', timestamp=None):
+        body = json.dumps(airflow_callbacks.build_payload(self.context)).encode('utf-8')
+        timestamp = timestamp or str(int(time.time()))
+        return APIClient().generic(
+            'POST', '/api/airflow/webhooks/dag-run/', body,
+            content_type='application/json',
+            HTTP_X_AIRFLOW_TIMESTAMP=timestamp,
+            HTTP_X_AIRFLOW_SIGNATURE=airflow_callbacks.sign(secret, timestamp, body),
+        )
+
+    @patch('airflow_integration.views.start_catalogue_warm_up')
+    def test_signed_webhook_records_run_and_bumps_catalogue(self, mock_warm_up):
+        """Test l'enregistrement du run, la version catalogue et le préchargement"""
+        from accounts.models import CatalogueVersion
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['catalogue_refreshed'])
+        self.assertEqual(ScraperRun.objects.get(run_id='scheduled__2024-01-01').duration, 900)
+        self.assertEqual(CatalogueVersion.objects.get(store_name='mytek').version, 1)
+        mock_warm_up.assert_called_once()
+
+    def test_rejects_bad_or_stale_signature(self):
+        """Test le refus d'une signature invalide ou expirée"""
+        self.assertEqual(self.post(secret='wrong').status_code, 401)
+        self.assertEqual(self.post(timestamp=str(int(time.time()) - 3600)).status_code, 401)
+        self.assertFalse(ScraperRun.objects.exists())
+
+    def test_ingestion_metrics_recorded_and_rolled_up(self):
+        """Test les métriques d'ingestion additionnées sur les tâches et l'endpoint /metrics/"""
+        pushed = {
+            'fetch': {'bytes_fetched': 2048},
+            'load': [
+                {'rows_inserted': 100, 'rows_updated': 50, 'rows_unchanged': 750, 'db_write_seconds': 30.0},
+                {'rows_inserted': 20, 'rows_updated': 10, 'rows_unchanged': 0, 'db_write_seconds': 15.0},
+            ],
+        }
+        tasks = [
+            SimpleNamespace(task_id=task_id, xcom_pull=lambda task_ids, key: pushed[task_ids])
+            for task_id in pushed
+        ]
+        self.context['dag_run'].get_task_instances = lambda: tasks
+
+        response = self.post()
+
+        self.assertTrue(response.data['metrics_recorded'])
+        metrics = ScraperRunMetrics.objects.get(run__run_id='scheduled__2024-01-01')
+        self.assertEqual(metrics.rows_total, 930)
+        self.assertEqual(metrics.rows_per_second, round(930 / 900, 4))
+        self.assertEqual(metrics.changed_ratio, round(180 / 930, 4))
+        self.assertEqual(metrics.db_write_share, 0.05)
+
+        response = APIClient().get('/api/airflow/scrapers/mytek/metrics/', {'days': 0})
+        self.assertEqual(response.status_code, 200)
+        rollup = response.data['metrics']
+        self.assertEqual(rollup['totals']['bytes_fetched'], 2048)
+        self.assertEqual([period['rows_total'] for period in rollup['series']], [930])
+        self.assertEqual(rollup['recent_runs'][0]['dag_run_id'], 'scheduled__2024-01-01')
+
+        response = APIClient().get('/api/airflow/scrapers/mytek/metrics/', {'interval': 'year'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ScraperBatchTests(TestCase):
+    """Tests pour le déclenchement groupé des scrapers"""
+
+    def setUp(self):
+        self.airflow = MagicMock()
+        self.airflow.trigger_dag.side_effect = lambda dag_id, **kwargs: {'dag_run_id': f'{dag_id}_run'}
+        self.scrapers = {
+            'mytek': 'mytek_scraper_dag',
+            'spacenet': 'spacenet_scraper_dag',
+            'parashop': 'parashop_scraper_dag',
+        }
+
+    def states(self, batch):
+        return list(batch.items.order_by('position').values_list('state', flat=True))
+
+    def finish(self, dag_id, state='success'):
+        upsert_runs([{'dag_id': dag_id, 'dag_run_id': f'{dag_id}_run', 'state': state}])
+        advance_batches_for_run(self.airflow, dag_id, f'{dag_id}_run')
+
+    def test_concurrency_cap_and_next_on_completion(self):
+        """Test la limite de concurrence et le démarrage du suivant à la fin d'un run"""
+        batch = create_batch(self.scrapers, max_concurrency=2, stagger_seconds=0)
+        batch = advance_batch(batch.id, self.airflow)
+        self.assertEqual(self.states(batch), ['running', 'running', 'pending'])
+
+        self.finish('mytek_scraper_dag')
+        self.assertEqual(self.states(batch), ['success', 'running', 'running'])
+
+        self.finish('spacenet_scraper_dag')
+        self.finish('parashop_scraper_dag', state='failed')
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'partial')
+        self.assertEqual(self.airflow.trigger_dag.call_count, 3)
+
+    def test_stagger_interval(self):
+        """Test le décalage minimum entre deux démarrages"""
+        batch = create_batch(self.scrapers, max_concurrency=3, stagger_seconds=60)
+        batch = advance_batch(batch.id, self.airflow)
+        advance_batch(batch.id, self.airflow)
+
+        self.assertEqual(self.states(batch), ['running', 'pending', 'pending'])
+
+    def test_trigger_all_endpoint(self):
+        """Test l'endpoint /scrapers/trigger-all/ et le statut consolidé"""
+        with patch('airflow_integration.views.airflow_client', self.airflow):
+            response = APIClient().post(
+                '/api/airflow/scrapers/trigger-all/',
+                {'scrapers': ['mytek', 'spacenet'], 'max_concurrency': 1, 'stagger_seconds': 0},
+                format='json'
+            )
+            batch_id = response.data['batch']['batch_id']
+            self.airflow.get_dag_run.return_value = {
+                'dag_id': 'mytek_scraper_dag', 'dag_run_id': 'mytek_scraper_dag_run', 'state': 'success'
+            }
+            status_response = APIClient().get(f'/api/airflow/scrapers/batches/{batch_id}/')
+            self.airflow.get_dag_run.assert_not_called()
+            self.assertEqual(self.airflow.trigger_dag.call_count, 1)
+            advance_response = APIClient().post(f'/api/airflow/scrapers/batches/{batch_id}/advance/')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['batch']['counts']['running'], 1)
+        # Le GET ne fait que lire: aucun appel à Airflow, aucun démarrage
+        self.assertEqual(
+            [item['state'] for item in status_response.data['batch']['scrapers']],
+            ['running', 'pending']
+        )
+        self.assertEqual(
+            [item['state'] for item in advance_response.data['batch']['scrapers']],
+            ['success', 'running']
+        )
+        self.assertEqual(ScraperBatch.objects.get(pk=batch_id).status, 'running')
+
+    def test_airflow_called_outside_transactions(self):
+        """Test aucun appel à Airflow pendant une transaction (verrou du batch relâché)"""
+        batch = create_batch(self.scrapers, max_concurrency=1, stagger_seconds=0)
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        def trigger(dag_id, **kwargs):
+            depths.append(len(connection.atomic_blocks))
+            return {'dag_run_id': kwargs['dag_run_id']}
+
+        def get_dag_run(dag_id, run_id):
+            depths.append(len(connection.atomic_blocks))
+            return {'dag_id': dag_id, 'dag_run_id': run_id, 'state': 'success'}
+
+        self.airflow.trigger_dag.side_effect = trigger
+        self.airflow.get_dag_run.side_effect = get_dag_run
+        advance_batch(batch.id, self.airflow)
+        advance_batch(batch.id, self.airflow, poll=True)
+
+        self.assertEqual(depths, [depth] * 3)
+        item = batch.items.get(position=0)
+        self.assertEqual((item.state, item.run_id), ('success', f'batch__{batch.id}__{item.pk}'))
+
+    def test_abandoned_claim_is_resumed_without_duplicate(self):
+        """Test une réservation abandonnée reprise: Airflow répond 409, le run existant est gardé"""
+        batch = create_batch(self.scrapers, max_concurrency=1, stagger_seconds=0)
+        item = batch.items.get(position=0)
+        ScraperBatchItem.objects.filter(pk=item.pk).update(
+            state='triggering', triggered_at=timezone.now() - timedelta(minutes=5)
+        )
+        conflict = requests.Response()
+        conflict.status_code = 409
+        self.airflow.trigger_dag.side_effect = requests.exceptions.HTTPError(response=conflict)
+
+        advance_batch(batch.id, self.airflow)
+
+        item.refresh_from_db()
+        self.assertEqual((item.state, item.run_id), ('running', f'batch__{batch.id}__{item.pk}'))
+        self.assertEqual(self.states(batch), ['running', 'pending', 'pending'])
+
+    def test_deadline_closes_batch(self):
+        """Test l'échéance: scrapers non terminés en échec, batch clos, plus d'interrogation"""
+        batch = create_batch(self.scrapers, max_concurrency=1, stagger_seconds=0)
+        advance_batch(batch.id, self.airflow)
+        ScraperBatch.objects.filter(pk=batch.id).update(deadline_at=timezone.now() - timedelta(seconds=1))
+
+        batch = advance_batch(batch.id, self.airflow, poll=True)
+        self.assertEqual(batch.status, 'failed')
+        self.assertEqual(self.states(batch), ['failed', 'failed', 'failed'])
+
+        self.airflow.reset_mock()
+        advance_batch(batch.id, self.airflow, poll=True)
+        self.airflow.get_dag_run.assert_not_called()
@@ -6,6 +6,8 @@ Endpoints API pour les DAGs, Scrapers et Produits
 from django.urls import path
 from . import views
 from . import products_views
+from . import async_products_views
+from . import async_views
 
 app_name = 'airflow_integration'
 
@@ -24,18 +26,31 @@ urlpatterns = [
     # ==================== DAG Runs ====================
     path('dags/<str:dag_id>/runs/', views.get_dag_runs, name='get_dag_runs'),
     path('dags/<str:dag_id>/runs/<str:run_id>/', views.get_dag_run, name='get_dag_run'),
+    path('dags/<str:dag_id>/runs/<str:run_id>/task-instances/', views.get_task_instances, name='get_task_instances'),
     path('dags/<str:dag_id>/latest-run/', views.get_latest_dag_run, name='get_latest_dag_run'),
 
     # ==================== DAG Statistics ====================
     path('dags/<str:dag_id>/stats/', views.get_dag_stats, name='get_dag_stats'),
+    path('dags/<str:dag_id>/profile/', views.get_dag_profile, name='get_dag_profile'),
 
     # ==================== Scrapers Shortcuts ====================
+    path('scrapers/status/', async_views.get_all_scrapers_status, name='get_all_scrapers_status'),
+    path('scrapers/trigger-all/', views.trigger_all_scrapers, name='trigger_all_scrapers'),
+    path('scrapers/batches/<int:batch_id>/', views.get_scraper_batch, name='get_scraper_batch'),
+    path('scrapers/batches/<int:batch_id>/advance/', views.advance_scraper_batch, name='advance_scraper_batch'),
     path('scrapers/<str:scraper_name>/trigger/', views.trigger_scraper, name='trigger_scraper'),
     path('scrapers/<str:scraper_name>/status/', views.get_scraper_status, name='get_scraper_status'),
+    path('scrapers/<str:scraper_name>/stats/', views.get_scraper_stats, name='get_scraper_stats'),
+    path('scrapers/<str:scraper_name>/profile/', views.get_scraper_profile, name='get_scraper_profile'),
+    path('scrapers/<str:scraper_name>/metrics/', views.get_scraper_metrics, name='get_scraper_metrics'),
+
+    # ==================== Webhooks ====================
+    path('webhooks/dag-run/', views.dag_run_webhook, name='dag_run_webhook'),
 
     # ==================== Products CRUD ====================
     path('products/', products_views.get_products, name='get_products'),
     path('products/<int:product_id>/', products_views.get_product_by_id, name='get_product'),
+    path('products/<int:product_id>/similar/', products_views.get_similar_products, name='get_similar_products'),
     path('products/search/', products_views.search_products, name='search_products'),
     path('products/stats/', products_views.get_products_stats, name='get_products_stats'),
     path('products/store-counts/', products_views.get_store_product_counts, name='get_store_product_counts'),
@@ -47,7 +62,13 @@ urlpatterns = [
     # ==================== Products by Category ====================
     path('products/category/<str:category>/', products_views.get_products_by_category, name='get_products_by_category'),
 
+    # ==================== Products (async, ASGI) ====================
+    path('async/products/', async_products_views.get_products, name='async_get_products'),
+    path('async/products/stats/', async_products_views.get_products_stats, name='async_get_products_stats'),
+    path('async/products/store/<str:store_name>/stats/', async_products_views.get_store_stats, name='async_get_store_stats'),
+
     # ==================== Unique Products (canonical catalogue) ====================
     path('unique-products/search/', products_views.search_unique_products, name='search_unique_products'),
     path('unique-products/<int:product_id>/', products_views.get_unique_product, name='get_unique_product'),
+    path('unique-products/<int:product_id>/similar/', products_views.get_similar_unique_products, name='get_similar_unique_products'),
 ]
@@ -3,12 +3,31 @@ Django Views pour l'intégration Airflow
 API endpoints pour les DAGs et leur exécution
 """
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
+import json
 import logging
 import os
+from itertools import chain
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from datetime import timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from .airflow_client import AirflowClient
+from .batches import advance_batch, advance_batches_for_run, batch_status, create_batch
+from .ingestion_metrics import ingestion_metrics, record_run_metrics
+from .models import ScraperBatch, ScraperRun
+from .scraper_runs import scraper_run_stats, sync_dag_runs, upsert_runs
+from .task_runs import task_profile
+from .webhooks import FINISHED_STATES, start_catalogue_warm_up, verify_signature
+from accounts.catalogue import bump_catalogue_version
 
 logger = logging.getLogger(__name__)
 
@@ -21,9 +40,75 @@ AIRFLOW_API_PASSWORD = os.getenv("AIRFLOW_API_PASSWORD", "airflow")
 airflow_client = AirflowClient(
     base_url=AIRFLOW_BASE_URL,
     username=AIRFLOW_API_USER,
-    password=AIRFLOW_API_PASSWORD
+    password=AIRFLOW_API_PASSWORD,
+    connect_timeout=float(os.getenv("AIRFLOW_CONNECT_TIMEOUT", "3")),
+    timeout=float(os.getenv("AIRFLOW_READ_TIMEOUT", "10")),
+    pool_maxsize=int(os.getenv("AIRFLOW_POOL_MAXSIZE", "10"))
 )
 
+# Scrapers -> DAG Airflow correspondant
+SCRAPER_DAGS = {
+    'chillandlit': 'chillandlit_scraper_dag',
+    'mytek': 'mytek_scraper_dag',
+    'spacenet': 'spacenet_scraper_dag',
+    'tunisianet': 'tunisianet_scraper_dag',
+    'parashop': 'parashop_scraper_dag'
+}
+SCRAPER_NAMES = {dag_id: scraper_name for scraper_name, dag_id in SCRAPER_DAGS.items()}
+
+# Pagination côté Airflow pour les réponses streamées (?all=true)
+MAX_STREAM_PAGE_SIZE = 1000
+_END = object()
+
+
+def _stream_collection(request, header, items_key, items, transform=None):
+    """
+    Réponse JSON streamée: `header` + une liste écrite élément par élément
+
+    Le premier élément est lu avant de renvoyer la réponse: une erreur sur la
+    première page Airflow donne encore une réponse d'erreur classique.
+    Sous ASGI le contenu est un itérateur async: Django bufferiserait sinon
+    tout le générateur (sync_to_async(list)) avant d'envoyer le premier octet.
+    """
+    items = iter(items)
+    first = next(items, _END)
+    items = chain([first], items) if first is not _END else iter(())
+
+    def body():
+        yield json.dumps(header, cls=DjangoJSONEncoder)[:-1] + f', "{items_key}": ['
+        count = 0
+        try:
+            for item in items:
+                yield (',' if count else '') + json.dumps(transform(item) if transform else item, cls=DjangoJSONEncoder)
+                count += 1
+        except Exception as e:
+            # Le statut HTTP est déjà parti: l'erreur est signalée en fin de document
+            logger.error(f"Error while streaming {items_key}: {str(e)}")
+            yield '], "stream_error": ' + json.dumps(str(e)) + f', "count": {count}}}'
+            return
+        yield f'], "count": {count}}}'
+
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        return StreamingHttpResponse(_async_chunks(body()), content_type='application/json')
+    return StreamingHttpResponse(body(), content_type='application/json')
+
+
+async def _async_chunks(chunks):
+    """Itérateur async sur un générateur sync: chaque morceau est lu dans un thread"""
+    try:
+        while True:
+            chunk = await sync_to_async(next, thread_sensitive=False)(chunks, _END)
+            if chunk is _END:
+                return
+            yield chunk
+    finally:
+        # Client déconnecté: fermer le générateur libère la pagination Airflow
+        await sync_to_async(chunks.close, thread_sensitive=False)()
+
+
+def _page_size(request):
+    return min(max(int(request.query_params.get('page_size', 100)), 1), MAX_STREAM_PAGE_SIZE)
+
 
 # ==================== Health Check ====================
 
@@ -40,21 +125,24 @@ def airflow_health(request):
                 'status': 'success',
                 'airflow_status': 'healthy',
                 'message': 'Airflow is running',
-                'details': health.get('details', {})
+                'details': health.get('details', {}),
+                'circuit_breaker': airflow_client.breaker.snapshot()
             })
         else:
             return Response({
                 'status': 'warning',
                 'airflow_status': health.get('status', 'unknown'),
                 'message': 'Airflow is not healthy',
-                'details': health.get('details', {})
+                'details': health.get('details', {}),
+                'circuit_breaker': airflow_client.breaker.snapshot()
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
     except Exception as e:
         logger.error(f"Health check error: {str(e)}")
         return Response({
             'status': 'error',
             'airflow_status': 'unavailable',
-            'message': str(e)
+            'message': str(e),
+            'circuit_breaker': airflow_client.breaker.snapshot()
         }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
 
@@ -69,8 +157,17 @@ def list_dags(request):
     Query parameters:
         - limit: Nombre de DAGs (défaut: 100)
         - offset: Offset pour la pagination (défaut: 0)
+        - all: true pour streamer tous les DAGs (pages Airflow de `page_size`)
     """
     try:
+        if request.query_params.get('all') == 'true':
+            return _stream_collection(
+                request,
+                {'status': 'success'},
+                'dags',
+                airflow_client.iter_dags(page_size=_page_size(request), prefetch=True)
+            )
+
         limit = int(request.query_params.get('limit', 100))
         offset = int(request.query_params.get('offset', 0))
 
@@ -180,12 +277,22 @@ def get_dag_runs(request, dag_id):
         - limit: Nombre de runs (défaut: 10)
         - offset: Offset pour la pagination (défaut: 0)
         - state: Filtrer par état (success, failed, running, etc.)
+        - all: true pour streamer tout l'historique (pages Airflow de `page_size`)
     """
     try:
         limit = int(request.query_params.get('limit', 10))
         offset = int(request.query_params.get('offset', 0))
         state = request.query_params.get('state')
 
+        if request.query_params.get('all') == 'true':
+            return _stream_collection(
+                request,
+                {'status': 'success', 'dag_id': dag_id},
+                'runs',
+                airflow_client.iter_dag_runs(dag_id, state=state, page_size=_page_size(request), prefetch=True),
+                transform=airflow_client.format_dag_run
+            )
+
         runs = airflow_client.get_dag_runs(dag_id, limit=limit, offset=offset, state=state)
 
         # Formater les résultats
@@ -227,6 +334,30 @@ def get_dag_run(request, dag_id, run_id):
         }, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+def get_task_instances(request, dag_id, run_id):
+    """
+    Endpoint: GET /api/airflow/dags/<dag_id>/runs/<run_id>/task-instances/
+    Streamer les instances de tâches d'un run ('~' pour tous les runs du DAG)
+
+    Query parameters:
+        - page_size: Taille des pages Airflow (défaut: 100)
+    """
+    try:
+        return _stream_collection(
+            request,
+            {'status': 'success', 'dag_id': dag_id, 'run_id': run_id},
+            'task_instances',
+            airflow_client.iter_task_instances(dag_id, run_id, page_size=_page_size(request), prefetch=True)
+        )
+    except Exception as e:
+        logger.error(f"Error getting task instances for {dag_id}/{run_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
 def get_latest_dag_run(request, dag_id):
     """
@@ -258,20 +389,80 @@ def get_latest_dag_run(request, dag_id):
 
 # ==================== DAG Statistics ====================
 
+def _stats_window(request, default_days=30):
+    """
+    Fenêtre des statistiques depuis les query params
+
+    - since / until: dates ISO 8601
+    - days: nombre de jours jusqu'à maintenant (défaut: `default_days`, 0 = tout l'historique)
+    """
+    raw_since = request.query_params.get('since')
+    raw_until = request.query_params.get('until')
+    if raw_since or raw_until:
+        since = parse_datetime(raw_since) if raw_since else None
+        until = parse_datetime(raw_until) if raw_until else None
+        if (raw_since and since is None) or (raw_until and until is None):
+            raise ValueError("since/until must be ISO 8601 datetimes")
+        return (
+            timezone.make_aware(since) if since and timezone.is_naive(since) else since,
+            timezone.make_aware(until) if until and timezone.is_naive(until) else until,
+        )
+
+    days = int(request.query_params.get('days', default_days))
+    return (timezone.now() - timedelta(days=days) if days > 0 else None), None
+
+
+def _mirror_unavailable(dag_id):
+    """
+    Réponse 503 si le miroir scraper_runs n'a jamais été rempli pour `dag_id` et
+    que la synchronisation au premier appel échoue, sinon None
+    """
+    if ScraperRun.objects.filter(dag_id=dag_id).exists():
+        return None
+    try:
+        sync_dag_runs(airflow_client, dag_id)
+    except Exception as e:
+        logger.warning(f"Première synchronisation des runs {dag_id} échouée: {str(e)}")
+        return Response({
+            'status': 'error',
+            'dag_id': dag_id,
+            'message': f"Runs for DAG '{dag_id}' have not been synced from Airflow yet: {str(e)}"
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return None
+
+
 @api_view(['GET'])
 def get_dag_stats(request, dag_id):
     """
     Endpoint: GET /api/airflow/dags/<dag_id>/stats/
-    Récupérer les statistiques d'un DAG
+    Récupérer les statistiques d'un DAG (calculées sur la table scraper_runs)
+
+    Réponse {status, dag_id, stats}; `stats` garde les compteurs historiques
+    (total_runs, success, failed, running, skipped) et ajoute queued,
+    success_rate, duration, runs_per_day et last_synced_at. La fenêtre
+    appliquée (since/until) n'est renvoyée que si elle est demandée.
+    Au premier appel pour un DAG, ses runs sont synchronisés depuis Airflow
+    (503 si Airflow ne répond pas).
+
+    Query parameters:
+        - days: Fenêtre en jours (défaut: 0 = tout l'historique)
+        - since / until: Fenêtre explicite (ISO 8601), prioritaire sur days
     """
     try:
-        stats = airflow_client.get_dag_stats(dag_id)
+        since, until = _stats_window(request, default_days=0)
+        unavailable = _mirror_unavailable(dag_id)
+        if unavailable is not None:
+            return unavailable
+        stats = scraper_run_stats(dag_id, since=since, until=until)
 
-        return Response({
+        data = {
             'status': 'success',
             'dag_id': dag_id,
             'stats': stats
-        })
+        }
+        if since or until:
+            data.update(since=since, until=until)
+        return Response(data)
     except Exception as e:
         logger.error(f"Error getting stats for {dag_id}: {str(e)}")
         return Response({
@@ -280,8 +471,154 @@ def get_dag_stats(request, dag_id):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+def get_dag_profile(request, dag_id):
+    """
+    Endpoint: GET /api/airflow/dags/<dag_id>/profile/
+    Profil des tâches d'un DAG (table scraper_task_runs): durées par tâche,
+    tendance journalière et chemin critique
+
+    Query parameters:
+        - days: Fenêtre en jours (défaut: 30, 0 = tout l'historique)
+        - since / until: Fenêtre explicite (ISO 8601), prioritaire sur days
+    """
+    try:
+        since, until = _stats_window(request)
+        profile = task_profile(dag_id, since=since, until=until)
+
+        return Response({
+            'status': 'success',
+            'dag_id': dag_id,
+            'since': since,
+            'until': until,
+            'profile': profile
+        })
+    except Exception as e:
+        logger.error(f"Error getting profile for {dag_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
 # ==================== Scrapers Shortcuts ====================
 
+@api_view(['GET'])
+def get_scraper_stats(request, scraper_name):
+    """
+    Endpoint: GET /api/airflow/scrapers/<scraper_name>/stats/
+    Statistiques d'un scraper (mêmes paramètres que /dags/<dag_id>/stats/, mais
+    fenêtre de 30 jours par défaut, renvoyée dans since/until)
+    """
+    if scraper_name not in SCRAPER_DAGS:
+        return Response({
+            'status': 'error',
+            'message': f"Unknown scraper: {scraper_name}",
+            'available_scrapers': list(SCRAPER_DAGS.keys())
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    dag_id = SCRAPER_DAGS[scraper_name]
+
+    try:
+        since, until = _stats_window(request)
+        unavailable = _mirror_unavailable(dag_id)
+        if unavailable is not None:
+            return unavailable
+        stats = scraper_run_stats(dag_id, since=since, until=until)
+
+        return Response({
+            'status': 'success',
+            'scraper': scraper_name,
+            'dag_id': dag_id,
+            'since': since,
+            'until': until,
+            'stats': stats
+        })
+    except Exception as e:
+        logger.error(f"Error getting stats for scraper {scraper_name}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def get_scraper_profile(request, scraper_name):
+    """
+    Endpoint: GET /api/airflow/scrapers/<scraper_name>/profile/
+    Profil des tâches d'un scraper (mêmes paramètres que /dags/<dag_id>/profile/)
+    """
+    if scraper_name not in SCRAPER_DAGS:
+        return Response({
+            'status': 'error',
+            'message': f"Unknown scraper: {scraper_name}",
+            'available_scrapers': list(SCRAPER_DAGS.keys())
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    dag_id = SCRAPER_DAGS[scraper_name]
+
+    try:
+        since, until = _stats_window(request)
+        profile = task_profile(dag_id, since=since, until=until)
+
+        return Response({
+            'status': 'success',
+            'scraper': scraper_name,
+            'dag_id': dag_id,
+            'since': since,
+            'until': until,
+            'profile': profile
+        })
+    except Exception as e:
+        logger.error(f"Error getting profile for scraper {scraper_name}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def get_scraper_metrics(request, scraper_name):
+    """
+    Endpoint: GET /api/airflow/scrapers/<scraper_name>/metrics/
+    Métriques d'ingestion d'un scraper (lignes/s, octets, ratio de lignes
+    modifiées, temps d'écriture en base) avec agrégats par période
+
+    Query parameters:
+        - days / since / until: Fenêtre (comme /stats/)
+        - interval: hour, day (défaut) ou week
+    """
+    if scraper_name not in SCRAPER_DAGS:
+        return Response({
+            'status': 'error',
+            'message': f"Unknown scraper: {scraper_name}",
+            'available_scrapers': list(SCRAPER_DAGS.keys())
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    dag_id = SCRAPER_DAGS[scraper_name]
+
+    try:
+        since, until = _stats_window(request)
+        metrics = ingestion_metrics(
+            dag_id, since=since, until=until, interval=request.query_params.get('interval', 'day')
+        )
+
+        return Response({
+            'status': 'success',
+            'scraper': scraper_name,
+            'dag_id': dag_id,
+            'since': since,
+            'until': until,
+            'metrics': metrics
+        })
+    except Exception as e:
+        logger.error(f"Error getting metrics for scraper {scraper_name}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 def trigger_scraper(request, scraper_name):
     """
@@ -295,22 +632,14 @@ def trigger_scraper(request, scraper_name):
         - tunisianet
         - parashop
     """
-    scrapers = {
-        'chillandlit': 'chillandlit_scraper_dag',
-        'mytek': 'mytek_scraper_dag',
-        'spacenet': 'spacenet_scraper_dag',
-        'tunisianet': 'tunisianet_scraper_dag',
-        'parashop': 'parashop_scraper_dag'
-    }
-
-    if scraper_name not in scrapers:
+    if scraper_name not in SCRAPER_DAGS:
         return Response({
             'status': 'error',
             'message': f"Unknown scraper: {scraper_name}",
-            'available_scrapers': list(scrapers.keys())
+            'available_scrapers': list(SCRAPER_DAGS.keys())
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    dag_id = scrapers[scraper_name]
+    dag_id = SCRAPER_DAGS[scraper_name]
 
     try:
         result = airflow_client.trigger_dag(dag_id)
@@ -331,27 +660,117 @@ def trigger_scraper(request, scraper_name):
         }, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+def trigger_all_scrapers(request):
+    """
+    Endpoint: POST /api/airflow/scrapers/trigger-all/
+    Déclencher plusieurs scrapers avec une limite de concurrence
+
+    Body (JSON, tout optionnel):
+        {
+            "scrapers": ["mytek", "spacenet"],  # défaut: tous
+            "max_concurrency": 2,               # scrapers simultanés
+            "stagger_seconds": 60               # délai minimum entre deux démarrages
+        }
+
+    Les scrapers suivants démarrent quand un slot se libère (webhook de fin de
+    run, ou interrogation d'Airflow par la commande advance_scraper_batches).
+    """
+    scrapers = request.data.get('scrapers') or list(SCRAPER_DAGS.keys())
+    unknown = [name for name in scrapers if name not in SCRAPER_DAGS]
+    if unknown:
+        return Response({
+            'status': 'error',
+            'message': f"Unknown scraper(s): {', '.join(unknown)}",
+            'available_scrapers': list(SCRAPER_DAGS.keys())
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        max_concurrency = int(request.data.get('max_concurrency', settings.SCRAPER_BATCH_MAX_CONCURRENCY))
+        stagger_seconds = int(request.data.get('stagger_seconds', settings.SCRAPER_BATCH_STAGGER_SECONDS))
+        if max_concurrency < 1 or stagger_seconds < 0:
+            raise ValueError("max_concurrency must be >= 1 and stagger_seconds >= 0")
+
+        batch = create_batch(
+            {name: SCRAPER_DAGS[name] for name in dict.fromkeys(scrapers)},
+            max_concurrency=max_concurrency,
+            stagger_seconds=stagger_seconds
+        )
+        batch = advance_batch(batch.id, airflow_client)
+
+        return Response({
+            'status': 'success',
+            'message': f"Batch #{batch.id} started",
+            'batch': batch_status(batch)
+        }, status=status.HTTP_202_ACCEPTED)
+    except Exception as e:
+        logger.error(f"Error triggering scrapers batch: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET'])
+def get_scraper_batch(request, batch_id):
+    """
+    Endpoint: GET /api/airflow/scrapers/batches/<batch_id>/
+    Statut consolidé d'un déclenchement groupé (lecture seule: le batch avance
+    par le webhook, la commande advance_scraper_batches ou POST .../advance/)
+    """
+    batch = ScraperBatch.objects.filter(pk=batch_id).first()
+    if batch is None:
+        return Response({
+            'status': 'error',
+            'message': f"Batch #{batch_id} not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({
+        'status': 'success',
+        'batch': batch_status(batch)
+    })
+
+
+@api_view(['POST'])
+def advance_scraper_batch(request, batch_id):
+    """
+    Endpoint: POST /api/airflow/scrapers/batches/<batch_id>/advance/
+    Faire avancer un déclenchement groupé sans attendre le webhook ni le CronJob
+    (interroge Airflow pour les runs en cours)
+    """
+    if not ScraperBatch.objects.filter(pk=batch_id).exists():
+        return Response({
+            'status': 'error',
+            'message': f"Batch #{batch_id} not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        batch = advance_batch(batch_id, airflow_client, poll=True)
+        return Response({
+            'status': 'success',
+            'batch': batch_status(batch)
+        })
+    except Exception as e:
+        logger.error(f"Error advancing scrapers batch {batch_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['GET'])
 def get_scraper_status(request, scraper_name):
     """
     Endpoint: GET /api/airflow/scrapers/<scraper_name>/status/
     Récupérer le statut d'un scraper
     """
-    scrapers = {
-        'chillandlit': 'chillandlit_scraper_dag',
-        'mytek': 'mytek_scraper_dag',
-        'spacenet': 'spacenet_scraper_dag',
-        'tunisianet': 'tunisianet_scraper_dag',
-        'parashop': 'parashop_scraper_dag'
-    }
-
-    if scraper_name not in scrapers:
+    if scraper_name not in SCRAPER_DAGS:
         return Response({
             'status': 'error',
             'message': f"Unknown scraper: {scraper_name}"
         }, status=status.HTTP_400_BAD_REQUEST)
 
-    dag_id = scrapers[scraper_name]
+    dag_id = SCRAPER_DAGS[scraper_name]
 
     try:
         run = airflow_client.get_latest_dag_run(dag_id)
@@ -376,3 +795,85 @@ def get_scraper_status(request, scraper_name):
             'status': 'error',
             'message': str(e)
         }, status=status.HTTP_400_BAD_REQUEST)
+
+
+# ==================== Webhooks ====================
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def dag_run_webhook(request):
+    """
+    Endpoint: POST /api/airflow/webhooks/dag-run/
+    Notification de fin de DAG run envoyée par les callbacks Airflow
+
+    Headers:
+        X-Airflow-Timestamp: timestamp Unix de l'envoi
+        X-Airflow-Signature: sha256=HMAC(AIRFLOW_WEBHOOK_SECRET, "<timestamp>.<body>")
+
+    Body (JSON): dag_id, dag_run_id, state, execution_date, start_date, end_date, ...
+        metrics (optionnel): rows_inserted, rows_updated, rows_unchanged,
+        bytes_fetched, db_write_seconds
+
+    Enregistre le run dans scraper_runs (et ses métriques d'ingestion),
+    invalide le cache Airflow du DAG et, pour un scraper terminé, incrémente
+    la version catalogue du magasin puis recharge le snapshot catalogue en
+    tâche de fond.
+    """
+    if not verify_signature(request):
+        return Response({
+            'status': 'error',
+            'message': 'Invalid or expired signature'
+        }, status=status.HTTP_401_UNAUTHORIZED)
+
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return Response({
+            'status': 'error',
+            'message': 'Invalid JSON body'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    dag_id = payload.get('dag_id')
+    run_id = payload.get('dag_run_id')
+    if not dag_id or not run_id:
+        return Response({
+            'status': 'error',
+            'message': 'dag_id and dag_run_id are required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        upsert_runs([payload])
+        airflow_client.invalidate_cache(dag_id)
+        # Un slot s'est peut-être libéré dans un batch de scrapers
+        advance_batches_for_run(airflow_client, dag_id, run_id)
+
+        scraper_name = SCRAPER_NAMES.get(dag_id)
+        metrics_recorded = False
+        if isinstance(payload.get('metrics'), dict):
+            try:
+                run = ScraperRun.objects.get(dag_id=dag_id, run_id=run_id)
+                record_run_metrics(run, scraper_name or dag_id, payload['metrics'])
+                metrics_recorded = True
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Invalid ingestion metrics for {dag_id}/{run_id}: {str(e)}")
+
+        catalogue_refreshed = bool(scraper_name) and payload.get('state') in FINISHED_STATES
+        if catalogue_refreshed:
+            bump_catalogue_version(scraper_name)
+            transaction.on_commit(start_catalogue_warm_up)
+
+        return Response({
+            'status': 'success',
+            'dag_id': dag_id,
+            'run_id': run_id,
+            'scraper': scraper_name,
+            'catalogue_refreshed': catalogue_refreshed,
+            'metrics_recorded': metrics_recorded
+        })
+    except Exception as e:
+        logger.error(f"Error handling webhook for {dag_id}/{run_id}: {str(e)}")
+        return Response({
+            'status': 'error',
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,66 @@
+"""
+Webhook de fin de DAG run envoyé par Airflow (on_success_callback / on_failure_callback)
+Vérification de la signature et effets de bord (miroir des runs, catalogue, caches)
+"""
+
+import hashlib
+import hmac
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_HEADER = 'HTTP_X_AIRFLOW_TIMESTAMP'
+SIGNATURE_HEADER = 'HTTP_X_AIRFLOW_SIGNATURE'
+FINISHED_STATES = ('success', 'failed')
+
+
+def sign_payload(secret: str, timestamp: str, body: bytes) -> str:
+    """Signature `sha256=<hex>` de `<timestamp>.<body>`"""
+    message = timestamp.encode('utf-8') + b'.' + body
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), message, hashlib.sha256).hexdigest()
+
+
+def verify_signature(request) -> bool:
+    """
+    Vérifier la signature HMAC et la fraîcheur d'une requête webhook
+
+    Refuse tout si AIRFLOW_WEBHOOK_SECRET n'est pas configuré.
+    """
+    secret = getattr(settings, 'AIRFLOW_WEBHOOK_SECRET', '')
+    timestamp = request.META.get(TIMESTAMP_HEADER, '')
+    signature = request.META.get(SIGNATURE_HEADER, '')
+    if not secret or not timestamp or not signature:
+        return False
+
+    try:
+        age = abs(time.time() - int(timestamp))
+    except ValueError:
+        return False
+    if age > getattr(settings, 'AIRFLOW_WEBHOOK_TOLERANCE', 300):
+        return False
+
+    expected = sign_payload(secret, timestamp, request.body)
+    return hmac.compare_digest(expected, signature)
+
+
+def _warm_up():
+    from accounts.catalogue import warm_catalogue_snapshot
+
+    try:
+        snapshot = warm_catalogue_snapshot()
+        logger.info(f"Snapshot catalogue préchargé (version {snapshot.version}, {len(snapshot)} produits)")
+    except Exception as e:
+        logger.error(f"Préchargement du catalogue échoué: {str(e)}")
+    finally:
+        # Connexion propre à ce thread
+        connection.close()
+
+
+def start_catalogue_warm_up():
+    """Recharger le snapshot catalogue en tâche de fond"""
+    threading.Thread(target=_warm_up, name='catalogue-warm-up', daemon=True).start()
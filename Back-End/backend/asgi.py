@@ -7,10 +7,51 @@ For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
+import logging
 import os
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Importés après get_asgi_application() (django.setup)
+from airflow_integration import async_db  # noqa: E402
+from airflow_integration.async_views import async_airflow_client  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+# Ressources async du worker: ouvertes au démarrage, sur la boucle qui servira
+# les requêtes, et fermées à l'arrêt (Django ne gère pas le protocole lifespan)
+STARTUP_HOOKS = [async_db.open_pool, async_airflow_client.open]
+SHUTDOWN_HOOKS = [async_db.close_pool, async_airflow_client.aclose]
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                for hook in STARTUP_HOOKS:
+                    await hook()
+            except Exception as e:
+                logger.error(f"Démarrage ASGI échoué: {str(e)}")
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            for hook in SHUTDOWN_HOOKS:
+                try:
+                    await hook()
+                except Exception as e:
+                    logger.error(f"Arrêt ASGI: {str(e)}")
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+        return
+    await django_application(scope, receive, send)
@@ -0,0 +1,136 @@
+"""
+Sondes Kubernetes: /healthz (liveness) et /readyz (readiness)
+
+Le middleware est placé en tête de MIDDLEWARE: les sondes ne passent ni par
+les sessions, ni par le CSRF, ni par l'authentification, ni par le routage.
+
+- /healthz: le process répond (aucune I/O)
+- /readyz: base Django, pool SQLAlchemy du catalogue et cache, chacun avec un
+  timeout court; 503 + raisons en JSON si une vérification échoue
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+LIVENESS_PATH = '/healthz'
+READINESS_PATH = '/readyz'
+
+# Les vérifications tournent dans des threads dédiés: une base bloquée fait
+# échouer la sonde après le timeout au lieu de bloquer le worker
+_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='readyz')
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def check_database():
+    """Connexion Django ouverte par le thread de vérification et fermée à la fin:
+    hors requête, rien d'autre ne la fermerait et chaque thread `readyz` garderait
+    une session PostgreSQL inactive"""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def check_catalogue_db():
+    """Pool SQLAlchemy des vues produits"""
+    from sqlalchemy import text
+    from airflow_integration.products_views import engine
+
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    return {'pool': engine.pool.status()}
+
+
+def check_cache():
+    """Aller-retour dans le cache par défaut"""
+    token = uuid.uuid4().hex
+    cache.set('readyz', token, 10)
+    if cache.get('readyz') != token:
+        raise RuntimeError('cache read-back mismatch')
+
+
+def _checks():
+    return {
+        'database': check_database,
+        'catalogue_db': check_catalogue_db,
+        'cache': check_cache,
+    }
+
+
+def _run_checks(timeout):
+    """Lancer les vérifications en parallèle; une vérification encore bloquée depuis
+    la sonde précédente échoue sans être relancée"""
+    futures = {}
+    results = {}
+    with _inflight_lock:
+        for name, check in _checks().items():
+            previous = _inflight.get(name)
+            if previous is not None and not previous.done():
+                results[name] = {'ok': False, 'error': 'previous check still running'}
+                continue
+            started = time.perf_counter()
+            futures[name] = (_executor.submit(check), started)
+            _inflight[name] = futures[name][0]
+
+    deadline = time.monotonic() + timeout
+    for name, (future, started) in futures.items():
+        try:
+            details = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            results[name] = {'ok': False, 'error': f'timeout after {timeout}s'}
+            continue
+        except Exception as e:
+            results[name] = {'ok': False, 'error': str(e)}
+            continue
+        results[name] = {'ok': True, 'latency_ms': round((time.perf_counter() - started) * 1000, 1)}
+        if details:
+            results[name].update(details)
+    return results
+
+
+def readiness():
+    """(ready, checks) pour /readyz"""
+    checks = _run_checks(getattr(settings, 'HEALTHCHECK_TIMEOUT', 1.0))
+    ready = all(check['ok'] for check in checks.values())
+    if not ready:
+        failing = {name: check['error'] for name, check in checks.items() if not check['ok']}
+        logger.warning(f"Readiness échouée: {failing}")
+    return ready, checks
+
+
+class HealthCheckMiddleware:
+    """Répondre aux sondes avant le reste de la pile de middlewares"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        path = request.path_info.rstrip('/')
+        if path == LIVENESS_PATH:
+            return self._response({'status': 'ok'}, 200)
+        if path == READINESS_PATH:
+            ready, checks = readiness()
+            return self._response(
+                {'status': 'ready' if ready else 'not_ready', 'checks': checks},
+                200 if ready else 503
+            )
+        return self.get_response(request)
+
+    @staticmethod
+    def _response(data, status):
+        response = JsonResponse(data, status=status)
+        response['Cache-Control'] = 'no-store'
+        return response
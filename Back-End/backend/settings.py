@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 import os
 from pathlib import Path
+from corsheaders.defaults import default_headers
 from decouple import config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -55,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Sondes /healthz et /readyz servies avant le reste de la pile
+    "backend.health.HealthCheckMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -64,8 +67,13 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    # Rejoue la première réponse des POST/PUT/PATCH/DELETE portant un Idempotency-Key
+    "accounts.idempotency.IdempotencyMiddleware",
 ]
 
+# Timeout (secondes) de chaque vérification de /readyz
+HEALTHCHECK_TIMEOUT = config("HEALTHCHECK_TIMEOUT", default=1.0, cast=float)
+
 ROOT_URLCONF = "backend.urls"
 
 TEMPLATES = [
@@ -142,6 +150,30 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Index vectoriels "produits similaires" (construits par `manage.py build_product_vectors`)
+PRODUCT_VECTORS_DIR = config("PRODUCT_VECTORS_DIR", default=str(BASE_DIR / "vector_index"))
+# Âge minimal (secondes) avant suppression d'une génération plus ancienne que la précédente
+PRODUCT_VECTORS_RETENTION_SECONDS = config("PRODUCT_VECTORS_RETENTION_SECONDS", default=24 * 3600, cast=int)
+
+# Snapshot en mémoire du catalogue servi par /api/products/
+CATALOGUE_SNAPSHOT_CHECK_INTERVAL = config("CATALOGUE_SNAPSHOT_CHECK_INTERVAL", default=5, cast=float)
+CATALOGUE_SNAPSHOT_MAX_AGE = config("CATALOGUE_SNAPSHOT_MAX_AGE", default=600, cast=float)
+
+# Webhook de fin de DAG run Airflow (signature HMAC-SHA256 du corps)
+AIRFLOW_WEBHOOK_SECRET = config("AIRFLOW_WEBHOOK_SECRET", default="")
+AIRFLOW_WEBHOOK_TOLERANCE = config("AIRFLOW_WEBHOOK_TOLERANCE", default=300, cast=int)
+
+# Déclenchement groupé des scrapers (/api/airflow/scrapers/trigger-all/)
+SCRAPER_BATCH_MAX_CONCURRENCY = config("SCRAPER_BATCH_MAX_CONCURRENCY", default=2, cast=int)
+SCRAPER_BATCH_STAGGER_SECONDS = config("SCRAPER_BATCH_STAGGER_SECONDS", default=60, cast=int)
+# Échéance d'un batch: les scrapers non terminés passé ce délai sont marqués en échec
+SCRAPER_BATCH_TIMEOUT_SECONDS = config("SCRAPER_BATCH_TIMEOUT_SECONDS", default=6 * 3600, cast=int)
+
+# Pool psycopg3 async des vues /api/airflow/async/ (un pool par worker ASGI, ouvert par le lifespan)
+ASYNC_DB_POOL_MIN_SIZE = config("ASYNC_DB_POOL_MIN_SIZE", default=2, cast=int)
+ASYNC_DB_POOL_MAX_SIZE = config("ASYNC_DB_POOL_MAX_SIZE", default=10, cast=int)
+ASYNC_DB_POOL_TIMEOUT = config("ASYNC_DB_POOL_TIMEOUT", default=10, cast=float)
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -162,11 +194,31 @@ CSRF_TRUSTED_ORIGINS = [
 ]
 
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+CORS_EXPOSE_HEADERS = ["Idempotent-Replayed", "Retry-After"]
+
+# Idempotency-Key (accounts.idempotency): durée de conservation des réponses,
+# attente maximale d'un doublon concurrent, délai avant reprise d'une exécution abandonnée
+IDEMPOTENCY_TTL = config("IDEMPOTENCY_TTL", default=24 * 3600, cast=int)
+IDEMPOTENCY_WAIT_TIMEOUT = config("IDEMPOTENCY_WAIT_TIMEOUT", default=10, cast=float)
+IDEMPOTENCY_LOCK_TIMEOUT = config("IDEMPOTENCY_LOCK_TIMEOUT", default=60, cast=int)
+
+# Partitions mensuelles des tables d'historique (accounts.partitioning, PostgreSQL):
+# mois créés à l'avance, âge d'archivage en mois, schéma qui reçoit les partitions détachées
+PARTITION_PREMAKE_MONTHS = config("PARTITION_PREMAKE_MONTHS", default=3, cast=int)
+PARTITION_ARCHIVE_AFTER_MONTHS = config("PARTITION_ARCHIVE_AFTER_MONTHS", default=12, cast=int)
+PARTITION_ARCHIVE_SCHEMA = config("PARTITION_ARCHIVE_SCHEMA", default="archive")
+
+# Flux order_events: les événements plus récents que ce délai (secondes) ne sont
+# pas encore servis, le temps que les transactions qui ont pris un id plus petit
+# aient commité (les ids sont attribués à l'INSERT, pas au commit)
+ORDER_EVENTS_COMMIT_LAG = config("ORDER_EVENTS_COMMIT_LAG", default=5, cast=float)
 
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # JWTAuthentication + request.driver depuis les claims role/driver_id
+        "accounts.authentication.RoleJWTAuthentication",
     ),
 }
 
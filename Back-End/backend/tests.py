@@ -0,0 +1,62 @@
+import threading
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from . import health
+
+
+@override_settings(HEALTHCHECK_TIMEOUT=0.2)
+class HealthCheckTests(TestCase):
+    """Tests des sondes /healthz et /readyz"""
+
+    def setUp(self):
+        patcher = patch.object(health, 'check_catalogue_db', return_value={'pool': 'Pool size: 5'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_liveness_skips_the_middleware_stack(self):
+        """Test /healthz sans I/O, sans session ni cookie CSRF"""
+        with self.assertNumQueries(0):
+            response = self.client.get('/healthz', HTTP_HOST='10.0.0.12:8000')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+        self.assertNotIn('Set-Cookie', response)
+
+    def test_readiness_reports_each_check(self):
+        """Test /readyz quand toutes les vérifications passent"""
+        response = self.client.get('/readyz/')
+
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(set(checks), {'database', 'catalogue_db', 'cache'})
+        self.assertTrue(all(check['ok'] for check in checks.values()))
+        self.assertEqual(checks['catalogue_db']['pool'], 'Pool size: 5')
+
+    def test_readiness_fails_fast_on_hung_dependency(self):
+        """Test le 503 avec la raison quand une dépendance ne répond pas"""
+        release = threading.Event()
+        # Débloquer puis attendre la vérification en cours avant le test suivant
+        self.addCleanup(lambda: [future.result() for future in list(health._inflight.values())])
+        self.addCleanup(release.set)
+
+        with patch.object(health, 'check_cache', side_effect=lambda: release.wait(5)):
+            response = self.client.get('/readyz')
+            # La vérification bloquée n'est pas relancée à la sonde suivante
+            second = self.client.get('/readyz')
+
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertEqual(body['status'], 'not_ready')
+        self.assertIn('timeout', body['checks']['cache']['error'])
+        self.assertTrue(body['checks']['database']['ok'])
+        self.assertEqual(second.json()['checks']['cache']['error'], 'previous check still running')
+
+    def test_database_check_closes_its_connection(self):
+        """Test que la vérification de la base ne laisse pas de connexion ouverte dans le thread readyz"""
+        with patch.object(health, 'connection') as connection:
+            health.check_database()
+
+        connection.cursor.return_value.__enter__.return_value.execute.assert_called_once_with('SELECT 1')
+        connection.close.assert_called_once_with()
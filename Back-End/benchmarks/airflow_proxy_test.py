@@ -0,0 +1,64 @@
+"""
+Test de charge des endpoints proxy Airflow contre le faux serveur Airflow
+
+Démarre airflow_integration.fake_airflow (latence et erreurs injectables) puis
+martèle les endpoints /api/airflow/... d'un backend configuré pour lui:
+    AIRFLOW_API_URL=http://127.0.0.1:8080 python manage.py runserver   # ou gunicorn
+    python benchmarks/airflow_proxy_test.py --airflow-port 8080 --latency 0.2 --error-rate 0.05
+
+Pour chaque scénario: débit, latences p50/p95, erreurs, et nombre d'appels
+reçus par Airflow pour 100 requêtes (effet du cache et du circuit breaker).
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from airflow_integration.fake_airflow import FakeAirflow  # noqa: E402
+from load_test import report, run  # noqa: E402
+
+SCENARIOS = [
+    'health/',
+    'dags/',
+    'dags/mytek_scraper_dag/runs/',
+    'scrapers/mytek/status/',
+    'scrapers/status/',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--airflow-port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.1, help="Latence d'Airflow (secondes)")
+    parser.add_argument('--jitter', type=float, default=0.05)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--runs-per-dag', type=int, default=30)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip('/')
+    with FakeAirflow(
+        runs_per_dag=args.runs_per_dag,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        port=args.airflow_port,
+        seed=0,
+    ) as airflow:
+        print(f"Faux Airflow sur {airflow.url} (latence {args.latency}s, erreurs {args.error_rate:.0%})\n")
+        for scenario in SCENARIOS:
+            before = airflow.request_count()
+            latencies, errors = run(f"{base}/api/airflow/{scenario}", args.concurrency, args.duration)
+            report(f"/api/airflow/{scenario}", latencies, errors, args.duration)
+            served = len(latencies) + errors
+            if served:
+                upstream = airflow.request_count() - before
+                print(f"{'':<55} {upstream * 100 / served:.1f} appels Airflow / 100 requêtes\n")
+
+
+if __name__ == '__main__':
+    main()
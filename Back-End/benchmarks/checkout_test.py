@@ -0,0 +1,89 @@
+"""
+Benchmark du checkout (POST /api/auth/orders/) pour des paniers de 1, 10 et 100 articles
+
+Crée de vraies commandes: à lancer sur une base de développement, avec un
+compte client de test:
+    python benchmarks/checkout_test.py --base-url http://localhost:8000 \\
+        --email client@example.com --password secret --iterations 50
+
+Les produits (et leurs prix courants) sont pris dans /api/products/.
+"""
+
+import argparse
+import statistics
+import time
+
+import requests
+
+CART_SIZES = (1, 10, 100)
+
+
+def login(session, base_url, email, password):
+    response = session.post(f"{base_url}/api/auth/login/", json={'email': email, 'password': password}, timeout=10)
+    response.raise_for_status()
+    session.headers['Authorization'] = f"Bearer {response.json()['tokens']['access']}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--iterations', type=int, default=30)
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip('/')
+    session = requests.Session()
+    login(session, base, args.email, args.password)
+
+    products = session.get(f"{base}/api/products/", params={'limit': max(CART_SIZES)}, timeout=30).json()['results']
+    products = [product for product in products if product.get('current_price') is not None]
+    if len(products) < max(CART_SIZES):
+        raise SystemExit(f"{max(CART_SIZES)} produits avec prix nécessaires, {len(products)} trouvés")
+
+    failed = False
+    for size in CART_SIZES:
+        cart = [
+            {
+                'id': p['id'], 'product_id': p['id'], 'name': p['name'], 'store': p['store_name'],
+                'price': p['current_price'], 'quantity': 1,
+            }
+            for p in products[:size]
+        ]
+        payload = {
+            'cart_items': cart,
+            'shipping_address': 'Benchmark',
+            'shipping_city': 'Tunis',
+            'shipping_postal_code': '1000',
+        }
+        latencies = []
+        errors = 0
+        first_error = None
+        for _ in range(args.iterations):
+            start = time.perf_counter()
+            response = session.post(f"{base}/api/auth/orders/", json=payload, timeout=30)
+            if response.status_code != 201:
+                errors += 1
+                if first_error is None:
+                    first_error = f"HTTP {response.status_code}: {response.text[:500]}"
+                continue
+            latencies.append(time.perf_counter() - start)
+
+        if not latencies:
+            print(f"{size:>4} articles  aucune commande créée ({errors} erreurs)")
+            print(f"      première erreur: {first_error}")
+            failed = True
+            continue
+        latencies.sort()
+        p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+        print(
+            f"{size:>4} articles  p50={statistics.median(latencies) * 1000:7.1f}ms  "
+            f"p95={p95 * 1000:7.1f}ms  erreurs={errors}"
+        )
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Test de charge: endpoints agrégés sync (WSGI) vs async (ASGI)
+
+Lancer le backend dans les deux modes sur le même pod/machine, par exemple:
+    SERVER_MODE=wsgi ./entrypoint.sh   # ou: gunicorn backend.wsgi:application -w 3 --threads 2
+    SERVER_MODE=asgi ./entrypoint.sh   # ou: gunicorn backend.asgi:application -w 3 -k uvicorn.workers.UvicornWorker
+
+puis:
+    python benchmarks/load_test.py --base-url http://localhost:8000 --concurrency 32 --duration 30
+
+Chaque scénario compare /api/airflow/<path> et /api/airflow/async/<path>.
+Lancer aussi contre le mode déployé (SERVER_MODE de backend-configmap.yaml):
+la colonne "chemin" reprend l'en-tête X-Catalogue-Backend des réponses async
+('async-pool' sous ASGI avec lifespan, 'sync' sous WSGI).
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+SCENARIOS = [
+    'products/stats/',
+    'products/store/mytek/stats/',
+    'products/?limit=20',
+]
+
+
+def run(url, concurrency, duration):
+    """Marteler une URL pendant `duration` secondes; retourne (latences, erreurs, chemins servis)"""
+    latencies = []
+    errors = [0]
+    backends = set()
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker():
+        session = requests.Session()
+        local = []
+        local_errors = 0
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                if response.status_code != 200:
+                    local_errors += 1
+                    continue
+                backend = response.headers.get('X-Catalogue-Backend')
+                if backend:
+                    backends.add(backend)
+            except requests.RequestException:
+                local_errors += 1
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], backends
+
+
+def report(label, latencies, errors, backends, duration):
+    if not latencies:
+        print(f"{label:<55} aucune réponse valide ({errors} erreurs)")
+        return 0.0
+    latencies.sort()
+    rps = len(latencies) / duration
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<55} {rps:8.1f} req/s  p50={statistics.median(latencies) * 1000:7.1f}ms  "
+        f"p95={p95 * 1000:7.1f}ms  erreurs={errors}"
+        + (f"  chemin={'/'.join(sorted(backends))}" if backends else "")
+    )
+    return rps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--sync-base-url', help="URL du backend WSGI si différente de --base-url")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=20)
+    args = parser.parse_args()
+
+    sync_base = (args.sync_base_url or args.base_url).rstrip('/')
+    async_base = args.base_url.rstrip('/')
+
+    for scenario in SCENARIOS:
+        sync_rps = report(
+            f"sync  /api/airflow/{scenario}",
+            *run(f"{sync_base}/api/airflow/{scenario}", args.concurrency, args.duration),
+            args.duration
+        )
+        async_rps = report(
+            f"async /api/airflow/async/{scenario}",
+            *run(f"{async_base}/api/airflow/async/{scenario}", args.concurrency, args.duration),
+            args.duration
+        )
+        if sync_rps:
+            print(f"{'':<55} x{async_rps / sync_rps:.2f}\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,6 +9,15 @@ done
 
 python manage.py collectstatic --noinput
 
+# SERVER_MODE=asgi: workers uvicorn (vues async /api/airflow/async/ + pool psycopg3)
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  exec gunicorn backend.asgi:application \
+    --worker-class uvicorn.workers.UvicornWorker \
+    --bind 0.0.0.0:8000 \
+    --workers "${GUNICORN_WORKERS:-3}" \
+    --timeout "${GUNICORN_TIMEOUT:-120}"
+fi
+
 exec gunicorn backend.wsgi:application \
   --bind 0.0.0.0:8000 \
   --workers "${GUNICORN_WORKERS:-3}" \
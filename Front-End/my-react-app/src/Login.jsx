@@ -68,27 +68,18 @@ export default function Login() {
         headers: { "Content-Type": "application/json" },
       });
 
-      const { tokens } = res.data || {};
+      const { tokens, user } = res.data || {};
       if (tokens) {
         localStorage.setItem("access_token", tokens.access);
         localStorage.setItem("refresh_token", tokens.refresh);
 
-        // Vérifier si l'utilisateur est un driver
-        try {
-          const driverRes = await axios.get(`${API_BASE}/api/auth/driver/dashboard/`, {
-            headers: { "Authorization": `Bearer ${tokens.access}` }
-          });
-
-          if (driverRes.data && driverRes.data.driver) {
-            // C'est un driver, rediriger vers driver-dashboard
-            setMsg("✓ Connexion réussie (Driver)...");
-            setTimeout(() => {
-              navigate('/driver-dashboard');
-            }, 1500);
-            return;
-          }
-        } catch (err) {
-          // Pas un driver, continuer vers le dashboard client
+        // Le rôle est renvoyé par le login (et porté par le token)
+        if (user?.role === 'driver') {
+          setMsg("✓ Connexion réussie (Driver)...");
+          setTimeout(() => {
+            navigate('/driver-dashboard');
+          }, 1500);
+          return;
         }
       }
 
@@ -155,28 +146,19 @@ export default function Login() {
           { headers: { "Content-Type": "application/json" } }
         );
 
-        const { tokens } = res.data || {};
+        const { tokens, user } = res.data || {};
         if (tokens) {
           localStorage.setItem("access_token", tokens.access);
           localStorage.setItem("refresh_token", tokens.refresh);
 
-          // Vérifier si l'utilisateur est un driver
-          try {
-            const driverRes = await axios.get(`${API_BASE}/api/auth/driver/dashboard/`, {
-              headers: { "Authorization": `Bearer ${tokens.access}` }
-            });
-
-            if (driverRes.data && driverRes.data.driver) {
-              // C'est un driver, rediriger vers driver-dashboard
-              setMsg("✓ Connexion par reconnaissance faciale réussie (Driver)!");
-              stopCamera();
-              setTimeout(() => {
-                navigate('/driver-dashboard');
-              }, 1500);
-              return;
-            }
-          } catch (err) {
-            // Pas un driver, continuer vers le dashboard client
+          // Le rôle est renvoyé par le login (et porté par le token)
+          if (user?.role === 'driver') {
+            setMsg("✓ Connexion par reconnaissance faciale réussie (Driver)!");
+            stopCamera();
+            setTimeout(() => {
+              navigate('/driver-dashboard');
+            }, 1500);
+            return;
           }
 
           // Par défaut, rediriger vers le dashboard client
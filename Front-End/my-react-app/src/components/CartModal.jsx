@@ -5,8 +5,15 @@ import './CartModal.css';
 
 const CartModal = ({ isOpen, onClose }) => {
   const navigate = useNavigate();
-  const { cart, removeFromCart, updateCartQuantity, clearCart, getCartTotal } =
-    useCartFavorites();
+  const {
+    cart,
+    removeFromCart,
+    updateCartQuantity,
+    clearCart,
+    getCartTotal,
+    removedCartItems,
+    dismissRemovedCartItems,
+  } = useCartFavorites();
 
   const handleQuantityChange = (productId, store, quantity) => {
     if (quantity >= 1) {
@@ -34,6 +41,19 @@ const CartModal = ({ isOpen, onClose }) => {
         </div>
 
         <div className="cart-modal-content">
+          {removedCartItems.length > 0 && (
+            <div className="cart-stale-notice">
+              <p>
+                {removedCartItems.length} article(s) enregistré(s) avec une ancienne
+                version du site ont été retirés du panier :{' '}
+                {removedCartItems.map((item) => item.name).join(', ')}. Ajoutez-les
+                à nouveau depuis la page du produit.
+              </p>
+              <button className="cart-stale-dismiss" onClick={dismissRemovedCartItems}>
+                ✕
+              </button>
+            </div>
+          )}
           {cart.length === 0 ? (
             <div className="empty-cart">
               <i className="fas fa-shopping-cart"></i>
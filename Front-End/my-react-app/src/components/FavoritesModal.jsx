@@ -57,7 +57,8 @@ const FavoritesModal = ({ isOpen, onClose }) => {
                     <button
                       className="btn-add-to-cart"
                       onClick={() => handleAddToCart(product)}
-                      title="Ajouter au panier"
+                      disabled={!product.product_id}
+                      title={product.product_id ? "Ajouter au panier" : "Ouvrez la page du produit pour l'ajouter au panier"}
                     >
                       <i className="fas fa-shopping-cart"></i>
                     </button>
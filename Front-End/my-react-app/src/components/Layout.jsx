@@ -1,45 +1,68 @@
-import React, { useEffect } from "react";
+import React, { useEffect, useRef } from "react";
 import Header from "./Header";
 import Footer from "./Footer";
 import { useNotification } from "../context/NotificationContext";
 
 export default function Layout({ children }) {
   const { addNotification } = useNotification();
+  const syncTokenRef = useRef(null);
+  // updated_at already handled per order id (the server re-sends its overlap window)
+  const seenRef = useRef(new Map());
 
-  // Notification polling - check for order status changes every 10 seconds
+  // Notification polling - check for order status changes every 15 seconds
   useEffect(() => {
     const pollNotifications = async () => {
       try {
         const token = localStorage.getItem('access_token');
         if (!token) return; // Only poll if user is authenticated
 
-        // Try to fetch user's orders from backend
-        const response = await fetch('http://localhost:8000/api/auth/orders/', {
-          headers: {
-            'Authorization': `Bearer ${token}`,
-            'Content-Type': 'application/json'
+        // First poll: latest page + sync token; afterwards only orders changed since the token
+        const orders = [];
+        let hasMore = true;
+        while (hasMore) {
+          const query = syncTokenRef.current
+            ? `?updated_since=${encodeURIComponent(syncTokenRef.current)}`
+            : '';
+          const response = await fetch(`http://localhost:8000/api/auth/orders/${query}`, {
+            headers: {
+              'Authorization': `Bearer ${token}`,
+              'Content-Type': 'application/json'
+            }
+          });
+
+          if (response.status === 400 && syncTokenRef.current) {
+            // Token rejected: start over from a full page on the next poll
+            syncTokenRef.current = null;
+            return;
+          }
+          if (!response.ok) {
+            console.warn('Order API not available, status:', response.status);
+            return;
           }
-        });
-
-        if (!response.ok) {
-          console.warn('Order API not available, status:', response.status);
-          return;
-        }
 
-        let orders = await response.json();
+          const data = await response.json();
+          if (!Array.isArray(data.results)) {
+            console.warn('Unexpected order response format:', data);
+            return;
+          }
 
-        // Handle both array and paginated response
-        if (orders.results && Array.isArray(orders.results)) {
-          orders = orders.results;
-        } else if (!Array.isArray(orders)) {
-          console.warn('Unexpected order response format:', orders);
-          return;
+          orders.push(...data.results);
+          hasMore = Boolean(syncTokenRef.current && data.has_more);
+          if (data.sync_token) syncTokenRef.current = data.sync_token;
         }
 
-        // Check each order for status changes and send notifications
+        // Keep the latest version of each order and drop the ones already handled
+        const latest = new Map();
         orders.forEach(order => {
           if (!order.id) return; // Skip if no ID
+          const previous = latest.get(order.id);
+          if (!previous || previous.updated_at <= order.updated_at) latest.set(order.id, order);
+        });
+        const changed = [...latest.values()].filter(order => seenRef.current.get(order.id) !== order.updated_at);
+        changed.forEach(order => seenRef.current.set(order.id, order.updated_at));
 
+        // Check each order for status changes and send notifications
+        changed.forEach(order => {
           const acceptedNotified = localStorage.getItem(`notified_${order.id}_accepted`) === 'true';
           const completedNotified = localStorage.getItem(`notified_${order.id}_completed`) === 'true';
 
@@ -5,6 +5,8 @@ export const CartFavoritesContext = createContext();
 export const CartFavoritesProvider = ({ children }) => {
   const [favorites, setFavorites] = useState([]);
   const [cart, setCart] = useState([]);
+  // Lines dropped from a cart saved before offers carried product_id
+  const [removedCartItems, setRemovedCartItems] = useState([]);
 
   // Load from localStorage on mount
   useEffect(() => {
@@ -21,7 +23,11 @@ export const CartFavoritesProvider = ({ children }) => {
 
     if (savedCart) {
       try {
-        setCart(JSON.parse(savedCart));
+        // Checkout needs the store offer id (product_id): older carts only have the
+        // display id, which cannot be mapped back to an offer, so those lines are dropped
+        const savedItems = JSON.parse(savedCart);
+        setCart(savedItems.filter((item) => item.product_id));
+        setRemovedCartItems(savedItems.filter((item) => !item.product_id));
       } catch (e) {
         console.error('Error loading cart:', e);
       }
@@ -72,6 +78,9 @@ export const CartFavoritesProvider = ({ children }) => {
 
   // Add to cart
   const addToCart = useCallback((product, quantity = 1) => {
+    if (!product.product_id) {
+      return; // No store offer to order (e.g. favorite saved by an older version)
+    }
     setCart((prev) => {
       const exists = prev.find((p) => p.id === product.id && p.store === product.store);
       if (exists) {
@@ -110,6 +119,11 @@ export const CartFavoritesProvider = ({ children }) => {
     setCart([]);
   }, []);
 
+  // Dismiss the notice about dropped cart lines
+  const dismissRemovedCartItems = useCallback(() => {
+    setRemovedCartItems([]);
+  }, []);
+
   // Get cart total
   const getCartTotal = useCallback(() => {
     return cart.reduce((total, item) => {
@@ -129,6 +143,8 @@ export const CartFavoritesProvider = ({ children }) => {
     updateCartQuantity,
     clearCart,
     getCartTotal,
+    removedCartItems,
+    dismissRemovedCartItems,
   };
 
   return (
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useCartFavorites } from '../context/CartFavoritesContext';
 import './Checkout.css';
@@ -21,6 +21,8 @@ export default function Checkout() {
   });
 
   const [orderData, setOrderData] = useState(null);
+  // Même clé pour toutes les tentatives d'une commande: un renvoi ne crée pas de doublon
+  const idempotencyKey = useRef(null);
 
   // Address selection state
   const [addresses, setAddresses] = useState([]);
@@ -144,10 +146,14 @@ export default function Checkout() {
 
     try {
       const token = localStorage.getItem('access_token');
+      if (!idempotencyKey.current) {
+        idempotencyKey.current = crypto.randomUUID();
+      }
 
       // Prepare order items
       const orderItems = cart.map(item => ({
         id: item.id,
+        product_id: item.product_id,
         name: item.name,
         store: item.store,
         price: item.price,
@@ -159,7 +165,8 @@ export default function Checkout() {
         method: 'POST',
         headers: {
           'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
+          'Content-Type': 'application/json',
+          'Idempotency-Key': idempotencyKey.current
         },
         body: JSON.stringify({
           cart_items: orderItems,
@@ -172,11 +179,20 @@ export default function Checkout() {
 
       if (response.ok) {
         const order = await response.json();
+        idempotencyKey.current = null;
         setOrderData(order);
         clearCart();
         setStep(3);
       } else {
-        const errorData = await response.json();
+        // 409 + Retry-After (même requête encore en cours) ou 5xx: la commande a pu
+        // être créée, une nouvelle tentative doit réutiliser la même clé.
+        // Les autres 4xx sont définitifs: une nouvelle tentative est une nouvelle requête
+        const retryable = response.status >= 500
+          || (response.status === 409 && response.headers.has('Retry-After'));
+        if (!retryable) {
+          idempotencyKey.current = null;
+        }
+        const errorData = await response.json().catch(() => ({}));
         setError(errorData.error || 'Erreur lors de la création de la commande');
       }
     } catch (err) {
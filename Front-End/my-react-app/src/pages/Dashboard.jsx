@@ -24,6 +24,8 @@ export default function Dashboard() {
   const [editedInfo, setEditedInfo] = useState(userInfo);
   const [newInterest, setNewInterest] = useState('');
   const [orders, setOrders] = useState([]);
+  const [ordersCursor, setOrdersCursor] = useState(null);
+  const [loadingMoreOrders, setLoadingMoreOrders] = useState(false);
   const [addresses, setAddresses] = useState([]);
   const [showAddAddressForm, setShowAddAddressForm] = useState(false);
   const [newAddress, setNewAddress] = useState({
@@ -102,7 +104,8 @@ export default function Dashboard() {
           if (ordersResponse.ok) {
             const ordersData = await ordersResponse.json();
             console.log('Orders loaded:', ordersData);
-            setOrders(ordersData);
+            setOrders(ordersData.results);
+            setOrdersCursor(ordersData.next_cursor);
           } else {
             console.log('Orders API error:', ordersResponse.status);
           }
@@ -137,6 +140,35 @@ export default function Dashboard() {
     fetchUserData();
   }, [navigate]);
 
+  // Page suivante de l'historique (pagination par curseur)
+  const loadMoreOrders = async () => {
+    if (!ordersCursor) return;
+    setLoadingMoreOrders(true);
+    try {
+      const token = localStorage.getItem('access_token');
+      const response = await fetch(
+        `http://localhost:8000/api/auth/orders/?cursor=${encodeURIComponent(ordersCursor)}`,
+        {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        }
+      );
+      if (response.ok) {
+        const data = await response.json();
+        setOrders(prev => [...prev, ...data.results]);
+        setOrdersCursor(data.next_cursor);
+      } else {
+        console.log('Orders API error:', response.status);
+      }
+    } catch (err) {
+      console.error('Orders API error:', err);
+    } finally {
+      setLoadingMoreOrders(false);
+    }
+  };
+
   const handleSaveProfile = async () => {
     try {
       const token = localStorage.getItem('access_token');
@@ -778,6 +810,13 @@ export default function Dashboard() {
                   </div>
                 )}
               </div>
+              {ordersCursor && (
+                <div style={{ textAlign: 'center', marginTop: '20px' }}>
+                  <button className="add-btn" onClick={loadMoreOrders} disabled={loadingMoreOrders}>
+                    {loadingMoreOrders ? 'Chargement...' : 'Voir plus de commandes'}
+                  </button>
+                </div>
+              )}
             </div>
           )}
 
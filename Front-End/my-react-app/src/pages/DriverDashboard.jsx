@@ -11,6 +11,7 @@ const DriverDashboard = () => {
   const { addNotification, fetchNotifications } = useNotification();
   const [driverProfile, setDriverProfile] = useState(null);
   const [orders, setOrders] = useState([]);
+  const [completedCount, setCompletedCount] = useState(0);
   const [selectedOrder, setSelectedOrder] = useState(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState('assigned'); // assigned, accepted, completed
@@ -47,9 +48,21 @@ const DriverDashboard = () => {
 
       const data = await response.json();
       setDriverProfile(data.driver);
-      setOrders(data.assignments || []);
-      if (data.assignments && data.assignments.length > 0) {
-        setSelectedOrder(data.assignments[0]);
+
+      // Le dashboard ne renvoie que les assignations actives: les dernières livrées sont chargées à part
+      const completedResponse = await fetch('http://localhost:8000/api/auth/driver/dashboard/?status=completed', {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        }
+      });
+      const completed = completedResponse.ok ? await completedResponse.json() : { assignments: [], count: 0 };
+      setCompletedCount(completed.count || 0);
+
+      const assignments = [...(data.assignments || []), ...(completed.assignments || [])];
+      setOrders(assignments);
+      if (assignments.length > 0) {
+        setSelectedOrder(assignments[0]);
       }
     } catch (error) {
       console.error('Error fetching driver data:', error);
@@ -270,7 +283,7 @@ const DriverDashboard = () => {
                 className={`quick-tab ${activeTab === 'completed' ? 'active' : ''}`}
                 onClick={() => setActiveTab('completed')}
               >
-                Livrées ({orders.filter(o => o.status === 'completed').length})
+                Livrées ({completedCount})
               </button>
             </div>
           </div>
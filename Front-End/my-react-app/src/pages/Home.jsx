@@ -106,6 +106,7 @@ export default function Home() {
               // Transform API response to match component's expected format
               const transformedProducts = storeProducts.map(p => ({
                 id: p.id,
+                product_id: p.id,
                 name: p.name,
                 category: p.category || 'Sans catégorie',
                 price: p.current_price || 0,
@@ -235,6 +235,7 @@ export default function ProductDetail() {
                 : "unavailable";
               const favoritePayload = {
                 id: offerId,
+                product_id: offer.product_id,
                 name: offer.name || product.canonical_name,
                 price: offer.current_price || 0,
                 prev_price: offer.prev_price,
@@ -283,6 +284,7 @@ export default function ProductDetail() {
                     <div className="product-actions">
                       <button
                         className={`btn-add-to-cart ${cartPulse[offerId] ? "pulse" : ""}`}
+                        disabled={!offer.product_id}
                         onClick={(e) => {
                           e.stopPropagation();
                           addToCart(favoritePayload);
@@ -68,6 +68,8 @@ export default function Products() {
 
           const item = {
             id: p.id,
+            // Store offer actually ordered (products.id); p.id is the canonical product
+            product_id: bestOffer?.product_id,
             name: p.canonical_name || "",
             description,
             category: p.canonical_category || "Sans categorie",
@@ -337,6 +339,7 @@ export default function Products() {
                   <div className="product-actions">
                     <button
                       className="btn-add-to-cart"
+                      disabled={!product.product_id}
                       onClick={(e) => handleAddToCart(e, product)}
                     >
                       <i className="fas fa-shopping-cart"></i> Ajouter
@@ -12,6 +12,10 @@ fi
 : "${BACKEND_IMAGE:?Set BACKEND_IMAGE to your pushed backend image (e.g., docker.io/youruser/tuni-backend:tag)}"
 : "${FRONTEND_IMAGE:?Set FRONTEND_IMAGE to your pushed frontend image (e.g., docker.io/youruser/tuni-frontend:tag)}"
 
+# Optional: a ReadWriteMany storage class (e.g., nfs-client) enables the product similarity index.
+# Without it the backend mounts an empty directory and the similar-products endpoints return 503.
+VECTORS_STORAGE_CLASS="${VECTORS_STORAGE_CLASS:-}"
+
 echo "Creating namespace ${NAMESPACE}..."
 kubectl apply -f deploy/k8s/namespace.yaml
 
@@ -26,8 +30,26 @@ kubectl delete pvc/postgres-data-postgres-0 -n "${NAMESPACE}" --ignore-not-found
 echo "Deploying Postgres (StatefulSet)..."
 kubectl apply -f deploy/k8s/postgres.yaml
 
+if [[ -n "${VECTORS_STORAGE_CLASS}" ]]; then
+  echo "Deploying product similarity index (PVC + nightly CronJob)..."
+  BACKEND_IMAGE="${BACKEND_IMAGE}" VECTORS_STORAGE_CLASS="${VECTORS_STORAGE_CLASS}" envsubst < deploy/k8s/product-vectors.yaml | kubectl apply -f -
+  PRODUCT_VECTORS_VOLUME="persistentVolumeClaim: {claimName: product-vectors}"
+else
+  echo "VECTORS_STORAGE_CLASS not set: skipping the product similarity index (endpoints will return 503)."
+  PRODUCT_VECTORS_VOLUME="emptyDir: {}"
+fi
+
 echo "Deploying backend..."
-BACKEND_IMAGE="${BACKEND_IMAGE}" envsubst < deploy/k8s/backend.yaml | kubectl apply -f -
+BACKEND_IMAGE="${BACKEND_IMAGE}" PRODUCT_VECTORS_VOLUME="${PRODUCT_VECTORS_VOLUME}" envsubst < deploy/k8s/backend.yaml | kubectl apply -f -
+
+echo "Deploying scraper runs sync and batch scheduler (CronJobs)..."
+BACKEND_IMAGE="${BACKEND_IMAGE}" envsubst < deploy/k8s/scraper-runs-sync.yaml | kubectl apply -f -
+
+echo "Deploying sales_daily rollup refresh (CronJob)..."
+BACKEND_IMAGE="${BACKEND_IMAGE}" envsubst < deploy/k8s/sales-rollup.yaml | kubectl apply -f -
+
+echo "Deploying monthly partition maintenance (CronJob)..."
+BACKEND_IMAGE="${BACKEND_IMAGE}" envsubst < deploy/k8s/partitions.yaml | kubectl apply -f -
 
 echo "Deploying frontend..."
 FRONTEND_IMAGE="${FRONTEND_IMAGE}" envsubst < deploy/k8s/frontend.yaml | kubectl apply -f -